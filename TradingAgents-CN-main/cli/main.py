@@ -36,7 +36,7 @@ from cli.utils import (
     select_shallow_thinking_agent,
 )
 from tradingagents.default_config import DEFAULT_CONFIG
-from tradingagents.graph.trading_graph import TradingAgentsGraph
+from tradingagents.graph.graph_pool import get_trading_graph
 from tradingagents.utils.logging_manager import get_logger
 
 # 加载环境变量
@@ -1074,7 +1074,7 @@ def run_analysis():
     # Initialize the graph
     ui.show_progress("正在初始化分析系统...")
     try:
-        graph = TradingAgentsGraph(
+        graph = get_trading_graph(
             [analyst.value for analyst in selections["analysts"]], config=config, debug=True
         )
         ui.show_success("分析系统初始化完成")
@@ -1,4 +1,4 @@
-from tradingagents.graph.trading_graph import TradingAgentsGraph
+from tradingagents.graph.graph_pool import get_trading_graph
 from tradingagents.default_config import DEFAULT_CONFIG
 
 # 导入日志模块
@@ -347,7 +347,7 @@ def main():
     print(f"发现 {len(tasks)} 个待处理任务")
     
     # 初始化TradingAgents
-    ta = TradingAgentsGraph(debug=True, config=config)
+    ta = get_trading_graph(config=config, debug=True)
     
     for i, task in enumerate(tasks, 1):
         record_id = task['record_id']
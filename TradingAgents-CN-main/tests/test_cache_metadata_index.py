@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+测试缓存元数据索引
+验证查找、清理、统计走SQLite索引，并能从现有 _meta.json 重建
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from tradingagents.dataflows.cache_manager import StockDataCache
+
+
+def _make_frame():
+    return pd.DataFrame({"close": [1.0, 2.0, 3.0]}, index=["2025-01-02", "2025-01-03", "2025-01-06"])
+
+
+def test_partial_match_uses_index(tmp_path):
+    """精确键不匹配时，通过索引找到同一股票的其他缓存"""
+    cache = StockDataCache(tmp_path)
+    key = cache.save_stock_data("000001", _make_frame(), "2025-01-01", "2025-01-06", "tushare")
+    cache.save_stock_data("AAPL", "aapl data", "2025-01-01", "2025-01-06", "yfinance")
+
+    assert cache.find_cached_stock_data("000001", "2025-01-01", "2025-01-06", "tushare") == key
+    # 不同的日期区间 -> 部分匹配
+    assert cache.find_cached_stock_data("000001", "2024-12-01", "2025-01-06", "tushare") == key
+    assert cache.find_cached_stock_data("000001", "2024-12-01", "2025-01-06", "akshare") is None
+    assert cache.find_cached_stock_data("600000") is None
+
+    fundamentals_key = cache.save_fundamentals_data("000001", "基本面报告", "openai")
+    assert cache.find_cached_fundamentals_data("000001", "openai") == fundamentals_key
+    assert cache.find_cached_fundamentals_data("000001", "finnhub") is None
+
+
+def test_index_rebuilt_from_meta_files(tmp_path):
+    """删除索引文件后，重新初始化会从 _meta.json 重建"""
+    cache = StockDataCache(tmp_path)
+    key = cache.save_stock_data("AAPL", "aapl data", "2025-01-01", "2025-01-06", "yfinance")
+    cache.save_news_data("AAPL", "news", "2025-01-01", "2025-01-06", "finnhub")
+    cache.metadata_index._conn.close()
+    cache.metadata_index.db_path.unlink()
+
+    rebuilt = StockDataCache(tmp_path)
+    assert [m["cache_key"] for m in rebuilt.query_metadata(symbol="AAPL", data_type="stock_data")] == [key]
+    stats = rebuilt.get_cache_stats()
+    assert stats["total_files"] == 2
+    assert stats["stock_data_count"] == 1
+    assert stats["news_count"] == 1
+
+
+def test_clear_old_cache_by_index(tmp_path):
+    """过期清理只处理索引中 cached_at 早于截止时间的记录"""
+    cache = StockDataCache(tmp_path)
+    old_key = cache.save_stock_data("AAPL", "old data", "2024-01-01", "2024-01-06", "yfinance")
+    new_key = cache.save_stock_data("AAPL", "new data", "2025-01-01", "2025-01-06", "yfinance")
+
+    # 手动把一条记录改成10天前缓存
+    meta_path = cache._get_metadata_path(old_key)
+    metadata = json.loads(meta_path.read_text(encoding="utf-8"))
+    metadata["cached_at"] = (datetime.now() - timedelta(days=10)).isoformat()
+    meta_path.write_text(json.dumps(metadata), encoding="utf-8")
+    cache.metadata_index.upsert(old_key, metadata)
+    old_file = metadata["file_path"]
+
+    cache.clear_old_cache(max_age_days=7)
+
+    assert not meta_path.exists()
+    assert not os.path.exists(old_file)
+    assert [m["cache_key"] for m in cache.query_metadata(symbol="AAPL")] == [new_key]
+    assert cache.get_cache_stats()["stock_data_count"] == 1
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+测试增量二进制断点存储
+验证只追加变化的状态键、合并加载、尾部损坏容错、压缩以及节点级断点续传
+"""
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from tradingagents.graph.setup import node_with_checkpoint
+from tradingagents.utils import checkpoints
+from tradingagents.utils.checkpoints import (
+    CheckpointStore, clear_checkpoint, get_checkpoint_path, load_checkpoint, save_checkpoint, sync_checkpoint,
+)
+
+
+@pytest.fixture(autouse=True)
+def isolated_store(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    store = CheckpointStore(fsync_every=4, compact_after=64)
+    monkeypatch.setattr(checkpoints, "_checkpoint_store", store)
+    return store
+
+
+def _base_state():
+    return {
+        "company_of_interest": "000001",
+        "trade_date": "2025-01-10",
+        "messages": [AIMessage(content="不应写入断点")],
+        "market_report": "",
+        "news_report": "",
+        "completed_nodes": [],
+    }
+
+
+def test_only_changed_keys_are_appended():
+    """每次保存只追加变化的键，文件大小随增量线性增长"""
+    state = _base_state()
+    state["market_report"] = "市场报告" * 2000
+    save_checkpoint(state, "000001", "2025-01-10")
+    path = get_checkpoint_path("000001", "2025-01-10")
+    size_after_first = path.stat().st_size
+
+    # 大报告未变化，只写入新完成的节点
+    state["completed_nodes"] = ["Market Analyst"]
+    save_checkpoint(state, "000001", "2025-01-10")
+    assert path.stat().st_size - size_after_first < 500
+
+    save_checkpoint({"news_report": "新闻报告", "completed_nodes": ["Market Analyst", "News Analyst"]},
+                    "000001", "2025-01-10")
+    sync_checkpoint("000001", "2025-01-10")
+
+    loaded = load_checkpoint("000001", "2025-01-10")
+    assert loaded["market_report"] == "市场报告" * 2000
+    assert loaded["news_report"] == "新闻报告"
+    assert loaded["completed_nodes"] == ["Market Analyst", "News Analyst"]
+    assert "messages" not in loaded
+
+
+def test_in_place_mutation_is_detected():
+    """调用方原地修改列表后再次保存仍会写入"""
+    state = _base_state()
+    save_checkpoint(state, "000001", "2025-01-10")
+    state["completed_nodes"].append("Market Analyst")
+    save_checkpoint(state, "000001", "2025-01-10")
+    sync_checkpoint("000001", "2025-01-10")
+
+    assert load_checkpoint("000001", "2025-01-10")["completed_nodes"] == ["Market Analyst"]
+
+
+def test_torn_tail_and_compaction(isolated_store):
+    """尾部不完整的记录被忽略；记录过多时原子压缩为一条"""
+    save_checkpoint({"market_report": "A"}, "000001", "2025-01-10")
+    sync_checkpoint("000001", "2025-01-10")
+    path = get_checkpoint_path("000001", "2025-01-10")
+    with open(path, "ab") as f:
+        f.write(b"\x50\x00\x00\x00partial")
+
+    assert load_checkpoint("000001", "2025-01-10")["market_report"] == "A"
+
+    isolated_store.compact_after = 5
+    for i in range(10):
+        save_checkpoint({"news_report": f"新闻{i}"}, "000001", "2025-01-10")
+    sync_checkpoint("000001", "2025-01-10")
+
+    _, count, _ = isolated_store._read_records(path.resolve())
+    assert count < 6
+    assert load_checkpoint("000001", "2025-01-10")["news_report"] == "新闻9"
+
+    clear_checkpoint("000001", "2025-01-10")
+    assert load_checkpoint("000001", "2025-01-10") is None
+
+
+def test_node_resume_semantics():
+    """节点完成后写入断点，恢复后已完成节点被跳过"""
+    calls = []
+
+    def market_node(state):
+        calls.append("market")
+        return {"messages": [AIMessage(content="报告")], "market_report": "市场报告"}
+
+    wrapped = node_with_checkpoint("Market Analyst", market_node)
+    state = _base_state()
+    wrapped(state)
+    sync_checkpoint("000001", "2025-01-10")
+
+    restored = dict(_base_state())
+    restored.update(load_checkpoint("000001", "2025-01-10"))
+    assert restored["market_report"] == "市场报告"
+    assert restored["completed_nodes"] == ["Market Analyst"]
+
+    assert wrapped(restored) == {}
+    assert calls == ["market"]
+
+
+def test_parallel_branches_keep_each_others_progress():
+    """并行分析师同时完成时，后保存的分支不会抹掉先保存分支的已完成节点"""
+    import threading
+
+    barrier = threading.Barrier(2, timeout=5)
+
+    def analyst(report_key):
+        def node(state):
+            barrier.wait()
+            return {"messages": [AIMessage(content=report_key)], report_key: "报告"}
+        return node
+
+    # 两个分支看到的是同一份扇出前的状态
+    state = _base_state()
+    state["completed_nodes"] = ["Msg Clear"]
+    branches = [node_with_checkpoint("Market Analyst", analyst("market_report")),
+                node_with_checkpoint("News Analyst", analyst("news_report"))]
+    threads = [threading.Thread(target=branch, args=(state,)) for branch in branches]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    sync_checkpoint("000001", "2025-01-10")
+
+    loaded = load_checkpoint("000001", "2025-01-10")
+    assert sorted(loaded["completed_nodes"]) == ["Market Analyst", "Msg Clear", "News Analyst"]
+    assert loaded["market_report"] == loaded["news_report"] == "报告"
+
+    # 较旧的列表不会缩小已保存的进度
+    save_checkpoint({"completed_nodes": ["Msg Clear"]}, "000001", "2025-01-10")
+    assert len(load_checkpoint("000001", "2025-01-10")["completed_nodes"]) == 3
+
+
+def test_failed_node_keeps_saved_progress():
+    """节点失败后断点保留已完成节点的报告，初始状态中的空值也不会覆盖它们"""
+    def news_node(state):
+        raise RuntimeError("LLM超时")
+
+    state = _base_state()
+    node_with_checkpoint("Market Analyst", lambda s: {"market_report": "市场报告"})(state)
+    with pytest.raises(RuntimeError):
+        node_with_checkpoint("News Analyst", news_node)(state)
+    save_checkpoint(_base_state(), "000001", "2025-01-10")
+    sync_checkpoint("000001", "2025-01-10")
+
+    loaded = load_checkpoint("000001", "2025-01-10")
+    assert loaded["market_report"] == "市场报告"
+    assert loaded["completed_nodes"] == ["Market Analyst"]
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+测试进程级数据库连接注册表
+验证相同参数共享客户端、健康检查间隔、失败后的重试间隔与惰性重连
+"""
+
+import pytest
+import redis
+
+from tradingagents.config.connection_registry import ConnectionRegistry
+
+
+@pytest.fixture
+def redis_up(monkeypatch):
+    """模拟Redis服务状态：ping 按开关成功或抛出连接错误"""
+    state = {"up": True, "pings": 0}
+
+    def fake_ping(self, **kwargs):
+        state["pings"] += 1
+        if not state["up"]:
+            raise redis.ConnectionError("connection refused")
+        return True
+
+    monkeypatch.setattr(redis.Redis, "ping", fake_ping)
+    return state
+
+
+def test_same_parameters_share_one_pooled_client(redis_up):
+    """相同连接参数返回同一个客户端，健康检查间隔内不再ping"""
+    registry = ConnectionRegistry(health_check_interval=60, retry_interval=60)
+    first = registry.get_redis(host="cache", port=6379, db=0, decode_responses=True)
+    second = registry.get_redis(host="cache", port=6379, db=0, decode_responses=True)
+    other_db = registry.get_redis(host="cache", port=6379, db=1, decode_responses=True)
+
+    assert first is second
+    assert other_db is not first
+    assert first.connection_pool.max_connections == registry.redis_max_connections
+    assert registry.stats["created"] == 2
+    assert redis_up["pings"] == 2
+
+
+def test_unavailable_server_backs_off_then_reconnects(redis_up):
+    """连接失败后在重试间隔内直接返回None，恢复后复用原客户端"""
+    registry = ConnectionRegistry(health_check_interval=60, retry_interval=60)
+    redis_up["up"] = False
+
+    assert registry.get_redis(host="cache") is None
+    assert registry.get_redis(host="cache") is None
+    assert redis_up["pings"] == 1
+
+    # 重试间隔到期后惰性重连
+    registry.retry_interval = 0
+    redis_up["up"] = True
+    client = registry.get_redis(host="cache")
+    assert client is not None
+    assert registry.stats["reconnects"] == 1
+    assert registry.get_status()["connections"][0]["healthy"] is True
+
+
+def test_health_check_detects_outage(redis_up):
+    """健康检查间隔到期时发现服务中断，返回None直到恢复"""
+    registry = ConnectionRegistry(health_check_interval=0, retry_interval=0)
+    client = registry.get_redis(host="cache")
+    assert client is not None
+
+    redis_up["up"] = False
+    assert registry.get_redis(host="cache") is None
+
+    redis_up["up"] = True
+    assert registry.get_redis(host="cache") is client
+    assert registry.stats["created"] == 1
+
+
+def test_generic_factory_errors_are_contained():
+    """客户端创建失败时返回None且不缓存半成品客户端"""
+    registry = ConnectionRegistry(retry_interval=0)
+    calls = []
+
+    def factory():
+        calls.append(1)
+        raise RuntimeError("bad uri")
+
+    assert registry._get(("mongodb", "bad"), factory, lambda client: None, "MongoDB") is None
+    assert registry._get(("mongodb", "bad"), factory, lambda client: None, "MongoDB") is None
+    assert len(calls) == 2
+    assert registry.stats["failures"] == 2
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+测试图启动时的数据预取
+验证工具调用复用预取结果、参数规范化、进行中/排队任务的处理、预取失败回退，
+以及 propagate 的预取计划（断点中已完成的分析师不再预取）
+"""
+
+import threading
+import time
+
+import pytest
+
+from tradingagents.agents.utils.agent_utils import UNIFIED_DATA_START_DATE, Toolkit
+from tradingagents.dataflows import interface
+from tradingagents.dataflows.data_context import (
+    DataContext, context_cached, get_data_context, use_data_context,
+)
+from tradingagents.graph.trading_graph import TradingAgentsGraph
+from tradingagents.utils import checkpoints
+
+
+def counting(name="fetch", delay=0.0, fail=False):
+    calls = []
+
+    @context_cached(name)
+    def fetch(ticker, days=30):
+        calls.append((ticker, days))
+        time.sleep(delay)
+        if fail:
+            raise ConnectionError("network down")
+        return f"{ticker}:{days}:{len(calls)}"
+
+    return fetch, calls
+
+
+def test_tool_call_reuses_prefetched_result():
+    fetch, calls = counting()
+    context = DataContext("AAPL", "2025-06-30")
+    try:
+        context.prefetch(fetch, ticker="AAPL").result(5)
+        with use_data_context(context):
+            # 位置参数、显式默认值与预取的关键字参数是同一个键
+            assert fetch("AAPL") == "AAPL:30:1"
+            assert fetch("AAPL", days=30) == "AAPL:30:1"
+            assert fetch(ticker="AAPL", days=60) == "AAPL:60:2"
+        assert calls == [("AAPL", 30), ("AAPL", 60)]
+        assert context.get_stats()["hits"] == 2
+    finally:
+        context.close()
+
+    # 没有数据上下文时直接调用
+    assert fetch("AAPL") == "AAPL:30:3"
+
+
+def test_in_flight_and_queued_prefetches():
+    release = threading.Event()
+
+    @context_cached("slow")
+    def slow(ticker):
+        release.wait(5)
+        return f"slow:{ticker}"
+
+    fast, fast_calls = counting("fast")
+    context = DataContext("AAPL", "2025-06-30", max_workers=1)
+    try:
+        context.prefetch(slow, ticker="AAPL")
+        # 唯一的预取线程被占用，这个任务还在排队
+        context.prefetch(fast, ticker="AAPL")
+        with use_data_context(context):
+            assert fast("AAPL") == "AAPL:30:1"
+            threading.Timer(0.05, release.set).start()
+            assert slow("AAPL") == "slow:AAPL"
+        stats = context.get_stats()
+        assert stats["misses"] == 1 and stats["waits"] == 1
+        assert fast_calls == [("AAPL", 30)]
+    finally:
+        context.close()
+
+
+def test_failed_prefetch_falls_back_to_direct_call():
+    attempts = []
+
+    @context_cached("flaky")
+    def flaky(ticker):
+        attempts.append(ticker)
+        if len(attempts) == 1:
+            raise ConnectionError("network down")
+        return "ok"
+
+    context = DataContext("AAPL", "2025-06-30")
+    try:
+        future = context.prefetch(flaky, ticker="AAPL")
+        with pytest.raises(ConnectionError):
+            future.result(5)
+        with use_data_context(context):
+            assert flaky("AAPL") == "ok"
+        assert context.get_stats()["prefetch_errors"] == 1
+    finally:
+        context.close()
+
+
+def test_prefetch_rejects_undecorated_function():
+    context = DataContext("AAPL", "2025-06-30")
+    with pytest.raises(ValueError):
+        context.prefetch(lambda ticker: ticker, ticker="AAPL")
+
+
+@pytest.fixture
+def us_data(monkeypatch, tmp_path):
+    # 断点目录相对当前目录，放到临时目录中
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(checkpoints, "_checkpoint_store", checkpoints.CheckpointStore())
+    calls = {"price": 0, "fundamentals": 0}
+
+    def price(ticker, start_date, end_date):
+        calls["price"] += 1
+        return f"price {ticker} {start_date}~{end_date}"
+
+    def fundamentals(ticker, curr_date):
+        calls["fundamentals"] += 1
+        return f"fundamentals {ticker} {curr_date}"
+
+    monkeypatch.setattr(interface, "get_YFin_data_online", price)
+    monkeypatch.setattr(interface, "get_fundamentals_openai", fundamentals)
+    return calls
+
+
+def test_propagate_prefetches_and_tools_resolve_from_context(us_data):
+    """propagate 开始时提交预取，分析师按提示词参数调用工具时直接取预取结果"""
+    graph = object.__new__(TradingAgentsGraph)
+    graph.config = {"online_tools": True, "data_prefetch": True}
+    graph.toolkit = Toolkit()
+    graph.selected_analysts = ["market", "fundamentals"]
+
+    results = {}
+
+    def run_graph(company_name, trade_date):
+        # 模拟LangGraph在线程池中执行工具节点（上下文变量随线程传递）
+        results["market"] = Toolkit.get_stock_market_data_unified.invoke({
+            "ticker": company_name, "start_date": UNIFIED_DATA_START_DATE, "end_date": trade_date})
+        results["fundamentals"] = Toolkit.get_stock_fundamentals_unified.invoke({
+            "ticker": company_name, "start_date": UNIFIED_DATA_START_DATE,
+            "end_date": trade_date, "curr_date": trade_date})
+        context = get_data_context()
+        results["stats"] = context.get_stats() if context is not None else None
+        return "state", "BUY"
+
+    graph._run_graph = run_graph
+    assert graph._run_analysis("AAPL", "2025-06-30") == ("state", "BUY")
+
+    assert us_data == {"price": 1, "fundamentals": 1}
+    stats = results["stats"]
+    assert stats["prefetched"] == 2 and stats["misses"] == 0
+    assert stats["hits"] + stats["waits"] == 2
+    assert f"price AAPL {UNIFIED_DATA_START_DATE}~2025-06-30" in results["market"]
+    assert "fundamentals AAPL 2025-06-30" in results["fundamentals"]
+
+    # 关闭预取后按原路径获取
+    graph.config["data_prefetch"] = False
+    graph._run_analysis("AAPL", "2025-06-30")
+    assert results["stats"] is None
+    assert us_data == {"price": 2, "fundamentals": 2}
+
+
+def test_prefetch_skips_analysts_completed_in_checkpoint(us_data):
+    """断点恢复时先读取断点，已完成分析师的数据（包括付费的新闻接口）不再预取"""
+    graph = object.__new__(TradingAgentsGraph)
+    graph.config = {"online_tools": True, "data_prefetch": True}
+    graph.toolkit = Toolkit()
+    graph.selected_analysts = ["market", "social", "fundamentals"]
+    checkpoints.save_checkpoint({"completed_nodes": ["Market Analyst", "Social Analyst"]}, "AAPL", "2025-06-30")
+
+    plan = graph._prefetch_plan("AAPL", "2025-06-30", ["Market Analyst", "Social Analyst"])
+    assert [func for func, _ in plan] == [Toolkit.get_stock_fundamentals_unified.func]
+
+    stats = {}
+
+    def run_graph(company_name, trade_date):
+        stats.update(get_data_context().get_stats())
+        return "state", "BUY"
+
+    graph._run_graph = run_graph
+    graph._run_analysis("AAPL", "2025-06-30")
+    assert stats["prefetched"] == 1
+    assert us_data["price"] == 0
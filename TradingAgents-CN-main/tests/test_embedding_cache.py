@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+测试记忆embedding缓存
+验证相同内容只请求一次embedding、add_situations批量请求以及磁盘缓存层
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from tradingagents.agents.utils.memory import EmbeddingCache, FinancialSituationMemory
+
+
+class FakeEmbeddingClient:
+    """模拟OpenAI兼容的embeddings接口，记录每次调用的输入"""
+
+    def __init__(self):
+        self.calls = []
+        self.embeddings = SimpleNamespace(create=self.create)
+
+    def create(self, model, input):
+        self.calls.append(input)
+        texts = input if isinstance(input, list) else [input]
+        data = [SimpleNamespace(index=i, embedding=[float(len(text)), 1.0, float(i + 1)])
+                for i, text in enumerate(texts)]
+        return SimpleNamespace(data=list(reversed(data)))
+
+
+@pytest.fixture(autouse=True)
+def memory_dir(monkeypatch, tmp_path):
+    monkeypatch.setenv("MEMORY_DIR", str(tmp_path / "memory"))
+
+
+@pytest.fixture
+def embedding_cache():
+    cache = EmbeddingCache()
+    cache.set_disk_dir(None)
+    cache.clear()
+    yield cache
+    cache.set_disk_dir(None)
+    cache.clear()
+
+
+def _make_memory(name, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    memory = FinancialSituationMemory(name, {"llm_provider": "openai", "backend_url": "http://localhost:1/v1"})
+    memory.client = FakeEmbeddingClient()
+    return memory
+
+
+def test_same_situation_embedded_once_across_memories(embedding_cache, monkeypatch):
+    """多个记忆实例查询同一情况时只调用一次embedding接口"""
+    bull = _make_memory("cache_test_bull", monkeypatch)
+    bear = _make_memory("cache_test_bear", monkeypatch)
+    bear.client = bull.client
+
+    situation = "市场报告\n情绪报告\n新闻报告\n基本面报告"
+    first = bull.get_embedding(situation)
+    second = bear.get_embedding(situation)
+
+    assert first == second
+    assert bull.client.calls == [situation]
+    stats = embedding_cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_add_situations_uses_one_batch_call(embedding_cache, monkeypatch):
+    """add_situations把未缓存的情况合并成一次批量调用"""
+    memory = _make_memory("cache_test_batch", monkeypatch)
+    memory.get_embedding("情况A")
+    memory.client.calls.clear()
+
+    memory.add_situations([("情况A", "建议A"), ("情况BB", "建议B"), ("情况CCC", "建议C"), ("情况BB", "建议B2")])
+
+    assert memory.client.calls == [["情况BB", "情况CCC"]]
+    assert memory.situation_collection.count() == 4
+    # 批量结果按 index 对应回原文本
+    assert memory.get_embedding("情况CCC") == [5.0, 1.0, 2.0]
+
+
+def test_disk_tier_survives_memory_eviction(embedding_cache, monkeypatch, tmp_path):
+    """内存缓存清空后仍可从磁盘缓存读取"""
+    embedding_cache.set_disk_dir(tmp_path / "embeddings")
+    memory = _make_memory("cache_test_disk", monkeypatch)
+
+    embedding = memory.get_embedding("持久化的情况")
+    embedding_cache.clear()
+    assert memory.get_embedding("持久化的情况") == embedding
+    assert len(memory.client.calls) == 1
+    assert embedding_cache.get_stats()["disk_hits"] == 1
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+测试增强新闻过滤器的共享模型与批量评分
+验证模型进程内只加载一次、整批编码、按内容哈希缓存，且评分与逐条余弦相似度一致
+"""
+
+import sys
+import types
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tradingagents.utils import enhanced_news_filter as enf
+
+
+class FakeSentenceTransformer:
+    """模拟SentenceTransformer：按字符哈希生成确定性向量"""
+
+    instances = 0
+
+    def __init__(self, model_name):
+        FakeSentenceTransformer.instances += 1
+        self.encode_calls = []
+
+    def encode(self, texts, batch_size=32):
+        self.encode_calls.append(list(texts))
+        vectors = np.zeros((len(texts), 32))
+        for i, text in enumerate(texts):
+            for ch in text:
+                vectors[i, ord(ch) % 32] += 1.0
+        return vectors
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    module = types.ModuleType("sentence_transformers")
+    module.SentenceTransformer = FakeSentenceTransformer
+    monkeypatch.setitem(sys.modules, "sentence_transformers", module)
+    monkeypatch.setattr(enf, "_models", {})
+    monkeypatch.setattr(enf, "_embedding_cache", enf.OrderedDict())
+    FakeSentenceTransformer.instances = 0
+    return module
+
+
+NEWS = pd.DataFrame([
+    {'新闻标题': '招商银行发布2024年第三季度业绩报告', '新闻内容': '招商银行今日发布第三季度财报，净利润同比增长8%'},
+    {'新闻标题': '银行ETF指数多只成分股上涨', '新闻内容': '银行板块今日表现强势，招商银行、工商银行等多只成分股上涨'},
+    {'新闻标题': '某科技公司发布新品', '新闻内容': '新品发布会'},
+])
+
+
+def test_model_loaded_once_across_filters(fake_model):
+    """不同股票的过滤器共享同一个模型实例"""
+    first = enf.EnhancedNewsFilter("600036", "招商银行")
+    second = enf.EnhancedNewsFilter("000001", "平安银行")
+
+    assert FakeSentenceTransformer.instances == 1
+    assert first.sentence_model is second.sentence_model
+
+
+def test_batched_scores_match_per_row_similarity(fake_model):
+    """整批评分只调用一次encode，结果与逐条余弦相似度一致"""
+    news_filter = enf.EnhancedNewsFilter("600036", "招商银行")
+    model = news_filter.sentence_model
+    model.encode_calls.clear()
+
+    result = news_filter.filter_news_enhanced(NEWS, min_score=0)
+    assert len(model.encode_calls) == 1
+    assert len(model.encode_calls[0]) == len(NEWS)
+
+    company_vectors = model.encode([news_filter.company_name, f"{news_filter.company_name}股票",
+                                    f"{news_filter.company_name}公司", news_filter.stock_code,
+                                    f"{news_filter.company_name}业绩", f"{news_filter.company_name}财报"])
+    for _, row in result.iterrows():
+        content = row['新闻内容'] if isinstance(row['新闻内容'], str) else ""
+        text_vector = model.encode([f"{row['新闻标题']} {content[:200]}"])[0]
+        expected = max(
+            np.dot(text_vector, c) / (np.linalg.norm(text_vector) * np.linalg.norm(c)) for c in company_vectors
+        )
+        assert row['semantic_score'] == pytest.approx(max(0, min(100, expected * 100)), rel=1e-5)
+        assert row['final_score'] == pytest.approx(0.4 * row['rule_score'] + 0.35 * row['semantic_score'])
+    assert result['final_score'].is_monotonic_decreasing
+
+
+def test_news_embeddings_cached_by_content(fake_model):
+    """同一新闻再次评分时不再编码"""
+    news_filter = enf.EnhancedNewsFilter("600036", "招商银行")
+    model = news_filter.sentence_model
+    news_filter.filter_news_enhanced(NEWS, min_score=0)
+    model.encode_calls.clear()
+
+    news_filter.filter_news_enhanced(NEWS, min_score=0)
+    score = news_filter.calculate_semantic_similarity(NEWS.iloc[0]['新闻标题'], NEWS.iloc[0]['新闻内容'])
+
+    assert model.encode_calls == []
+    assert 0 < score <= 100
+
+
+def test_missing_dependency_disables_semantic(monkeypatch):
+    """sentence-transformers不可用时降级为规则过滤，且不重复尝试加载"""
+    monkeypatch.setattr(enf, "_models", {})
+    monkeypatch.setitem(sys.modules, "sentence_transformers", None)
+
+    news_filter = enf.EnhancedNewsFilter("600036", "招商银行")
+    assert news_filter.use_semantic is False
+    assert enf._models[enf.SEMANTIC_MODEL_NAME] is None
+    result = news_filter.filter_news_enhanced(NEWS, min_score=0)
+    assert (result['semantic_score'] == 0).all()
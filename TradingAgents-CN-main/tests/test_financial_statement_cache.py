@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+测试财务报表缓存
+验证报表并发获取、按披露日历失效、报告期更新后丢弃旧指标，以及热命中时不再解析
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from tradingagents.dataflows import akshare_utils, financial_statement_cache
+from tradingagents.dataflows.akshare_utils import AKShareProvider
+from tradingagents.dataflows.financial_statement_cache import (
+    FinancialStatementCache, latest_report_period, next_check_time,
+)
+from tradingagents.dataflows.optimized_china_data import OptimizedChinaDataProvider
+
+DAY = timedelta(hours=24)
+
+
+def indicators(*periods):
+    rows = [["常用指标", "净资产收益率(ROE)"] + [12.5] * len(periods),
+            ["常用指标", "每股净资产_最新股数"] + [8.0] * len(periods)]
+    return pd.DataFrame(rows, columns=["选项", "指标", *periods])
+
+
+class FakeAK:
+    """四个报表接口必须同时在途才能返回，以此验证并发获取"""
+
+    def __init__(self, periods=("20240930", "20240630")):
+        self.periods = periods
+        self.calls = []
+        self.barrier = threading.Barrier(4, timeout=5)
+
+    def _fetch(self, name, frame):
+        self.calls.append(name)
+        self.barrier.wait()
+        return frame
+
+    def stock_financial_abstract(self, symbol):
+        return self._fetch("abstract", indicators(*self.periods))
+
+    def stock_balance_sheet_by_report_em(self, symbol):
+        return self._fetch("balance", pd.DataFrame({"REPORT_DATE": ["2024-09-30 00:00:00"]}))
+
+    def stock_profit_sheet_by_report_em(self, symbol):
+        return self._fetch("profit", pd.DataFrame())
+
+    def stock_cash_flow_sheet_by_report_em(self, symbol):
+        raise ConnectionError(self._fetch("cash", "network down"))
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.delenv("ENABLE_FINANCIAL_CACHE", raising=False)
+    cache = FinancialStatementCache(store_dir=str(tmp_path), recheck_hours=24)
+    monkeypatch.setattr(financial_statement_cache, "_cache_instance", cache)
+    return cache
+
+
+def make_provider(ak):
+    provider = object.__new__(AKShareProvider)
+    provider.connected = True
+    provider.ak = ak
+    return provider
+
+
+@pytest.mark.parametrize("fetched_at,expected", [
+    # 下一报告期(12/31)结束前无需确认
+    (datetime(2024, 11, 5), datetime(2025, 1, 1)),
+    # 年报披露窗口内按间隔确认
+    (datetime(2025, 1, 10, 9), datetime(2025, 1, 11, 9)),
+    # 截止日次日必定确认
+    (datetime(2025, 4, 30, 12), datetime(2025, 5, 1)),
+    # 已过截止日仍未披露
+    (datetime(2025, 5, 3), datetime(2025, 5, 4)),
+])
+def test_next_check_follows_disclosure_calendar(fetched_at, expected):
+    assert next_check_time("20240930", fetched_at, DAY) == expected
+
+
+def test_latest_report_period_from_statements():
+    assert latest_report_period({"main_indicators": indicators("20240630", "20240331")}) == "20240630"
+    assert latest_report_period({
+        "main_indicators": indicators("20240630"),
+        "balance_sheet": pd.DataFrame({"REPORT_DATE": ["2024-09-30 00:00:00", "2024-06-30 00:00:00"]}),
+    }) == "20240930"
+    assert latest_report_period({"income_statement": [{"end_date": "20231231"}]}) == "20231231"
+    assert latest_report_period({"balance_sheet": []}) is None
+
+
+def test_new_report_period_replaces_metrics(cache):
+    """同一报告期重新确认时保留指标；出现新报告期后旧指标失效"""
+    cache.put_statements("akshare", "000001", {"main_indicators": indicators("20240930")},
+                         now=datetime(2024, 11, 5))
+    cache.put_metrics("akshare", "000001", 10.0, {"pe": "5.0倍"})
+
+    assert cache.get_statements("akshare", "000001", now=datetime(2024, 12, 31, 23)) is not None
+    assert cache.get_metrics("akshare", "000001", 10.0, now=datetime(2024, 12, 31, 23)) == {"pe": "5.0倍"}
+    assert cache.get_statements("akshare", "000001", now=datetime(2025, 1, 1)) is None
+
+    cache.put_statements("akshare", "000001", {"main_indicators": indicators("20240930")},
+                         now=datetime(2025, 1, 1))
+    assert cache.get_metrics("akshare", "000001", 10.0, now=datetime(2025, 1, 1, 12)) == {"pe": "5.0倍"}
+
+    cache.put_statements("akshare", "000001", {"main_indicators": indicators("20241231", "20240930")},
+                         now=datetime(2025, 3, 20))
+    assert cache.get_report_period("akshare", "000001") == "20241231"
+    assert cache.get_metrics("akshare", "000001", 10.0, now=datetime(2025, 3, 21)) is None
+    assert cache.stats["new_periods"] == 1
+
+    # 新实例从磁盘恢复
+    reloaded = FinancialStatementCache(store_dir=str(cache.store_dir), recheck_hours=24)
+    assert reloaded.get_report_period("akshare", "000001") == "20241231"
+
+
+def test_akshare_statements_fetched_concurrently_and_cached(cache):
+    ak = FakeAK()
+    data = make_provider(ak).get_financial_data("000001")
+
+    assert sorted(ak.calls) == ["abstract", "balance", "cash", "profit"]
+    assert list(data) == ["main_indicators", "balance_sheet"]
+    assert cache.get_report_period("akshare", "000001") == "20240930"
+
+    # 另一个提供器实例（get_akshare_provider 每次新建）直接命中缓存
+    again = make_provider(ak).get_financial_data("000001")
+    assert len(ak.calls) == 4
+    assert again is data
+
+
+def test_warm_hit_skips_parsing(cache, monkeypatch):
+    ak = FakeAK()
+    monkeypatch.setattr(akshare_utils, "get_akshare_provider", lambda: make_provider(ak))
+    monkeypatch.setattr(AKShareProvider, "get_stock_info",
+                        lambda self, symbol: {"symbol": symbol, "name": "平安银行"})
+
+    provider = object.__new__(OptimizedChinaDataProvider)
+    parsed = []
+    real_parse = OptimizedChinaDataProvider._parse_akshare_financial_data
+
+    def counting_parse(financial_data, stock_info, price_value):
+        parsed.append(price_value)
+        return real_parse(provider, financial_data, stock_info, price_value)
+
+    provider._parse_akshare_financial_data = counting_parse
+
+    first = provider._get_real_financial_metrics("000001", 16.0)
+    assert first["pb"] == "2.00倍"
+    second = provider._get_real_financial_metrics("000001", 16.0)
+    assert second == first
+    assert parsed == [16.0]
+    assert len(ak.calls) == 4
+
+    # 股价变化只重新解析，不重新获取报表
+    assert provider._get_real_financial_metrics("000001", 24.0)["pb"] == "3.00倍"
+    assert parsed == [16.0, 24.0]
+    assert len(ak.calls) == 4
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+测试离线Finnhub数据缓存
+验证区间结果与逐键过滤一致（包括顺序）、重复查询不再解析文件、修改时间变化后重新加载
+"""
+
+import json
+import os
+
+import pytest
+
+from tradingagents.dataflows import finnhub_utils
+from tradingagents.dataflows.finnhub_utils import FinnhubOfflineStore, get_data_in_range
+
+
+NEWS = {
+    # 文件中的键不一定按日期排序
+    "2024-03-05": [{"headline": "c", "summary": "c"}],
+    "2024-03-01": [{"headline": "a", "summary": "a"}],
+    "2024-03-03": [],
+    "2024-03-04": [{"headline": "b", "summary": "b"}],
+    "2024-02-28": [{"headline": "z", "summary": "z"}],
+}
+
+
+def _write(data_dir, data, data_type="news_data", ticker="AAPL"):
+    path = data_dir / "finnhub_data" / data_type / f"{ticker}_data_formatted.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = FinnhubOfflineStore()
+    monkeypatch.setattr(finnhub_utils, "_store", store)
+    return store
+
+
+def _legacy(data, start, end):
+    return {k: v for k, v in data.items() if start <= k <= end and len(v) > 0}
+
+
+@pytest.mark.parametrize("start,end", [
+    ("2024-03-01", "2024-03-04"),
+    ("2024-02-01", "2024-12-31"),
+    ("2024-03-02", "2024-03-03"),
+    ("2024-03-05", "2024-03-01"),
+])
+def test_range_matches_key_filtering(tmp_path, store, start, end):
+    """二分查找结果与逐键过滤一致，键顺序保持文件中的顺序"""
+    _write(tmp_path, NEWS)
+    result = get_data_in_range("AAPL", start, end, "news_data", str(tmp_path))
+    expected = _legacy(NEWS, start, end)
+    assert result == expected
+    assert list(result) == list(expected)
+
+
+def test_file_parsed_once_until_modified(tmp_path, store):
+    """重复查询只解析一次；文件修改后重新加载"""
+    path = _write(tmp_path, NEWS)
+    for _ in range(5):
+        get_data_in_range("AAPL", "2024-03-01", "2024-03-05", "news_data", str(tmp_path))
+    assert store.stats == {"hits": 4, "loads": 1}
+
+    _write(tmp_path, {"2024-03-06": [{"headline": "d", "summary": "d"}]})
+    future = os.stat(path).st_mtime + 10
+    os.utime(path, (future, future))
+    result = get_data_in_range("AAPL", "2024-03-01", "2024-03-31", "news_data", str(tmp_path))
+    assert list(result) == ["2024-03-06"]
+    assert store.stats["loads"] == 2
+
+
+def test_missing_and_invalid_files_return_empty(tmp_path, store):
+    """文件不存在或JSON损坏时返回空字典"""
+    assert get_data_in_range("MSFT", "2024-01-01", "2024-12-31", "news_data", str(tmp_path)) == {}
+
+    path = tmp_path / "finnhub_data" / "insider_senti" / "AAPL_data_formatted.json"
+    path.parent.mkdir(parents=True)
+    path.write_text("{not json", encoding="utf-8")
+    assert get_data_in_range("AAPL", "2024-01-01", "2024-12-31", "insider_senti", str(tmp_path)) == {}
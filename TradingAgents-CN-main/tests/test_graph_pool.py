@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+测试交易图复用池与共享LLM客户端
+验证相同配置复用同一图实例、不同配置分开创建、并发获取只创建一次以及LRU淘汰
+"""
+
+import threading
+import time
+
+import pytest
+
+from tradingagents.default_config import DEFAULT_CONFIG
+from tradingagents.graph import graph_pool, trading_graph
+from tradingagents.graph.graph_pool import GraphPool
+
+
+class FakeGraph:
+    """记录创建次数的图替身（真实图的创建需要LLM密钥和ChromaDB）"""
+
+    created = 0
+    lock = threading.Lock()
+
+    def __init__(self, selected_analysts, debug=False, config=None):
+        time.sleep(0.05)
+        with self.lock:
+            FakeGraph.created += 1
+        self.selected_analysts = selected_analysts
+        self.config = config
+
+
+@pytest.fixture(autouse=True)
+def fake_graph(monkeypatch):
+    FakeGraph.created = 0
+    monkeypatch.setattr(graph_pool, "TradingAgentsGraph", FakeGraph)
+    monkeypatch.setattr(graph_pool, "set_config", lambda config: None)
+
+
+def _config(**overrides):
+    config = DEFAULT_CONFIG.copy()
+    config.update(overrides)
+    return config
+
+
+def test_same_configuration_reuses_graph():
+    """相同配置复用同一图实例，分析师或辩论轮数不同时分开创建"""
+    pool = GraphPool(max_size=4)
+    first = pool.get(["market", "news"], _config())
+    second = pool.get(["market", "news"], _config())
+    other_analysts = pool.get(["market"], _config())
+    other_rounds = pool.get(["market", "news"], _config(max_debate_rounds=3))
+
+    assert first is second
+    assert other_analysts is not first
+    assert other_rounds is not first
+    assert FakeGraph.created == 3
+    assert pool.stats["hits"] == 1
+
+
+def test_concurrent_requests_create_graph_once():
+    """并发获取同一配置只创建一次"""
+    pool = GraphPool(max_size=4)
+    graphs = []
+
+    def worker():
+        graphs.append(pool.get(["market"], _config()))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert FakeGraph.created == 1
+    assert all(graph is graphs[0] for graph in graphs)
+
+
+def test_lru_eviction():
+    """超过容量时淘汰最久未使用的图实例"""
+    pool = GraphPool(max_size=2)
+    a = pool.get(["market"], _config())
+    pool.get(["news"], _config())
+    assert pool.get(["market"], _config()) is a
+    pool.get(["fundamentals"], _config())
+
+    assert len(pool) == 2
+    assert pool.stats["evictions"] == 1
+    assert pool.get(["market"], _config()) is a
+    pool.get(["news"], _config())
+    assert FakeGraph.created == 4
+
+
+def test_llm_clients_shared_per_model(monkeypatch):
+    """相同提供商/模型/端点的LLM客户端只创建一次"""
+    created = []
+
+    def fake_create(config):
+        created.append(config["deep_think_llm"])
+        return object(), object()
+
+    monkeypatch.setattr(trading_graph, "_create_llm_clients", fake_create)
+    trading_graph.clear_llm_clients()
+    try:
+        first = trading_graph.get_llm_clients(_config(deep_think_llm="m1"))
+        second = trading_graph.get_llm_clients(_config(deep_think_llm="m1", max_debate_rounds=5))
+        third = trading_graph.get_llm_clients(_config(deep_think_llm="m2"))
+    finally:
+        trading_graph.clear_llm_clients()
+
+    assert first is second
+    assert third is not first
+    assert created == ["m1", "m2"]
+
+
+def test_llm_clients_rebuilt_after_api_key_rotation(monkeypatch):
+    """API密钥变化后不复用旧密钥创建的LLM客户端"""
+    monkeypatch.setattr(trading_graph, "_create_llm_clients", lambda config: (object(), object()))
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "old-key")
+    trading_graph.clear_llm_clients()
+    try:
+        first = trading_graph.get_llm_clients(_config())
+        assert trading_graph.get_llm_clients(_config()) is first
+        old_graph_key = graph_pool.graph_pool_key(["market"], _config())
+        monkeypatch.setenv("DEEPSEEK_API_KEY", "new-key")
+        rotated = trading_graph.get_llm_clients(_config())
+    finally:
+        trading_graph.clear_llm_clients()
+
+    assert rotated is not first
+    # 图复用池同样不复用旧密钥创建的图
+    assert graph_pool.graph_pool_key(["market"], _config()) != old_graph_key
+
+
+def test_reload_env_file_clears_llm_clients_on_change(monkeypatch, tmp_path):
+    """重新加载.env且环境变量变化时清空共享LLM客户端"""
+    from tradingagents.config.env_utils import reload_env_file
+
+    monkeypatch.setattr(trading_graph, "_create_llm_clients", lambda config: (object(), object()))
+    monkeypatch.delenv("TA_TEST_ROTATED_KEY", raising=False)
+    trading_graph.clear_llm_clients()
+    env_file = tmp_path / ".env"
+    env_file.write_text("TA_TEST_ROTATED_KEY=one\n", encoding="utf-8")
+    try:
+        trading_graph.get_llm_clients(_config())
+        reload_env_file(env_file)
+        assert len(trading_graph._llm_clients) == 0
+
+        trading_graph.get_llm_clients(_config())
+        reload_env_file(env_file)  # 内容未变化，保留客户端
+        assert len(trading_graph._llm_clients) == 1
+    finally:
+        monkeypatch.delenv("TA_TEST_ROTATED_KEY", raising=False)
+        trading_graph.clear_llm_clients()
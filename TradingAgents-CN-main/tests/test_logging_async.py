@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+测试热路径日志
+验证延迟字段只在级别启用时计算、调用线程求值消息后由后台线程写盘、按前缀采样以及工具装饰器的开销
+"""
+
+import json
+import logging
+import threading
+
+import pytest
+
+from tradingagents.utils.logging_manager import (
+    SamplingFilter, TradingAgentsLogger, lazy, log_event,
+)
+from tradingagents.utils.tool_logging import log_tool_call
+
+
+def _config(log_dir, sampling=None, async_enabled=True):
+    return {
+        'level': 'INFO',
+        'format': {
+            'console': '%(name)s | %(message)s',
+            'file': '%(name)s | %(levelname)s | %(message)s',
+        },
+        'handlers': {
+            'console': {'enabled': False, 'colored': False, 'level': 'INFO'},
+            'file': {'enabled': True, 'level': 'DEBUG', 'max_size': '1MB', 'backup_count': 1,
+                     'directory': str(log_dir)},
+            'structured': {'enabled': True, 'level': 'INFO', 'directory': str(log_dir)},
+        },
+        'loggers': {},
+        'docker': {'enabled': False, 'stdout_only': True},
+        'async': {'enabled': async_enabled, 'queue_size': 1000},
+        'sampling': sampling or {},
+    }
+
+
+@pytest.fixture
+def make_manager(monkeypatch):
+    """创建独立的日志管理器，测试结束后恢复原有根处理器"""
+    monkeypatch.delenv('TRADINGAGENTS_LOG_ASYNC', raising=False)
+    monkeypatch.delenv('TRADINGAGENTS_LOG_SAMPLING', raising=False)
+    root = logging.getLogger()
+    saved_handlers, saved_level = list(root.handlers), root.level
+    managers = []
+
+    def factory(config):
+        manager = TradingAgentsLogger(config)
+        managers.append(manager)
+        return manager
+
+    yield factory
+    for manager in managers:
+        manager.shutdown()
+    root.handlers[:] = saved_handlers
+    root.setLevel(saved_level)
+
+
+class CountingArg:
+    """记录被转换为字符串的次数"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return "counting-arg"
+
+
+def test_lazy_fields_skip_work_when_level_disabled():
+    """级别未启用时延迟字段不计算，启用时只计算一次"""
+    test_logger = logging.getLogger("test.lazy")
+    test_logger.setLevel(logging.INFO)
+    calls = []
+
+    def expensive():
+        calls.append(1)
+        return "expensive"
+
+    test_logger.debug("字段: %s", lazy(expensive))
+    log_event(test_logger, logging.DEBUG, "事件", detail=lazy(expensive))
+    assert calls == []
+
+    value = lazy(expensive)
+    assert f"{value}" == "expensive"
+    assert str(value) == "expensive"
+    assert calls == [1]
+
+
+def test_async_sink_resolves_message_in_caller_thread(tmp_path, make_manager):
+    """消息参数在调用线程中求值（之后修改数据不影响日志），写盘在后台线程完成，结构化字段写入JSON"""
+    manager = make_manager(_config(tmp_path))
+    test_logger = logging.getLogger("test.async")
+    caller = threading.current_thread().name
+    formatted_in = []
+    rows = [1, 2]
+
+    def where():
+        formatted_in.append(threading.current_thread().name)
+        return "computed"
+
+    test_logger.info("调用线程求值: %s, 行: %s, 数量: %d", lazy(where), rows, lazy(len, rows))
+    rows.append(3)
+    try:
+        raise ValueError("测试异常")
+    except ValueError:
+        test_logger.exception("带堆栈的日志")
+    log_event(test_logger, logging.INFO, "结构化事件", event_type="unit_test", symbol="000001",
+              rows=lazy(lambda: 42))
+    manager.flush()
+
+    assert manager.get_stats()['async'] is True
+    assert formatted_in == [caller]
+    text = (tmp_path / 'tradingagents.log').read_text(encoding='utf-8')
+    assert "调用线程求值: computed, 行: [1, 2], 数量: 2" in text
+    assert "ValueError: 测试异常" in text
+
+    records = [json.loads(line) for line in
+               (tmp_path / 'tradingagents_structured.log').read_text(encoding='utf-8').splitlines()]
+    event = next(r for r in records if r['message'] == "结构化事件")
+    assert event['event_type'] == "unit_test"
+    assert event['symbol'] == "000001" and event['rows'] == 42
+
+
+def test_sampling_keeps_one_in_n_and_all_warnings():
+    """按前缀采样INFO日志，WARNING总是保留，同一记录只判定一次"""
+    sampling = SamplingFilter({'tools': 0.25})
+
+    def record(name, level=logging.INFO):
+        return logging.LogRecord(name, level, __file__, 1, "msg", None, None)
+
+    kept = [sampling.filter(record("tools.sub")) for _ in range(8)]
+    assert kept == [True, False, False, False, True, False, False, False]
+    assert sampling.sampled_out == 6
+    assert all(sampling.filter(record("tools", logging.WARNING)) for _ in range(3))
+    assert all(sampling.filter(record("agents")) for _ in range(3))
+
+    dropped = record("tools")
+    first = sampling.filter(dropped)
+    assert sampling.filter(dropped) is first
+
+
+def test_sampling_configured_from_env(tmp_path, make_manager, monkeypatch):
+    """TRADINGAGENTS_LOG_SAMPLING 生效于根处理器"""
+    monkeypatch.setenv('TRADINGAGENTS_LOG_SAMPLING', 'test.sampled=0.5')
+    manager = make_manager(_config(tmp_path, async_enabled=False))
+    sampled_logger = logging.getLogger("test.sampled")
+    for i in range(10):
+        sampled_logger.info("sampled %d", i)
+    manager.flush()
+
+    lines = (tmp_path / 'tradingagents.log').read_text(encoding='utf-8').splitlines()
+    assert len([line for line in lines if "sampled" in line]) == 5
+    assert manager.get_stats()['sampled_out'] == 5
+
+
+def test_tool_call_decorator_does_not_stringify_when_disabled():
+    """工具日志未启用时不转换参数和结果"""
+    tools_logger = logging.getLogger("tools")
+    previous = tools_logger.level
+    tools_logger.setLevel(logging.WARNING)
+    try:
+        @log_tool_call(tool_name="fake_tool", log_args=True, log_result=True)
+        def fake_tool(arg):
+            return arg
+
+        arg = CountingArg()
+        assert fake_tool(arg) is arg
+        assert arg.calls == 0
+    finally:
+        tools_logger.setLevel(previous)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+测试离线YFin价格加载器
+验证列式转换、进程级LRU、二分切片结果与原CSV过滤一致，以及文件更新后失效
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tradingagents.dataflows import interface, offline_price_store
+from tradingagents.dataflows.offline_price_store import (
+    OfflinePriceStore, convert_price_directory, price_csv_path,
+)
+
+
+SYMBOL = "TEST"
+
+
+def _write_prices(price_dir, periods=300, start="2023-01-02"):
+    rng = np.random.default_rng(1)
+    dates = pd.bdate_range(start, periods=periods)
+    close = 50 + rng.normal(0, 1, len(dates)).cumsum()
+    data = pd.DataFrame({
+        # 原始YFin文件的日期带时区后缀
+        "Date": dates.strftime("%Y-%m-%d") + " 00:00:00-05:00",
+        "Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+        "Adj Close": close, "Volume": rng.integers(1_000, 10_000, len(dates)),
+    })
+    data.to_csv(price_csv_path(SYMBOL, str(price_dir)), index=False)
+    return data
+
+
+@pytest.fixture
+def price_dir(tmp_path, monkeypatch):
+    price_dir = tmp_path / "market_data" / "price_data"
+    price_dir.mkdir(parents=True)
+    monkeypatch.setattr(interface, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(offline_price_store, "_store", OfflinePriceStore())
+    return price_dir
+
+
+def _legacy_filter(raw, start, end):
+    """原实现：按日期字符串前10位过滤"""
+    day = raw["Date"].str[:10]
+    return raw[(day >= start) & (day <= end)]
+
+
+def test_slices_match_string_filtering(price_dir):
+    """二分切片与按字符串过滤的结果一致，窗口输出保留原始行号"""
+    raw = _write_prices(price_dir)
+
+    data = interface.get_YFin_data(SYMBOL, "2023-03-04", "2023-06-30")
+    expected = _legacy_filter(raw, "2023-03-04", "2023-06-30").reset_index(drop=True)
+    pd.testing.assert_frame_equal(data, expected)
+
+    report = interface.get_YFin_data_window(SYMBOL, "2023-06-30", 20)
+    with pd.option_context("display.max_rows", None, "display.max_columns", None, "display.width", None):
+        expected_text = _legacy_filter(raw, "2023-06-10", "2023-06-30").to_string()
+    assert report.endswith(expected_text)
+
+    assert interface.get_YFin_data(SYMBOL, "2022-01-01", "2022-12-31").empty
+
+
+def test_loaded_once_and_columnar_reused(price_dir):
+    """同一文件只解析一次CSV；新进程（新加载器）直接读取列式文件"""
+    _write_prices(price_dir)
+    assert convert_price_directory(str(price_dir)) == 1
+
+    store = OfflinePriceStore()
+    first = store.load(SYMBOL, str(price_dir))
+    for _ in range(5):
+        assert store.load(SYMBOL, str(price_dir)) is first
+    assert store.stats == {"hits": 5, "columnar_loads": 1, "csv_parses": 0}
+    assert isinstance(first.index, pd.DatetimeIndex)
+    assert first.index.is_monotonic_increasing
+
+
+def test_updated_csv_invalidates_cache(price_dir):
+    """CSV更新后重新解析并覆盖列式文件"""
+    _write_prices(price_dir, periods=100)
+    store = OfflinePriceStore()
+    assert len(store.load(SYMBOL, str(price_dir))) == 100
+
+    _write_prices(price_dir, periods=150)
+    csv_path = price_csv_path(SYMBOL, str(price_dir))
+    future = os.path.getmtime(csv_path) + 10
+    os.utime(csv_path, (future, future))
+
+    assert len(store.load(SYMBOL, str(price_dir))) == 150
+    assert store.stats["csv_parses"] == 2
+    assert len(OfflinePriceStore().load(SYMBOL, str(price_dir))) == 150
+
+
+def test_lru_evicts_and_missing_file_raises(price_dir):
+    """超过容量时淘汰最久未用的帧；文件不存在时抛出 FileNotFoundError"""
+    _write_prices(price_dir)
+    store = OfflinePriceStore(max_frames=1)
+    store.load(SYMBOL, str(price_dir))
+
+    other_dir = price_dir.parent / "other"
+    other_dir.mkdir()
+    _write_prices(other_dir)
+    store.load(SYMBOL, str(other_dir))
+    assert len(store._frames) == 1
+
+    with pytest.raises(FileNotFoundError):
+        store.load("MISSING", str(price_dir))
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+测试增量OHLCV存储
+验证区间覆盖计算、只请求缺失的首尾区间，以及数据源管理器的接入
+"""
+
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from tradingagents.dataflows import ohlcv_store
+from tradingagents.dataflows.ohlcv_store import OHLCVStore, merge_ranges, missing_ranges
+
+
+class FakeSource:
+    """模拟按日期区间返回日线数据的数据源（tushare风格日期 YYYYMMDD）"""
+
+    def __init__(self):
+        self.calls = []
+
+    def fetch(self, start, end):
+        self.calls.append((start, end))
+        days = pd.bdate_range(start, end)
+        return pd.DataFrame({
+            "trade_date": days.strftime("%Y%m%d"),
+            "open": [float(d.day) for d in days],
+            "close": [float(d.day) + 0.5 for d in days],
+        })
+
+
+def test_range_helpers():
+    """覆盖区间合并与缺失区间计算"""
+    assert merge_ranges([("2025-01-05", "2025-01-10"), ("2025-01-01", "2025-01-04")]) == [("2025-01-01", "2025-01-10")]
+    covered = [("2025-01-05", "2025-01-10"), ("2025-01-20", "2025-01-25")]
+    assert missing_ranges(covered, "2025-01-01", "2025-01-31") == [
+        ("2025-01-01", "2025-01-04"), ("2025-01-11", "2025-01-19"), ("2025-01-26", "2025-01-31"),
+    ]
+    assert missing_ranges(covered, "2025-01-06", "2025-01-09") == []
+
+
+def test_fetch_only_missing_segments(tmp_path):
+    """已覆盖区间从本地返回，只请求缺失的首尾区间"""
+    store = OHLCVStore(tmp_path)
+    source = FakeSource()
+
+    first = store.get_range("000001", "tushare", "2025-01-06", "2025-01-17", source.fetch)
+    assert len(first) == 10
+    assert source.calls == [("2025-01-06", "2025-01-17")]
+
+    # 子区间完全由本地数据回答
+    inner = store.get_range("000001", "tushare", "2025-01-08", "2025-01-10", source.fetch)
+    assert list(inner["trade_date"]) == ["20250108", "20250109", "20250110"]
+    assert len(source.calls) == 1
+
+    # 向前、向后扩展只请求缺失部分
+    wider = store.get_range("000001", "tushare", "2025-01-01", "2025-01-24", source.fetch)
+    assert source.calls[1:] == [("2025-01-01", "2025-01-05"), ("2025-01-18", "2025-01-24")]
+    assert wider["trade_date"].is_monotonic_increasing
+    assert wider["trade_date"].is_unique
+    assert len(wider) == 18
+
+    # 新实例从磁盘恢复覆盖区间
+    reloaded = OHLCVStore(tmp_path)
+    assert reloaded.get_coverage("tushare", "000001") == [("2025-01-01", "2025-01-24")]
+    reloaded.get_range("000001", "tushare", "2025-01-02", "2025-01-23", source.fetch)
+    assert len(source.calls) == 3
+
+
+def test_today_is_refetched(tmp_path):
+    """当天数据可能未收盘，不记入覆盖区间"""
+    store = OHLCVStore(tmp_path)
+    source = FakeSource()
+    today = datetime.now().strftime("%Y-%m-%d")
+    start = (datetime.now() - timedelta(days=10)).strftime("%Y-%m-%d")
+
+    store.get_range("600519", "akshare", start, today, source.fetch)
+    store.get_range("600519", "akshare", start, today, source.fetch)
+
+    assert source.calls[1] == (today, today)
+
+
+def test_data_source_manager_uses_store(tmp_path, monkeypatch):
+    """DataSourceManager 的AKShare路径经过增量存储"""
+    from tradingagents.dataflows import akshare_utils
+    from tradingagents.dataflows.data_source_manager import DataSourceManager
+
+    source = FakeSource()
+
+    class FakeProvider:
+        def get_stock_data(self, symbol, start_date, end_date):
+            data = source.fetch(start_date, end_date)
+            return data.rename(columns={"trade_date": "日期", "close": "收盘"})
+
+    store = OHLCVStore(tmp_path)
+    monkeypatch.setattr(ohlcv_store, "get_ohlcv_store", lambda: store)
+    monkeypatch.setattr(akshare_utils, "get_akshare_provider", lambda: FakeProvider())
+
+    manager = DataSourceManager.__new__(DataSourceManager)
+    first = manager._get_akshare_data("000001", "2025-01-06", "2025-01-17")
+    second = manager._get_akshare_data("000001", "2025-01-07", "2025-01-16")
+
+    assert "数据条数: 10条" in first
+    assert "数据条数: 8条" in second
+    assert source.calls == [("2025-01-06", "2025-01-17")]
+
+
+def test_empty_gap_is_covered(tmp_path):
+    """没有交易日的尾部区间也记入覆盖区间，不再重复请求"""
+    store = OHLCVStore(tmp_path)
+    source = FakeSource()
+
+    store.get_range("000001", "tushare", "2025-01-06", "2025-01-10", source.fetch)
+    # 2025-01-11/12 为周末
+    weekend = store.get_range("000001", "tushare", "2025-01-06", "2025-01-12", source.fetch)
+    again = store.get_range("000001", "tushare", "2025-01-06", "2025-01-12", source.fetch)
+
+    assert source.calls == [("2025-01-06", "2025-01-10"), ("2025-01-11", "2025-01-12")]
+    assert len(weekend) == len(again) == 5
+    assert store.get_coverage("tushare", "000001") == [("2025-01-06", "2025-01-12")]
+
+    # 本地没有数据时空结果可能是数据源失败，不记入覆盖区间
+    store.get_range("600000", "tushare", "2025-01-11", "2025-01-12", source.fetch)
+    assert store.get_coverage("tushare", "600000") == []
+
+
+def test_failed_fetch_over_trading_days_is_refetched(tmp_path):
+    """已有本地数据时，数据源失败（空表或None）的多周区间不记入覆盖区间，下次重新请求"""
+    store = OHLCVStore(tmp_path)
+    source = FakeSource()
+    store.get_range("000001", "tushare", "2025-01-06", "2025-01-10", source.fetch)
+
+    for failed in (pd.DataFrame(), None):
+        partial = store.get_range("000001", "tushare", "2025-01-06", "2025-02-28", lambda start, end: failed)
+        assert len(partial) == 5
+        assert store.get_coverage("tushare", "000001") == [("2025-01-06", "2025-01-10")]
+
+    full = store.get_range("000001", "tushare", "2025-01-06", "2025-02-28", source.fetch)
+    assert source.calls[-1] == ("2025-01-11", "2025-02-28")
+    assert len(full) == len(pd.bdate_range("2025-01-06", "2025-02-28"))
+
+
+def test_result_without_date_column_is_not_refetched(tmp_path):
+    """数据缺少日期列时直接返回，不再额外请求整个区间"""
+    store = OHLCVStore(tmp_path)
+    source = FakeSource()
+    store.get_range("000001", "tushare", "2025-01-06", "2025-01-10", source.fetch)
+    calls = []
+
+    def fetch(start, end):
+        calls.append((start, end))
+        return pd.DataFrame({"close": [1.0]})
+
+    result = store.get_range("000001", "tushare", "2025-01-01", "2025-01-17", fetch)
+    assert list(result.columns) == ["close"]
+    assert calls == [("2025-01-01", "2025-01-05")]
+
+
+def test_tushare_adjusts_after_stitching(tmp_path, monkeypatch):
+    """Tushare 日线以除权价格存储，拼接出完整区间后统一前复权"""
+    from tradingagents.dataflows import tushare_adapter
+    from tradingagents.dataflows.data_source_manager import ChinaDataSource, DataSourceManager
+    from tradingagents.dataflows.tushare_utils import TushareProvider
+
+    days = pd.bdate_range("2025-01-06", "2025-01-17")
+    # 2025-01-13 除权（10送10），除权价格减半但涨跌幅为0
+    closes = [10.0, 10.5, 11.0, 11.0, 11.2, 5.6, 5.7, 5.8, 5.9, 6.0]
+    pct = [0.0] + [0.0 if i == 5 else (closes[i] / closes[i - 1] - 1) * 100 for i in range(1, len(closes))]
+    raw = pd.DataFrame({"ts_code": "000001.SZ", "trade_date": days.strftime("%Y%m%d"), "open": closes,
+                        "high": closes, "low": closes, "close": closes, "vol": 1000.0, "pct_chg": pct})
+
+    class FakeTushare(TushareProvider):
+        def __init__(self):
+            self.connected = True
+            self.calls = []
+
+        def get_stock_daily(self, symbol, start_date=None, end_date=None, forward_adjust=True):
+            self.calls.append((start_date, end_date, forward_adjust))
+            dates = pd.to_datetime(raw["trade_date"])
+            data = raw[(dates >= start_date) & (dates <= end_date)].copy()
+            data["trade_date"] = pd.to_datetime(data["trade_date"])
+            return self._calculate_forward_adjusted_prices(data) if forward_adjust else data
+
+    adapter = object.__new__(tushare_adapter.TushareDataAdapter)
+    adapter.provider = FakeTushare()
+    adapter.enable_cache = False
+    monkeypatch.setattr(tushare_adapter, "get_tushare_adapter", lambda: adapter)
+    store = OHLCVStore(tmp_path)
+    monkeypatch.setattr(ohlcv_store, "get_ohlcv_store", lambda: store)
+    monkeypatch.setenv("ENABLE_OHLCV_STORE", "true")
+
+    manager = DataSourceManager.__new__(DataSourceManager)
+    manager._load_bars("000001", ChinaDataSource.TUSHARE, "2025-01-06", "2025-01-10")
+    bars = manager._load_bars("000001", ChinaDataSource.TUSHARE, "2025-01-06", "2025-01-17")
+
+    assert adapter.provider.calls == [("2025-01-06", "2025-01-10", False), ("2025-01-11", "2025-01-17", False)]
+    expected = adapter.provider.get_stock_daily("000001", "2025-01-06", "2025-01-17")["close"].tolist()
+    assert bars.frame["close"].tolist() == pytest.approx(expected)
+    assert bars.frame["close"].iloc[-1] == 6.0 and bars.frame["close"].iloc[0] == pytest.approx(5.0)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+测试分析师并行执行模式
+验证各分析师使用独立消息通道并发运行，并在Bull Researcher之前汇合
+"""
+
+import threading
+import time
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+
+import tradingagents.graph.setup as graph_setup
+from tradingagents.graph.conditional_logic import ConditionalLogic
+from tradingagents.graph.propagation import Propagator
+from langgraph.prebuilt import ToolNode
+
+
+ANALYSTS = ["market", "social", "news", "fundamentals"]
+REPORT_KEYS = {
+    "market": "market_report",
+    "social": "sentiment_report",
+    "news": "news_report",
+    "fundamentals": "fundamentals_report",
+}
+
+
+@tool
+def fake_data_tool(ticker: str) -> str:
+    """返回模拟数据"""
+    return f"data for {ticker}"
+
+
+def _make_fake_analyst(analyst_type, active, peak):
+    """模拟分析师：第一次请求工具，拿到工具结果后输出报告"""
+    def fake_analyst(state):
+        with active["lock"]:
+            active["count"] += 1
+            peak["value"] = max(peak["value"], active["count"])
+        time.sleep(0.05)
+        with active["lock"]:
+            active["count"] -= 1
+
+        # 每个分析师只能看到自己通道里的工具结果
+        tool_results = [m for m in state["messages"] if getattr(m, "type", "") == "tool"]
+        if not tool_results:
+            return {"messages": [AIMessage(
+                content="",
+                tool_calls=[{"name": "fake_data_tool", "args": {"ticker": analyst_type}, "id": f"call_{analyst_type}"}],
+            )]}
+        assert len(tool_results) == 1
+        report = f"{analyst_type} report: {tool_results[0].content}"
+        return {"messages": [AIMessage(content=report)], REPORT_KEYS[analyst_type]: report}
+    return fake_analyst
+
+
+def _fake_bull(state):
+    debate = dict(state["investment_debate_state"])
+    debate["count"] = 2
+    debate["current_response"] = "Bull: " + "|".join(state[k] for k in REPORT_KEYS.values())
+    return {"investment_debate_state": debate}
+
+
+def _fake_node(key, value):
+    def node(state):
+        return {key: value}
+    return node
+
+
+@pytest.fixture
+def parallel_setup(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    active = {"count": 0, "lock": threading.Lock()}
+    peak = {"value": 0}
+
+    monkeypatch.setattr(graph_setup, "create_market_analyst", lambda llm, tk: _make_fake_analyst("market", active, peak))
+    monkeypatch.setattr(graph_setup, "create_social_media_analyst", lambda llm, tk: _make_fake_analyst("social", active, peak))
+    monkeypatch.setattr(graph_setup, "create_news_analyst", lambda llm, tk: _make_fake_analyst("news", active, peak))
+    monkeypatch.setattr(graph_setup, "create_fundamentals_analyst", lambda llm, tk: _make_fake_analyst("fundamentals", active, peak))
+    monkeypatch.setattr(graph_setup, "create_bull_researcher", lambda llm, mem: _fake_bull)
+    monkeypatch.setattr(graph_setup, "create_bear_researcher", lambda llm, mem: _fake_bull)
+    monkeypatch.setattr(graph_setup, "create_research_manager", lambda llm, mem: _fake_node("investment_plan", "plan"))
+    monkeypatch.setattr(graph_setup, "create_trader", lambda llm, mem: _fake_node("trader_investment_plan", "trade"))
+    risk_done = {"count": 3, "latest_speaker": "Neutral", "history": ""}
+    monkeypatch.setattr(graph_setup, "create_risky_debator", lambda llm: _fake_node("risk_debate_state", risk_done))
+    monkeypatch.setattr(graph_setup, "create_safe_debator", lambda llm: _fake_node("risk_debate_state", risk_done))
+    monkeypatch.setattr(graph_setup, "create_neutral_debator", lambda llm: _fake_node("risk_debate_state", risk_done))
+    monkeypatch.setattr(graph_setup, "create_risk_manager", lambda llm, mem: _fake_node("final_trade_decision", "买入"))
+
+    tool_nodes = {analyst: ToolNode([fake_data_tool]) for analyst in ANALYSTS}
+    setup = graph_setup.GraphSetup(
+        None, None, None, tool_nodes, None, None, None, None, None,
+        ConditionalLogic(), {"parallel_analysts": True},
+    )
+    return setup, peak
+
+
+def test_parallel_analysts_join_before_bull(parallel_setup):
+    """并行模式下所有报告都应在Bull Researcher之前生成"""
+    setup, peak = parallel_setup
+    graph = setup.setup_graph(ANALYSTS)
+
+    state = Propagator().create_initial_state("000001", "2025-01-10")
+    final_state = graph.invoke(state, config={"recursion_limit": 50})
+
+    for analyst, key in REPORT_KEYS.items():
+        assert final_state[key] == f"{analyst} report: data for {analyst}"
+    assert final_state["investment_debate_state"]["current_response"].count("report") == 4
+    assert final_state["final_trade_decision"] == "买入"
+    # 分析师确实并发执行
+    assert peak["value"] > 1
+    for analyst in ANALYSTS:
+        assert f"{analyst.capitalize()} Analyst" in final_state["completed_nodes"]
+        # 独立消息通道在汇合前被清空
+        assert final_state[f"{analyst}_messages"] == []
+
+
+def test_parallel_analysts_skip_completed_nodes(parallel_setup):
+    """断点续传：已完成的分析师节点不应再次执行"""
+    setup, _ = parallel_setup
+    graph = setup.setup_graph(ANALYSTS)
+
+    state = Propagator().create_initial_state("000001", "2025-01-10")
+    state["market_report"] = "restored market report"
+    state["completed_nodes"] = ["Market Analyst"]
+    final_state = graph.invoke(state, config={"recursion_limit": 50})
+
+    assert final_state["market_report"] == "restored market report"
+    assert final_state["news_report"] == "news report: data for news"
+
+
+def test_sequential_mode_unchanged(parallel_setup):
+    """默认串行模式仍然按顺序执行所有分析师"""
+    setup, peak = parallel_setup
+    graph = setup.setup_graph(ANALYSTS, parallel_analysts=False)
+
+    state = Propagator().create_initial_state("000001", "2025-01-10")
+    final_state = graph.invoke(state, config={"recursion_limit": 80})
+
+    assert final_state["fundamentals_report"].startswith("fundamentals report")
+    assert peak["value"] == 1
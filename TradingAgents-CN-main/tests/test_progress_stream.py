@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+测试进度事件流
+验证只追加变化字段、增量读取、半行保护、最新分析指针以及旧版快照兼容
+"""
+
+import json
+
+import pytest
+
+from web.utils import async_progress_tracker, progress_stream
+from web.utils.async_progress_tracker import (
+    AsyncProgressTracker, get_latest_analysis_id, get_progress_by_id,
+)
+from web.utils.progress_stream import FileProgressStream, ProgressStreamReader
+
+
+@pytest.fixture(autouse=True)
+def file_streams(tmp_path, monkeypatch):
+    """所有测试使用临时目录下的文件事件流"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("REDIS_ENABLED", "false")
+    progress_stream.reset_progress_streams()
+    yield
+    progress_stream.reset_progress_streams()
+
+
+def test_reader_only_applies_new_events(tmp_path):
+    """读取器记住偏移，每次只解析新增事件；写到一半的行留到下次"""
+    stream = FileProgressStream(tmp_path / "events")
+    stream.append("a1", {"status": "running", "progress_percentage": 0.0, "steps": [1, 2, 3]})
+    reader = ProgressStreamReader(stream, "a1")
+
+    assert reader.poll() == {"status": "running", "progress_percentage": 0.0, "steps": [1, 2, 3]}
+    first_offset = reader.offset
+
+    stream.append("a1", {"progress_percentage": 40.0})
+    with open(stream._events_path("a1"), "a", encoding="utf-8") as f:
+        f.write('{"progress_percentage": 5')  # 尚未写完的一行
+
+    progress = reader.poll()
+    assert progress["progress_percentage"] == 40.0
+    assert reader.events_read == 2
+    assert reader.offset > first_offset
+
+    with open(stream._events_path("a1"), "a", encoding="utf-8") as f:
+        f.write('0.0, "status": "completed"}\n')
+    progress = reader.poll()
+    assert progress["progress_percentage"] == 50.0
+    assert progress["status"] == "completed"
+    assert progress["steps"] == [1, 2, 3]
+    assert reader.events_read == 3
+
+
+def test_tracker_appends_only_changed_fields():
+    """第一条事件是完整状态，之后每条事件只包含变化的字段"""
+    tracker = AsyncProgressTracker("run-1", ["market"], 1, "dashscope")
+    tracker.update_progress("📊 开始市场分析")
+    tracker.mark_completed("分析完成", results={"decision": {"action": "买入"}})
+
+    path = progress_stream.get_file_progress_stream()._events_path("run-1")
+    events = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert "steps" in events[0]
+    assert all("steps" not in event for event in events[1:])
+    assert all("analysis_id" not in event for event in events[1:])
+    assert events[-1]["raw_results"] == {"decision": {"action": "买入"}}
+
+    progress = get_progress_by_id("run-1")
+    assert progress["status"] == "completed"
+    assert progress["progress_percentage"] == 100.0
+    assert progress == json.loads(json.dumps(async_progress_tracker.safe_serialize(tracker.progress_data)))
+
+
+def test_latest_pointer_tracks_most_recent_analysis():
+    """最新分析指针在分析开始时更新"""
+    assert get_latest_analysis_id() is None
+    AsyncProgressTracker("run-old", ["market"], 1, "dashscope")
+    AsyncProgressTracker("run-new", ["market"], 1, "dashscope")
+    assert get_latest_analysis_id() == "run-new"
+
+
+def test_legacy_snapshot_fallback(tmp_path):
+    """升级前写入的整份快照文件仍可读取"""
+    legacy = tmp_path / "data" / "progress_legacy-1.json"
+    legacy.parent.mkdir(parents=True, exist_ok=True)
+    legacy.write_text(json.dumps({"analysis_id": "legacy-1", "status": "completed"}), encoding="utf-8")
+
+    assert get_progress_by_id("legacy-1")["status"] == "completed"
+    assert get_latest_analysis_id() == "legacy-1"
+    assert get_progress_by_id("missing") is None
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+测试批量并发分析
+验证 propagate_many 共享同一图实例并发运行，且每只股票的状态互相隔离
+"""
+
+import json
+import threading
+import time
+
+import pytest
+
+from tradingagents.default_config import DEFAULT_CONFIG
+from tradingagents.graph import trading_graph
+from tradingagents.graph.trading_graph import TradingAgentsGraph
+
+
+class FakeCompiledGraph:
+    """模拟编译后的图：记录并发数，并按股票生成最终状态"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def invoke(self, state, **kwargs):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.05)
+        with self.lock:
+            self.active -= 1
+
+        ticker = state["company_of_interest"]
+        if ticker == "FAIL":
+            raise RuntimeError("模拟分析失败")
+        final_state = dict(state)
+        for key in ["market_report", "sentiment_report", "news_report", "fundamentals_report",
+                    "investment_plan", "trader_investment_plan"]:
+            final_state[key] = f"{ticker} {key}"
+        final_state["investment_debate_state"] = {
+            "bull_history": "", "bear_history": "", "history": "",
+            "current_response": "", "judge_decision": f"{ticker} 研究结论",
+        }
+        final_state["risk_debate_state"] = {
+            "risky_history": "", "safe_history": "", "neutral_history": "",
+            "history": "", "judge_decision": f"{ticker} 风险结论",
+        }
+        final_state["final_trade_decision"] = f"{ticker} 买入"
+        return final_state
+
+
+class FakeSignalProcessor:
+    def process_signal(self, full_signal, stock_symbol=None):
+        return {"action": "买入", "symbol": stock_symbol, "reasoning": full_signal}
+
+
+@pytest.fixture
+def graph(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    config = DEFAULT_CONFIG.copy()
+    config.update({
+        "llm_provider": "openai",
+        "backend_url": "http://localhost:1/v1",
+        "deep_think_llm": "gpt-4o-mini",
+        "quick_think_llm": "gpt-4o-mini",
+        "memory_enabled": False,
+        "results_dir": str(tmp_path / "results"),
+        "llm_rate_limits": {"openai": 50},
+    })
+    graph = TradingAgentsGraph(["market"], config=config)
+    graph.graph = FakeCompiledGraph()
+    graph.signal_processor = FakeSignalProcessor()
+    return graph
+
+
+def test_propagate_many_runs_concurrently_with_isolated_state(graph, tmp_path):
+    """并发分析的结果、反思状态和日志文件按股票隔离"""
+    tickers = ["000001", "600519", "AAPL", "FAIL"]
+    results = graph.propagate_many(tickers, "2025-01-10", max_concurrency=4)
+
+    assert list(results) == tickers
+    assert graph.graph.peak > 1
+    for ticker in ["000001", "600519", "AAPL"]:
+        assert results[ticker]["success"]
+        assert results[ticker]["decision"]["symbol"] == ticker
+        assert results[ticker]["final_state"]["market_report"] == f"{ticker} market_report"
+        assert graph.curr_states[ticker]["final_trade_decision"] == f"{ticker} 买入"
+
+        log_file = tmp_path / "eval_results" / ticker / "TradingAgentsStrategy_logs" / "full_states_log.json"
+        logged = json.loads(log_file.read_text())
+        assert list(logged) == ["2025-01-10"]
+        assert logged["2025-01-10"]["company_of_interest"] == ticker
+
+    assert results["FAIL"] == {"success": False, "error": "模拟分析失败"}
+    # 批量分析不会修改单次分析使用的实例状态
+    assert graph.curr_state is None
+    assert graph.ticker is None
+
+
+def test_propagate_keeps_single_ticker_state(graph):
+    """单只股票分析仍然设置 curr_state / ticker / log_states_dict"""
+    graph.propagate_many(["600519"], "2025-01-10")
+    final_state, decision = graph.propagate("000001", "2025-01-10")
+
+    assert graph.ticker == "000001"
+    assert graph.curr_state is final_state
+    assert list(graph.log_states_dict) == ["2025-01-10"]
+    assert graph.log_states_dict["2025-01-10"]["company_of_interest"] == "000001"
+    assert decision["symbol"] == "000001"
+
+
+def test_provider_rate_limiter_shared(graph):
+    """同一提供商的LLM共用一个限流器"""
+    limiter = trading_graph.get_provider_rate_limiter("openai", 50.0)
+    assert graph.deep_thinking_llm.rate_limiter is limiter
+    assert graph.quick_thinking_llm.rate_limiter is limiter
+
+    graph.propagate_many([], "2025-01-10", requests_per_second=10)
+    assert graph.quick_thinking_llm.rate_limiter.requests_per_second == 10
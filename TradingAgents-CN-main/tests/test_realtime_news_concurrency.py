@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+测试实时新闻聚合器的并发获取
+验证各新闻源并发执行、整体截止时间、高相关性新闻提前返回以及新闻源统计
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from tradingagents.dataflows import realtime_news_utils
+from tradingagents.dataflows.realtime_news_utils import NewsItem, RealtimeNewsAggregator
+
+
+def _news(prefix, count, relevance=0.9):
+    now = datetime.now()
+    return [
+        NewsItem(
+            title=f"{prefix} headline number {i}",
+            content="content",
+            source=prefix,
+            publish_time=now - timedelta(minutes=i),
+            url="",
+            urgency="low",
+            relevance_score=relevance,
+        )
+        for i in range(count)
+    ]
+
+
+def _source(delay, items):
+    def fetch(ticker, hours_back):
+        time.sleep(delay)
+        return list(items)
+    return fetch
+
+
+@pytest.fixture
+def aggregator(monkeypatch):
+    monkeypatch.delenv("NEWSAPI_KEY", raising=False)
+    realtime_news_utils.reset_news_source_metrics()
+    yield RealtimeNewsAggregator()
+    # 等待被跳过的慢速新闻源在后台结束，避免影响后续测试
+    for thread in threading.enumerate():
+        if thread.name.startswith("news-source"):
+            thread.join(timeout=5)
+    realtime_news_utils.reset_news_source_metrics()
+
+
+def test_sources_run_concurrently(aggregator):
+    """总耗时接近最慢的新闻源，而不是各新闻源耗时之和"""
+    aggregator._get_finnhub_realtime_news = _source(0.3, _news("finnhub", 2, relevance=0.3))
+    aggregator._get_alpha_vantage_news = _source(0.3, _news("alpha", 2, relevance=0.3))
+    aggregator._get_chinese_finance_news = _source(0.3, _news("chinese", 2, relevance=0.3))
+
+    start = time.time()
+    news = aggregator.get_realtime_stock_news("AAPL", max_news=10)
+    elapsed = time.time() - start
+
+    assert len(news) == 6
+    assert elapsed < 0.8
+
+
+def test_deadline_skips_slow_source(aggregator):
+    """超过截止时间后返回已到达的新闻，并记录超时"""
+    aggregator._get_finnhub_realtime_news = _source(0.05, _news("finnhub", 2, relevance=0.3))
+    aggregator._get_alpha_vantage_news = _source(1.0, _news("alpha", 2))
+    aggregator._get_chinese_finance_news = _source(0.05, [])
+
+    start = time.time()
+    news = aggregator.get_realtime_stock_news("AAPL", max_news=10, deadline=0.3)
+    elapsed = time.time() - start
+
+    assert elapsed < 1.0
+    assert {item.source for item in news} == {"finnhub"}
+
+    metrics = aggregator.get_source_metrics()
+    assert metrics["Alpha Vantage"]["timeouts"] == 1
+    assert metrics["FinnHub"]["hit_rate"] == 1.0
+    assert metrics["中文财经"]["hits"] == 0
+
+
+def test_early_return_with_enough_relevant_news(aggregator):
+    """已收集到足够的高相关性新闻时不再等待慢速新闻源"""
+    aggregator._get_finnhub_realtime_news = _source(0.05, _news("finnhub", 5, relevance=1.0))
+    aggregator._get_alpha_vantage_news = _source(1.0, _news("alpha", 5))
+    aggregator._get_chinese_finance_news = _source(1.0, _news("chinese", 5))
+
+    start = time.time()
+    news = aggregator.get_realtime_stock_news("AAPL", max_news=3, deadline=10)
+    elapsed = time.time() - start
+
+    assert elapsed < 1.0
+    assert len(news) == 3
+    assert all(item.source == "finnhub" for item in news)
+
+    metrics = aggregator.get_source_metrics()
+    assert metrics["FinnHub"]["calls"] == 1
+    assert metrics["FinnHub"]["avg_latency"] > 0
+    assert metrics["Alpha Vantage"]["timeouts"] == 0
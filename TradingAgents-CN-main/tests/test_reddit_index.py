@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+测试离线Reddit语料索引
+验证按 (分类, 日期) 分区的索引结果与逐行扫描一致、只读取当天分区，以及JSONL变化后重建
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+from tradingagents.dataflows import reddit_utils
+from tradingagents.dataflows.reddit_utils import build_reddit_index, fetch_top_from_category
+
+
+def _post(day, hour, title, selftext="", ups=1):
+    created = datetime(2024, 5, day, hour, tzinfo=timezone.utc).timestamp()
+    return {"created_utc": created, "title": title, "selftext": selftext,
+            "url": f"https://reddit.com/{title}", "ups": ups}
+
+
+def _write(path, posts):
+    with open(path, "w", encoding="utf-8") as f:
+        for post in posts:
+            f.write(json.dumps(post) + "\n")
+        f.write("\n")
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    monkeypatch.delenv("REDDIT_INDEX_ENABLED", raising=False)
+    monkeypatch.setattr(reddit_utils, "_index_state", {})
+    company = tmp_path / "company_news"
+    company.mkdir()
+    _write(company / "stocks.jsonl", [
+        _post(1, 9, "Apple earnings beat", ups=50),
+        _post(1, 10, "Nvidia rally", "AAPL also up", ups=80),
+        _post(1, 11, "Market wrap", "nothing here", ups=99),
+        _post(1, 23, "Late apple news", ups=50),
+        _post(2, 1, "Tesla recall", ups=10),
+    ])
+    _write(company / "investing.jsonl", [
+        _post(1, 8, "Snap Inc. guidance", ups=5),
+        _post(1, 12, "snapshot of the day", ups=7),
+        _post(2, 3, "Apple buyback", ups=3),
+    ])
+    world = tmp_path / "global_news"
+    world.mkdir()
+    _write(world / "worldnews.jsonl", [_post(1, h, f"headline {h}", ups=h) for h in range(8)])
+    return tmp_path
+
+
+def _scan(monkeypatch, *args, **kwargs):
+    """关闭索引得到逐行扫描的参考结果"""
+    monkeypatch.setenv("REDDIT_INDEX_ENABLED", "false")
+    try:
+        return fetch_top_from_category(*args, **kwargs)
+    finally:
+        monkeypatch.delenv("REDDIT_INDEX_ENABLED")
+
+
+@pytest.mark.parametrize("category,date,limit,query", [
+    ("company_news", "2024-05-01", 4, "AAPL"),
+    ("company_news", "2024-05-01", 2, "AAPL"),
+    ("company_news", "2024-05-01", 4, "SNAP"),
+    ("company_news", "2024-05-02", 4, "TSLA"),
+    ("company_news", "2024-05-01", 4, None),
+    ("global_news", "2024-05-01", 3, None),
+    ("global_news", "2024-05-03", 3, None),
+])
+def test_index_matches_linear_scan(corpus, monkeypatch, category, date, limit, query):
+    """索引查询与逐行扫描返回相同的帖子和顺序"""
+    expected = _scan(monkeypatch, category, date, limit, query, data_path=str(corpus))
+    assert fetch_top_from_category(category, date, limit, query, data_path=str(corpus)) == expected
+
+
+def test_lookup_reads_only_the_date_partition(corpus, monkeypatch):
+    """建好索引后查询不再打开JSONL文件"""
+    assert build_reddit_index(str(corpus)) == 3
+    opened = []
+    real_open = open
+
+    def tracking_open(path, *args, **kwargs):
+        opened.append(os.path.basename(str(path)))
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr("builtins.open", tracking_open)
+    posts = fetch_top_from_category("company_news", "2024-05-01", 4, "AAPL", data_path=str(corpus))
+
+    assert [post["title"] for post in posts] == ["Nvidia rally", "Apple earnings beat"]
+    assert not any(name.endswith(".jsonl") for name in opened)
+    assert "2024-05-01.json" in opened
+
+
+def test_changed_jsonl_rebuilds_index(corpus):
+    """JSONL文件变化后自动重建索引"""
+    assert fetch_top_from_category("global_news", "2024-05-04", 8, data_path=str(corpus)) == []
+
+    _write(corpus / "global_news" / "worldnews.jsonl", [_post(4, 1, "new day", ups=3)])
+    posts = fetch_top_from_category("global_news", "2024-05-04", 8, data_path=str(corpus))
+    assert [post["title"] for post in posts] == ["new day"]
+    # 旧日期的分区随重建删除
+    assert fetch_top_from_category("global_news", "2024-05-01", 8, data_path=str(corpus)) == []
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+测试运行级数据上下文
+验证按会话ID登记的上下文在预获取、工具调用和数据提供器之间共享信息字典与日线数据，
+不同日期窗口的日线数据互相复用，以及 propagate 复用登记的上下文且不提前关闭
+"""
+
+import pandas as pd
+import pytest
+
+from tradingagents.dataflows import data_source_manager
+from tradingagents.dataflows.akshare_utils import AKShareProvider
+from tradingagents.dataflows.data_context import (
+    DataContext, close_data_context, get_data_context, get_run_data_context,
+    open_data_context, use_data_context,
+)
+from tradingagents.dataflows.data_source_manager import ChinaDataSource, DataSourceManager
+from tradingagents.graph.trading_graph import TradingAgentsGraph
+
+
+def daily(start, end):
+    days = pd.bdate_range(start, end)
+    return pd.DataFrame({"date": days.strftime("%Y-%m-%d"), "close": range(len(days))})
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setenv("ENABLE_OHLCV_STORE", "false")
+    return object.__new__(DataSourceManager)
+
+
+def test_frames_reused_across_windows(manager):
+    requests = []
+
+    def fetch(start, end):
+        requests.append((start, end))
+        return daily(start, end)
+
+    context = DataContext("000001", "2025-06-30")
+    with use_data_context(context):
+        # 预获取的30天窗口，随后工具请求更长的窗口
+        prepared = manager._fetch_ohlcv("000001", ChinaDataSource.AKSHARE, "2025-06-01", "2025-06-30", fetch)
+        wide = manager._fetch_ohlcv("000001", ChinaDataSource.AKSHARE, "2025-05-28", "2025-06-30", fetch)
+        again = manager._fetch_ohlcv("000001", ChinaDataSource.AKSHARE, "2025-05-28", "2025-06-30", fetch)
+        inner = manager._fetch_ohlcv("000001", ChinaDataSource.AKSHARE, "2025-06-10", "2025-06-20", fetch)
+        # 不同数据源分开保存
+        manager._fetch_ohlcv("000001", ChinaDataSource.TUSHARE, "2025-06-10", "2025-06-20", fetch)
+
+    assert requests == [("2025-06-01", "2025-06-30"), ("2025-05-28", "2025-06-30"),
+                        ("2025-06-10", "2025-06-20")]
+    assert again["date"].tolist() == wide["date"].tolist()
+    assert inner["date"].tolist() == [d for d in prepared["date"] if "2025-06-10" <= d <= "2025-06-20"]
+    stats = context.get_stats()
+    assert stats["frame_hits"] == 2 and stats["frame_loads"] == 3
+
+    # 调用方修改返回的数据不影响上下文中保存的数据
+    wide.loc[:, "close"] = -1
+    with use_data_context(context):
+        assert (manager._fetch_ohlcv("000001", ChinaDataSource.AKSHARE, "2025-05-28", "2025-06-30",
+                                     fetch)["close"] >= 0).all()
+
+
+def test_info_dicts_shared_between_provider_instances(monkeypatch):
+    calls = []
+
+    def lookup(symbol, market):
+        calls.append(symbol)
+        return type("Record", (), {"name": "平安银行"})()
+
+    monkeypatch.setattr("tradingagents.dataflows.security_master.lookup_security", lookup)
+
+    def provider():
+        instance = object.__new__(AKShareProvider)
+        instance.connected = True
+        return instance
+
+    context = DataContext("000001", "2025-06-30")
+    with use_data_context(context):
+        info = provider().get_stock_info("000001")
+        info["name"] = "被调用方修改"
+        assert provider().get_stock_info("000001")["name"] == "平安银行"
+    assert calls == ["000001"]
+
+    # 没有数据上下文时每次都获取
+    provider().get_stock_info("000001")
+    assert calls == ["000001", "000001"]
+
+
+class FakeManager:
+    def __init__(self):
+        self.calls = []
+
+    def get_stock_data(self, symbol, start_date, end_date):
+        self.calls.append((symbol, start_date, end_date))
+        return f"{symbol} {start_date}~{end_date}"
+
+
+def test_propagate_reuses_registered_context(monkeypatch, tmp_path):
+    # 断点目录相对当前目录，放到临时目录中
+    monkeypatch.chdir(tmp_path)
+    fake = FakeManager()
+    monkeypatch.setattr(data_source_manager, "_data_source_manager", fake)
+
+    graph = object.__new__(TradingAgentsGraph)
+    graph.config = {"data_prefetch": False}
+    graph.selected_analysts = []
+
+    def run_graph(company_name, trade_date):
+        context = get_data_context()
+        result = data_source_manager.get_china_stock_data_unified(company_name, "2025-06-01", trade_date)
+        return context, result
+
+    graph._run_graph = run_graph
+
+    run_id = "analysis_test"
+    context = open_data_context(run_id, "000001", "2025-06-30")
+    try:
+        assert open_data_context(run_id, "000001", "2025-06-30") is context
+        # 预获取阶段
+        with use_data_context(context):
+            data_source_manager.get_china_stock_data_unified("000001", "2025-06-01", "2025-06-30")
+
+        used, result = graph._run_analysis("000001", "2025-06-30", run_id=run_id)
+        assert used is context
+        assert result == "000001 2025-06-01~2025-06-30"
+        assert len(fake.calls) == 1
+        # 图运行结束后上下文仍可用，由登记方关闭
+        assert get_run_data_context(run_id) is context and not context._closed
+    finally:
+        close_data_context(run_id)
+
+    assert get_run_data_context(run_id) is None
+    assert context._closed
+
+
+def test_failure_results_are_not_memoized():
+    """“❌”文本和占位名称的信息字典不在运行内复用，后续调用重新获取"""
+    from tradingagents.dataflows.data_context import context_cached
+
+    results = iter(["❌ 网络错误", "行情数据", {"symbol": "000001", "name": "股票000001"},
+                    {"symbol": "000001", "name": "平安银行"}])
+    calls = []
+
+    @context_cached("flaky")
+    def fetch(kind):
+        calls.append(kind)
+        return next(results)
+
+    context = DataContext("000001", "2025-06-30")
+    with use_data_context(context):
+        assert fetch("text") == "❌ 网络错误"
+        assert fetch("text") == "行情数据"
+        assert fetch("text") == "行情数据"
+        assert fetch("info")["name"] == "股票000001"
+        assert fetch("info")["name"] == "平安银行"
+        assert fetch("info")["name"] == "平安银行"
+    assert calls == ["text", "text", "info", "info"]
+    assert context.get_stats()["failures_discarded"] == 2
+
+    # 预取得到的失败结果同样不保留
+    prefetched = iter(["❌ 超时", "新闻"])
+    fetch_news = context_cached("news")(lambda ticker: next(prefetched))
+    context.prefetch(fetch_news, ticker="000001").result()
+    with use_data_context(context):
+        assert fetch_news("000001") == "新闻"
+    context.close()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+测试统一证券主数据
+验证代码规范化、按市场的来源降级、前缀/拼音搜索、本地快照以及调用方改为内存查找
+"""
+
+import threading
+import time
+
+import pytest
+
+from tradingagents.dataflows import security_master
+from tradingagents.dataflows.akshare_utils import AKShareProvider
+from tradingagents.dataflows.data_source_manager import DataSourceManager
+from tradingagents.dataflows.security_master import (
+    CHINA_A, HONG_KONG, US, SecurityMaster, SecurityRecord, normalize_symbol,
+)
+from tradingagents.utils.news_filter import get_company_name
+
+
+def china_records():
+    return [
+        SecurityRecord(CHINA_A, "000001", "平安银行", industry="银行", area="深圳",
+                       list_date="19910403", board="主板", pinyin="payh"),
+        SecurityRecord(CHINA_A, "600036", "招商银行", industry="银行", area="深圳",
+                       list_date="20020409", board="主板", pinyin="zsyh"),
+        SecurityRecord(CHINA_A, "000002", "万科A", industry="全国地产", area="深圳",
+                       list_date="19910129", board="主板", pinyin="wka"),
+        SecurityRecord(CHINA_A, "688981", "中芯国际", industry="半导体", area="上海",
+                       list_date="20200716", board="科创板", pinyin="zxgj"),
+    ]
+
+
+def failing_loader():
+    raise ConnectionError("network down")
+
+
+def make_master(tmp_path, loaders=None, **kwargs):
+    loaders = loaders if loaders is not None else [
+        (CHINA_A, failing_loader),
+        (CHINA_A, china_records),
+        (HONG_KONG, lambda: [SecurityRecord(HONG_KONG, "00700", "腾讯控股")]),
+        (US, lambda: [SecurityRecord(US, "AAPL", "苹果")]),
+    ]
+    kwargs.setdefault("markets", [CHINA_A, HONG_KONG, US])
+    return SecurityMaster(store_dir=str(tmp_path), loaders=loaders, **kwargs)
+
+
+@pytest.fixture
+def global_master(tmp_path, monkeypatch):
+    """把全局证券主数据替换为已刷新的测试实例"""
+    monkeypatch.delenv("SECURITY_MASTER_ENABLED", raising=False)
+    master = make_master(tmp_path)
+    assert master.refresh()
+    monkeypatch.setattr(security_master, "_security_master", master)
+    return master
+
+
+@pytest.mark.parametrize("symbol,expected", [
+    ("000001", (CHINA_A, "000001")),
+    ("000001.SZ", (CHINA_A, "000001")),
+    ("sh600036", (CHINA_A, "600036")),
+    ("0700.HK", (HONG_KONG, "00700")),
+    ("700", (HONG_KONG, "00700")),
+    ("aapl", (US, "AAPL")),
+    ("", None),
+])
+def test_normalize_symbol(symbol, expected):
+    assert normalize_symbol(symbol) == expected
+
+
+def test_lookup_and_search(tmp_path):
+    """精确查找与代码/名称/拼音前缀搜索，名称包含关键词的结果排在后面"""
+    master = make_master(tmp_path)
+    assert master.refresh()
+
+    assert master.get("000001.SZ").name == "平安银行"
+    assert master.get_name("0700.HK") == "腾讯控股"
+    assert master.get_name("AAPL") == "苹果"
+    assert master.get("999999") is None
+    assert master.find_by_name("招商银行").symbol == "600036"
+
+    assert [r.symbol for r in master.search("00000")] == ["000001", "000002"]
+    assert [r.symbol for r in master.search("payh")] == ["000001"]
+    assert [r.name for r in master.search("银行")] == ["平安银行", "招商银行"]
+    assert [r.symbol for r in master.search("招商")] == ["600036"]
+    assert [r.symbol for r in master.search("0", market=HONG_KONG)] == ["00700"]
+    assert len(master.search("0", limit=2)) == 2
+
+    # 带交易所后缀/前缀的代码和代码片段同样能搜到
+    assert [r.symbol for r in master.search("000001.SZ")] == ["000001"]
+    assert [r.symbol for r in master.search("sh600036", market=CHINA_A)] == ["600036"]
+    assert [r.symbol for r in master.search("0036")] == ["600036"]
+    assert [r.symbol for r in master.search("8981.SH")] == ["688981"]
+
+
+def test_snapshot_persisted_and_refreshed_in_background(tmp_path):
+    """快照保存到本地；过期快照先继续使用，后台刷新失败的市场保留旧数据"""
+    assert make_master(tmp_path).refresh()
+
+    # 新进程：快照未过期时不访问数据源
+    calls = []
+    release = threading.Event()
+
+    def counting_loader():
+        calls.append(1)
+        release.wait(5)
+        return [SecurityRecord(CHINA_A, "000001", "平安银行(新)")]
+
+    fresh = make_master(tmp_path, loaders=[(CHINA_A, counting_loader)])
+    assert fresh.get_name("000001") == "平安银行"
+    assert calls == []
+
+    # 快照过期：立即返回旧数据，后台刷新后替换；港股来源失败时保留旧港股数据
+    stale = make_master(tmp_path, loaders=[(CHINA_A, counting_loader), (HONG_KONG, failing_loader)],
+                        max_age_hours=0)
+    assert stale.get_name("000001") == "平安银行"
+    release.set()
+    deadline = time.time() + 5
+    while stale.get_status()["refreshing"] and time.time() < deadline:
+        time.sleep(0.01)
+    assert calls == [1]
+    assert stale.get_name("000001") == "平安银行(新)"
+    assert stale.get_name("00700") == "腾讯控股"
+    assert stale.get("600036") is None
+
+
+def test_call_sites_use_memory_lookup(global_master):
+    """AKShare、数据源管理器搜索和新闻过滤的名称解析走内存查找"""
+    provider = object.__new__(AKShareProvider)
+    provider.connected = True
+    provider.ak = None  # 命中时不应访问AKShare
+    assert provider.get_stock_info("600036")["name"] == "招商银行"
+    assert provider.get_hk_stock_info("0700.HK")["name"] == "腾讯控股"
+
+    manager = object.__new__(DataSourceManager)
+    info = manager.get_stock_info("688981")
+    assert info["name"] == "中芯国际"
+    assert info["industry"] == "半导体"
+    assert info["source"] == "security_master"
+
+    report = manager.search_china_stocks_tushare("zsyh")
+    assert "代码: 600036" in report and "行业: 银行" in report
+    assert manager.search_china_stocks_tushare("不存在的公司").startswith("❌ 未找到")
+    assert "代码: 000001" in manager.search_china_stocks_tushare("000001.SZ")
+
+    assert get_company_name("688981.SH") == "中芯国际"
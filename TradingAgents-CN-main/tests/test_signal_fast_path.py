@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+测试信号处理的规则提取快速路径
+验证结构化报告直接解析、缺失或矛盾时回退LLM，以及命中率统计
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from tradingagents.graph.signal_processing import SignalProcessor, extract_structured_decision
+
+
+STRUCTURED_REPORT = """## 风险委员会结论
+三位分析师对公司盈利能力的判断基本一致，估值处于历史中位。
+
+投资建议: 买入
+**目标价位**: ¥1,850.50
+**置信度**: 75%
+**风险评分**: 0.4
+最终交易建议: **买入**
+"""
+
+
+class FakeLLM:
+    """记录调用次数并返回固定JSON的模型"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        return SimpleNamespace(content='{"action": "卖出", "target_price": 9.5, '
+                                       '"confidence": 0.6, "risk_score": 0.7, "reasoning": "LLM解析"}')
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    monkeypatch.delenv("SIGNAL_FAST_PATH", raising=False)
+    llm = FakeLLM()
+    return SignalProcessor(llm), llm
+
+
+def test_structured_sections_are_parsed():
+    """带标签的结构化段落解析为决策，区间取中值、比例统一到0-1"""
+    decision = extract_structured_decision(STRUCTURED_REPORT)
+    assert decision["action"] == "买入"
+    assert decision["target_price"] == 1850.5
+    assert decision["confidence"] == 0.75
+    assert decision["risk_score"] == 0.4
+    assert decision["reasoning"].startswith("三位分析师")
+
+    ranged = extract_structured_decision(
+        "最终交易建议：**持有**\n目标价位：¥12-14元\n置信度：8/10\n风险评分：0.3")
+    assert ranged["action"] == "持有"
+    assert ranged["target_price"] == 13.0
+    assert ranged["confidence"] == 0.8
+
+
+@pytest.mark.parametrize("text", [
+    "投资建议: 买入\n目标价位: 20\n置信度: 0.7",                               # 缺少风险评分
+    "投资建议: 买入\n投资建议: 卖出\n目标价位: 20\n置信度: 0.7\n风险评分: 0.5",   # 建议矛盾
+    "投资建议: 买入\n短期目标价: 20\n长期目标价: 26\n置信度: 0.7\n风险评分: 0.5",  # 多个目标价
+    "建议逢低买入，目标价位计算参考行业估值。置信度: 0.7 风险评分: 0.5",          # 无明确标签
+    "投资建议: 买入\n目标价位: 20\n置信度: 0.7\n风险评分: 5",                  # 无单位，分制不明
+    "投资建议: 买入\n目标价位: 20\n置信度: 8\n风险评分: 0.5",
+    "投资建议: 买入\n目标价位: 20\n置信度: 80\n风险评分: 0.5",
+    "投资建议: 买入\n目标价位: 20\n置信度: 0.7\n风险等级: 1",                  # 风险档位不是评分
+    "投资建议: 买入\n目标价位: 20\n置信度: 0.7\n风险评级: 3/5",
+])
+def test_ambiguous_reports_are_rejected(text):
+    """任一字段缺失或前后矛盾时不做猜测"""
+    assert extract_structured_decision(text) is None
+
+
+def test_process_signal_skips_llm_on_hit_and_reports_rates(processor):
+    """命中时不调用LLM，未命中时回退LLM，统计命中率"""
+    signal_processor, llm = processor
+
+    decision = signal_processor.process_signal(STRUCTURED_REPORT, "600519")
+    assert decision["action"] == "买入"
+    assert llm.calls == 0
+
+    fallback = signal_processor.process_signal("综合来看建议谨慎，等待更明确的信号。", "600519")
+    assert fallback["action"] == "卖出"
+    assert llm.calls == 1
+
+    assert signal_processor.get_stats() == {"fast_path_hits": 1, "llm_fallbacks": 1, "hit_rate": 0.5}
+
+
+def test_fast_path_can_be_disabled(monkeypatch):
+    """SIGNAL_FAST_PATH=false 时总是调用LLM"""
+    monkeypatch.setenv("SIGNAL_FAST_PATH", "false")
+    llm = FakeLLM()
+    signal_processor = SignalProcessor(llm)
+    signal_processor.process_signal(STRUCTURED_REPORT, "600519")
+    assert llm.calls == 1
+
+
+def test_unitless_scores_fall_back_to_llm(processor):
+    """“风险评分: 5”不会被当作5%，而是交给LLM解析"""
+    signal_processor, llm = processor
+    decision = signal_processor.process_signal(STRUCTURED_REPORT.replace("0.4", "5"), "600519")
+    assert llm.calls == 1
+    assert decision["risk_score"] == 0.7
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+测试向量化指标窗口计算
+验证价格数据只解析一次，且结果与逐日重新计算一致
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from stockstats import wrap
+
+from tradingagents.dataflows import interface
+from tradingagents.dataflows import stockstats_utils
+from tradingagents.dataflows.stockstats_utils import StockstatsUtils
+
+
+SYMBOL = "TEST"
+INDICATORS = ["close_50_sma", "close_10_ema", "macd", "rsi", "boll_ub", "atr", "vwma", "mfi"]
+
+
+@pytest.fixture
+def price_dir(tmp_path, monkeypatch):
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2023-01-02", periods=400)
+    close = 100 + rng.normal(0, 1, len(dates)).cumsum()
+    data = pd.DataFrame({
+        "Date": dates.strftime("%Y-%m-%d"),
+        "Open": close + rng.normal(0, 0.5, len(dates)),
+        "High": close + 1,
+        "Low": close - 1,
+        "Close": close,
+        "Adj Close": close,
+        "Volume": rng.integers(1_000, 10_000, len(dates)),
+    })
+    price_dir = tmp_path / "market_data" / "price_data"
+    price_dir.mkdir(parents=True)
+    data.to_csv(price_dir / f"{SYMBOL}-YFin-data-2015-01-01-2025-03-25.csv", index=False)
+
+    monkeypatch.setattr(interface, "DATA_DIR", str(tmp_path))
+    stockstats_utils._load_stats_frame.cache_clear()
+    yield price_dir
+    stockstats_utils._load_stats_frame.cache_clear()
+
+
+def test_window_matches_per_day_computation(price_dir):
+    """窗口结果应与逐日重新包装计算的结果一致"""
+    raw = pd.read_csv(price_dir / f"{SYMBOL}-YFin-data-2015-01-01-2025-03-25.csv")
+    window = StockstatsUtils.get_stock_stats_window(
+        SYMBOL, INDICATORS, "2024-06-28", 30, str(price_dir)
+    )
+
+    assert window["Date"].iloc[0] == "2024-06-28"
+    assert window["Date"].is_monotonic_decreasing
+    assert window["Date"].iloc[-1] >= "2024-05-29"
+
+    for indicator in INDICATORS:
+        expected = wrap(raw.copy())
+        expected[indicator]
+        expected = expected.set_index("Date")[indicator]
+        for day, value in zip(window["Date"], window[indicator]):
+            assert value == pytest.approx(expected[day], nan_ok=True)
+
+
+def test_price_file_parsed_once(price_dir, monkeypatch):
+    """多次窗口查询只解析一次CSV"""
+    calls = {"count": 0}
+    original_read_csv = pd.read_csv
+
+    def counting_read_csv(*args, **kwargs):
+        calls["count"] += 1
+        return original_read_csv(*args, **kwargs)
+
+    monkeypatch.setattr(stockstats_utils.pd, "read_csv", counting_read_csv)
+
+    for indicator in ["close_50_sma", "rsi", "macd", "boll", "atr"]:
+        report = interface.get_stock_stats_indicators_window(
+            SYMBOL, indicator, "2024-06-28", 30, False
+        )
+        assert "2024-06-28: " in report
+        # 周末不应出现在离线结果中
+        assert "2024-06-23: " not in report
+
+    assert calls["count"] == 1
+
+
+def test_single_day_lookup(price_dir):
+    """单日查询复用同一缓存帧，非交易日返回提示"""
+    value = StockstatsUtils.get_stock_stats(SYMBOL, "rsi", "2024-06-28", str(price_dir))
+    assert isinstance(float(value), float)
+
+    holiday = StockstatsUtils.get_stock_stats(SYMBOL, "rsi", "2024-06-29", str(price_dir))
+    assert holiday == "N/A: Not a trading day (weekend or holiday)"
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+测试数据层的结构化结果
+验证日线数据的行情快照与文本按需渲染、股票信息不再经过文本解析，
+以及数据准备、基本面报告和信号处理直接读取结构化字段
+"""
+
+import pandas as pd
+import pytest
+
+from tradingagents.dataflows import data_source_manager, tushare_adapter
+from tradingagents.dataflows.data_context import DataContext, use_data_context
+from tradingagents.dataflows.data_source_manager import ChinaDataSource, DataSourceManager
+from tradingagents.dataflows.optimized_china_data import OptimizedChinaDataProvider
+from tradingagents.dataflows.stock_data_types import StockBars, StockInfo
+from tradingagents.graph.signal_processing import SignalProcessor
+from tradingagents.utils.stock_validator import StockDataPreparer
+
+
+def daily(closes, start="2025-06-23"):
+    days = pd.bdate_range(start, periods=len(closes))
+    return pd.DataFrame({"日期": days.strftime("%Y-%m-%d"), "开盘": closes, "收盘": closes,
+                         "最高": closes, "最低": closes, "成交量": [1000.0 * (i + 1) for i in range(len(closes))]})
+
+
+class FakeProvider:
+    def __init__(self, frame):
+        self.frame = frame
+        self.calls = 0
+
+    def get_stock_data(self, symbol, start_date, end_date):
+        self.calls += 1
+        return self.frame
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setenv("ENABLE_OHLCV_STORE", "false")
+    manager = object.__new__(DataSourceManager)
+    manager.current_source = ChinaDataSource.AKSHARE
+    manager.available_sources = [ChinaDataSource.AKSHARE]
+    provider = FakeProvider(daily([10.0, 10.5, 11.0, 12.0, 12.5]))
+    monkeypatch.setattr("tradingagents.dataflows.akshare_utils.get_akshare_provider", lambda: provider)
+    monkeypatch.setattr(data_source_manager, "_data_source_manager", manager)
+    return manager
+
+
+def test_quote_and_lazy_text():
+    rendered = []
+
+    def renderer(bars):
+        rendered.append(bars.symbol)
+        return "text"
+
+    bars = StockBars("000001", "akshare", "2025-06-23", "2025-06-27", daily([10.0, 12.5]), renderer)
+    quote = bars.quote
+    assert (quote.date, quote.price, quote.prev_close, quote.volume) == ("2025-06-24", 12.5, 10.0, 2000.0)
+    assert quote.change_pct == pytest.approx(25.0)
+    assert rendered == []
+
+    assert bars.text == "text" and bars.text == "text"
+    assert rendered == ["000001"]
+
+
+def test_bars_and_text_share_one_fetch(manager, monkeypatch):
+    bars = manager.get_stock_bars("000001", "2025-06-23", "2025-06-27")
+    assert bars.source == "akshare" and bars.quote.price == 12.5 and bars._text is None
+
+    # 文本接口保持原有格式
+    text = manager._get_akshare_data("000001", "2025-06-23", "2025-06-27")
+    assert "最新3天数据:" in text and "期间涨跌: +2.50 (+25.00%)" in text
+
+    # 运行内文本与结构化结果共用同一份日线数据
+    fake = FakeProvider(daily([10.0]))
+    monkeypatch.setattr("tradingagents.dataflows.akshare_utils.get_akshare_provider", lambda: fake)
+    with use_data_context(DataContext("000001", "2025-06-27")):
+        manager.get_stock_bars("000001", "2025-06-23", "2025-06-27")
+        manager._get_akshare_data("000001", "2025-06-23", "2025-06-27")
+    assert fake.calls == 1
+
+
+def test_tushare_info_read_without_text_parsing(manager, monkeypatch):
+    class FakeAdapter:
+        def get_stock_info(self, symbol):
+            return {"symbol": symbol, "name": "平安银行", "industry": "银行", "area": "深圳", "list_date": ""}
+
+    monkeypatch.setattr(tushare_adapter, "get_tushare_adapter", lambda: FakeAdapter())
+    monkeypatch.setattr(DataSourceManager, "_security_master_info", staticmethod(lambda *args, **kwargs: None))
+    manager.current_source = ChinaDataSource.TUSHARE
+
+    info = manager.get_stock_info("000001")
+    assert info == {"symbol": "000001", "name": "平安银行", "area": "深圳", "industry": "银行",
+                    "market": "未知", "list_date": "未知", "source": "tushare"}
+    assert StockInfo.from_dict("000001", {"name": "股票000001"}).is_valid is False
+
+
+def test_fundamentals_report_uses_quote(manager, monkeypatch):
+    monkeypatch.setattr(data_source_manager, "get_china_stock_info_unified",
+                        lambda symbol: {"symbol": symbol, "name": "平安银行"})
+    prices = []
+
+    def metrics(self, symbol, price_value):
+        prices.append(price_value)
+        return None
+
+    monkeypatch.setattr(OptimizedChinaDataProvider, "_get_real_financial_metrics", metrics)
+    provider = object.__new__(OptimizedChinaDataProvider)
+
+    report = provider._generate_fundamentals_report("000001", end_date="2025-06-27")
+    assert "**股票名称**: 平安银行" in report
+    assert "**当前股价**: ¥12.50" in report and "**涨跌幅**: +4.17%" in report
+    assert prices == [12.5]
+
+
+def test_preparer_does_not_render_text(manager, monkeypatch):
+    monkeypatch.setattr(data_source_manager, "get_china_stock_info_unified",
+                        lambda symbol: {"symbol": symbol, "name": "平安银行"})
+    monkeypatch.setattr(DataSourceManager, "_render_akshare_bars",
+                        lambda self, bars: pytest.fail("数据准备不应渲染文本"))
+
+    result = StockDataPreparer()._prepare_china_stock_data("000001", 30, "2025-06-27")
+    assert result.is_valid and result.stock_name == "平安银行" and result.has_historical_data
+
+    monkeypatch.setattr(data_source_manager, "get_china_stock_info_unified",
+                        lambda symbol: {"symbol": symbol, "name": f"股票{symbol}"})
+    assert not StockDataPreparer()._prepare_china_stock_data("000001", 30, "2025-06-27").is_valid
+
+
+def test_signal_price_estimation_uses_run_quote(manager):
+    processor = object.__new__(SignalProcessor)
+    text = "建议买入，当前价格: 99"
+    # 没有行情数据时从文本中匹配当前价
+    assert processor._smart_price_estimation(text, "买入", True, processor._current_price("000001")) == 113.85
+
+    with use_data_context(DataContext("000001", "2025-06-27")):
+        manager.get_stock_bars("000001", "2025-06-23", "2025-06-27")
+        assert processor._current_price("000001") == 12.5
+        assert processor._smart_price_estimation(text, "买入", True, processor._current_price("000001")) == 14.37
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+测试通达信连接池
+验证服务器按延迟排序、连接复用与失效连接丢弃，以及实时行情的批量合并请求
+"""
+
+import threading
+import time
+
+import pytest
+
+from tradingagents.dataflows import tdx_utils
+from tradingagents.dataflows.tdx_utils import TdxConnectionPool, TongDaXinDataProvider
+
+SERVER_DELAYS = {"10.0.0.1": 0.15, "10.0.0.2": 0.01, "10.0.0.3": None}
+
+
+class FakeTdxApi:
+    """模拟 TdxHq_API：按服务器延迟响应，记录每次行情请求的股票数量"""
+
+    quote_batches = []
+    lock = threading.Lock()
+
+    def __init__(self):
+        self.server = None
+
+    def connect(self, ip, port, time_out=None):
+        delay = SERVER_DELAYS[ip]
+        if delay is None:
+            return False
+        time.sleep(delay)
+        self.server = ip
+        return self
+
+    def disconnect(self):
+        self.server = None
+
+    def get_security_count(self, market):
+        return 100 if self.server else None
+
+    def get_security_list(self, market, start):
+        return []
+
+    def get_security_quotes(self, stocks):
+        with self.lock:
+            self.quote_batches.append(len(stocks))
+        return [
+            {"market": market, "code": code, "price": 11.0, "last_close": 10.0, "vol": 1000}
+            for market, code in stocks
+        ]
+
+
+@pytest.fixture
+def pool():
+    FakeTdxApi.quote_batches = []
+    servers = [{"ip": ip, "port": 7709} for ip in SERVER_DELAYS]
+    pool = TdxConnectionPool(servers=servers, size=2, api_factory=FakeTdxApi)
+    yield pool
+    pool.close()
+
+
+def test_servers_ranked_by_latency_in_parallel(pool):
+    """并行探测服务器，不可用的服务器被排除，连接优先使用最快的服务器"""
+    start = time.time()
+    ranked = pool.rank_servers()
+    elapsed = time.time() - start
+
+    assert [server["ip"] for server in ranked] == ["10.0.0.2", "10.0.0.1"]
+    assert elapsed < 0.3
+
+    assert pool.start()
+    with pool.connection() as api:
+        assert api.server == "10.0.0.2"
+    assert pool.stats["opened"] == 2
+
+
+def test_connections_are_reused_and_broken_ones_discarded(pool):
+    """归还的连接被复用；使用中出错的连接被丢弃，之后按需重新建立"""
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        assert second is first
+
+    with pytest.raises(RuntimeError):
+        with pool.connection():
+            raise RuntimeError("socket closed")
+    assert pool.stats["discarded"] == 1
+
+    with pool.connection() as api:
+        assert api is not first
+    assert pool.stats["opened"] == 2
+
+
+def test_pool_limits_concurrent_connections(pool):
+    """并发借用不超过连接池大小"""
+    active = []
+    peak = []
+
+    def worker():
+        with pool.connection():
+            active.append(1)
+            peak.append(len(active))
+            time.sleep(0.05)
+            active.pop()
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(peak) <= 2
+    assert pool.stats["opened"] <= 2
+
+
+def test_realtime_quotes_are_batched(pool, monkeypatch):
+    """多只股票的实时行情合并为按协议上限分批的请求"""
+    monkeypatch.setattr(tdx_utils, "_get_stock_name_from_mongodb", lambda code: None)
+    provider = TongDaXinDataProvider(pool=pool)
+    codes = [f"{i:06d}" for i in range(1, 101)]
+
+    quotes = provider.get_real_time_quotes(codes)
+
+    assert len(quotes) == 100
+    assert FakeTdxApi.quote_batches == [tdx_utils.MAX_QUOTES_PER_REQUEST, 100 - tdx_utils.MAX_QUOTES_PER_REQUEST]
+    assert quotes["000001"]["change_percent"] == pytest.approx(10.0)
+    assert provider.get_real_time_data("600519")["price"] == 11.0
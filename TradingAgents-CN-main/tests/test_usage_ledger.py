@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+测试Token使用记录账本
+验证追加写入、批量刷盘、内存累计统计以及旧版 usage.json 迁移
+"""
+
+import json
+from datetime import datetime, timedelta
+
+from tradingagents.config.usage_ledger import UsageLedger
+
+
+def _record(cost, provider="dashscope", session_id="s1", days_ago=0):
+    timestamp = (datetime.now() - timedelta(days=days_ago)).isoformat()
+    return {
+        "timestamp": timestamp,
+        "provider": provider,
+        "model_name": "qwen-turbo",
+        "input_tokens": 100,
+        "output_tokens": 50,
+        "cost": cost,
+        "session_id": session_id,
+        "analysis_type": "stock_analysis",
+    }
+
+
+def test_append_updates_aggregates_before_flush(tmp_path):
+    """追加后立即可查询成本，写盘由 flush 批量完成"""
+    ledger = UsageLedger(tmp_path / "usage.jsonl", flush_interval=60)
+    try:
+        ledger.append(_record(0.5))
+        ledger.append(_record(0.25, provider="deepseek", session_id="s2"))
+        ledger.append(_record(10.0, days_ago=40))
+
+        assert ledger.get_day_cost() == 0.75
+        assert ledger.get_session_cost("s1") == 10.5
+        assert ledger.get_session_cost("s2") == 0.25
+
+        stats = ledger.get_statistics(days=30)
+        assert stats["total_requests"] == 2
+        assert stats["total_cost"] == 0.75
+        assert stats["provider_stats"]["deepseek"]["cost"] == 0.25
+
+        # 尚未刷盘
+        assert not (tmp_path / "usage.jsonl").exists()
+        assert len(ledger.load_records()) == 3
+        lines = (tmp_path / "usage.jsonl").read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 3
+    finally:
+        ledger.close()
+
+
+def test_reload_and_compaction(tmp_path):
+    """重新加载时从账本重建统计，超出上限后压缩为最近记录"""
+    ledger_file = tmp_path / "usage.jsonl"
+    ledger = UsageLedger(ledger_file, max_records=5, flush_interval=60)
+    for i in range(11):
+        ledger.append(_record(1.0, session_id=f"s{i}"))
+    ledger.flush()
+    ledger.close()
+
+    records = [json.loads(line) for line in ledger_file.read_text(encoding="utf-8").splitlines()]
+    assert [r["session_id"] for r in records] == [f"s{i}" for i in range(6, 11)]
+
+    reloaded = UsageLedger(ledger_file, max_records=5, flush_interval=60)
+    try:
+        assert reloaded.get_day_cost() == 5.0
+        assert reloaded.get_session_cost("s10") == 1.0
+    finally:
+        reloaded.close()
+
+
+def test_migrate_legacy_usage_json(tmp_path):
+    """账本不存在时从旧版 usage.json 迁移记录"""
+    legacy_file = tmp_path / "usage.json"
+    legacy_file.write_text(json.dumps([_record(0.1), _record(0.2, session_id="s2")]), encoding="utf-8")
+
+    ledger = UsageLedger(tmp_path / "usage.jsonl", legacy_file=legacy_file, flush_interval=60)
+    try:
+        assert len(ledger.load_records()) == 2
+        assert round(ledger.get_day_cost(), 4) == 0.3
+
+        ledger.rewrite([_record(0.4)])
+        assert ledger.get_day_cost() == 0.4
+        assert ledger.get_session_cost("s2") == 0.0
+        assert len(ledger.load_records()) == 1
+    finally:
+        ledger.close()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+测试持久化向量记忆存储
+验证重启后记忆保留、精确余弦top-k、写入中断后的恢复以及IVF索引查询
+"""
+
+import numpy as np
+
+from tradingagents.agents.utils import vector_store
+from tradingagents.agents.utils.vector_store import NumpyVectorStore
+
+
+def _random_vectors(count, dim, seed=0):
+    return np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+
+
+def test_memories_survive_reopen(tmp_path):
+    """重新打开集合后记忆仍在，查询结果按相似度排序"""
+    store = NumpyVectorStore("bull_memory", tmp_path)
+    store.add(
+        documents=["通胀上升", "科技股抛售", "美元走强"],
+        metadatas=[{"recommendation": "防御板块"}, {"recommendation": "减仓成长股"}, {"recommendation": "对冲汇率"}],
+        embeddings=[[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]],
+        ids=["0", "1", "2"],
+    )
+
+    reopened = NumpyVectorStore("bull_memory", tmp_path)
+    assert reopened.count() == 3
+
+    result = reopened.query(query_embeddings=[[0.1, 0.9, 0.0]], n_results=2)
+    assert result["documents"][0] == ["科技股抛售", "通胀上升"]
+    assert result["metadatas"][0][0]["recommendation"] == "减仓成长股"
+    assert 0 <= result["distances"][0][0] < result["distances"][0][1]
+
+
+def test_exact_top_k_matches_brute_force(tmp_path):
+    """精确查询与逐个计算余弦相似度的结果一致"""
+    vectors = _random_vectors(500, 32)
+    store = NumpyVectorStore("trader_memory", tmp_path)
+    store.add(documents=[f"doc{i}" for i in range(500)], embeddings=vectors.tolist())
+
+    query = _random_vectors(1, 32, seed=1)[0]
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:5]
+
+    result = store.query(query_embeddings=[query.tolist()], n_results=5)
+    assert result["ids"][0] == [str(i) for i in expected]
+
+
+def test_truncated_write_is_recovered(tmp_path):
+    """向量文件写了一半时，加载后按完整记录截断并可继续追加"""
+    store = NumpyVectorStore("risk_memory", tmp_path)
+    store.add(documents=["a", "b"], embeddings=[[1.0, 0.0], [0.0, 1.0]])
+    with open(store.vectors_path, "ab") as f:
+        f.write(b"\x00" * 6)
+
+    recovered = NumpyVectorStore("risk_memory", tmp_path)
+    assert recovered.count() == 2
+    recovered.add(documents=["c"], embeddings=[[1.0, 1.0]])
+    assert NumpyVectorStore("risk_memory", tmp_path).count() == 3
+
+
+def test_ivf_index_above_threshold(tmp_path):
+    """超过阈值后使用IVF索引，近似重复的向量仍能被找到；索引后新增的向量也能查到"""
+    vectors = _random_vectors(4000, 16)
+    store = NumpyVectorStore("judge_memory", tmp_path, index_threshold=1000, n_probe=8)
+    store.add(documents=[f"doc{i}" for i in range(4000)], embeddings=vectors.tolist())
+
+    hits = 0
+    for i in range(0, 4000, 200):
+        noisy = vectors[i] + 0.01 * _random_vectors(1, 16, seed=i)[0]
+        if store.query(query_embeddings=[noisy.tolist()], n_results=1)["ids"][0] == [str(i)]:
+            hits += 1
+    assert store._index is not None
+    assert hits >= 18
+
+    store.add(documents=["new"], embeddings=[[5.0] * 16], ids=["new"])
+    assert store.query(query_embeddings=[[5.0] * 16], n_results=1)["ids"][0] == ["new"]
+
+
+def test_financial_memory_uses_persistent_backend(tmp_path, monkeypatch):
+    """FinancialSituationMemory 默认使用持久化后端，进程重启后仍能查询到记忆"""
+    from tradingagents.agents.utils.memory import FinancialSituationMemory
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    config = {"llm_provider": "openai", "backend_url": "http://localhost:1/v1", "memory_dir": str(tmp_path)}
+
+    memory = FinancialSituationMemory("persist_test", config)
+    memory.get_embeddings = lambda texts: [[1.0, float(len(text))] for text in texts]
+    memory.add_situations([("短", "建议A"), ("很长的情况描述", "建议B")])
+
+    # 模拟重启：清空进程内的集合缓存
+    monkeypatch.setattr(vector_store, "_stores", {})
+    restarted = FinancialSituationMemory("persist_test", config)
+    restarted.get_embedding = lambda text: [1.0, 7.0]
+
+    assert restarted.backend == "numpy"
+    memories = restarted.get_memories("很长的情况描述", n_matches=1)
+    assert memories[0]["recommendation"] == "建议B"
+
+
+def test_zero_vectors_are_not_written(tmp_path):
+    """embedding失败时的零向量不写入，也不会确定集合维度"""
+    store = NumpyVectorStore("zero_memory", tmp_path)
+    store.add(documents=["失败"], embeddings=[[0.0] * 1024])
+    assert store.count() == 0 and store.dim is None
+
+    store.add(documents=["失败", "成功"], embeddings=[[0.0, 0.0, 0.0], [1.0, 0.0, 0.0]], ids=["a", "b"])
+    assert store.count() == 1 and store.dim == 3
+    assert store.query(query_embeddings=[[1.0, 0.0, 0.0]], n_results=1)["ids"][0] == ["b"]
+
+
+def test_dimension_change_rebuilds_and_keeps_backup(tmp_path):
+    """向量维度改变时保留原文件为备份并重建集合，新模型的写入和查询可以正常进行"""
+    store = NumpyVectorStore("dim_memory", tmp_path)
+    store.add(documents=["旧"], embeddings=[[1.0, 0.0]])
+    store.add(documents=["新"], embeddings=[[0.0, 1.0, 0.0]])
+
+    assert store.count() == 1 and store.dim == 3
+    assert list(tmp_path.glob("dim_memory.jsonl.*.bak"))
+    assert NumpyVectorStore("dim_memory", tmp_path).query(query_embeddings=[[0.0, 1.0, 0.0]])["documents"][0] == ["新"]
+
+
+def test_missing_meta_does_not_discard_records(tmp_path):
+    """元数据文件丢失时按向量文件推断维度，记忆不被丢弃"""
+    store = NumpyVectorStore("meta_memory", tmp_path)
+    store.add(documents=["a", "b"], embeddings=[[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]])
+    store.meta_path.unlink()
+
+    reopened = NumpyVectorStore("meta_memory", tmp_path)
+    assert reopened.count() == 2 and reopened.dim == 3
+    assert reopened.meta_path.exists()
+
+
+def test_store_is_keyed_by_embedding_model(tmp_path, monkeypatch):
+    """不同embedding模型使用不同的存储，打开时核对元数据中的模型"""
+    monkeypatch.setattr(vector_store, "_stores", {})
+    first = vector_store.get_vector_store("bull_memory", tmp_path, embedding_model="openai/text-embedding-3-small")
+    second = vector_store.get_vector_store("bull_memory", tmp_path, embedding_model="dashscope/text-embedding-v3")
+    first.add(documents=["openai"], embeddings=[[1.0, 0.0]])
+    assert first.vectors_path.parent != second.vectors_path.parent
+    assert second.count() == 0
+
+    # 元数据记录的模型与打开时的不一致时不混用
+    mismatched = NumpyVectorStore("bull_memory", first.store_dir, embedding_model="dashscope/text-embedding-v3")
+    assert mismatched.count() == 0
+    assert list(first.store_dir.glob("bull_memory.meta.json.*.bak"))
@@ -14,6 +14,7 @@ logger = get_logger("default")
 
 # 导入Google工具调用处理器
 from tradingagents.agents.utils.google_tool_handler import GoogleToolCallHandler
+from tradingagents.agents.utils.agent_utils import UNIFIED_DATA_START_DATE
 
 
 def _get_company_name(ticker: str, market_info: dict) -> str:
@@ -319,6 +320,7 @@ def create_market_analyst(llm, toolkit):
 
 **工具调用指令：**
 你有一个工具叫做get_stock_market_data_unified，你必须立即调用这个工具来获取{company_name}（{ticker}）的市场数据。
+参数：ticker='{ticker}', start_date='{UNIFIED_DATA_START_DATE}', end_date='{current_date}'
 不要说你将要调用工具，直接调用工具。
 
 **分析要求：**
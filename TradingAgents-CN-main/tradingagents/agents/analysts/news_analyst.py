@@ -16,6 +16,22 @@ from tradingagents.agents.utils.google_tool_handler import GoogleToolCallHandler
 logger = get_logger("analysts.news")
 
 
+def _news_model_info(llm) -> str:
+    """统一新闻工具用于特殊处理的模型信息"""
+    try:
+        if hasattr(llm, 'model_name'):
+            return f"{llm.__class__.__name__}:{llm.model_name}"
+        return llm.__class__.__name__
+    except:
+        return "Unknown"
+
+
+def news_prefetch_args(ticker: str, llm) -> dict:
+    """新闻分析师首次调用统一新闻工具的参数（DashScope模型在节点内预先调用），供图启动时预取"""
+    model_info = _news_model_info(llm) if 'DashScope' in llm.__class__.__name__ else ""
+    return {"stock_code": ticker, "max_news": 10, "model_info": model_info}
+
+
 def create_news_analyst(llm, toolkit):
     @log_analyst_module("news")
     def news_analyst_node(state):
@@ -181,14 +197,7 @@ def create_news_analyst(llm, toolkit):
         prompt = prompt.partial(ticker=ticker)
         
         # 获取模型信息用于统一新闻工具的特殊处理
-        model_info = ""
-        try:
-            if hasattr(llm, 'model_name'):
-                model_info = f"{llm.__class__.__name__}:{llm.model_name}"
-            else:
-                model_info = llm.__class__.__name__
-        except:
-            model_info = "Unknown"
+        model_info = _news_model_info(llm)
         
         logger.info(f"[新闻分析师] 准备调用LLM进行新闻分析，模型: {model_info}")
         
@@ -43,6 +43,12 @@ def create_risk_manager(llm, memory):
 交付成果：
 - 明确且可操作的建议：买入、卖出或持有。
 - 基于辩论和过去反思的详细推理。
+- 在回应末尾按以下格式给出结构化决策（每项一行，使用具体数值）：
+  投资建议: 买入/持有/卖出
+  目标价位: 具体价格数值
+  置信度: 0-1之间的数值
+  风险评分: 0-1之间的数值（0为低风险，1为高风险）
+  最终交易建议: **买入/持有/卖出**
 
 ---
 
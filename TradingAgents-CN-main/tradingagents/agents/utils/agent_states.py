@@ -5,12 +5,22 @@ from langchain_openai import ChatOpenAI
 from tradingagents.agents import *
 from langgraph.prebuilt import ToolNode
 from langgraph.graph import END, StateGraph, START, MessagesState
+from langgraph.graph.message import AnyMessage, add_messages
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
 
 
+def merge_completed_nodes(left, right):
+    """合并已完成节点列表（并行分析师同一步写入时按顺序去重合并）"""
+    merged = list(left or [])
+    for node_name in right or []:
+        if node_name not in merged:
+            merged.append(node_name)
+    return merged
+
+
 # Researcher team state
 class InvestDebateState(TypedDict):
     bull_history: Annotated[
@@ -78,3 +88,12 @@ class AgentState(MessagesState):
         RiskDebateState, "Current state of the debate on evaluating risk"
     ]
     final_trade_decision: Annotated[str, "Final decision made by the Risk Analysts"]
+
+    # 断点续传：已完成节点列表
+    completed_nodes: Annotated[list, merge_completed_nodes]
+
+    # 并行分析师模式下每个分析师独立的消息通道
+    market_messages: Annotated[list[AnyMessage], add_messages]
+    social_messages: Annotated[list[AnyMessage], add_messages]
+    news_messages: Annotated[list[AnyMessage], add_messages]
+    fundamentals_messages: Annotated[list[AnyMessage], add_messages]
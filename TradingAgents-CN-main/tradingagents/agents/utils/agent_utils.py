@@ -17,20 +17,28 @@ from langchain_core.messages import HumanMessage
 # 导入统一日志系统和工具日志装饰器
 from tradingagents.utils.logging_init import get_logger
 from tradingagents.utils.tool_logging import log_tool_call, log_analysis_step
+from tradingagents.dataflows.data_context import context_cached
 
 # 导入日志模块
-from tradingagents.utils.logging_manager import get_logger
+from tradingagents.utils.logging_manager import get_logger, lazy
 logger = get_logger('agents')
 
+# 市场/基本面分析师调用统一数据工具时使用的起始日期（图启动时的数据预取使用相同参数）
+UNIFIED_DATA_START_DATE = '2025-05-28'
 
-def create_msg_delete():
+
+def create_msg_delete(messages_key: str = "messages"):
     def delete_messages(state):
         """Clear messages and add placeholder for Anthropic compatibility"""
-        messages = state["messages"]
+        messages = state.get(messages_key) or []
         
         # Remove all messages
         removal_operations = [RemoveMessage(id=m.id) for m in messages]
         
+        # 并行模式下的独立消息通道不会被下游节点读取，无需占位消息
+        if messages_key != "messages":
+            return {messages_key: removal_operations}
+
         # Add a minimal placeholder message
         placeholder = HumanMessage(content="Continue")
         
@@ -129,6 +137,7 @@ class Toolkit:
 
     @staticmethod
     @tool
+    @context_cached("get_chinese_social_sentiment")
     def get_chinese_social_sentiment(
         ticker: Annotated[str, "Ticker of a company. e.g. AAPL, TSM"],
         curr_date: Annotated[str, "Current date in yyyy-mm-dd format"],
@@ -505,6 +514,7 @@ class Toolkit:
 
     @staticmethod
     @tool
+    @context_cached("get_stock_news_openai")
     def get_stock_news_openai(
         ticker: Annotated[str, "the company's ticker"],
         curr_date: Annotated[str, "Current date in yyyy-mm-dd format"],
@@ -614,8 +624,8 @@ class Toolkit:
             return f"错误：{ticker} 不是有效的中国A股代码格式"
 
         try:
-            # 使用统一数据源接口获取股票数据（默认Tushare，支持备用数据源）
-            from tradingagents.dataflows.interface import get_china_stock_data_unified
+            # 使用统一数据源获取结构化日线数据（默认Tushare，支持备用数据源）
+            from tradingagents.dataflows.data_source_manager import get_china_stock_bars
             logger.debug(f"📊 [DEBUG] 正在获取 {ticker} 的股票数据...")
 
             # 获取最近30天的数据用于基本面分析
@@ -623,16 +633,14 @@ class Toolkit:
             end_date = datetime.strptime(curr_date, '%Y-%m-%d')
             start_date = end_date - timedelta(days=30)
 
-            stock_data = get_china_stock_data_unified(
+            stock_bars = get_china_stock_bars(
                 ticker,
                 start_date.strftime('%Y-%m-%d'),
                 end_date.strftime('%Y-%m-%d')
             )
 
-            logger.debug(f"📊 [DEBUG] 股票数据获取完成，长度: {len(stock_data) if stock_data else 0}")
-
-            if not stock_data or "获取失败" in stock_data or "❌" in stock_data:
-                return f"无法获取股票 {ticker} 的基本面数据：{stock_data}"
+            if stock_bars is None:
+                return f"无法获取股票 {ticker} 的基本面数据：❌ 未获取到{ticker}的有效数据"
 
             # 调用真正的基本面分析
             from tradingagents.dataflows.optimized_china_data import OptimizedChinaDataProvider
@@ -641,7 +649,7 @@ class Toolkit:
             analyzer = OptimizedChinaDataProvider()
 
             # 生成真正的基本面分析报告
-            fundamentals_report = analyzer._generate_fundamentals_report(ticker, stock_data)
+            fundamentals_report = analyzer._generate_fundamentals_report(ticker, stock_bars)
 
             logger.debug(f"📊 [DEBUG] 中国基本面分析报告生成完成")
             logger.debug(f"📊 [DEBUG] get_china_fundamentals 结果长度: {len(fundamentals_report)}")
@@ -696,6 +704,7 @@ class Toolkit:
     @staticmethod
     @tool
     @log_tool_call(tool_name="get_stock_fundamentals_unified", log_args=True)
+    @context_cached("get_stock_fundamentals_unified")
     def get_stock_fundamentals_unified(
         ticker: Annotated[str, "股票代码（支持A股、港股、美股）"],
         start_date: Annotated[str, "开始日期，格式：YYYY-MM-DD"] = None,
@@ -715,12 +724,11 @@ class Toolkit:
         Returns:
             str: 基本面分析数据和报告
         """
-        logger.info(f"📊 [统一基本面工具] 分析股票: {ticker}")
+        logger.info("📊 [统一基本面工具] 分析股票: %s", ticker)
 
-        # 添加详细的股票代码追踪日志
-        logger.info(f"🔍 [股票代码追踪] 统一基本面工具接收到的原始股票代码: '{ticker}' (类型: {type(ticker)})")
-        logger.info(f"🔍 [股票代码追踪] 股票代码长度: {len(str(ticker))}")
-        logger.info(f"🔍 [股票代码追踪] 股票代码字符: {list(str(ticker))}")
+        # 股票代码追踪日志（DEBUG级别，字符拆分只在启用时计算）
+        logger.debug("🔍 [股票代码追踪] 统一基本面工具接收到的原始股票代码: '%s' (类型: %s, 长度: %s, 字符: %s)",
+                     ticker, type(ticker).__name__, lazy(lambda: len(str(ticker))), lazy(lambda: list(str(ticker))))
 
         # 保存原始ticker用于对比
         original_ticker = ticker
@@ -735,9 +743,9 @@ class Toolkit:
             is_hk = market_info['is_hk']
             is_us = market_info['is_us']
 
-            logger.info(f"🔍 [股票代码追踪] StockUtils.get_market_info 返回的市场信息: {market_info}")
-            logger.info(f"📊 [统一基本面工具] 股票类型: {market_info['market_name']}")
-            logger.info(f"📊 [统一基本面工具] 货币: {market_info['currency_name']} ({market_info['currency_symbol']})")
+            logger.debug("🔍 [股票代码追踪] StockUtils.get_market_info 返回的市场信息: %s", market_info)
+            logger.info("📊 [统一基本面工具] 股票类型: %s, 货币: %s (%s)", market_info['market_name'],
+                        market_info['currency_name'], market_info['currency_symbol'])
 
             # 检查ticker是否在处理过程中发生了变化
             if str(ticker) != str(original_ticker):
@@ -755,15 +763,16 @@ class Toolkit:
 
             if is_china:
                 # 中国A股：获取股票数据 + 基本面数据
-                logger.info(f"🇨🇳 [统一基本面工具] 处理A股数据...")
-                logger.info(f"🔍 [股票代码追踪] 进入A股处理分支，ticker: '{ticker}'")
+                logger.info("🇨🇳 [统一基本面工具] 处理A股数据...")
 
                 try:
                     # 获取股票价格数据
                     from tradingagents.dataflows.interface import get_china_stock_data_unified
-                    logger.info(f"🔍 [股票代码追踪] 调用 get_china_stock_data_unified，传入参数: ticker='{ticker}', start_date='{start_date}', end_date='{end_date}'")
+                    logger.debug("🔍 [股票代码追踪] 调用 get_china_stock_data_unified，传入参数: ticker='%s', start_date='%s', end_date='%s'",
+                                 ticker, start_date, end_date)
                     stock_data = get_china_stock_data_unified(ticker, start_date, end_date)
-                    logger.info(f"🔍 [股票代码追踪] get_china_stock_data_unified 返回结果前200字符: {stock_data[:200] if stock_data else 'None'}")
+                    logger.debug("🔍 [股票代码追踪] get_china_stock_data_unified 返回结果前200字符: %s",
+                                 lazy(lambda: stock_data[:200] if stock_data else 'None'))
                     result_data.append(f"## A股价格数据\n{stock_data}")
                 except Exception as e:
                     logger.error(f"🔍 [股票代码追踪] get_china_stock_data_unified 调用失败: {e}")
@@ -773,9 +782,9 @@ class Toolkit:
                     # 获取基本面数据
                     from tradingagents.dataflows.optimized_china_data import OptimizedChinaDataProvider
                     analyzer = OptimizedChinaDataProvider()
-                    logger.info(f"🔍 [股票代码追踪] 调用 OptimizedChinaDataProvider._generate_fundamentals_report，传入参数: ticker='{ticker}'")
-                    fundamentals_data = analyzer._generate_fundamentals_report(ticker, stock_data if 'stock_data' in locals() else "")
-                    logger.info(f"🔍 [股票代码追踪] _generate_fundamentals_report 返回结果前200字符: {fundamentals_data[:200] if fundamentals_data else 'None'}")
+                    fundamentals_data = analyzer._generate_fundamentals_report(ticker, end_date=end_date)
+                    logger.debug("🔍 [股票代码追踪] _generate_fundamentals_report 返回结果前200字符: %s",
+                                 lazy(lambda: fundamentals_data[:200] if fundamentals_data else 'None'))
                     result_data.append(f"## A股基本面数据\n{fundamentals_data}")
                 except Exception as e:
                     logger.error(f"🔍 [股票代码追踪] _generate_fundamentals_report 调用失败: {e}")
@@ -882,6 +891,7 @@ class Toolkit:
     @staticmethod
     @tool
     @log_tool_call(tool_name="get_stock_market_data_unified", log_args=True)
+    @context_cached("get_stock_market_data_unified")
     def get_stock_market_data_unified(
         ticker: Annotated[str, "股票代码（支持A股、港股、美股）"],
         start_date: Annotated[str, "开始日期，格式：YYYY-MM-DD"],
@@ -972,6 +982,7 @@ class Toolkit:
     @staticmethod
     @tool
     @log_tool_call(tool_name="get_stock_news_unified", log_args=True)
+    @context_cached("get_stock_news_unified")
     def get_stock_news_unified(
         ticker: Annotated[str, "股票代码（支持A股、港股、美股）"],
         curr_date: Annotated[str, "当前日期，格式：YYYY-MM-DD"]
@@ -1103,6 +1114,7 @@ class Toolkit:
     @staticmethod
     @tool
     @log_tool_call(tool_name="get_stock_sentiment_unified", log_args=True)
+    @context_cached("get_stock_sentiment_unified")
     def get_stock_sentiment_unified(
         ticker: Annotated[str, "股票代码（支持A股、港股、美股）"],
         curr_date: Annotated[str, "当前日期，格式：YYYY-MM-DD"]
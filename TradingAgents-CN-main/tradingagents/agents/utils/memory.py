@@ -1,17 +1,24 @@
-import chromadb
-from chromadb.config import Settings
 from openai import OpenAI
 import dashscope
 from dashscope import TextEmbedding
 import os
 import threading
 import hashlib
-from typing import Dict, Optional
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("agents.utils.memory")
 
+from .vector_store import get_vector_store
+
+# 记忆后端：numpy（持久化向量文件，默认）或 chromadb（进程内集合，重启后丢失）
+MEMORY_BACKENDS = ("numpy", "chromadb")
+
 
 class ChromaDBManager:
     """单例ChromaDB管理器，避免并发创建集合的冲突"""
@@ -31,6 +38,9 @@ class ChromaDBManager:
 
     def __init__(self):
         if not self._initialized:
+            # 只有选择chromadb后端时才导入，避免额外的启动开销
+            import chromadb
+            from chromadb.config import Settings
             try:
                 # 自动检测操作系统版本并使用最优配置
                 import platform
@@ -107,6 +117,109 @@ class ChromaDBManager:
             return collection
 
 
+class EmbeddingCache:
+    """进程内共享的embedding缓存（单例）
+
+    以 (嵌入模型, 文本内容) 的哈希为键，内存中按LRU淘汰；
+    配置了磁盘目录时，淘汰或新写入的向量同时保存到磁盘，跨进程复用。
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super(EmbeddingCache, cls).__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self.max_size = int(os.getenv('EMBEDDING_CACHE_SIZE', '1024'))
+        self.disk_dir: Optional[Path] = None
+        self._entries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._entries_lock = threading.Lock()
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0}
+        env_dir = os.getenv('EMBEDDING_CACHE_DIR')
+        if env_dir:
+            self.set_disk_dir(env_dir)
+        self._initialized = True
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\0{text}".encode('utf-8')).hexdigest()
+
+    def set_disk_dir(self, disk_dir):
+        """启用磁盘缓存层（传入None则关闭）"""
+        if disk_dir is None:
+            self.disk_dir = None
+            return
+        self.disk_dir = Path(disk_dir)
+        self.disk_dir.mkdir(parents=True, exist_ok=True)
+        logger.info(f"📚 [Embedding缓存] 启用磁盘缓存: {self.disk_dir}")
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.npy"
+
+    def get(self, key: str) -> Optional[List[float]]:
+        with self._entries_lock:
+            embedding = self._entries.get(key)
+            if embedding is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return embedding
+
+        disk_dir = self.disk_dir
+        if disk_dir is not None:
+            path = self._disk_path(key)
+            if path.exists():
+                try:
+                    embedding = np.load(path).tolist()
+                except Exception as e:
+                    logger.debug(f"⚠️ [Embedding缓存] 读取磁盘缓存失败: {e}")
+                else:
+                    with self._entries_lock:
+                        self.stats["disk_hits"] += 1
+                    self._put_memory(key, embedding)
+                    return embedding
+
+        with self._entries_lock:
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, key: str, embedding: List[float]):
+        self._put_memory(key, list(embedding))
+        if self.disk_dir is not None:
+            path = self._disk_path(key)
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_name(f"{path.stem}.{threading.get_ident()}.tmp.npy")
+                np.save(tmp_path, np.asarray(embedding, dtype=np.float64))
+                os.replace(tmp_path, path)
+            except Exception as e:
+                logger.debug(f"⚠️ [Embedding缓存] 写入磁盘缓存失败: {e}")
+
+    def _put_memory(self, key: str, embedding: List[float]):
+        with self._entries_lock:
+            self._entries[key] = embedding
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """清空内存缓存和统计（不删除磁盘文件）"""
+        with self._entries_lock:
+            self._entries.clear()
+            self.stats = {"hits": 0, "disk_hits": 0, "misses": 0}
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._entries_lock:
+            return dict(self.stats, size=len(self._entries), max_size=self.max_size)
+
+
 class FinancialSituationMemory:
     def __init__(self, name, config):
         self.config = config
@@ -290,9 +403,27 @@ class FinancialSituationMemory:
                 self.client = "DISABLED"
                 logger.warning(f"⚠️ 未找到OPENAI_API_KEY，记忆功能已禁用")
 
-        # 使用单例ChromaDB管理器
-        self.chroma_manager = ChromaDBManager()
-        self.situation_collection = self.chroma_manager.get_or_create_collection(name)
+        # 进程内共享的embedding缓存，可通过配置启用磁盘缓存层
+        self.embedding_cache = EmbeddingCache()
+        if config.get("embedding_cache_dir"):
+            self.embedding_cache.set_disk_dir(config["embedding_cache_dir"])
+
+        # 记忆后端（两者的集合接口一致）
+        self.backend = (config.get("memory_backend") or os.getenv("MEMORY_BACKEND", "numpy")).lower()
+        if self.backend not in MEMORY_BACKENDS:
+            logger.warning(f"⚠️ 未知的记忆后端 {self.backend}，使用numpy")
+            self.backend = "numpy"
+
+        if self.backend == "numpy":
+            memory_dir = (config.get("memory_dir") or os.getenv("MEMORY_DIR") or
+                          os.path.join(config.get("data_cache_dir", "."), "memory"))
+            # 按提供商和模型分开存储，不同模型的向量空间不能混用
+            embedding_model = f"{self.llm_provider}/{getattr(self, 'embedding', 'disabled')}"
+            self.situation_collection = get_vector_store(name, memory_dir, embedding_model=embedding_model)
+        else:
+            # 使用单例ChromaDB管理器
+            self.chroma_manager = ChromaDBManager()
+            self.situation_collection = self.chroma_manager.get_or_create_collection(name)
 
     def _smart_text_truncation(self, text, max_length=8192):
         """智能文本截断，保持语义完整性和缓存兼容性"""
@@ -332,8 +463,81 @@ class FinancialSituationMemory:
         logger.warning(f"⚠️ 强制截断：保留首尾关键信息，{len(text)}字符截断为{len(truncated)}字符")
         return truncated, True
 
+    def _uses_dashscope(self):
+        return (self.llm_provider == "dashscope" or
+                self.llm_provider == "alibaba" or
+                (self.llm_provider == "google" and self.client is None) or
+                (self.llm_provider == "deepseek" and self.client is None) or
+                (self.llm_provider == "openrouter" and self.client is None))
+
     def get_embedding(self, text):
-        """Get embedding for a text using the configured provider"""
+        """Get embedding for a text using the configured provider (cached by content hash)"""
+        return self.get_embeddings([text])[0]
+
+    def get_embeddings(self, texts):
+        """批量获取embedding：先查共享缓存，未命中的文本合并为一次提供商调用"""
+        results = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+
+        for i, text in enumerate(texts):
+            if (self.client == "DISABLED" or not text or not isinstance(text, str) or
+                    (self.enable_embedding_length_check and len(text) > self.max_embedding_length)):
+                # 无需调用提供商的情况，由原有逻辑返回空向量
+                results[i] = self._compute_embedding(text)
+                continue
+            key = self.embedding_cache.make_key(self.embedding, text)
+            cached = self.embedding_cache.get(key)
+            if cached is not None:
+                results[i] = cached
+            else:
+                missing.setdefault(key, []).append(i)
+
+        if missing:
+            keys = list(missing)
+            miss_texts = [texts[missing[key][0]] for key in keys]
+            if len(miss_texts) == 1:
+                embeddings = [self._compute_embedding(miss_texts[0])]
+            else:
+                embeddings = self._compute_embeddings_batch(miss_texts)
+
+            for key, embedding in zip(keys, embeddings):
+                # 空向量表示调用失败，不写入缓存
+                if any(x != 0.0 for x in embedding):
+                    self.embedding_cache.put(key, embedding)
+                for i in missing[key]:
+                    results[i] = embedding
+
+        return results
+
+    def _compute_embeddings_batch(self, texts):
+        """一次提供商调用获取多条文本的embedding，失败时逐条调用原有逻辑"""
+        # DashScope text-embedding-v3 单次最多10条
+        batch_size = 10 if self._uses_dashscope() else 100
+        embeddings = []
+        try:
+            for start in range(0, len(texts), batch_size):
+                chunk = texts[start:start + batch_size]
+                if self._uses_dashscope():
+                    from dashscope import TextEmbedding
+                    response = TextEmbedding.call(model=self.embedding, input=chunk)
+                    if response.status_code != 200:
+                        raise RuntimeError(f"{response.code} - {response.message}")
+                    items = sorted(response.output['embeddings'], key=lambda item: item['text_index'])
+                    chunk_embeddings = [item['embedding'] for item in items]
+                else:
+                    response = self.client.embeddings.create(model=self.embedding, input=chunk)
+                    chunk_embeddings = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+                if len(chunk_embeddings) != len(chunk):
+                    raise RuntimeError(f"返回数量不匹配: {len(chunk_embeddings)}/{len(chunk)}")
+                embeddings.extend(chunk_embeddings)
+            logger.debug(f"✅ {self.llm_provider} 批量embedding成功，共{len(texts)}条")
+            return embeddings
+        except Exception as e:
+            logger.warning(f"⚠️ 批量embedding失败，改为逐条处理: {e}")
+            return [self._compute_embedding(text) for text in texts]
+
+    def _compute_embedding(self, text):
+        """调用提供商获取单条文本的embedding（不经过缓存）"""
 
         # 检查记忆功能是否被禁用
         if self.client == "DISABLED":
@@ -380,11 +584,7 @@ class FinancialSituationMemory:
             'strategy': 'no_truncation_with_fallback'  # 标记策略
         }
 
-        if (self.llm_provider == "dashscope" or
-            self.llm_provider == "alibaba" or
-            (self.llm_provider == "google" and self.client is None) or
-            (self.llm_provider == "deepseek" and self.client is None) or
-            (self.llm_provider == "openrouter" and self.client is None)):
+        if self._uses_dashscope():
             # 使用阿里百炼的嵌入模型
             try:
                 # 导入DashScope模块
@@ -545,7 +745,6 @@ class FinancialSituationMemory:
         situations = []
         advice = []
         ids = []
-        embeddings = []
 
         offset = self.situation_collection.count()
 
@@ -553,7 +752,19 @@ class FinancialSituationMemory:
             situations.append(situation)
             advice.append(recommendation)
             ids.append(str(offset + i))
-            embeddings.append(self.get_embedding(situation))
+
+        embeddings = self.get_embeddings(situations)
+
+        # embedding失败或禁用时返回的零向量不写入记忆
+        kept = [i for i, embedding in enumerate(embeddings) if any(embedding)]
+        if len(kept) < len(embeddings):
+            logger.warning(f"⚠️ {len(embeddings) - len(kept)}条情况的embedding为空向量，不写入记忆")
+            situations = [situations[i] for i in kept]
+            advice = [advice[i] for i in kept]
+            ids = [str(offset + n) for n in range(len(kept))]
+            embeddings = [embeddings[i] for i in kept]
+            if not kept:
+                return
 
         self.situation_collection.add(
             documents=situations,
@@ -626,9 +837,11 @@ class FinancialSituationMemory:
         """获取缓存相关信息，用于调试和监控"""
         info = {
             'collection_count': self.situation_collection.count(),
+            'backend': self.backend,
             'client_status': 'enabled' if self.client != "DISABLED" else 'disabled',
             'embedding_model': self.embedding,
-            'provider': self.llm_provider
+            'provider': self.llm_provider,
+            'embedding_cache': self.embedding_cache.get_stats()
         }
         
         # 添加最后一次文本处理信息
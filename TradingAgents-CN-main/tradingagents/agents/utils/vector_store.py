@@ -0,0 +1,309 @@
+"""
+持久化向量记忆存储
+每个记忆集合保存为一个float32向量矩阵文件（内存映射读取）和一个JSONL元数据文件，
+进程重启后记忆仍然保留。查询时对归一化向量做一次矩阵乘法得到精确的余弦相似度top-k；
+集合超过阈值后自动构建IVF倒排索引，只在最近的若干个聚类中搜索。
+接口与ChromaDB集合保持一致（count/add/query），可直接替换 FinancialSituationMemory 的后端。
+"""
+
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# 导入统一日志系统
+from tradingagents.utils.logging_init import get_logger
+logger = get_logger("agents.utils.vector_store")
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    """按行L2归一化，零向量保持为零"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class IVFIndex:
+    """基于k-means粗聚类的倒排索引（近似最近邻）"""
+
+    def __init__(self, vectors: np.ndarray, n_lists: int = None, n_iter: int = 8, seed: int = 0):
+        count = len(vectors)
+        self.size = count
+        self.n_lists = n_lists or max(1, int(np.sqrt(count)))
+        rng = np.random.default_rng(seed)
+
+        # 在样本上训练聚类中心，再把全部向量分配到最近的中心
+        sample_size = min(count, self.n_lists * 64)
+        sample = vectors[rng.choice(count, sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, self.n_lists, replace=False)].copy()
+        for _ in range(n_iter):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for list_id in range(self.n_lists):
+                members = sample[labels == list_id]
+                if len(members):
+                    centroids[list_id] = members.mean(axis=0)
+            centroids = _normalize(centroids)
+        self.centroids = centroids.astype(np.float32)
+
+        labels = np.empty(count, dtype=np.int64)
+        for start in range(0, count, 8192):
+            labels[start:start + 8192] = np.argmax(vectors[start:start + 8192] @ self.centroids.T, axis=1)
+        order = np.argsort(labels, kind="stable")
+        boundaries = np.searchsorted(labels[order], np.arange(self.n_lists + 1))
+        self.lists = [order[boundaries[i]:boundaries[i + 1]] for i in range(self.n_lists)]
+
+    def candidates(self, query: np.ndarray, n_probe: int) -> np.ndarray:
+        """返回最近的 n_probe 个聚类中的向量行号"""
+        n_probe = min(n_probe, self.n_lists)
+        nearest = np.argpartition(-(self.centroids @ query), n_probe - 1)[:n_probe]
+        return np.concatenate([self.lists[i] for i in nearest])
+
+
+class NumpyVectorStore:
+    """内存映射的持久化向量集合（兼容ChromaDB集合接口）"""
+
+    def __init__(self, name: str, store_dir, index_threshold: int = None, n_probe: int = 8,
+                 embedding_model: str = None):
+        """
+        Args:
+            name: 集合名称（文件名前缀）
+            store_dir: 存储目录
+            embedding_model: 生成向量的embedding模型（如 "dashscope/text-embedding-v3"），
+                写入元数据并在打开时核对，不同模型的向量空间不能混用
+            index_threshold: 向量数达到该值后使用IVF索引，默认读取 MEMORY_INDEX_THRESHOLD（默认20000）
+            n_probe: IVF查询时搜索的聚类数
+        """
+        self.name = name
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.vectors_path = self.store_dir / f"{name}.f32"
+        self.records_path = self.store_dir / f"{name}.jsonl"
+        self.meta_path = self.store_dir / f"{name}.meta.json"
+        self.index_threshold = index_threshold or int(os.getenv("MEMORY_INDEX_THRESHOLD", "20000"))
+        self.n_probe = n_probe
+        self.embedding_model = embedding_model
+
+        self._lock = threading.RLock()
+        self.dim: Optional[int] = None
+        self._records: List[Dict[str, Any]] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._index: Optional[IVFIndex] = None
+        self._load()
+
+    def _load(self):
+        meta = {}
+        if self.meta_path.exists():
+            try:
+                with open(self.meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"⚠️ [向量记忆] {self.name} 元数据读取失败: {e}")
+        self.dim = meta.get("dim")
+
+        stored_model = meta.get("embedding_model")
+        if self.embedding_model and stored_model and stored_model != self.embedding_model:
+            self._archive(f"embedding模型不一致（已保存 {stored_model}，当前 {self.embedding_model}）")
+            return
+
+        if self.records_path.exists():
+            with open(self.records_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self._records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # 写到一半的尾行
+                        break
+
+        if self.dim is None and self._records:
+            # 元数据丢失时按向量文件大小推断维度，不能推断时保留原文件后重建，而不是静默丢弃
+            size = self.vectors_path.stat().st_size if self.vectors_path.exists() else 0
+            if size and size % (len(self._records) * 4) == 0:
+                self.dim = size // (len(self._records) * 4)
+                logger.warning(f"⚠️ [向量记忆] {self.name} 缺少元数据，按向量文件推断维度{self.dim}")
+                self._write_meta()
+            else:
+                self._archive("缺少元数据且无法推断向量维度")
+                return
+
+        # 向量文件与元数据行数不一致时（写入中断）以两者中较少的为准
+        rows = 0
+        if self.dim and self.vectors_path.exists():
+            rows = self.vectors_path.stat().st_size // (self.dim * 4)
+        count = min(rows, len(self._records))
+        if count < len(self._records):
+            self._records = self._records[:count]
+            self._rewrite_records()
+        if self.dim and self.vectors_path.exists() and self.vectors_path.stat().st_size != count * self.dim * 4:
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate(count * self.dim * 4)
+
+        if count:
+            logger.info(f"📚 [向量记忆] 加载集合 {self.name}: {count}条记忆，维度{self.dim}")
+
+    def _write_meta(self):
+        tmp_path = self.meta_path.with_name(self.meta_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "metric": "cosine", "embedding_model": self.embedding_model}, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def _archive(self, reason: str):
+        """现有文件无法继续使用时改名保留（*.bak），集合从空开始重建"""
+        suffix = datetime.now().strftime("%Y%m%d_%H%M%S")
+        for path in (self.vectors_path, self.records_path, self.meta_path):
+            if path.exists():
+                os.replace(path, path.with_name(f"{path.name}.{suffix}.bak"))
+        logger.error(f"❌ [向量记忆] {self.name} {reason}，原有记忆已改名为 *.{suffix}.bak，集合将重建")
+        self.dim = None
+        self._records = []
+        self._matrix = None
+        self._index = None
+
+    def _rewrite_records(self):
+        tmp_path = self.records_path.with_name(self.records_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in self._records)
+        os.replace(tmp_path, self.records_path)
+
+    def _vectors(self) -> np.ndarray:
+        """内存映射的归一化向量矩阵（写入后重新映射）"""
+        count = len(self._records)
+        if self._matrix is None or len(self._matrix) != count:
+            self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(count, self.dim))
+        return self._matrix
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._records)
+
+    def add(self, documents: List[str], metadatas: List[Dict[str, Any]] = None,
+            embeddings: List[List[float]] = None, ids: List[str] = None):
+        """追加记忆：向量写入矩阵文件末尾，文档和元数据写入JSONL"""
+        if not documents:
+            return
+        metadatas = metadatas or [{} for _ in documents]
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(documents), -1)
+
+        # 零向量是embedding失败或禁用时的占位，不能写入（也不能用它确定集合维度）
+        valid = np.linalg.norm(vectors, axis=1) > 0
+        if not valid.all():
+            logger.warning(f"⚠️ [向量记忆] {self.name} 跳过{int((~valid).sum())}条零向量（embedding失败）")
+            keep = np.flatnonzero(valid)
+            documents = [documents[i] for i in keep]
+            metadatas = [metadatas[i] for i in keep]
+            ids = [ids[i] for i in keep] if ids else None
+            vectors = vectors[valid]
+            if not documents:
+                return
+        vectors = _normalize(vectors)
+
+        with self._lock:
+            if self.dim is not None and vectors.shape[1] != self.dim:
+                self._archive(f"向量维度不匹配（已保存 {self.dim}，写入 {vectors.shape[1]}）")
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._write_meta()
+
+            offset = len(self._records)
+            ids = ids or [str(offset + i) for i in range(len(documents))]
+            new_records = [
+                {"id": record_id, "document": document, "metadata": metadata}
+                for record_id, document, metadata in zip(ids, documents, metadatas)
+            ]
+
+            # 先写向量再写元数据，崩溃时加载按较少的一方截断
+            with open(self.vectors_path, "ab") as f:
+                f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self.records_path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in new_records)
+                f.flush()
+                os.fsync(f.fileno())
+
+            self._records.extend(new_records)
+            self._matrix = None
+
+    def _ensure_index(self, count: int):
+        """集合足够大时构建IVF索引；新增超过10%后重建"""
+        if count < self.index_threshold:
+            self._index = None
+            return
+        if self._index is None or count > self._index.size * 1.1:
+            self._index = IVFIndex(np.asarray(self._vectors()))
+            logger.info(f"🗂️ [向量记忆] {self.name} 构建IVF索引: {count}条，{self._index.n_lists}个聚类")
+
+    def query(self, query_embeddings: List[List[float]], n_results: int = 1) -> Dict[str, List[List[Any]]]:
+        """余弦相似度top-k查询，返回与ChromaDB一致的结果结构（distance = 1 - 相似度）"""
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        with self._lock:
+            count = len(self._records)
+            if count == 0:
+                return result
+            queries = np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), -1)
+            if queries.shape[1] != self.dim:
+                logger.error(f"❌ [向量记忆] {self.name} 查询向量维度不匹配 ({queries.shape[1]} != {self.dim})，"
+                             f"请检查embedding模型配置")
+                return result
+            queries = _normalize(queries)
+            vectors = self._vectors()
+            self._ensure_index(count)
+            records = self._records
+
+            for query in queries:
+                if self._index is not None:
+                    # 索引之后追加的向量不在索引中，精确搜索补上
+                    rows = np.concatenate([
+                        self._index.candidates(query, self.n_probe),
+                        np.arange(self._index.size, count),
+                    ])
+                    scores = vectors[rows] @ query
+                else:
+                    rows = None
+                    scores = vectors @ query
+
+                k = min(n_results, len(scores))
+                top = np.argpartition(-scores, k - 1)[:k]
+                top = top[np.argsort(-scores[top])]
+                positions = rows[top] if rows is not None else top
+
+                result["ids"].append([records[i]["id"] for i in positions])
+                result["documents"].append([records[i]["document"] for i in positions])
+                result["metadatas"].append([records[i]["metadata"] for i in positions])
+                result["distances"].append([float(1.0 - scores[i]) for i in top])
+        return result
+
+    def reset(self):
+        """删除集合的全部记忆"""
+        with self._lock:
+            for path in (self.vectors_path, self.records_path, self.meta_path):
+                path.unlink(missing_ok=True)
+            self.dim = None
+            self._records = []
+            self._matrix = None
+            self._index = None
+
+
+_stores: Dict[str, NumpyVectorStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_vector_store(name: str, store_dir, embedding_model: str = None) -> NumpyVectorStore:
+    """
+    获取（或创建）进程内共享的向量集合，同一文件只打开一次
+
+    指定 embedding_model 时集合保存在按模型区分的子目录中，切换模型不会混用向量空间
+    """
+    if embedding_model:
+        store_dir = Path(store_dir) / re.sub(r"[^0-9A-Za-z_.-]+", "_", embedding_model)
+    key = str(Path(store_dir).resolve() / name)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = NumpyVectorStore(name, store_dir, embedding_model=embedding_model)
+            _stores[key] = store
+        return store
@@ -7,11 +7,11 @@
 import json
 import os
 import re
+import threading
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, asdict
 from pathlib import Path
-from dotenv import load_dotenv
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
@@ -27,6 +27,9 @@ except ImportError:
     MONGODB_AVAILABLE = False
     MongoDBStorage = None
 
+from .usage_ledger import UsageLedger
+from .env_utils import reload_env_file
+
 
 @dataclass
 class ModelConfig:
@@ -73,8 +76,13 @@ class ConfigManager:
         self.models_file = self.config_dir / "models.json"
         self.pricing_file = self.config_dir / "pricing.json"
         self.usage_file = self.config_dir / "usage.json"
+        self.usage_ledger_file = self.config_dir / "usage.jsonl"
         self.settings_file = self.config_dir / "settings.json"
 
+        # JSON配置文件缓存：{路径: (修改时间, 内容)}，文件未变化时不重复解析
+        self._json_cache: Dict[Path, Any] = {}
+        self._json_cache_lock = threading.Lock()
+
         # 加载.env文件（保持向后兼容）
         self._load_env_file()
 
@@ -84,6 +92,31 @@ class ConfigManager:
 
         self._init_default_configs()
 
+        # Token使用记录账本（旧版 usage.json 会在首次启动时迁移）
+        self.usage_ledger = UsageLedger(
+            self.usage_ledger_file,
+            legacy_file=self.usage_file,
+            max_records=self.load_settings().get("max_usage_records", 10000),
+        )
+
+    def _read_json_cached(self, path: Path) -> Any:
+        """读取JSON文件，按修改时间缓存解析结果"""
+        mtime = path.stat().st_mtime_ns
+        with self._json_cache_lock:
+            cached = self._json_cache.get(path)
+            if cached and cached[0] == mtime:
+                return cached[1]
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        with self._json_cache_lock:
+            self._json_cache[path] = (mtime, data)
+        return data
+
+    def _invalidate_json_cache(self, path: Path):
+        """配置文件被本进程改写后清除缓存（避免文件系统时间精度不足）"""
+        with self._json_cache_lock:
+            self._json_cache.pop(path, None)
+
     def _load_env_file(self):
         """加载.env文件（保持向后兼容）"""
         # 尝试从项目根目录加载.env文件
@@ -91,7 +124,7 @@ class ConfigManager:
         env_file = project_root / ".env"
 
         if env_file.exists():
-            load_dotenv(env_file, override=True)
+            reload_env_file(env_file)
 
     def _get_env_api_key(self, provider: str) -> str:
         """从环境变量获取API密钥"""
@@ -329,8 +362,7 @@ class ConfigManager:
     def load_pricing(self) -> List[PricingConfig]:
         """加载定价配置"""
         try:
-            with open(self.pricing_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = self._read_json_cached(self.pricing_file)
             return [PricingConfig(**item) for item in data]
         except Exception as e:
             logger.error(f"加载定价配置失败: {e}")
@@ -342,27 +374,22 @@ class ConfigManager:
             data = [asdict(price) for price in pricing]
             with open(self.pricing_file, 'w', encoding='utf-8') as f:
                 json.dump(data, f, ensure_ascii=False, indent=2)
+            self._invalidate_json_cache(self.pricing_file)
         except Exception as e:
             logger.error(f"保存定价配置失败: {e}")
     
     def load_usage_records(self) -> List[UsageRecord]:
         """加载使用记录"""
         try:
-            if not self.usage_file.exists():
-                return []
-            with open(self.usage_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return [UsageRecord(**item) for item in data]
+            return [UsageRecord(**item) for item in self.usage_ledger.load_records()]
         except Exception as e:
             logger.error(f"加载使用记录失败: {e}")
             return []
     
     def save_usage_records(self, records: List[UsageRecord]):
-        """保存使用记录"""
+        """保存使用记录（整体替换账本）"""
         try:
-            data = [asdict(record) for record in records]
-            with open(self.usage_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            self.usage_ledger.rewrite([asdict(record) for record in records])
         except Exception as e:
             logger.error(f"保存使用记录失败: {e}")
     
@@ -387,21 +414,13 @@ class ConfigManager:
         if self.mongodb_storage and self.mongodb_storage.is_connected():
             success = self.mongodb_storage.save_usage_record(record)
             if success:
+                self.usage_ledger.observe(asdict(record))
                 return record
             else:
                 logger.error(f"⚠️ MongoDB保存失败，回退到JSON文件存储")
         
-        # 回退到JSON文件存储
-        records = self.load_usage_records()
-        records.append(record)
-        
-        # 限制记录数量
-        settings = self.load_settings()
-        max_records = settings.get("max_usage_records", 10000)
-        if len(records) > max_records:
-            records = records[-max_records:]
-        
-        self.save_usage_records(records)
+        # 回退到本地账本：追加记录，由后台线程批量写盘
+        self.usage_ledger.append(asdict(record))
         return record
     
     def calculate_cost(self, provider: str, model_name: str, input_tokens: int, output_tokens: int) -> float:
@@ -427,8 +446,7 @@ class ConfigManager:
         """加载设置，合并.env中的配置"""
         try:
             if self.settings_file.exists():
-                with open(self.settings_file, 'r', encoding='utf-8') as f:
-                    settings = json.load(f)
+                settings = dict(self._read_json_cached(self.settings_file))
             else:
                 # 如果设置文件不存在，创建默认设置
                 settings = {
@@ -501,6 +519,7 @@ class ConfigManager:
         try:
             with open(self.settings_file, 'w', encoding='utf-8') as f:
                 json.dump(settings, f, ensure_ascii=False, indent=2)
+            self._invalidate_json_cache(self.settings_file)
         except Exception as e:
             logger.error(f"保存设置失败: {e}")
     
@@ -534,52 +553,8 @@ class ConfigManager:
             except Exception as e:
                 logger.error(f"⚠️ MongoDB统计获取失败，回退到JSON文件: {e}")
         
-        # 回退到JSON文件统计
-        records = self.load_usage_records()
-        
-        # 过滤最近N天的记录
-        from datetime import datetime, timedelta
-
-        cutoff_date = datetime.now() - timedelta(days=days)
-        
-        recent_records = []
-        for record in records:
-            try:
-                record_date = datetime.fromisoformat(record.timestamp)
-                if record_date >= cutoff_date:
-                    recent_records.append(record)
-            except:
-                continue
-        
-        # 统计数据
-        total_cost = sum(record.cost for record in recent_records)
-        total_input_tokens = sum(record.input_tokens for record in recent_records)
-        total_output_tokens = sum(record.output_tokens for record in recent_records)
-        
-        # 按供应商统计
-        provider_stats = {}
-        for record in recent_records:
-            if record.provider not in provider_stats:
-                provider_stats[record.provider] = {
-                    "cost": 0,
-                    "input_tokens": 0,
-                    "output_tokens": 0,
-                    "requests": 0
-                }
-            provider_stats[record.provider]["cost"] += record.cost
-            provider_stats[record.provider]["input_tokens"] += record.input_tokens
-            provider_stats[record.provider]["output_tokens"] += record.output_tokens
-            provider_stats[record.provider]["requests"] += 1
-        
-        return {
-            "period_days": days,
-            "total_cost": round(total_cost, 4),
-            "total_input_tokens": total_input_tokens,
-            "total_output_tokens": total_output_tokens,
-            "total_requests": len(recent_records),
-            "provider_stats": provider_stats,
-            "records_count": len(recent_records)
-        }
+        # 回退到本地账本的内存累计统计
+        return self.usage_ledger.get_statistics(days)
     
     def get_data_dir(self) -> str:
         """获取数据目录路径"""
@@ -690,9 +665,11 @@ class TokenTracker:
         settings = self.config_manager.load_settings()
         threshold = settings.get("cost_alert_threshold", 100.0)
 
-        # 获取今日总成本
-        today_stats = self.config_manager.get_usage_statistics(1)
-        total_today = today_stats["total_cost"]
+        # 获取今日总成本（本地账本直接读取内存累计值）
+        if self.config_manager.mongodb_storage and self.config_manager.mongodb_storage.is_connected():
+            total_today = self.config_manager.get_usage_statistics(1)["total_cost"]
+        else:
+            total_today = self.config_manager.usage_ledger.get_day_cost()
 
         if total_today >= threshold:
             logger.warning(f"⚠️ 成本警告: 今日成本已达到 ¥{total_today:.4f}，超过阈值 ¥{threshold}",
@@ -700,9 +677,7 @@ class TokenTracker:
 
     def get_session_cost(self, session_id: str) -> float:
         """获取会话成本"""
-        records = self.config_manager.load_usage_records()
-        session_cost = sum(record.cost for record in records if record.session_id == session_id)
-        return session_cost
+        return self.config_manager.usage_ledger.get_session_cost(session_id)
 
     def estimate_cost(self, provider: str, model_name: str, estimated_input_tokens: int,
                      estimated_output_tokens: int) -> float:
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+进程级数据库连接注册表
+相同连接参数的Redis/MongoDB客户端在整个进程中只创建一次，所有模块共享同一个连接池。
+客户端按间隔做健康检查（ping），不可用时返回None并在重试间隔后惰性重连，
+避免每次请求都新建套接字或反复等待连接超时。
+共享客户端由注册表持有，使用方不应调用 close()。
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+class _Connection:
+    """注册表中的一个客户端及其健康状态"""
+
+    __slots__ = ("client", "healthy", "checked_at", "error", "lock")
+
+    def __init__(self):
+        self.client = None
+        self.healthy = False
+        self.checked_at = 0.0
+        self.error = None
+        self.lock = threading.Lock()
+
+
+class ConnectionRegistry:
+    """按连接参数共享的Redis/MongoDB客户端注册表"""
+
+    def __init__(self, health_check_interval: float = None, retry_interval: float = None,
+                 redis_max_connections: int = None):
+        """
+        Args:
+            health_check_interval: 健康客户端两次ping之间的最小间隔（秒），默认读取 DB_HEALTH_CHECK_INTERVAL（默认30）
+            retry_interval: 连接失败后再次尝试的间隔（秒），默认读取 DB_RETRY_INTERVAL（默认10）
+            redis_max_connections: 每个Redis连接池的最大连接数，默认读取 REDIS_MAX_CONNECTIONS（默认50）
+        """
+        self.health_check_interval = health_check_interval if health_check_interval is not None else \
+            float(os.getenv("DB_HEALTH_CHECK_INTERVAL", "30"))
+        self.retry_interval = retry_interval if retry_interval is not None else \
+            float(os.getenv("DB_RETRY_INTERVAL", "10"))
+        self.redis_max_connections = redis_max_connections or int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+
+        self._connections: Dict[Tuple, _Connection] = {}
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "created": 0, "health_checks": 0, "failures": 0, "reconnects": 0}
+
+    @staticmethod
+    def _key(kind: str, url: Optional[str], options: Dict[str, Any]) -> Tuple:
+        return (kind, url) + tuple(sorted((k, v) for k, v in options.items() if v is not None))
+
+    def _get(self, key: Tuple, factory: Callable[[], Any], ping: Callable[[Any], Any], label: str):
+        with self._lock:
+            self.stats["requests"] += 1
+            connection = self._connections.get(key)
+            if connection is None:
+                connection = self._connections[key] = _Connection()
+
+        with connection.lock:
+            now = time.monotonic()
+            elapsed = now - connection.checked_at
+            if connection.client is not None:
+                if connection.healthy and elapsed < self.health_check_interval:
+                    return connection.client
+                if not connection.healthy and elapsed < self.retry_interval:
+                    return None
+
+            was_unhealthy = connection.error is not None
+            try:
+                if connection.client is None:
+                    connection.client = factory()
+                    self.stats["created"] += 1
+                self.stats["health_checks"] += 1
+                ping(connection.client)
+            except Exception as e:
+                if connection.healthy or connection.error is None:
+                    logger.warning(f"⚠️ [连接池] {label} 不可用，{self.retry_interval:.0f}秒后重试: {e}")
+                connection.healthy = False
+                connection.error = str(e)
+                connection.checked_at = now
+                self.stats["failures"] += 1
+                return None
+
+            if was_unhealthy:
+                self.stats["reconnects"] += 1
+                logger.info(f"✅ [连接池] {label} 已恢复连接")
+            elif not connection.healthy:
+                logger.info(f"✅ [连接池] {label} 连接成功")
+            connection.healthy = True
+            connection.error = None
+            connection.checked_at = now
+            return connection.client
+
+    def get_redis(self, url: str = None, host: str = "localhost", port: int = 6379, db: int = 0,
+                  password: str = None, decode_responses: bool = False,
+                  socket_timeout: float = 5, socket_connect_timeout: float = 5):
+        """
+        获取共享的Redis客户端（底层是按参数共享的ConnectionPool）
+
+        Args:
+            url: redis:// 连接URL，提供时忽略 host/port/password
+            host/port/db/password: 连接参数
+            decode_responses: 是否把返回值解码为字符串
+            socket_timeout/socket_connect_timeout: 套接字超时（秒）
+
+        Returns:
+            redis.Redis，redis未安装或连接不可用时返回None
+        """
+        try:
+            import redis
+        except ImportError:
+            logger.warning(f"⚠️ redis 未安装，Redis功能不可用")
+            return None
+
+        options = {
+            "db": int(db),
+            "decode_responses": decode_responses,
+            "socket_timeout": socket_timeout,
+            "socket_connect_timeout": socket_connect_timeout,
+        }
+        if url is None:
+            options.update(host=host, port=int(port), password=password or None)
+
+        def factory():
+            pool_options = dict(options, max_connections=self.redis_max_connections,
+                                health_check_interval=self.health_check_interval)
+            if url is not None:
+                pool = redis.ConnectionPool.from_url(url, **pool_options)
+            else:
+                pool = redis.ConnectionPool(**pool_options)
+            return redis.Redis(connection_pool=pool)
+
+        # URL中可能带密码，不写入日志
+        label = f"Redis {host}:{port}/{db}" if url is None else f"Redis(URL)/{db}"
+        return self._get(self._key("redis", url, options), factory, lambda client: client.ping(), label)
+
+    def get_mongodb(self, url: str = None, host: str = "localhost", port: int = 27017,
+                    username: str = None, password: str = None, auth_source: str = "admin",
+                    timeout_ms: int = 5000):
+        """
+        获取共享的MongoClient（MongoClient自身维护连接池）
+
+        Args:
+            url: mongodb:// 连接字符串，提供时忽略 host/port/认证参数
+            host/port/username/password/auth_source: 连接参数
+            timeout_ms: 服务器选择与连接超时（毫秒）
+
+        Returns:
+            pymongo.MongoClient，pymongo未安装或连接不可用时返回None
+        """
+        try:
+            from pymongo import MongoClient
+        except ImportError:
+            logger.warning(f"⚠️ pymongo 未安装，MongoDB功能不可用")
+            return None
+
+        options = {"timeout_ms": int(timeout_ms)}
+        if url is None:
+            options.update(host=host, port=int(port))
+            if username and password:
+                options.update(username=username, password=password, auth_source=auth_source)
+
+        def factory():
+            client_options = {
+                "serverSelectionTimeoutMS": options["timeout_ms"],
+                "connectTimeoutMS": options["timeout_ms"],
+            }
+            if url is not None:
+                return MongoClient(url, **client_options)
+            if "username" in options:
+                client_options.update(username=username, password=password, authSource=auth_source)
+            return MongoClient(host=options["host"], port=options["port"], **client_options)
+
+        label = f"MongoDB {host}:{port}" if url is None else "MongoDB"
+        return self._get(self._key("mongodb", url, options), factory,
+                         lambda client: client.admin.command("ping"), label)
+
+    def get_status(self) -> Dict[str, Any]:
+        """各连接的健康状态和统计"""
+        with self._lock:
+            connections = list(self._connections.items())
+        return {
+            "connections": [
+                {"kind": key[0], "healthy": conn.healthy, "error": conn.error}
+                for key, conn in connections
+            ],
+            **self.stats,
+        }
+
+    def close_all(self):
+        """关闭所有共享客户端（进程退出或测试清理时调用）"""
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+        for connection in connections:
+            try:
+                if connection.client is not None:
+                    connection.client.close()
+            except Exception as e:
+                logger.debug(f"关闭连接失败: {e}")
+
+
+# 全局注册表实例
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_connection_registry() -> ConnectionRegistry:
+    """获取全局连接注册表"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ConnectionRegistry()
+        return _registry
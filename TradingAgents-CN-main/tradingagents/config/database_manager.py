@@ -78,6 +78,30 @@ class DatabaseManager:
     
 
     
+    def _shared_mongodb_client(self):
+        """从进程级连接注册表获取MongoDB客户端"""
+        from .connection_registry import get_connection_registry
+        return get_connection_registry().get_mongodb(
+            host=self.mongodb_config["host"],
+            port=self.mongodb_config["port"],
+            username=self.mongodb_config["username"],
+            password=self.mongodb_config["password"],
+            auth_source=self.mongodb_config["auth_source"],
+            timeout_ms=self.mongodb_config["timeout"]
+        )
+
+    def _shared_redis_client(self):
+        """从进程级连接注册表获取Redis客户端"""
+        from .connection_registry import get_connection_registry
+        return get_connection_registry().get_redis(
+            host=self.redis_config["host"],
+            port=self.redis_config["port"],
+            db=self.redis_config["db"],
+            password=self.redis_config["password"],
+            socket_timeout=self.redis_config["timeout"],
+            socket_connect_timeout=self.redis_config["timeout"]
+        )
+
     def _detect_mongodb(self) -> Tuple[bool, str]:
         """检测MongoDB是否可用"""
         # 首先检查是否启用
@@ -86,37 +110,14 @@ class DatabaseManager:
 
         try:
             import pymongo
-            from pymongo import MongoClient
-
-            # 构建连接参数
-            connect_kwargs = {
-                "host": self.mongodb_config["host"],
-                "port": self.mongodb_config["port"],
-                "serverSelectionTimeoutMS": self.mongodb_config["timeout"],
-                "connectTimeoutMS": self.mongodb_config["timeout"]
-            }
-
-            # 如果有用户名和密码，添加认证
-            if self.mongodb_config["username"] and self.mongodb_config["password"]:
-                connect_kwargs.update({
-                    "username": self.mongodb_config["username"],
-                    "password": self.mongodb_config["password"],
-                    "authSource": self.mongodb_config["auth_source"]
-                })
-
-            client = MongoClient(**connect_kwargs)
-
-            # 测试连接
-            client.server_info()
-            client.close()
-
-            return True, "MongoDB连接成功"
-
         except ImportError:
             return False, "pymongo未安装"
-        except Exception as e:
-            return False, f"MongoDB连接失败: {str(e)}"
-    
+
+        # 注册表创建客户端时会ping测试连接
+        if self._shared_mongodb_client() is None:
+            return False, "MongoDB连接失败"
+        return True, "MongoDB连接成功"
+
     def _detect_redis(self) -> Tuple[bool, str]:
         """检测Redis是否可用"""
         # 首先检查是否启用
@@ -125,31 +126,12 @@ class DatabaseManager:
 
         try:
             import redis
-
-            # 构建连接参数
-            connect_kwargs = {
-                "host": self.redis_config["host"],
-                "port": self.redis_config["port"],
-                "db": self.redis_config["db"],
-                "socket_timeout": self.redis_config["timeout"],
-                "socket_connect_timeout": self.redis_config["timeout"]
-            }
-
-            # 如果有密码，添加密码
-            if self.redis_config["password"]:
-                connect_kwargs["password"] = self.redis_config["password"]
-
-            client = redis.Redis(**connect_kwargs)
-
-            # 测试连接
-            client.ping()
-
-            return True, "Redis连接成功"
-
         except ImportError:
             return False, "redis未安装"
-        except Exception as e:
-            return False, f"Redis连接失败: {str(e)}"
+
+        if self._shared_redis_client() is None:
+            return False, "Redis连接失败"
+        return True, "Redis连接成功"
     
     def _detect_databases(self):
         """检测所有数据库"""
@@ -189,67 +171,30 @@ class DatabaseManager:
         self.logger.info(f"主要缓存后端: {self.primary_backend}")
     
     def _initialize_connections(self):
-        """初始化数据库连接"""
-        # 初始化MongoDB连接
+        """初始化数据库连接（共享注册表中的客户端，不单独建立连接）"""
         if self.mongodb_available:
-            try:
-                import pymongo
-
-                # 构建连接参数
-                connect_kwargs = {
-                    "host": self.mongodb_config["host"],
-                    "port": self.mongodb_config["port"],
-                    "serverSelectionTimeoutMS": self.mongodb_config["timeout"]
-                }
-
-                # 如果有用户名和密码，添加认证
-                if self.mongodb_config["username"] and self.mongodb_config["password"]:
-                    connect_kwargs.update({
-                        "username": self.mongodb_config["username"],
-                        "password": self.mongodb_config["password"],
-                        "authSource": self.mongodb_config["auth_source"]
-                    })
-
-                self.mongodb_client = pymongo.MongoClient(**connect_kwargs)
-                self.logger.info("MongoDB客户端初始化成功")
-            except Exception as e:
-                self.logger.error(f"MongoDB客户端初始化失败: {e}")
-                self.mongodb_available = False
+            self.mongodb_client = self._shared_mongodb_client()
+            self.logger.info("MongoDB客户端初始化成功")
 
-        # 初始化Redis连接
         if self.redis_available:
-            try:
-                import redis
-
-                # 构建连接参数
-                connect_kwargs = {
-                    "host": self.redis_config["host"],
-                    "port": self.redis_config["port"],
-                    "db": self.redis_config["db"],
-                    "socket_timeout": self.redis_config["timeout"]
-                }
-
-                # 如果有密码，添加密码
-                if self.redis_config["password"]:
-                    connect_kwargs["password"] = self.redis_config["password"]
-
-                self.redis_client = redis.Redis(**connect_kwargs)
-                self.logger.info("Redis客户端初始化成功")
-            except Exception as e:
-                self.logger.error(f"Redis客户端初始化失败: {e}")
-                self.redis_available = False
+            self.redis_client = self._shared_redis_client()
+            self.logger.info("Redis客户端初始化成功")
     
     def get_mongodb_client(self):
-        """获取MongoDB客户端"""
-        if self.mongodb_available and self.mongodb_client:
-            return self.mongodb_client
-        return None
+        """获取MongoDB客户端（不可用时返回None，恢复后自动重连）"""
+        if not self.mongodb_enabled:
+            return None
+        self.mongodb_client = self._shared_mongodb_client()
+        self.mongodb_available = self.mongodb_client is not None
+        return self.mongodb_client
     
     def get_redis_client(self):
-        """获取Redis客户端"""
-        if self.redis_available and self.redis_client:
-            return self.redis_client
-        return None
+        """获取Redis客户端（不可用时返回None，恢复后自动重连）"""
+        if not self.redis_enabled:
+            return None
+        self.redis_client = self._shared_redis_client()
+        self.redis_available = self.redis_client is not None
+        return self.redis_client
     
     def is_mongodb_available(self) -> bool:
         """检查MongoDB是否可用"""
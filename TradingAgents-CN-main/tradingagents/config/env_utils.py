@@ -5,6 +5,7 @@
 """
 
 import os
+import sys
 from typing import Any, Union, Optional
 
 
@@ -213,6 +214,33 @@ def validate_required_env_vars(required_vars: list) -> dict:
     return results
 
 
+def reload_env_file(env_file) -> bool:
+    """
+    以覆盖方式重新加载.env文件
+
+    .env中的API密钥可能已被修改，环境变量发生变化时清空已创建的共享LLM客户端，
+    避免继续使用旧密钥创建的客户端。
+
+    Args:
+        env_file: .env文件路径
+
+    Returns:
+        bool: 是否加载了文件
+    """
+    from dotenv import load_dotenv
+
+    before = dict(os.environ)
+    loaded = load_dotenv(env_file, override=True)
+    if dict(os.environ) == before:
+        return loaded
+
+    # 只在交易图模块已加载时清理，避免为此导入LLM相关依赖
+    trading_graph = sys.modules.get("tradingagents.graph.trading_graph")
+    if trading_graph is not None:
+        trading_graph.clear_llm_clients()
+    return loaded
+
+
 # 兼容性函数：保持向后兼容
 def get_bool_env(env_var: str, default: bool = False) -> bool:
     """向后兼容的布尔值解析函数"""
@@ -238,6 +266,7 @@ __all__ = [
     'parse_list_env',
     'get_env_info',
     'validate_required_env_vars',
+    'reload_env_file',
     'get_bool_env',  # 向后兼容
     'get_int_env',   # 向后兼容
     'get_str_env'    # 向后兼容
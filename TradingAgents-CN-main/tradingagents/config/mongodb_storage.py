@@ -52,15 +52,16 @@ class MongoDBStorage:
         self._connect()
     
     def _connect(self):
-        """连接到MongoDB"""
+        """连接到MongoDB（使用进程级共享连接池）"""
+        from .connection_registry import get_connection_registry
+
+        self.client = get_connection_registry().get_mongodb(url=self.connection_string, timeout_ms=5000)
+        if self.client is None:
+            logger.info(f"将使用本地JSON文件存储")
+            self._connected = False
+            return
+
         try:
-            self.client = MongoClient(
-                self.connection_string,
-                serverSelectionTimeoutMS=5000  # 5秒超时
-            )
-            # 测试连接
-            self.client.admin.command('ping')
-            
             self.db = self.client[self.database_name]
             self.collection = self.db[self.collection_name]
             
@@ -70,10 +71,6 @@ class MongoDBStorage:
             self._connected = True
             logger.info(f"✅ MongoDB连接成功: {self.database_name}.{self.collection_name}")
             
-        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
-            logger.error(f"❌ MongoDB连接失败: {e}")
-            logger.info(f"将使用本地JSON文件存储")
-            self._connected = False
         except Exception as e:
             logger.error(f"❌ MongoDB初始化失败: {e}")
             self._connected = False
@@ -283,8 +280,8 @@ class MongoDBStorage:
             return 0
     
     def close(self):
-        """关闭MongoDB连接"""
+        """释放MongoDB连接（客户端由进程级连接注册表共享，这里只解除引用）"""
         if self.client:
-            self.client.close()
+            self.client = None
             self._connected = False
-            logger.info(f"MongoDB连接已关闭")
\ No newline at end of file
+            logger.info(f"MongoDB连接已释放")
\ No newline at end of file
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Token使用记录账本
+以JSONL追加方式存储使用记录，由后台线程批量写盘，并在内存中维护
+按日期/供应商/会话的累计统计，使成本警告和统计查询不再需要扫描全部记录
+"""
+
+import atexit
+import json
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+def _empty_totals() -> Dict[str, Any]:
+    return {"cost": 0.0, "input_tokens": 0, "output_tokens": 0, "requests": 0}
+
+
+def _add_to_totals(totals: Dict[str, Any], record: Dict[str, Any]):
+    totals["cost"] += record.get("cost", 0.0)
+    totals["input_tokens"] += record.get("input_tokens", 0)
+    totals["output_tokens"] += record.get("output_tokens", 0)
+    totals["requests"] += 1
+
+
+class UsageLedger:
+    """追加写入、批量刷盘的使用记录账本"""
+
+    def __init__(self, ledger_file: Path, legacy_file: Optional[Path] = None,
+                 max_records: int = 10000, flush_interval: float = 2.0,
+                 batch_size: int = 50):
+        """
+        Args:
+            ledger_file: JSONL账本文件路径
+            legacy_file: 旧版 usage.json 路径，账本不存在时从中迁移记录
+            max_records: 保留的最大记录数，超出一倍后压缩文件
+            flush_interval: 后台线程刷盘间隔（秒）
+            batch_size: 待写入记录达到该数量时立即唤醒后台线程
+        """
+        self.ledger_file = Path(ledger_file)
+        self.max_records = max_records
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._pending: List[Dict[str, Any]] = []
+        self._line_count = 0
+        self._wakeup = threading.Event()
+        self._closed = False
+
+        # 内存中的累计统计
+        self._daily: Dict[str, Dict[str, Any]] = defaultdict(_empty_totals)
+        self._daily_provider: Dict[str, Dict[str, Dict[str, Any]]] = defaultdict(
+            lambda: defaultdict(_empty_totals)
+        )
+        self._session_cost: Dict[str, float] = defaultdict(float)
+
+        if not self.ledger_file.exists() and legacy_file is not None and Path(legacy_file).exists():
+            self._migrate_legacy(Path(legacy_file))
+
+        for record in self._read_file():
+            self._observe(record)
+            self._line_count += 1
+
+        self._writer = threading.Thread(target=self._writer_loop, name="usage-ledger-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _migrate_legacy(self, legacy_file: Path):
+        """把旧版 usage.json 中的记录迁移到JSONL账本"""
+        try:
+            with open(legacy_file, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+            self._write_lines(records, mode='w')
+            logger.info(f"📦 已迁移 {len(records)} 条使用记录到账本: {self.ledger_file}")
+        except Exception as e:
+            logger.error(f"迁移旧版使用记录失败: {e}")
+
+    def _read_file(self) -> List[Dict[str, Any]]:
+        if not self.ledger_file.exists():
+            return []
+        records = []
+        with open(self.ledger_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return records
+
+    def _write_lines(self, records: List[Dict[str, Any]], mode: str = 'a'):
+        with open(self.ledger_file, mode, encoding='utf-8') as f:
+            f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+
+    def _observe(self, record: Dict[str, Any]):
+        """更新内存累计统计（调用方持有锁或处于初始化阶段）"""
+        day = str(record.get("timestamp", ""))[:10]
+        _add_to_totals(self._daily[day], record)
+        _add_to_totals(self._daily_provider[day][record.get("provider", "unknown")], record)
+        self._session_cost[record.get("session_id", "")] += record.get("cost", 0.0)
+
+    def observe(self, record: Dict[str, Any]):
+        """只更新内存统计，不写入账本（记录已由其他存储持久化时使用）"""
+        with self._lock:
+            self._observe(record)
+
+    def append(self, record: Dict[str, Any]):
+        """追加一条记录：立即更新统计，写盘由后台线程批量完成"""
+        with self._lock:
+            self._observe(record)
+            self._pending.append(record)
+            should_wake = len(self._pending) >= self.batch_size
+        if should_wake:
+            self._wakeup.set()
+
+    def flush(self):
+        """把待写入的记录写入账本文件"""
+        with self._io_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if not pending:
+                return
+            if not self.ledger_file.parent.exists():
+                # 账本目录已被删除（如临时配置目录），无法再写入
+                logger.debug(f"使用记录账本目录不存在，丢弃 {len(pending)} 条记录: {self.ledger_file}")
+                return
+            try:
+                self._write_lines(pending)
+                self._line_count += len(pending)
+            except Exception as e:
+                logger.error(f"写入使用记录账本失败: {e}")
+                with self._lock:
+                    self._pending = pending + self._pending
+                return
+
+            if self._line_count > self.max_records * 2:
+                self._compact()
+
+    def _compact(self):
+        """只保留最近 max_records 条记录（调用方持有 _io_lock）"""
+        records = self._read_file()[-self.max_records:]
+        tmp_file = self.ledger_file.with_suffix(self.ledger_file.suffix + ".tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        tmp_file.replace(self.ledger_file)
+        self._line_count = len(records)
+
+    def _writer_loop(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def close(self):
+        """停止后台线程并写入剩余记录"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self.flush()
+
+    def load_records(self) -> List[Dict[str, Any]]:
+        """读取全部记录（包括尚未写盘的记录）"""
+        self.flush()
+        with self._io_lock:
+            return self._read_file()
+
+    def rewrite(self, records: List[Dict[str, Any]]):
+        """用给定记录替换整个账本，并重建统计"""
+        with self._io_lock:
+            with self._lock:
+                self._pending = []
+                self._daily.clear()
+                self._daily_provider.clear()
+                self._session_cost.clear()
+                for record in records:
+                    self._observe(record)
+            self._write_lines(records, mode='w')
+            self._line_count = len(records)
+
+    def get_day_cost(self, day: str = None) -> float:
+        """获取某天（默认今天）的总成本"""
+        day = day or datetime.now().strftime("%Y-%m-%d")
+        with self._lock:
+            return self._daily[day]["cost"] if day in self._daily else 0.0
+
+    def get_session_cost(self, session_id: str) -> float:
+        """获取会话总成本"""
+        with self._lock:
+            return self._session_cost.get(session_id, 0.0)
+
+    def get_statistics(self, days: int = 30) -> Dict[str, Any]:
+        """按天聚合最近N天的统计（包含起始日整天）"""
+        first_day = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        totals = _empty_totals()
+        provider_stats: Dict[str, Dict[str, Any]] = defaultdict(_empty_totals)
+
+        with self._lock:
+            for day, day_totals in self._daily.items():
+                if day < first_day:
+                    continue
+                for key in totals:
+                    totals[key] += day_totals[key]
+                for provider, provider_totals in self._daily_provider[day].items():
+                    for key in provider_totals:
+                        provider_stats[provider][key] += provider_totals[key]
+
+        return {
+            "period_days": days,
+            "total_cost": round(totals["cost"], 4),
+            "total_input_tokens": totals["input_tokens"],
+            "total_output_tokens": totals["output_tokens"],
+            "total_requests": totals["requests"],
+            "provider_stats": dict(provider_stats),
+            "records_count": totals["requests"]
+        }
@@ -7,8 +7,11 @@ AKShare数据源工具
 import pandas as pd
 from typing import Optional, Dict, Any
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from .data_context import context_cached
+
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
@@ -93,11 +96,18 @@ class AKShareProvider:
             logger.error(f"❌ AKShare获取股票数据失败: {e}")
             return None
     
+    @context_cached("akshare_stock_info")
     def get_stock_info(self, symbol: str) -> Dict[str, Any]:
         """获取股票基本信息"""
         if not self.connected:
             return {}
-        
+
+        # 名称优先从证券主数据中查找，不再为一只股票下载完整列表
+        from .security_master import CHINA_A, lookup_security
+        record = lookup_security(symbol, CHINA_A)
+        if record is not None:
+            return {'symbol': symbol, 'name': record.name, 'source': 'akshare'}
+
         try:
             # 获取股票基本信息
             stock_list = self.ak.stock_info_a_code_name()
@@ -209,6 +219,7 @@ class AKShareProvider:
             logger.error(f"❌ AKShare获取港股数据失败: {e}")
             return None
 
+    @context_cached("akshare_hk_stock_info")
     def get_hk_stock_info(self, symbol: str) -> Dict[str, Any]:
         """
         获取港股基本信息
@@ -228,6 +239,18 @@ class AKShareProvider:
                 'source': 'akshare_unavailable'
             }
 
+        # 证券主数据命中时不再下载完整的港股行情表
+        from .security_master import HONG_KONG, lookup_security
+        record = lookup_security(symbol, HONG_KONG)
+        if record is not None:
+            return {
+                'symbol': symbol,
+                'name': record.name,
+                'currency': 'HKD',
+                'exchange': 'HKG',
+                'source': 'akshare'
+            }
+
         try:
             hk_symbol = self._normalize_hk_symbol_for_akshare(symbol)
 
@@ -325,6 +348,7 @@ class AKShareProvider:
 
         return clean_symbol
 
+    @context_cached("akshare_financial_data")
     def get_financial_data(self, symbol: str) -> Dict[str, Any]:
         """
         获取股票财务数据
@@ -339,60 +363,36 @@ class AKShareProvider:
             logger.error(f"❌ AKShare未连接，无法获取{symbol}财务数据")
             return {}
         
+        from .financial_statement_cache import get_financial_statement_cache, is_financial_cache_enabled
+
+        cache = get_financial_statement_cache() if is_financial_cache_enabled() else None
+        if cache is not None:
+            cached = cache.get_statements('akshare', symbol)
+            if cached is not None:
+                logger.info(f"⚡ 使用缓存的{symbol}AKShare财务数据 (报告期: {cache.get_report_period('akshare', symbol)})")
+                return cached
+
         try:
             logger.info(f"🔍 开始获取{symbol}的AKShare财务数据")
-            
-            financial_data = {}
-            
-            # 1. 优先获取主要财务指标
-            try:
-                logger.debug(f"📊 尝试获取{symbol}主要财务指标...")
-                main_indicators = self.ak.stock_financial_abstract(symbol=symbol)
-                if main_indicators is not None and not main_indicators.empty:
-                    financial_data['main_indicators'] = main_indicators
-                    logger.info(f"✅ 成功获取{symbol}主要财务指标: {len(main_indicators)}条记录")
-                    logger.debug(f"主要财务指标列名: {list(main_indicators.columns)}")
-                else:
-                    logger.warning(f"⚠️ {symbol}主要财务指标为空")
-            except Exception as e:
-                logger.warning(f"❌ 获取{symbol}主要财务指标失败: {e}")
-            
-            # 2. 尝试获取资产负债表（可能失败，降级为debug日志）
-            try:
-                logger.debug(f"📊 尝试获取{symbol}资产负债表...")
-                balance_sheet = self.ak.stock_balance_sheet_by_report_em(symbol=symbol)
-                if balance_sheet is not None and not balance_sheet.empty:
-                    financial_data['balance_sheet'] = balance_sheet
-                    logger.debug(f"✅ 成功获取{symbol}资产负债表: {len(balance_sheet)}条记录")
-                else:
-                    logger.debug(f"⚠️ {symbol}资产负债表为空")
-            except Exception as e:
-                logger.debug(f"❌ 获取{symbol}资产负债表失败: {e}")
-            
-            # 3. 尝试获取利润表（可能失败，降级为debug日志）
-            try:
-                logger.debug(f"📊 尝试获取{symbol}利润表...")
-                income_statement = self.ak.stock_profit_sheet_by_report_em(symbol=symbol)
-                if income_statement is not None and not income_statement.empty:
-                    financial_data['income_statement'] = income_statement
-                    logger.debug(f"✅ 成功获取{symbol}利润表: {len(income_statement)}条记录")
-                else:
-                    logger.debug(f"⚠️ {symbol}利润表为空")
-            except Exception as e:
-                logger.debug(f"❌ 获取{symbol}利润表失败: {e}")
-            
-            # 4. 尝试获取现金流量表（可能失败，降级为debug日志）
-            try:
-                logger.debug(f"📊 尝试获取{symbol}现金流量表...")
-                cash_flow = self.ak.stock_cash_flow_sheet_by_report_em(symbol=symbol)
-                if cash_flow is not None and not cash_flow.empty:
-                    financial_data['cash_flow'] = cash_flow
-                    logger.debug(f"✅ 成功获取{symbol}现金流量表: {len(cash_flow)}条记录")
-                else:
-                    logger.debug(f"⚠️ {symbol}现金流量表为空")
-            except Exception as e:
-                logger.debug(f"❌ 获取{symbol}现金流量表失败: {e}")
-            
+
+            # 主要财务指标与三张报表互不依赖，并发获取
+            fetchers = [
+                ('main_indicators', '主要财务指标', self.ak.stock_financial_abstract),
+                ('balance_sheet', '资产负债表', self.ak.stock_balance_sheet_by_report_em),
+                ('income_statement', '利润表', self.ak.stock_profit_sheet_by_report_em),
+                ('cash_flow', '现金流量表', self.ak.stock_cash_flow_sheet_by_report_em),
+            ]
+            with ThreadPoolExecutor(max_workers=len(fetchers)) as executor:
+                futures = [
+                    (key, label, executor.submit(self._fetch_financial_table, symbol, key, label, func))
+                    for key, label, func in fetchers
+                ]
+                financial_data = {}
+                for key, label, future in futures:
+                    table = future.result()
+                    if table is not None:
+                        financial_data[key] = table
+
             # 记录最终结果
             if financial_data:
                 logger.info(f"✅ AKShare财务数据获取完成: {symbol}, 包含{len(financial_data)}个数据集")
@@ -401,13 +401,36 @@ class AKShareProvider:
                         logger.info(f"  - {key}: {len(value)}条记录")
             else:
                 logger.warning(f"⚠️ 未能获取{symbol}的任何AKShare财务数据")
-            
+
+            # 解析依赖主要财务指标，缺失时不缓存，下次重新获取
+            if cache is not None and 'main_indicators' in financial_data:
+                period = cache.put_statements('akshare', symbol, financial_data)
+                logger.debug(f"💾 已缓存{symbol}AKShare财务数据，最新报告期: {period}")
+
             return financial_data
             
         except Exception as e:
             logger.error(f"❌ AKShare获取{symbol}财务数据失败: {e}")
             return {}
 
+    def _fetch_financial_table(self, symbol: str, key: str, label: str, func):
+        """获取单张财务报表，失败或为空时返回None（主要财务指标之外的报表经常失败，降级为debug日志）"""
+        log = logger.warning if key == 'main_indicators' else logger.debug
+        try:
+            logger.debug(f"📊 尝试获取{symbol}{label}...")
+            table = func(symbol=symbol)
+            if table is not None and not table.empty:
+                if key == 'main_indicators':
+                    logger.info(f"✅ 成功获取{symbol}{label}: {len(table)}条记录")
+                    logger.debug(f"{label}列名: {list(table.columns)}")
+                else:
+                    logger.debug(f"✅ 成功获取{symbol}{label}: {len(table)}条记录")
+                return table
+            log(f"⚠️ {symbol}{label}为空")
+        except Exception as e:
+            log(f"❌ 获取{symbol}{label}失败: {e}")
+        return None
+
 def get_akshare_provider() -> AKShareProvider:
     """获取AKShare提供器实例"""
     return AKShareProvider()
@@ -7,6 +7,8 @@
 import os
 import json
 import pickle
+import sqlite3
+import threading
 import pandas as pd
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -18,6 +20,158 @@ from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
 
 
+class CacheMetadataIndex:
+    """缓存元数据索引 - 基于SQLite
+
+    ``_meta.json`` 文件仍然是元数据的来源，索引只是它们的查询加速层：
+    按 symbol/data_type/market/source 查找、按 cached_at 清理和统计都变成索引查询，
+    不再需要遍历并解析整个 metadata 目录。索引文件不存在时会从现有
+    ``_meta.json`` 文件重建。
+    """
+
+    _COLUMNS = ('cache_key', 'symbol', 'data_type', 'market_type', 'data_source',
+                'start_date', 'end_date', 'cached_at', 'file_path', 'file_format',
+                'content_length', 'file_size')
+
+    def __init__(self, metadata_dir: Path):
+        self.metadata_dir = Path(metadata_dir)
+        self.db_path = self.metadata_dir / "cache_index.sqlite3"
+        self._lock = threading.Lock()
+
+        is_new = not self.db_path.exists()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_index (
+                    cache_key TEXT PRIMARY KEY,
+                    symbol TEXT,
+                    data_type TEXT,
+                    market_type TEXT,
+                    data_source TEXT,
+                    start_date TEXT,
+                    end_date TEXT,
+                    cached_at TEXT,
+                    file_path TEXT,
+                    file_format TEXT,
+                    content_length INTEGER,
+                    file_size INTEGER
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cache_lookup "
+                "ON cache_index (symbol, data_type, market_type, data_source)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cache_cached_at ON cache_index (cached_at)"
+            )
+
+        if is_new:
+            self.rebuild()
+
+    def _row_from_metadata(self, cache_key: str, metadata: Dict[str, Any]) -> tuple:
+        file_path = metadata.get('file_path')
+        file_size = None
+        if file_path:
+            try:
+                file_size = os.path.getsize(file_path)
+            except OSError:
+                file_size = None
+        return (
+            cache_key,
+            metadata.get('symbol'),
+            metadata.get('data_type'),
+            metadata.get('market_type'),
+            metadata.get('data_source'),
+            metadata.get('start_date'),
+            metadata.get('end_date'),
+            metadata.get('cached_at'),
+            file_path,
+            metadata.get('file_format'),
+            metadata.get('content_length'),
+            file_size,
+        )
+
+    def upsert(self, cache_key: str, metadata: Dict[str, Any]):
+        """写入或更新一条索引记录"""
+        row = self._row_from_metadata(cache_key, metadata)
+        placeholders = ", ".join("?" for _ in self._COLUMNS)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO cache_index ({', '.join(self._COLUMNS)}) VALUES ({placeholders})",
+                row,
+            )
+
+    def remove(self, cache_keys: List[str]):
+        """删除索引记录"""
+        if not cache_keys:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM cache_index WHERE cache_key = ?",
+                [(key,) for key in cache_keys],
+            )
+
+    def rebuild(self) -> int:
+        """从 metadata 目录中的 ``_meta.json`` 文件重建索引"""
+        rows = []
+        for metadata_file in self.metadata_dir.glob("*_meta.json"):
+            try:
+                with open(metadata_file, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+                cache_key = metadata_file.stem.replace('_meta', '')
+                rows.append(self._row_from_metadata(cache_key, metadata))
+            except Exception:
+                continue
+
+        placeholders = ", ".join("?" for _ in self._COLUMNS)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache_index")
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO cache_index ({', '.join(self._COLUMNS)}) VALUES ({placeholders})",
+                rows,
+            )
+
+        logger.info(f"🗂️ 缓存元数据索引已重建: {len(rows)} 条记录")
+        return len(rows)
+
+    def query(self, symbol: str = None, data_type: str = None, market_type: str = None,
+              data_source: str = None, cached_after: str = None,
+              cached_before: str = None) -> List[Dict[str, Any]]:
+        """按条件查询索引记录，按缓存时间倒序返回"""
+        conditions = []
+        params = []
+        for column, value in (('symbol', symbol), ('data_type', data_type),
+                              ('market_type', market_type), ('data_source', data_source)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if cached_after is not None:
+            conditions.append("cached_at >= ?")
+            params.append(cached_after)
+        if cached_before is not None:
+            conditions.append("cached_at < ?")
+            params.append(cached_before)
+
+        sql = "SELECT * FROM cache_index"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY cached_at DESC"
+
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    def stats(self) -> Dict[str, Any]:
+        """按数据类型汇总数量和文件大小"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data_type, COUNT(*) AS count, COALESCE(SUM(file_size), 0) AS size, "
+                "SUM(CASE WHEN file_size IS NULL THEN 1 ELSE 0 END) AS missing "
+                "FROM cache_index GROUP BY data_type"
+            ).fetchall()
+        return {row['data_type']: dict(row) for row in rows}
+
+
 class StockDataCache:
     """股票数据缓存管理器 - 支持美股和A股数据缓存优化"""
 
@@ -51,6 +205,9 @@ class StockDataCache:
                         self.china_fundamentals_dir, self.metadata_dir]:
             dir_path.mkdir(exist_ok=True)
 
+        # 元数据索引（首次启动时从现有 _meta.json 重建）
+        self.metadata_index = CacheMetadataIndex(self.metadata_dir)
+
         # 缓存配置 - 针对不同市场设置不同的TTL
         self.cache_config = {
             'us_stock_data': {
@@ -216,6 +373,31 @@ class StockDataCache:
         
         with open(metadata_path, 'w', encoding='utf-8') as f:
             json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+        self.metadata_index.upsert(cache_key, metadata)
+
+    def query_metadata(self, symbol: str = None, data_type: str = None,
+                       market_type: str = None, data_source: str = None,
+                       max_age_hours: float = None) -> List[Dict[str, Any]]:
+        """
+        通过元数据索引查询缓存记录
+
+        Args:
+            symbol: 股票代码
+            data_type: 数据类型（stock_data/news/fundamentals）
+            market_type: 市场类型（china/us）
+            data_source: 数据源
+            max_age_hours: 只返回该时间内的缓存，None表示不限制
+
+        Returns:
+            元数据字典列表（包含 cache_key），按缓存时间倒序
+        """
+        cached_after = None
+        if max_age_hours is not None:
+            cached_after = (datetime.now() - timedelta(hours=max_age_hours)).isoformat()
+        return self.metadata_index.query(symbol=symbol, data_type=data_type,
+                                         market_type=market_type, data_source=data_source,
+                                         cached_after=cached_after)
     
     def _load_metadata(self, cache_key: str) -> Optional[Dict[str, Any]]:
         """加载元数据"""
@@ -388,23 +570,14 @@ class StockDataCache:
             return search_key
 
         # 如果没有精确匹配，查找部分匹配（相同股票代码的其他缓存）
-        for metadata_file in self.metadata_dir.glob(f"*_meta.json"):
-            try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-
-                if (metadata.get('symbol') == symbol and
-                    metadata.get('data_type') == 'stock_data' and
-                    metadata.get('market_type') == market_type and
-                    (data_source is None or metadata.get('data_source') == data_source)):
-
-                    cache_key = metadata_file.stem.replace('_meta', '')
-                    if self.is_cache_valid(cache_key, max_age_hours, symbol, 'stock_data'):
-                        desc = self.cache_config.get(f"{market_type}_stock_data", {}).get('description', '数据')
-                        logger.info(f"📋 找到部分匹配的{desc}: {symbol} -> {cache_key}")
-                        return cache_key
-            except Exception:
-                continue
+        for metadata in self.query_metadata(symbol=symbol, data_type='stock_data',
+                                            market_type=market_type, data_source=data_source,
+                                            max_age_hours=max_age_hours):
+            cache_key = metadata['cache_key']
+            if self.is_cache_valid(cache_key, max_age_hours, symbol, 'stock_data'):
+                desc = self.cache_config.get(f"{market_type}_stock_data", {}).get('description', '数据')
+                logger.info(f"📋 找到部分匹配的{desc}: {symbol} -> {cache_key}")
+                return cache_key
 
         desc = self.cache_config.get(f"{market_type}_stock_data", {}).get('description', '数据')
         logger.error(f"❌ 未找到有效的{desc}缓存: {symbol}")
@@ -529,23 +702,14 @@ class StockDataCache:
             max_age_hours = self.cache_config.get(cache_type, {}).get('ttl_hours', 24)
         
         # 查找匹配的缓存
-        for metadata_file in self.metadata_dir.glob(f"*_meta.json"):
-            try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                
-                if (metadata.get('symbol') == symbol and
-                    metadata.get('data_type') == 'fundamentals' and
-                    metadata.get('market_type') == market_type and
-                    (data_source is None or metadata.get('data_source') == data_source)):
-                    
-                    cache_key = metadata_file.stem.replace('_meta', '')
-                    if self.is_cache_valid(cache_key, max_age_hours, symbol, 'fundamentals'):
-                        desc = self.cache_config.get(f"{market_type}_fundamentals", {}).get('description', '基本面数据')
-                        logger.info(f"🎯 找到匹配的{desc}缓存: {symbol} ({data_source}) -> {cache_key}")
-                        return cache_key
-            except Exception:
-                continue
+        for metadata in self.query_metadata(symbol=symbol, data_type='fundamentals',
+                                            market_type=market_type, data_source=data_source,
+                                            max_age_hours=max_age_hours):
+            cache_key = metadata['cache_key']
+            if self.is_cache_valid(cache_key, max_age_hours, symbol, 'fundamentals'):
+                desc = self.cache_config.get(f"{market_type}_fundamentals", {}).get('description', '基本面数据')
+                logger.info(f"🎯 找到匹配的{desc}缓存: {symbol} ({data_source}) -> {cache_key}")
+                return cache_key
         
         desc = self.cache_config.get(f"{market_type}_fundamentals", {}).get('description', '基本面数据')
         logger.error(f"❌ 未找到有效的{desc}缓存: {symbol} ({data_source})")
@@ -556,24 +720,27 @@ class StockDataCache:
         cutoff_time = datetime.now() - timedelta(days=max_age_days)
         cleared_count = 0
         
-        for metadata_file in self.metadata_dir.glob("*_meta.json"):
+        expired = self.metadata_index.query(cached_before=cutoff_time.isoformat())
+        removed_keys = []
+        for metadata in expired:
             try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                
-                cached_at = datetime.fromisoformat(metadata['cached_at'])
-                if cached_at < cutoff_time:
-                    # 删除数据文件
+                # 删除数据文件
+                if metadata.get('file_path'):
                     data_file = Path(metadata['file_path'])
                     if data_file.exists():
                         data_file.unlink()
-                    
-                    # 删除元数据文件
+                
+                # 删除元数据文件
+                metadata_file = self._get_metadata_path(metadata['cache_key'])
+                if metadata_file.exists():
                     metadata_file.unlink()
-                    cleared_count += 1
+                removed_keys.append(metadata['cache_key'])
+                cleared_count += 1
                     
             except Exception as e:
                 logger.warning(f"⚠️ 清理缓存时出错: {e}")
+
+        self.metadata_index.remove(removed_keys)
         
         logger.info(f"🧹 已清理 {cleared_count} 个过期缓存文件")
     
@@ -588,31 +755,18 @@ class StockDataCache:
             'skipped_count': 0  # 新增：跳过的缓存数量
         }
         
-        for metadata_file in self.metadata_dir.glob("*_meta.json"):
-            try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                
-                data_type = metadata.get('data_type', 'unknown')
-                if data_type == 'stock_data':
-                    stats['stock_data_count'] += 1
-                elif data_type == 'news':
-                    stats['news_count'] += 1
-                elif data_type == 'fundamentals':
-                    stats['fundamentals_count'] += 1
-                
-                # 检查是否为跳过的缓存（没有实际文件）
-                data_file = Path(metadata.get('file_path', ''))
-                if not data_file.exists():
-                    stats['skipped_count'] += 1
-                else:
-                    # 计算文件大小
-                    stats['total_size_mb'] += data_file.stat().st_size / (1024 * 1024)
-                
-                stats['total_files'] += 1
-                
-            except Exception:
-                continue
+        for data_type, row in self.metadata_index.stats().items():
+            if data_type == 'stock_data':
+                stats['stock_data_count'] += row['count']
+            elif data_type == 'news':
+                stats['news_count'] += row['count']
+            elif data_type == 'fundamentals':
+                stats['fundamentals_count'] += row['count']
+
+            # 没有实际文件的记录视为跳过的缓存
+            stats['skipped_count'] += row['missing']
+            stats['total_size_mb'] += row['size'] / (1024 * 1024)
+            stats['total_files'] += row['count']
         
         stats['total_size_mb'] = round(stats['total_size_mb'], 2)
         return stats
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+分析运行内的数据上下文
+一次 propagate 内共享的数据结果：按 (名称, 规范化参数) 保存 Future。
+图启动时预取阶段提前提交确定会被调用的数据获取，工具调用时直接取已完成（或进行中）的结果，
+相同参数的重复调用也复用同一份结果。
+
+Web分析按会话ID登记一个运行级上下文，数据预获取（stock_validator）、Toolkit工具和
+OptimizedChinaDataProvider 共用其中的信息字典和日线 DataFrame，每份数据在一次分析内最多获取一次。
+"""
+
+import contextvars
+import functools
+import inspect
+import os
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import pandas as pd
+
+from .ohlcv_store import _shift_day, _to_day, date_column, merge_frames, slice_by_date
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+_current_context: contextvars.ContextVar = contextvars.ContextVar("data_context", default=None)
+
+
+def get_data_context() -> Optional["DataContext"]:
+    """获取当前运行的数据上下文（LangGraph节点线程会继承调用方的上下文）"""
+    return _current_context.get()
+
+
+@contextmanager
+def use_data_context(context: Optional["DataContext"]):
+    """在 with 块内把 context 设为当前数据上下文"""
+    token = _current_context.set(context)
+    try:
+        yield context
+    finally:
+        _current_context.reset(token)
+
+
+def _call_key(name: str, func: Callable, args: tuple, kwargs: dict) -> Tuple[str, Hashable]:
+    """按函数签名规范化参数（补齐默认值），位置参数和关键字参数得到相同的键"""
+    try:
+        bound = inspect.signature(func).bind(*args, **kwargs)
+        bound.apply_defaults()
+        # 方法的 self 不参与键：同一运行内不同的提供器实例共享结果
+        items = [(key, value) for key, value in bound.arguments.items() if key != "self"]
+    except TypeError:
+        items = list(enumerate(args)) + sorted(kwargs.items())
+    return name, tuple((key, repr(value)) for key, value in items)
+
+
+# 数据源获取失败时返回的占位名称，如“股票000001”
+_PLACEHOLDER_NAME_RE = re.compile(r"股票[0-9A-Za-z.]+")
+
+
+def _is_failure_result(result) -> bool:
+    """
+    数据源以返回值表示的失败：“❌”开头的文本、空结果，以及名称缺失或为“股票{代码}”占位的信息字典。
+    这些结果不在运行内复用，后续调用重新获取
+    """
+    if result is None:
+        return True
+    if isinstance(result, str):
+        return result.lstrip().startswith("❌")
+    if isinstance(result, dict):
+        if not result:
+            return True
+        if "name" in result:
+            name = str(result.get("name") or "")
+            return name in ("", "未知") or _PLACEHOLDER_NAME_RE.fullmatch(name) is not None
+        return False
+    if isinstance(result, pd.DataFrame):
+        return result.empty
+    return False
+
+
+class DataContext:
+    """一次分析运行内共享的数据结果，预取与工具调用复用同一个 Future"""
+
+    def __init__(self, ticker: str, trade_date: str, max_workers: int = None, run_id: str = None):
+        self.ticker = ticker
+        self.trade_date = trade_date
+        self.run_id = run_id
+        self.max_workers = max_workers or int(os.getenv("DATA_PREFETCH_WORKERS", "4"))
+        self._futures: Dict[Tuple[str, Hashable], Future] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._closed = False
+        # (命名空间, 股票代码) -> (开始日期, 结束日期, DataFrame)
+        self._frames: Dict[Tuple[str, str], Tuple[str, str, pd.DataFrame]] = {}
+        self._frame_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self.stats = {"prefetched": 0, "hits": 0, "waits": 0, "misses": 0, "prefetch_errors": 0,
+                      "failures_discarded": 0, "frame_hits": 0, "frame_loads": 0}
+
+    def _run_in_context(self, func: Callable, kwargs: dict):
+        # 预取任务内部的数据调用同样经过本上下文
+        with use_data_context(self):
+            return func(**kwargs)
+
+    def prefetch(self, func: Callable, **kwargs) -> Optional[Future]:
+        """
+        在后台提交一次数据获取
+
+        Args:
+            func: 经过 context_cached 装饰的函数（或其 LangChain 工具的 .func）
+            kwargs: 与工具调用时相同的参数
+        """
+        name = getattr(func, "context_name", None)
+        raw = getattr(func, "uncached", None)
+        if name is None or raw is None:
+            raise ValueError(f"{func!r} 未使用 context_cached 装饰，无法预取")
+
+        key = _call_key(name, raw, (), kwargs)
+        with self._lock:
+            if self._closed or key in self._futures:
+                return self._futures.get(key)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix="data-prefetch")
+            future = self._executor.submit(self._run_in_context, raw, kwargs)
+            self._futures[key] = future
+            self.stats["prefetched"] += 1
+        logger.debug(f"🚀 [数据预取] 已提交 {name}{kwargs}")
+        return future
+
+    @staticmethod
+    def _is_failed(future: Future) -> bool:
+        """已完成且结果表示失败（已在等待的调用仍拿到该结果，之后的调用重新获取）"""
+        return (future.done() and not future.cancelled() and future.exception() is None
+                and _is_failure_result(future.result()))
+
+    def resolve(self, name: str, func: Callable, args: tuple = (), kwargs: dict = None):
+        """返回 (name, 参数) 的结果：已有 Future 时等待它，否则在当前线程计算并共享给后续调用"""
+        kwargs = kwargs or {}
+        key = _call_key(name, func, args, kwargs)
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None and self._is_failed(future):
+                future = None
+                self.stats["failures_discarded"] += 1
+            # 还在排队的预取任务直接取消并在当前线程计算，避免预取线程互相等待
+            owner = future is None or future.cancel()
+            if owner:
+                future = Future()
+                future.set_running_or_notify_cancel()
+                self._futures[key] = future
+                self.stats["misses"] += 1
+            elif future.done():
+                self.stats["hits"] += 1
+            else:
+                self.stats["waits"] += 1
+
+        if owner:
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                # 失败结果不共享，后续调用重新计算
+                with self._lock:
+                    self._futures.pop(key, None)
+                future.set_exception(e)
+                raise
+            future.set_result(result)
+            return result
+
+        try:
+            return future.result()
+        except Exception as e:
+            # 预取失败时不影响工具调用，按原路径重新获取
+            with self._lock:
+                self.stats["prefetch_errors"] += 1
+            logger.warning(f"⚠️ [数据预取] {name} 预取失败，重新获取: {e}")
+            return func(*args, **kwargs)
+
+    def get_frame(self, namespace: str, symbol: str, start_date: str, end_date: str,
+                  load: Callable[[str, str], Optional[pd.DataFrame]]) -> Optional[pd.DataFrame]:
+        """
+        本次运行内复用已获取的日线 DataFrame
+
+        已保存的区间覆盖请求区间时直接截取；否则调用 load(start, end) 获取，
+        与已保存区间相交或相邻时合并保存，使不同窗口（如30天预获取与工具的长窗口）互相复用。
+
+        Args:
+            namespace: 数据源名称（不同数据源的列格式不同，分开保存）
+            symbol: 股票代码
+            start_date: 开始日期
+            end_date: 结束日期
+            load: load(start, end) -> DataFrame
+        """
+        start, end = _to_day(start_date), _to_day(end_date)
+        key = (namespace, symbol)
+        with self._lock:
+            frame_lock = self._frame_locks.setdefault(key, threading.Lock())
+
+        with frame_lock:
+            saved = self._frames.get(key)
+            if saved is not None and saved[0] <= start and end <= saved[1]:
+                with self._lock:
+                    self.stats["frame_hits"] += 1
+                logger.debug(f"⚡ [数据上下文] 复用 {namespace}/{symbol} {start}~{end}")
+                return slice_by_date(saved[2], start, end)
+
+            frame = load(start_date, end_date)
+            with self._lock:
+                self.stats["frame_loads"] += 1
+            if not isinstance(frame, pd.DataFrame) or frame.empty or date_column(frame) is None:
+                return frame
+
+            if saved is not None and saved[0] <= _shift_day(end, 1) and start <= _shift_day(saved[1], 1):
+                self._frames[key] = (min(saved[0], start), max(saved[1], end), merge_frames([saved[2], frame]))
+            else:
+                self._frames[key] = (start, end, frame.copy())
+            return frame
+
+    def latest_frame(self, symbol: str) -> Optional[Tuple[str, str, str, pd.DataFrame]]:
+        """本次运行内已获取的该股票日线数据中结束日期最晚的一份：(命名空间, 开始日期, 结束日期, DataFrame)"""
+        saved = [(namespace,) + value for (namespace, saved_symbol), value in list(self._frames.items())
+                 if saved_symbol == symbol]
+        return max(saved, key=lambda item: item[2]) if saved else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.stats)
+
+    def close(self):
+        """运行结束：取消尚未开始的预取任务，不等待进行中的任务"""
+        with self._lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def context_cached(name: str):
+    """
+    让函数的调用经过当前数据上下文：同一运行内相同参数只计算一次，并可被预取
+
+    没有数据上下文时直接调用原函数。装饰后的函数带有 context_name / uncached 属性，
+    放在 @tool 与 @log_tool_call 之下时，这些属性会随 functools.wraps 传到工具的 .func 上。
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            context = get_data_context()
+            if context is None:
+                return func(*args, **kwargs)
+            result = context.resolve(name, func, args, kwargs)
+            # 信息字典可能被调用方修改，每次返回副本
+            return dict(result) if isinstance(result, dict) else result
+
+        wrapper.context_name = name
+        wrapper.uncached = func
+        return wrapper
+
+    return decorator
+
+
+_run_contexts: Dict[str, DataContext] = {}
+_run_contexts_lock = threading.Lock()
+
+
+def open_data_context(run_id: str, ticker: str, trade_date: str) -> DataContext:
+    """为一次分析登记运行级数据上下文（同一 run_id 重复登记时返回已有的上下文）"""
+    with _run_contexts_lock:
+        context = _run_contexts.get(run_id)
+        if context is None:
+            context = DataContext(ticker, str(trade_date), run_id=run_id)
+            _run_contexts[run_id] = context
+    return context
+
+
+def get_run_data_context(run_id: Optional[str]) -> Optional[DataContext]:
+    """按 run_id 查找运行级数据上下文"""
+    if not run_id:
+        return None
+    with _run_contexts_lock:
+        return _run_contexts.get(run_id)
+
+
+def close_data_context(run_id: str):
+    """分析结束：注销并关闭运行级数据上下文，释放其中的数据"""
+    with _run_contexts_lock:
+        context = _run_contexts.pop(run_id, None)
+    if context is not None:
+        context.close()
+        logger.info(f"📊 [数据上下文] {run_id} 统计: {context.get_stats()}")
@@ -11,6 +11,9 @@ from enum import Enum
 import warnings
 import pandas as pd
 
+from .data_context import context_cached, get_data_context
+from .stock_data_types import StockBars, StockInfo, StockQuote
+
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
@@ -21,6 +24,10 @@ from tradingagents.utils.logging_init import setup_dataflow_logging
 logger = setup_dataflow_logging()
 
 
+# Tushare 除权日线在增量存储中的名称（与早期保存的前复权数据分开）
+TUSHARE_RAW_STORE = "tushare_raw"
+
+
 class ChinaDataSource(Enum):
     """中国股票数据源枚举"""
     TUSHARE = "tushare"
@@ -96,6 +103,25 @@ class DataSourceManager:
             str: 搜索结果
         """
         try:
+            from .security_master import CHINA_A, get_security_master
+
+            # 证券主数据已有A股列表时在内存中搜索（代码/名称/拼音首字母）
+            master = get_security_master()
+            if master is not None and master.has_market(CHINA_A):
+                records = master.search(keyword, market=CHINA_A)
+                if not records:
+                    return f"❌ 未找到匹配'{keyword}'的股票"
+                result = f"搜索关键词: {keyword}\n"
+                result += f"找到 {len(records)} 只股票:\n\n"
+                for record in records[:10]:
+                    result += f"代码: {record.symbol}\n"
+                    result += f"名称: {record.name}\n"
+                    result += f"行业: {record.industry or '未知'}\n"
+                    result += f"地区: {record.area or '未知'}\n"
+                    result += f"上市日期: {record.list_date or '未知'}\n"
+                    result += "-" * 30 + "\n"
+                return result
+
             from .tushare_adapter import get_tushare_adapter
 
             logger.debug(f"🔍 [Tushare] 搜索股票: {keyword}")
@@ -392,123 +418,150 @@ class DataSourceManager:
                         }, exc_info=True)
             return self._try_fallback_sources(symbol, start_date, end_date)
     
+    def _fetch_ohlcv(self, symbol: str, source: ChinaDataSource, start_date: str, end_date: str, fetch,
+                     store_name: str = None):
+        """
+        通过增量OHLCV存储获取日线数据，只向数据源请求本地缺失的区间；分析运行内复用已取得的数据
+
+        Args:
+            store_name: 存储与运行上下文中使用的名称，默认为数据源名称
+        """
+        store_name = store_name or source.value
+        context = get_data_context()
+        if context is not None and start_date and end_date:
+            return context.get_frame(store_name, symbol, start_date, end_date,
+                                     lambda start, end: self._fetch_ohlcv_stored(symbol, store_name, start, end, fetch))
+        return self._fetch_ohlcv_stored(symbol, store_name, start_date, end_date, fetch)
+
+    def _fetch_ohlcv_stored(self, symbol: str, store_name: str, start_date: str, end_date: str, fetch):
+        from .ohlcv_store import get_ohlcv_store, is_ohlcv_store_enabled
+
+        if not start_date or not end_date or not is_ohlcv_store_enabled():
+            return fetch(start_date, end_date)
+        try:
+            return get_ohlcv_store().get_range(symbol, store_name, start_date, end_date, fetch)
+        except Exception as e:
+            logger.warning(f"⚠️ [OHLCV存储] 增量存储不可用，直接请求数据源: {e}")
+            return fetch(start_date, end_date)
+
+    def _load_bars(self, symbol: str, source: ChinaDataSource, start_date: str, end_date: str) -> Optional[StockBars]:
+        """从指定数据源获取日线数据，无数据时返回None"""
+        if source == ChinaDataSource.TUSHARE:
+            from .tushare_adapter import get_tushare_adapter
+            adapter = get_tushare_adapter()
+            # 存储除权价格与涨跌幅，拼接出请求区间后再统一前复权，避免各段以各自的最后收盘价为基准
+            data = self._fetch_ohlcv(symbol, source, start_date, end_date,
+                                     lambda start, end: adapter.get_stock_data(symbol, start, end, forward_adjust=False),
+                                     store_name=TUSHARE_RAW_STORE)
+            if data is None or not isinstance(data, pd.DataFrame) or data.empty:
+                return None
+            return StockBars(symbol, source.value, start_date, end_date, adapter.forward_adjust(data),
+                             self._render_tushare_bars)
+        elif source == ChinaDataSource.AKSHARE:
+            from .akshare_utils import get_akshare_provider
+            provider = get_akshare_provider()
+            renderer = self._render_akshare_bars
+        elif source == ChinaDataSource.BAOSTOCK:
+            from .baostock_utils import get_baostock_provider
+            provider = get_baostock_provider()
+            renderer = self._render_baostock_bars
+        else:
+            return None
+
+        data = self._fetch_ohlcv(symbol, source, start_date, end_date,
+                                 lambda start, end: provider.get_stock_data(symbol, start, end))
+        if data is None or not isinstance(data, pd.DataFrame) or data.empty:
+            return None
+        return StockBars(symbol, source.value, start_date, end_date, data, renderer)
+
+    def get_stock_bars(self, symbol: str, start_date: str, end_date: str) -> Optional[StockBars]:
+        """
+        获取结构化的日线数据，当前数据源失败时按备用顺序降级
+
+        Returns:
+            StockBars: 日线数据与最新行情，文本在访问 .text 时才渲染；所有数据源都无数据时返回None
+        """
+        sources = [self.current_source] + [source for source in (ChinaDataSource.AKSHARE,
+                                                                  ChinaDataSource.TUSHARE,
+                                                                  ChinaDataSource.BAOSTOCK)
+                                            if source != self.current_source and source in self.available_sources]
+        for source in sources:
+            try:
+                bars = self._load_bars(symbol, source, start_date, end_date)
+            except Exception as e:
+                logger.error(f"❌ [日线数据] {source.value}获取{symbol}失败: {e}")
+                continue
+            if bars is not None:
+                return bars
+            logger.warning(f"⚠️ [日线数据] {source.value}未返回{symbol}的数据")
+        return None
+
     def _get_tushare_data(self, symbol: str, start_date: str, end_date: str) -> str:
         """使用Tushare获取数据 - 直接调用适配器，避免循环调用"""
         logger.debug(f"📊 [Tushare] 调用参数: symbol={symbol}, start_date={start_date}, end_date={end_date}")
 
         # 添加详细的股票代码追踪日志
         logger.info(f"🔍 [股票代码追踪] _get_tushare_data 接收到的股票代码: '{symbol}' (类型: {type(symbol)})")
-        logger.info(f"🔍 [股票代码追踪] 股票代码长度: {len(str(symbol))}")
-        logger.info(f"🔍 [股票代码追踪] 股票代码字符: {list(str(symbol))}")
         logger.info(f"🔍 [DataSourceManager详细日志] _get_tushare_data 开始执行")
-        logger.info(f"🔍 [DataSourceManager详细日志] 当前数据源: {self.current_source.value}")
 
         start_time = time.time()
         try:
-            # 直接调用适配器，避免循环调用interface
-            from .tushare_adapter import get_tushare_adapter
-            logger.info(f"🔍 [股票代码追踪] 调用 tushare_adapter，传入参数: symbol='{symbol}'")
-            logger.info(f"🔍 [DataSourceManager详细日志] 开始调用tushare_adapter...")
-
-            adapter = get_tushare_adapter()
-            data = adapter.get_stock_data(symbol, start_date, end_date)
-
-            if data is not None and not data.empty:
-                # 获取股票基本信息
-                stock_info = adapter.get_stock_info(symbol)
-                stock_name = stock_info.get('name', f'股票{symbol}') if stock_info else f'股票{symbol}'
-
-                # 计算最新价格和涨跌幅
-                latest_data = data.iloc[-1]
-                latest_price = latest_data.get('close', 0)
-                prev_close = data.iloc[-2].get('close', latest_price) if len(data) > 1 else latest_price
-                change = latest_price - prev_close
-                change_pct = (change / prev_close * 100) if prev_close != 0 else 0
-
-                # 格式化数据报告
-                result = f"📊 {stock_name}({symbol}) - Tushare数据\n"
-                result += f"数据期间: {start_date} 至 {end_date}\n"
-                result += f"数据条数: {len(data)}条\n\n"
-
-                result += f"💰 最新价格: ¥{latest_price:.2f}\n"
-                result += f"📈 涨跌额: {change:+.2f} ({change_pct:+.2f}%)\n\n"
-
-                # 添加统计信息
-                result += f"📊 价格统计:\n"
-                result += f"   最高价: ¥{data['high'].max():.2f}\n"
-                result += f"   最低价: ¥{data['low'].min():.2f}\n"
-                result += f"   平均价: ¥{data['close'].mean():.2f}\n"
-                # 防御性获取成交量数据
-                volume_value = self._get_volume_safely(data)
-                result += f"   成交量: {volume_value:,.0f}股\n"
-
-                return result
-            else:
-                result = f"❌ 未获取到{symbol}的有效数据"
+            bars = self._load_bars(symbol, ChinaDataSource.TUSHARE, start_date, end_date)
+            result = bars.text if bars is not None else f"❌ 未获取到{symbol}的有效数据"
 
             duration = time.time() - start_time
-            logger.info(f"🔍 [DataSourceManager详细日志] interface调用完成，耗时: {duration:.3f}秒")
-            logger.info(f"🔍 [股票代码追踪] get_china_stock_data_tushare 返回结果前200字符: {result[:200] if result else 'None'}")
-            logger.info(f"🔍 [DataSourceManager详细日志] 返回结果类型: {type(result)}")
-            logger.info(f"🔍 [DataSourceManager详细日志] 返回结果长度: {len(result) if result else 0}")
-
-            logger.debug(f"📊 [Tushare] 调用完成: 耗时={duration:.2f}s, 结果长度={len(result) if result else 0}")
+            logger.info(f"🔍 [DataSourceManager详细日志] 数据获取完成，耗时: {duration:.3f}秒")
+            logger.debug(f"📊 [Tushare] 调用完成: 耗时={duration:.2f}s, 结果长度={len(result)}")
 
             return result
         except Exception as e:
             duration = time.time() - start_time
             logger.error(f"❌ [Tushare] 调用失败: {e}, 耗时={duration:.2f}s", exc_info=True)
             logger.error(f"❌ [DataSourceManager详细日志] 异常类型: {type(e).__name__}")
-            logger.error(f"❌ [DataSourceManager详细日志] 异常信息: {str(e)}")
-            import traceback
-            logger.error(f"❌ [DataSourceManager详细日志] 异常堆栈: {traceback.format_exc()}")
             raise
-    
+
+    def _render_tushare_bars(self, bars: StockBars) -> str:
+        """Tushare日线数据的文本格式"""
+        from .tushare_adapter import get_tushare_adapter
+
+        data = bars.frame
+        symbol = bars.symbol
+        # 获取股票基本信息
+        stock_info = get_tushare_adapter().get_stock_info(symbol)
+        stock_name = stock_info.get('name', f'股票{symbol}') if stock_info else f'股票{symbol}'
+        quote = bars.quote
+
+        # 格式化数据报告
+        result = f"📊 {stock_name}({symbol}) - Tushare数据\n"
+        result += f"数据期间: {bars.start_date} 至 {bars.end_date}\n"
+        result += f"数据条数: {len(data)}条\n\n"
+
+        result += f"💰 最新价格: ¥{quote.price:.2f}\n"
+        result += f"📈 涨跌额: {quote.change:+.2f} ({quote.change_pct:+.2f}%)\n\n"
+
+        # 添加统计信息
+        result += f"📊 价格统计:\n"
+        result += f"   最高价: ¥{data['high'].max():.2f}\n"
+        result += f"   最低价: ¥{data['low'].min():.2f}\n"
+        result += f"   平均价: ¥{data['close'].mean():.2f}\n"
+        # 防御性获取成交量数据
+        volume_value = self._get_volume_safely(data)
+        result += f"   成交量: {volume_value:,.0f}股\n"
+
+        return result
+
     def _get_akshare_data(self, symbol: str, start_date: str, end_date: str) -> str:
         """使用AKShare获取数据"""
         logger.debug(f"📊 [AKShare] 调用参数: symbol={symbol}, start_date={start_date}, end_date={end_date}")
 
         start_time = time.time()
         try:
-            # 这里需要实现AKShare的统一接口
-            from .akshare_utils import get_akshare_provider
-            provider = get_akshare_provider()
-            data = provider.get_stock_data(symbol, start_date, end_date)
-
+            bars = self._load_bars(symbol, ChinaDataSource.AKSHARE, start_date, end_date)
             duration = time.time() - start_time
 
-            if data is not None and not data.empty:
-                result = f"股票代码: {symbol}\n"
-                result += f"数据期间: {start_date} 至 {end_date}\n"
-                result += f"数据条数: {len(data)}条\n\n"
-
-                # 显示最新3天数据，确保在各种显示环境下都能完整显示
-                display_rows = min(3, len(data))
-                result += f"最新{display_rows}天数据:\n"
-
-                # 使用pandas选项确保显示完整数据
-                with pd.option_context('display.max_rows', None,
-                                     'display.max_columns', None,
-                                     'display.width', None,
-                                     'display.max_colwidth', None):
-                    result += data.tail(display_rows).to_string(index=False)
-
-                # 如果数据超过3天，也显示一些统计信息
-                if len(data) > 3:
-                    latest_price = data.iloc[-1]['收盘'] if '收盘' in data.columns else data.iloc[-1].get('close', 'N/A')
-                    first_price = data.iloc[0]['收盘'] if '收盘' in data.columns else data.iloc[0].get('close', 'N/A')
-                    if latest_price != 'N/A' and first_price != 'N/A':
-                        try:
-                            change = float(latest_price) - float(first_price)
-                            change_pct = (change / float(first_price)) * 100
-                            result += f"\n\n📊 期间统计:\n"
-                            result += f"期间涨跌: {change:+.2f} ({change_pct:+.2f}%)\n"
-                            result += f"最高价: {data['最高'].max() if '最高' in data.columns else data.get('high', pd.Series()).max():.2f}\n"
-                            result += f"最低价: {data['最低'].min() if '最低' in data.columns else data.get('low', pd.Series()).min():.2f}"
-                        except (ValueError, TypeError):
-                            pass
-
-                logger.debug(f"📊 [AKShare] 调用成功: 耗时={duration:.2f}s, 数据条数={len(data)}, 结果长度={len(result)}")
+            if bars is not None:
+                result = bars.text
+                logger.debug(f"📊 [AKShare] 调用成功: 耗时={duration:.2f}s, 数据条数={len(bars)}, 结果长度={len(result)}")
                 return result
             else:
                 result = f"❌ 未能获取{symbol}的股票数据"
@@ -519,33 +572,59 @@ class DataSourceManager:
             duration = time.time() - start_time
             logger.error(f"❌ [AKShare] 调用失败: {e}, 耗时={duration:.2f}s", exc_info=True)
             return f"❌ AKShare获取{symbol}数据失败: {e}"
-    
+
+    @staticmethod
+    def _render_recent_rows(bars: StockBars) -> str:
+        """最近3天数据的通用文本格式（AKShare / BaoStock）"""
+        data = bars.frame
+        result = f"股票代码: {bars.symbol}\n"
+        result += f"数据期间: {bars.start_date} 至 {bars.end_date}\n"
+        result += f"数据条数: {len(data)}条\n\n"
+
+        # 显示最新3天数据，确保在各种显示环境下都能完整显示
+        display_rows = min(3, len(data))
+        result += f"最新{display_rows}天数据:\n"
+
+        # 使用pandas选项确保显示完整数据
+        with pd.option_context('display.max_rows', None,
+                             'display.max_columns', None,
+                             'display.width', None,
+                             'display.max_colwidth', None):
+            result += data.tail(display_rows).to_string(index=False)
+        return result
+
+    def _render_akshare_bars(self, bars: StockBars) -> str:
+        """AKShare日线数据的文本格式"""
+        data = bars.frame
+        result = self._render_recent_rows(bars)
+
+        # 如果数据超过3天，也显示一些统计信息
+        if len(data) > 3:
+            latest_price = data.iloc[-1]['收盘'] if '收盘' in data.columns else data.iloc[-1].get('close', 'N/A')
+            first_price = data.iloc[0]['收盘'] if '收盘' in data.columns else data.iloc[0].get('close', 'N/A')
+            if latest_price != 'N/A' and first_price != 'N/A':
+                try:
+                    change = float(latest_price) - float(first_price)
+                    change_pct = (change / float(first_price)) * 100
+                    result += f"\n\n📊 期间统计:\n"
+                    result += f"期间涨跌: {change:+.2f} ({change_pct:+.2f}%)\n"
+                    result += f"最高价: {data['最高'].max() if '最高' in data.columns else data.get('high', pd.Series()).max():.2f}\n"
+                    result += f"最低价: {data['最低'].min() if '最低' in data.columns else data.get('low', pd.Series()).min():.2f}"
+                except (ValueError, TypeError):
+                    pass
+        return result
+
     def _get_baostock_data(self, symbol: str, start_date: str, end_date: str) -> str:
         """使用BaoStock获取数据"""
-        # 这里需要实现BaoStock的统一接口
-        from .baostock_utils import get_baostock_provider
-        provider = get_baostock_provider()
-        data = provider.get_stock_data(symbol, start_date, end_date)
-        
-        if data is not None and not data.empty:
-            result = f"股票代码: {symbol}\n"
-            result += f"数据期间: {start_date} 至 {end_date}\n"
-            result += f"数据条数: {len(data)}条\n\n"
-
-            # 显示最新3天数据，确保在各种显示环境下都能完整显示
-            display_rows = min(3, len(data))
-            result += f"最新{display_rows}天数据:\n"
-
-            # 使用pandas选项确保显示完整数据
-            with pd.option_context('display.max_rows', None,
-                                 'display.max_columns', None,
-                                 'display.width', None,
-                                 'display.max_colwidth', None):
-                result += data.tail(display_rows).to_string(index=False)
-            return result
-        else:
-            return f"❌ 未能获取{symbol}的股票数据"
-    
+        bars = self._load_bars(symbol, ChinaDataSource.BAOSTOCK, start_date, end_date)
+        if bars is not None:
+            return bars.text
+        return f"❌ 未能获取{symbol}的股票数据"
+
+    def _render_baostock_bars(self, bars: StockBars) -> str:
+        """BaoStock日线数据的文本格式"""
+        return self._render_recent_rows(bars)
+
     def _get_tdx_data(self, symbol: str, start_date: str, end_date: str) -> str:
         """使用TDX获取数据 (已弃用)"""
         logger.warning(f"⚠️ 警告: 正在使用已弃用的TDX数据源")
@@ -613,16 +692,39 @@ class DataSourceManager:
         
         return f"❌ 所有数据源都无法获取{symbol}的数据"
     
+    @staticmethod
+    def _security_master_info(symbol: str, require_details: bool = False) -> Optional[Dict]:
+        """从证券主数据中获取股票信息（内存查找），未命中或缺少行业等明细时返回None"""
+        from .security_master import CHINA_A, lookup_security
+
+        record = lookup_security(symbol, CHINA_A)
+        if record is None or (require_details and not record.industry):
+            return None
+        return {
+            'symbol': symbol,
+            'name': record.name,
+            'area': record.area or '未知',
+            'industry': record.industry or '未知',
+            'market': record.board or '未知',
+            'list_date': record.list_date or '未知',
+            'source': 'security_master',
+        }
+
+    @context_cached("china_stock_info")
     def get_stock_info(self, symbol: str) -> Dict:
         """获取股票基本信息，支持降级机制"""
         logger.info(f"📊 [股票信息] 开始获取{symbol}基本信息...")
 
+        # 证券主数据快照中有完整信息时不再请求数据源
+        info = self._security_master_info(symbol, require_details=True)
+        if info:
+            logger.info(f"✅ [股票信息] 证券主数据命中: {symbol} -> {info['name']}")
+            return info
+
         # 首先尝试当前数据源
         try:
             if self.current_source == ChinaDataSource.TUSHARE:
-                from .interface import get_china_stock_info_tushare
-                info_str = get_china_stock_info_tushare(symbol)
-                result = self._parse_stock_info_string(info_str, symbol)
+                result = self._get_tushare_stock_info(symbol)
 
                 # 检查是否获取到有效信息
                 if result.get('name') and result['name'] != f'股票{symbol}':
@@ -668,9 +770,7 @@ class DataSourceManager:
 
                 # 根据数据源类型获取股票信息
                 if source == ChinaDataSource.TUSHARE:
-                    from .interface import get_china_stock_info_tushare
-                    info_str = get_china_stock_info_tushare(symbol)
-                    result = self._parse_stock_info_string(info_str, symbol)
+                    result = self._get_tushare_stock_info(symbol)
                 elif source == ChinaDataSource.AKSHARE:
                     result = self._get_akshare_stock_info(symbol)
                 elif source == ChinaDataSource.BAOSTOCK:
@@ -703,8 +803,19 @@ class DataSourceManager:
         logger.error(f"❌ [股票信息] 所有数据源都无法获取{symbol}的基本信息")
         return {'symbol': symbol, 'name': f'股票{symbol}', 'source': 'unknown'}
 
+    def _get_tushare_stock_info(self, symbol: str) -> Dict:
+        """使用Tushare获取股票基本信息"""
+        from .tushare_adapter import get_tushare_adapter
+
+        info = get_tushare_adapter().get_stock_info(symbol)
+        return StockInfo.from_dict(symbol, info, source=ChinaDataSource.TUSHARE.value).to_dict()
+
     def _get_akshare_stock_info(self, symbol: str) -> Dict:
         """使用AKShare获取股票基本信息"""
+        info = self._security_master_info(symbol)
+        if info:
+            return info
+
         try:
             import akshare as ak
 
@@ -785,35 +896,6 @@ class DataSourceManager:
             logger.error(f"❌ [股票信息] BaoStock获取失败: {e}")
             return {'symbol': symbol, 'name': f'股票{symbol}', 'source': 'baostock', 'error': str(e)}
 
-    def _parse_stock_info_string(self, info_str: str, symbol: str) -> Dict:
-        """解析股票信息字符串为字典"""
-        try:
-            info = {'symbol': symbol, 'source': self.current_source.value}
-            lines = info_str.split('\n')
-            
-            for line in lines:
-                if ':' in line:
-                    key, value = line.split(':', 1)
-                    key = key.strip()
-                    value = value.strip()
-                    
-                    if '股票名称' in key:
-                        info['name'] = value
-                    elif '所属行业' in key:
-                        info['industry'] = value
-                    elif '所属地区' in key:
-                        info['area'] = value
-                    elif '上市市场' in key:
-                        info['market'] = value
-                    elif '上市日期' in key:
-                        info['list_date'] = value
-            
-            return info
-            
-        except Exception as e:
-            logger.error(f"⚠️ 解析股票信息失败: {e}")
-            return {'symbol': symbol, 'name': f'股票{symbol}', 'source': self.current_source.value}
-
 
 # 全局数据源管理器实例
 _data_source_manager = None
@@ -826,6 +908,7 @@ def get_data_source_manager() -> DataSourceManager:
     return _data_source_manager
 
 
+@context_cached("china_stock_data")
 def get_china_stock_data_unified(symbol: str, start_date: str, end_date: str) -> str:
     """
     统一的中国股票数据获取接口
@@ -863,6 +946,32 @@ def get_china_stock_data_unified(symbol: str, start_date: str, end_date: str) ->
     return result
 
 
+@context_cached("china_stock_bars")
+def get_china_stock_bars(symbol: str, start_date: str, end_date: str) -> Optional[StockBars]:
+    """
+    结构化的中国股票日线数据，供需要数值的调用方直接读取（不渲染文本）
+
+    Args:
+        symbol: 股票代码
+        start_date: 开始日期
+        end_date: 结束日期
+
+    Returns:
+        StockBars: 日线数据与最新行情；所有数据源都无数据时返回None
+    """
+    return get_data_source_manager().get_stock_bars(symbol, start_date, end_date)
+
+
+def get_cached_quote(symbol: str) -> Optional[StockQuote]:
+    """当前分析运行内已获取的日线数据中的最新行情（不发起请求），没有时返回None"""
+    context = get_data_context()
+    saved = context.latest_frame(symbol) if context is not None else None
+    if saved is None:
+        return None
+    namespace, start_date, end_date, frame = saved
+    return StockBars(symbol, namespace, start_date, end_date, frame).quote
+
+
 def get_china_stock_info_unified(symbol: str) -> Dict:
     """
     统一的中国股票信息获取接口
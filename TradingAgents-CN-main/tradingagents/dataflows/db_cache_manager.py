@@ -14,6 +14,7 @@ import pandas as pd
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
+from tradingagents.config.connection_registry import get_connection_registry
 logger = get_logger('agents')
 
 # MongoDB
@@ -80,21 +81,17 @@ class DatabaseCacheManager:
         if not MONGODB_AVAILABLE:
             return
         
+        # 共享进程级连接池，连接失败时注册表已记录日志
+        self.mongodb_client = get_connection_registry().get_mongodb(url=self.mongodb_url, timeout_ms=5000)
+        if self.mongodb_client is None:
+            self.mongodb_db = None
+            return
+
+        self.mongodb_db = self.mongodb_client[self.mongodb_db_name]
         try:
-            self.mongodb_client = MongoClient(
-                self.mongodb_url,
-                serverSelectionTimeoutMS=5000,  # 5秒超时
-                connectTimeoutMS=5000
-            )
-            # 测试连接
-            self.mongodb_client.admin.command('ping')
-            self.mongodb_db = self.mongodb_client[self.mongodb_db_name]
-            
             # 创建索引
             self._create_mongodb_indexes()
-            
-            logger.info(f"✅ MongoDB连接成功: {self.mongodb_url}")
-            
+            logger.info(f"✅ MongoDB连接成功")
         except Exception as e:
             logger.error(f"❌ MongoDB连接失败: {e}")
             self.mongodb_client = None
@@ -105,22 +102,15 @@ class DatabaseCacheManager:
         if not REDIS_AVAILABLE:
             return
         
-        try:
-            self.redis_client = redis.from_url(
-                self.redis_url,
-                db=self.redis_db,
-                socket_timeout=5,
-                socket_connect_timeout=5,
-                decode_responses=True
-            )
-            # 测试连接
-            self.redis_client.ping()
-            
-            logger.info(f"✅ Redis连接成功: {self.redis_url}")
-            
-        except Exception as e:
-            logger.error(f"❌ Redis连接失败: {e}")
-            self.redis_client = None
+        self.redis_client = get_connection_registry().get_redis(
+            url=self.redis_url,
+            db=self.redis_db,
+            socket_timeout=5,
+            socket_connect_timeout=5,
+            decode_responses=True
+        )
+        if self.redis_client is not None:
+            logger.info(f"✅ Redis连接成功")
     
     def _create_mongodb_indexes(self):
         """创建MongoDB索引"""
@@ -512,14 +502,15 @@ class DatabaseCacheManager:
         return cleared_count
 
     def close(self):
-        """关闭数据库连接"""
+        """释放数据库连接（客户端由进程级连接注册表共享，这里只解除引用）"""
         if self.mongodb_client:
-            self.mongodb_client.close()
-            logger.info(f"🔒 MongoDB连接已关闭")
+            self.mongodb_client = None
+            self.mongodb_db = None
+            logger.info(f"🔒 MongoDB连接已释放")
 
         if self.redis_client:
-            self.redis_client.close()
-            logger.info(f"🔒 Redis连接已关闭")
+            self.redis_client = None
+            logger.info(f"🔒 Redis连接已释放")
 
 
 # 全局数据库缓存实例
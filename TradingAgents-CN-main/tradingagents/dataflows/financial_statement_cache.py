@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+财务报表缓存
+按 (数据源, 股票代码) 保存最近一次获取的财务报表及其最新报告期，并附带由报表解析出的指标。
+报表只会在新一期定期报告披露后变化，因此失效时间由披露日历决定，而不是固定的小时TTL：
+下一报告期结束前缓存一直有效；进入披露窗口后按检查间隔重新确认是否已有新报告。
+"""
+
+import os
+import pickle
+import re
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import pandas as pd
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+# 报告期(季末月份) -> 法定披露截止日 (月, 日, 跨年)
+# 一季报 4/30，半年报 8/31，三季报 10/31，年报次年 4/30
+DISCLOSURE_DEADLINES = {
+    3: (4, 30, 0),
+    6: (8, 31, 0),
+    9: (10, 31, 0),
+    12: (4, 30, 1),
+}
+
+_QUARTER_END_DAYS = {3: 31, 6: 30, 9: 30, 12: 31}
+_PERIOD_RE = re.compile(r'^(\d{4})-?(\d{2})-?(\d{2})')
+# 报表中报告期列的候选名称（东方财富 / Tushare）
+PERIOD_COLUMNS = ['REPORT_DATE', 'end_date']
+# 每期报表最多保留的指标份数（指标随股价变化）
+MAX_METRICS_PER_ENTRY = 16
+
+
+def parse_report_period(value) -> Optional[date]:
+    """把 20240930 / 2024-09-30 / Timestamp 等形式解析为季末日期，不是季末时返回None"""
+    if value is None:
+        return None
+    if isinstance(value, (datetime, pd.Timestamp)):
+        day = value.date()
+    elif isinstance(value, date):
+        day = value
+    else:
+        match = _PERIOD_RE.match(str(value).strip())
+        if not match:
+            return None
+        try:
+            day = date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        except ValueError:
+            return None
+    if _QUARTER_END_DAYS.get(day.month) != day.day:
+        return None
+    return day
+
+
+def next_report_period(period: date) -> date:
+    """下一个报告期（下一个季末）"""
+    if period.month == 12:
+        return date(period.year + 1, 3, 31)
+    month = period.month + 3
+    return date(period.year, month, _QUARTER_END_DAYS[month])
+
+
+def disclosure_deadline(period: date) -> date:
+    """报告期对应的法定披露截止日"""
+    month, day, year_offset = DISCLOSURE_DEADLINES[period.month]
+    return date(period.year + year_offset, month, day)
+
+
+def latest_report_period(statements: Dict[str, Any]) -> Optional[str]:
+    """从各张报表中找出最新的报告期，返回 YYYYMMDD"""
+    periods = []
+    for data in statements.values():
+        if isinstance(data, pd.DataFrame):
+            # 主要财务指标以报告期为列名，三张报表以报告期为列值
+            periods.extend(parse_report_period(column) for column in data.columns)
+            for column in PERIOD_COLUMNS:
+                if column in data.columns:
+                    periods.extend(parse_report_period(v) for v in data[column].dropna().unique())
+        elif isinstance(data, list):
+            for record in data:
+                if isinstance(record, dict):
+                    periods.extend(parse_report_period(record.get(c)) for c in PERIOD_COLUMNS)
+    periods = [p for p in periods if p is not None]
+    return max(periods).strftime('%Y%m%d') if periods else None
+
+
+def next_check_time(period: Optional[str], fetched_at: datetime, recheck: timedelta) -> datetime:
+    """
+    计算缓存下一次需要向数据源确认的时间
+
+    下一报告期结束之前不可能有新报告，缓存一直有效；
+    进入下一报告期的披露窗口后每隔 recheck 确认一次，且截止日次日必定重新确认；
+    已过截止日仍未披露（延期、停牌等）时继续按 recheck 确认。
+    """
+    latest = parse_report_period(period)
+    if latest is None:
+        return fetched_at + recheck
+    upcoming = next_report_period(latest)
+    window_open = datetime.combine(upcoming + timedelta(days=1), datetime.min.time())
+    if fetched_at < window_open:
+        return window_open
+    after_deadline = datetime.combine(disclosure_deadline(upcoming) + timedelta(days=1), datetime.min.time())
+    if fetched_at < after_deadline:
+        return min(fetched_at + recheck, after_deadline)
+    return fetched_at + recheck
+
+
+class _Entry:
+    """一只股票在一个数据源下的缓存报表"""
+
+    __slots__ = ("period", "fetched_at", "pinned", "statements", "metrics")
+
+    def __init__(self, period, fetched_at, pinned, statements, metrics=None):
+        self.period = period
+        self.fetched_at = fetched_at
+        self.pinned = pinned
+        self.statements = statements
+        self.metrics = metrics if metrics is not None else {}
+
+
+class FinancialStatementCache:
+    """按 (数据源, 股票代码) 缓存财务报表与解析后的指标，失效由最新报告期和披露日历决定"""
+
+    def __init__(self, store_dir: str = None, recheck_hours: float = None):
+        """
+        Args:
+            store_dir: 存储目录，默认为 tradingagents/dataflows/data_cache/financial_statements
+            recheck_hours: 披露窗口内重新确认的间隔，默认读取 FINANCIAL_RECHECK_HOURS (24)
+        """
+        if store_dir is None:
+            store_dir = Path(__file__).parent / "data_cache" / "financial_statements"
+        self.store_dir = Path(store_dir)
+        if recheck_hours is None:
+            recheck_hours = float(os.getenv("FINANCIAL_RECHECK_HOURS", "24"))
+        self.recheck = timedelta(hours=recheck_hours)
+
+        self._entries: Dict[Tuple[str, str], _Entry] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "metric_hits": 0, "new_periods": 0}
+
+    def _path(self, source: str, symbol: str) -> Path:
+        return self.store_dir / source / f"{symbol.replace('/', '_')}.pkl"
+
+    def _load(self, source: str, symbol: str) -> Optional[_Entry]:
+        key = (source, symbol)
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+        path = self._path(source, symbol)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'rb') as f:
+                entry = _Entry(**pickle.load(f))
+        except Exception as e:
+            logger.warning(f"⚠️ [财务报表缓存] 读取失败 {path}: {e}")
+            return None
+        self._entries[key] = entry
+        return entry
+
+    def _save(self, source: str, symbol: str, entry: _Entry):
+        path = self._path(source, symbol)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix('.tmp')
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({name: getattr(entry, name) for name in _Entry.__slots__}, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"⚠️ [财务报表缓存] 保存失败 {path}: {e}")
+
+    def _is_valid(self, entry: _Entry, now: datetime) -> bool:
+        if entry.pinned:
+            return True
+        return now < next_check_time(entry.period, entry.fetched_at, self.recheck)
+
+    def get_statements(self, source: str, symbol: str, now: datetime = None) -> Optional[Dict[str, Any]]:
+        """返回仍然有效的缓存报表，需要重新确认时返回None"""
+        now = now or datetime.now()
+        with self._lock:
+            entry = self._load(source, symbol)
+            if entry is not None and self._is_valid(entry, now):
+                self.stats["hits"] += 1
+                return entry.statements
+            self.stats["misses"] += 1
+            return None
+
+    def put_statements(self, source: str, symbol: str, statements: Dict[str, Any],
+                       now: datetime = None, pinned: bool = False) -> Optional[str]:
+        """
+        保存新获取的报表，返回其最新报告期
+
+        报告期未变化时保留已解析的指标；pinned 表示请求的是指定的历史报告期，内容不再变化。
+        """
+        if not statements:
+            return None
+        period = latest_report_period(statements)
+        with self._lock:
+            previous = self._load(source, symbol)
+            metrics = None
+            if previous is not None and previous.period == period:
+                metrics = previous.metrics
+            elif previous is not None:
+                self.stats["new_periods"] += 1
+                logger.info(f"📅 [财务报表缓存] {source}/{symbol} 报告期更新: {previous.period} -> {period}")
+            entry = _Entry(period, now or datetime.now(), pinned, statements, metrics)
+            self._entries[(source, symbol)] = entry
+            self._save(source, symbol, entry)
+        return period
+
+    def get_metrics(self, source: str, symbol: str, key: Hashable, now: datetime = None) -> Optional[dict]:
+        """读取基于当前有效报表解析出的指标（返回副本）"""
+        now = now or datetime.now()
+        with self._lock:
+            entry = self._load(source, symbol)
+            if entry is None or not self._is_valid(entry, now):
+                return None
+            metrics = entry.metrics.get(key)
+            if metrics is None:
+                return None
+            self.stats["metric_hits"] += 1
+            return dict(metrics)
+
+    def put_metrics(self, source: str, symbol: str, key: Hashable, metrics: dict):
+        """保存解析出的指标，与报表同生命周期"""
+        with self._lock:
+            entry = self._load(source, symbol)
+            if entry is None:
+                return
+            entry.metrics.pop(key, None)
+            entry.metrics[key] = dict(metrics)
+            while len(entry.metrics) > MAX_METRICS_PER_ENTRY:
+                entry.metrics.pop(next(iter(entry.metrics)))
+            self._save(source, symbol, entry)
+
+    def get_report_period(self, source: str, symbol: str) -> Optional[str]:
+        with self._lock:
+            entry = self._load(source, symbol)
+            return entry.period if entry is not None else None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache_instance = None
+_cache_lock = threading.Lock()
+
+
+def get_financial_statement_cache() -> FinancialStatementCache:
+    """获取全局财务报表缓存实例"""
+    global _cache_instance
+    if _cache_instance is None:
+        with _cache_lock:
+            if _cache_instance is None:
+                _cache_instance = FinancialStatementCache()
+    return _cache_instance
+
+
+def is_financial_cache_enabled() -> bool:
+    return os.getenv('ENABLE_FINANCIAL_CACHE', 'true').lower() == 'true'
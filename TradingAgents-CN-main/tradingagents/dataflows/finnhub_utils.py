@@ -1,11 +1,80 @@
 import json
 import os
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
 
 
+class _DatedData:
+    """一个数据文件的内存索引：按日期排序的键及其在文件中的原始位置"""
+
+    __slots__ = ("dates", "positions", "values", "file_ordered")
+
+    def __init__(self, data: dict):
+        # 空列表在任何区间查询中都会被过滤，加载时直接丢弃
+        items = [(key, position, value)
+                 for position, (key, value) in enumerate(data.items()) if len(value) > 0]
+        items.sort(key=lambda item: item[0])
+        self.dates = [item[0] for item in items]
+        self.positions = [item[1] for item in items]
+        self.values = [item[2] for item in items]
+        self.file_ordered = self.positions == sorted(self.positions)
+
+    def range(self, start_date, end_date) -> dict:
+        lo = bisect_left(self.dates, start_date)
+        hi = bisect_right(self.dates, end_date)
+        indices = range(lo, hi)
+        if not self.file_ordered:
+            # 保持与逐键过滤相同的输出顺序（文件中的顺序）
+            indices = sorted(indices, key=self.positions.__getitem__)
+        return {self.dates[i]: self.values[i] for i in indices}
+
+
+class FinnhubOfflineStore:
+    """按 (ticker, data_type, period) 缓存已解析的离线Finnhub数据，文件修改时间变化时重新加载"""
+
+    def __init__(self, max_files: int = None):
+        self.max_files = max_files or int(os.getenv("FINNHUB_CACHE_SIZE", "64"))
+        self._files: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "loads": 0}
+
+    def get(self, data_path: str, mtime_ns: int) -> _DatedData:
+        """获取文件的日期索引，未缓存或已过期时解析JSON（解析错误向上抛出）"""
+        with self._lock:
+            cached = self._files.get(data_path)
+            if cached is not None and cached[0] == mtime_ns:
+                self._files.move_to_end(data_path)
+                self.stats["hits"] += 1
+                return cached[1]
+
+        with open(data_path, "r", encoding="utf-8") as f:
+            dated = _DatedData(json.load(f))
+
+        with self._lock:
+            self.stats["loads"] += 1
+            self._files[data_path] = (mtime_ns, dated)
+            self._files.move_to_end(data_path)
+            while len(self._files) > self.max_files:
+                self._files.popitem(last=False)
+        return dated
+
+    def clear(self):
+        with self._lock:
+            self._files.clear()
+
+
+_store = FinnhubOfflineStore()
+
+
+def get_finnhub_offline_store() -> FinnhubOfflineStore:
+    """获取全局离线Finnhub数据缓存"""
+    return _store
+
 
 def get_data_in_range(ticker, start_date, end_date, data_type, data_dir, period=None):
     """
@@ -16,6 +85,9 @@ def get_data_in_range(ticker, start_date, end_date, data_type, data_dir, period=
         data_type (str): Type of data from finnhub to fetch. Can be insider_trans, SEC_filings, news_data, insider_senti, or fin_as_reported.
         data_dir (str): Directory where the data is saved.
         period (str): Default to none, if there is a period specified, should be annual or quarterly.
+
+    文件解析一次后缓存在进程内（按修改时间失效），区间通过二分查找截取；
+    返回的列表与缓存共享，调用方不应修改。
     """
 
     if period:
@@ -31,13 +103,14 @@ def get_data_in_range(ticker, start_date, end_date, data_type, data_dir, period=
         )
 
     try:
-        if not os.path.exists(data_path):
+        try:
+            mtime_ns = os.stat(data_path).st_mtime_ns
+        except FileNotFoundError:
             logger.warning(f"⚠️ [DEBUG] 数据文件不存在: {data_path}")
             logger.warning(f"⚠️ [DEBUG] 请确保已下载相关数据或检查数据目录配置")
             return {}
-        
-        with open(data_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+
+        dated = _store.get(data_path, mtime_ns)
     except FileNotFoundError:
         logger.error(f"❌ [ERROR] 文件未找到: {data_path}")
         return {}
@@ -49,8 +122,4 @@ def get_data_in_range(ticker, start_date, end_date, data_type, data_dir, period=
         return {}
 
     # filter keys (date, str in format YYYY-MM-DD) by the date range (str, str in format YYYY-MM-DD)
-    filtered_data = {}
-    for key, value in data.items():
-        if start_date <= key <= end_date and len(value) > 0:
-            filtered_data[key] = value
-    return filtered_data
+    return dated.range(start_date, end_date)
@@ -141,6 +141,12 @@ class ImprovedHKStockProvider:
             str: 公司名称
         """
         try:
+            # 证券主数据（每日快照，内存查找）
+            from .security_master import HONG_KONG, lookup_security
+            record = lookup_security(symbol, HONG_KONG)
+            if record is not None:
+                return record.name
+
             # 检查缓存
             cache_key = f"name_{symbol}"
             if self._is_cache_valid(cache_key):
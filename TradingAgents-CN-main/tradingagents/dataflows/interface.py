@@ -62,6 +62,9 @@ except ImportError as e:
     yf = None
     YF_AVAILABLE = False
 from .config import get_config, set_config, DATA_DIR
+from .data_context import context_cached
+from .stock_data_types import StockInfo
+from .offline_price_store import get_offline_price_store
 
 
 def get_finnhub_news(
@@ -590,37 +593,36 @@ def get_stock_stats_indicators_window(
     curr_date = datetime.strptime(curr_date, "%Y-%m-%d")
     before = curr_date - relativedelta(days=look_back_days)
 
+    # 价格数据只加载一次，指标在完整历史上一次性计算后按窗口切片
+    data_dir = os.path.join(DATA_DIR, "market_data", "price_data")
     if not online:
-        # read from YFin data
-        data = pd.read_csv(
-            os.path.join(
-                DATA_DIR,
-                f"market_data/price_data/{symbol}-YFin-data-2015-01-01-2025-03-25.csv",
-            )
+        window = StockstatsUtils.get_stock_stats_window(
+            symbol, [indicator], end_date, look_back_days, data_dir, online=False
         )
-        data["Date"] = pd.to_datetime(data["Date"], utc=True)
-        dates_in_df = data["Date"].astype(str).str[:10]
-
-        ind_string = ""
-        while curr_date >= before:
-            # only do the trading dates
-            if curr_date.strftime("%Y-%m-%d") in dates_in_df.values:
-                indicator_value = get_stockstats_indicator(
-                    symbol, indicator, curr_date.strftime("%Y-%m-%d"), online
-                )
-
-                ind_string += f"{curr_date.strftime('%Y-%m-%d')}: {indicator_value}\n"
 
-            curr_date = curr_date - relativedelta(days=1)
+        # only do the trading dates
+        ind_string = "".join(
+            f"{day}: {value}\n" for day, value in zip(window["Date"], window[indicator])
+        )
     else:
         # online gathering
-        ind_string = ""
-        while curr_date >= before:
-            indicator_value = get_stockstats_indicator(
-                symbol, indicator, curr_date.strftime("%Y-%m-%d"), online
+        try:
+            window = StockstatsUtils.get_stock_stats_window(
+                symbol, [indicator], end_date, look_back_days, data_dir, online=True
+            )
+            values = dict(zip(window["Date"], window[indicator].astype(str)))
+            missing = "N/A: Not a trading day (weekend or holiday)"
+        except Exception as e:
+            print(
+                f"Error getting stockstats indicator data for indicator {indicator} on {end_date}: {e}"
             )
+            values = {}
+            missing = ""
 
-            ind_string += f"{curr_date.strftime('%Y-%m-%d')}: {indicator_value}\n"
+        ind_string = ""
+        while curr_date >= before:
+            day = curr_date.strftime("%Y-%m-%d")
+            ind_string += f"{day}: {values.get(day, missing)}\n"
 
             curr_date = curr_date - relativedelta(days=1)
 
@@ -673,25 +675,11 @@ def get_YFin_data_window(
     before = date_obj - relativedelta(days=look_back_days)
     start_date = before.strftime("%Y-%m-%d")
 
-    # read in data
-    data = pd.read_csv(
-        os.path.join(
-            DATA_DIR,
-            f"market_data/price_data/{symbol}-YFin-data-2015-01-01-2025-03-25.csv",
-        )
+    # 共享的离线价格加载器：列式文件 + 进程级LRU，按日期二分切片（含两端）
+    filtered_data = get_offline_price_store().get_range(
+        symbol, os.path.join(DATA_DIR, "market_data", "price_data"), start_date, curr_date
     )
 
-    # Extract just the date part for comparison
-    data["DateOnly"] = data["Date"].str[:10]
-
-    # Filter data between the start and end dates (inclusive)
-    filtered_data = data[
-        (data["DateOnly"] >= start_date) & (data["DateOnly"] <= curr_date)
-    ]
-
-    # Drop the temporary column we created
-    filtered_data = filtered_data.drop("DateOnly", axis=1)
-
     # Set pandas display options to show the full DataFrame
     with pd.option_context(
         "display.max_rows", None, "display.max_columns", None, "display.width", None
@@ -754,29 +742,14 @@ def get_YFin_data(
     start_date: Annotated[str, "Start date in yyyy-mm-dd format"],
     end_date: Annotated[str, "End date in yyyy-mm-dd format"],
 ) -> str:
-    # read in data
-    data = pd.read_csv(
-        os.path.join(
-            DATA_DIR,
-            f"market_data/price_data/{symbol}-YFin-data-2015-01-01-2025-03-25.csv",
-        )
-    )
-
     if end_date > "2025-03-25":
         raise Exception(
             f"Get_YFin_Data: {end_date} is outside of the data range of 2015-01-01 to 2025-03-25"
         )
 
-    # Extract just the date part for comparison
-    data["DateOnly"] = data["Date"].str[:10]
-
-    # Filter data between the start and end dates (inclusive)
-    filtered_data = data[
-        (data["DateOnly"] >= start_date) & (data["DateOnly"] <= end_date)
-    ]
-
-    # Drop the temporary column we created
-    filtered_data = filtered_data.drop("DateOnly", axis=1)
+    filtered_data = get_offline_price_store().get_range(
+        symbol, os.path.join(DATA_DIR, "market_data", "price_data"), start_date, end_date
+    )
 
     # remove the index from the dataframe
     filtered_data = filtered_data.reset_index(drop=True)
@@ -1308,15 +1281,7 @@ def get_china_stock_info_unified(
         info = get_china_stock_info_unified(ticker)
 
         if info and info.get('name'):
-            result = f"股票代码: {ticker}\n"
-            result += f"股票名称: {info.get('name', '未知')}\n"
-            result += f"所属地区: {info.get('area', '未知')}\n"
-            result += f"所属行业: {info.get('industry', '未知')}\n"
-            result += f"上市市场: {info.get('market', '未知')}\n"
-            result += f"上市日期: {info.get('list_date', '未知')}\n"
-            result += f"数据来源: {info.get('source', 'unknown')}\n"
-
-            return result
+            return StockInfo.from_dict(ticker, info).to_text()
         else:
             return f"❌ 未能获取{ticker}的基本信息"
 
@@ -1391,6 +1356,7 @@ def get_current_china_data_source() -> str:
 
 # ==================== 港股数据接口 ====================
 
+@context_cached("hk_stock_data")
 def get_hk_stock_data_unified(symbol: str, start_date: str = None, end_date: str = None) -> str:
     """
     获取港股数据的统一接口
@@ -1452,6 +1418,7 @@ def get_hk_stock_data_unified(symbol: str, start_date: str = None, end_date: str
         return f"❌ 获取港股{symbol}数据失败: {e}"
 
 
+@context_cached("hk_stock_info")
 def get_hk_stock_info_unified(symbol: str) -> Dict:
     """
     获取港股信息的统一接口
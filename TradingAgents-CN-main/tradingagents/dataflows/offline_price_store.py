@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+离线YFin价格数据加载器
+把 market_data/price_data 下的 {symbol}-YFin-data-*.csv 一次性转换为列式文件（columnar/{symbol}.parquet），
+加载后以解析好的 DatetimeIndex 排序保存在进程级LRU中，日期区间通过二分查找切片。
+get_YFin_data、get_YFin_data_window、离线技术指标和 StockstatsUtils 共用这一个加载器。
+"""
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+
+import pandas as pd
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+# Parquet 需要 pyarrow，不可用时退回 pickle
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# 离线数据集覆盖的日期范围（文件名的一部分）
+OFFLINE_START = "2015-01-01"
+OFFLINE_END = "2025-03-25"
+COLUMNAR_DIR = "columnar"
+
+
+def price_csv_path(symbol: str, data_dir: str) -> str:
+    """离线CSV文件路径"""
+    return os.path.join(data_dir, f"{symbol}-YFin-data-{OFFLINE_START}-{OFFLINE_END}.csv")
+
+
+def _columnar_path(symbol: str, data_dir: str) -> Path:
+    suffix = "parquet" if PARQUET_AVAILABLE else "pkl"
+    return Path(data_dir) / COLUMNAR_DIR / f"{symbol}.{suffix}"
+
+
+def _parse_csv(csv_path: str) -> pd.DataFrame:
+    """解析CSV并建立按日期排序的 DatetimeIndex；原始 Date 列保留，输出格式不变"""
+    data = pd.read_csv(csv_path)
+    data.index = pd.DatetimeIndex(pd.to_datetime(data["Date"].astype(str).str[:10]), name=None)
+    if not data.index.is_monotonic_increasing:
+        data = data.sort_index(kind="mergesort")
+    return data
+
+
+def _write_columnar(frame: pd.DataFrame, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    if path.suffix == ".parquet":
+        frame.to_parquet(tmp_path, index=True)
+    else:
+        frame.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _read_columnar(path: Path) -> pd.DataFrame:
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path)
+    return pd.read_pickle(path)
+
+
+def convert_price_file(symbol: str, data_dir: str) -> Optional[pd.DataFrame]:
+    """
+    把单个股票的离线CSV转换为列式文件（CSV比列式文件新时重新转换）
+
+    Returns:
+        解析后的DataFrame，CSV不存在时返回None
+    """
+    csv_path = price_csv_path(symbol, data_dir)
+    if not os.path.exists(csv_path):
+        return None
+    frame = _parse_csv(csv_path)
+    try:
+        _write_columnar(frame, _columnar_path(symbol, data_dir))
+    except Exception as e:
+        # 数据目录只读时只在内存中使用解析结果
+        logger.warning(f"⚠️ [离线价格] 列式文件写入失败 {symbol}: {e}")
+    return frame
+
+
+def convert_price_directory(data_dir: str) -> int:
+    """一次性转换目录下所有离线CSV，返回转换的文件数"""
+    suffix = f"-YFin-data-{OFFLINE_START}-{OFFLINE_END}.csv"
+    converted = 0
+    for name in sorted(os.listdir(data_dir)):
+        if name.endswith(suffix):
+            if convert_price_file(name[:-len(suffix)], data_dir) is not None:
+                converted += 1
+    logger.info(f"📦 [离线价格] 已转换 {converted} 个价格文件: {data_dir}")
+    return converted
+
+
+class OfflinePriceStore:
+    """离线价格帧的进程级LRU缓存，按CSV修改时间失效"""
+
+    def __init__(self, max_frames: int = None):
+        self.max_frames = max_frames or int(os.getenv("OFFLINE_PRICE_CACHE_SIZE", "32"))
+        self._frames: "OrderedDict[Tuple[str, str], Tuple[float, pd.DataFrame]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "columnar_loads": 0, "csv_parses": 0}
+
+    def _load(self, symbol: str, data_dir: str, csv_mtime: float) -> pd.DataFrame:
+        path = _columnar_path(symbol, data_dir)
+        try:
+            if path.exists() and path.stat().st_mtime >= csv_mtime:
+                frame = _read_columnar(path)
+                self.stats["columnar_loads"] += 1
+                return frame
+        except Exception as e:
+            logger.warning(f"⚠️ [离线价格] 列式文件读取失败，重新转换 {symbol}: {e}")
+
+        self.stats["csv_parses"] += 1
+        return convert_price_file(symbol, data_dir)
+
+    def load(self, symbol: str, data_dir: str) -> pd.DataFrame:
+        """
+        获取按日期排序、以 DatetimeIndex 为索引的完整价格数据（只读共享，调用方不要修改）
+
+        Raises:
+            FileNotFoundError: 离线CSV不存在
+        """
+        csv_path = price_csv_path(symbol, data_dir)
+        try:
+            csv_mtime = os.path.getmtime(csv_path)
+        except OSError:
+            raise FileNotFoundError(csv_path)
+
+        key = (symbol, os.path.abspath(data_dir))
+        with self._lock:
+            cached = self._frames.get(key)
+            if cached is not None and cached[0] == csv_mtime:
+                self._frames.move_to_end(key)
+                self.stats["hits"] += 1
+                return cached[1]
+
+        frame = self._load(symbol, data_dir, csv_mtime)
+        if frame is None:
+            raise FileNotFoundError(csv_path)
+
+        with self._lock:
+            self._frames[key] = (csv_mtime, frame)
+            self._frames.move_to_end(key)
+            while len(self._frames) > self.max_frames:
+                self._frames.popitem(last=False)
+        return frame
+
+    def get_range(self, symbol: str, data_dir: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """返回 [start_date, end_date]（含两端）的行，保留原始行号"""
+        return slice_dates(self.load(symbol, data_dir), start_date, end_date)
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+
+
+def slice_dates(frame: pd.DataFrame, start_date: str, end_date: str) -> pd.DataFrame:
+    """在有序 DatetimeIndex 上二分查找日期区间（含两端），行号沿用原始位置"""
+    index = frame.index
+    lo = index.searchsorted(pd.Timestamp(start_date), side="left")
+    hi = index.searchsorted(pd.Timestamp(end_date), side="right")
+    window = frame.iloc[lo:hi]
+    return window.set_axis(pd.RangeIndex(lo, hi), axis=0)
+
+
+# 全局加载器实例
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_offline_price_store() -> OfflinePriceStore:
+    """获取全局离线价格加载器"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = OfflinePriceStore()
+        return _store
+
+
+if __name__ == "__main__":
+    # python -m tradingagents.dataflows.offline_price_store [price_data目录]
+    if len(sys.argv) > 1:
+        target_dir = sys.argv[1]
+    else:
+        from .config import DATA_DIR
+        target_dir = os.path.join(DATA_DIR, "market_data", "price_data")
+    convert_price_directory(target_dir)
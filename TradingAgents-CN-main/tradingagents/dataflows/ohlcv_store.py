@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+增量日线行情存储
+按 (数据源, 股票代码) 保存列式OHLCV数据，并记录已覆盖的日期区间。
+任意区间请求优先由本地数据回答，只向数据源请求缺失的首/尾区间。
+"""
+
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+# Parquet 需要 pyarrow，不可用时退回 pickle
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# 各数据源日期列的候选名称
+DATE_COLUMNS = ['date', 'trade_date', '日期', 'Date']
+
+DateRange = Tuple[str, str]
+
+
+def _to_day(value) -> str:
+    return pd.Timestamp(value).strftime('%Y-%m-%d')
+
+
+def _shift_day(day: str, days: int) -> str:
+    return (datetime.strptime(day, '%Y-%m-%d') + timedelta(days=days)).strftime('%Y-%m-%d')
+
+
+def _has_weekday(start: str, end: str) -> bool:
+    """[start, end] 内是否有工作日（可能的交易日）"""
+    return len(pd.bdate_range(start, end)) > 0
+
+
+def merge_ranges(ranges: List[DateRange]) -> List[DateRange]:
+    """合并重叠或相邻（相差一天）的日期区间"""
+    merged: List[List[str]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= _shift_day(merged[-1][1], 1):
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def missing_ranges(covered: List[DateRange], start: str, end: str) -> List[DateRange]:
+    """计算 [start, end] 中未被 covered 覆盖的区间"""
+    missing = []
+    cursor = start
+    for covered_start, covered_end in merge_ranges(covered):
+        if covered_end < cursor:
+            continue
+        if covered_start > end:
+            break
+        if covered_start > cursor:
+            missing.append((cursor, _shift_day(covered_start, -1)))
+        cursor = max(cursor, _shift_day(covered_end, 1))
+        if cursor > end:
+            break
+    if cursor <= end:
+        missing.append((cursor, end))
+    return missing
+
+
+def _normalize_dates(values: pd.Series) -> pd.Series:
+    """把各数据源的日期列统一为 YYYY-MM-DD 字符串"""
+    text = values.astype(str).str.slice(0, 10)
+    compact = text.str.fullmatch(r'\d{8}')
+    if compact.any():
+        text = text.where(~compact, text.str.slice(0, 4) + '-' + text.str.slice(4, 6) + '-' + text.str.slice(6, 8))
+    return text
+
+
+def date_column(frame: pd.DataFrame) -> Optional[str]:
+    """返回 DataFrame 中的日期列名，没有时返回None"""
+    for column in DATE_COLUMNS:
+        if column in frame.columns:
+            return column
+    return None
+
+
+def slice_by_date(frame: pd.DataFrame, start: str, end: str) -> pd.DataFrame:
+    """截取 [start, end] 内的行（日期为 YYYY-MM-DD）"""
+    days = _normalize_dates(frame[date_column(frame)])
+    return frame[(days >= start).values & (days <= end).values].reset_index(drop=True)
+
+
+def merge_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """合并多段日线数据，同一天保留后出现的行，按日期升序"""
+    merged = pd.concat(frames, ignore_index=True)
+    keys = _normalize_dates(merged[date_column(merged)])
+    merged = merged.assign(_store_day=keys.values)
+    merged = merged.drop_duplicates("_store_day", keep="last").sort_values("_store_day")
+    return merged.drop(columns="_store_day").reset_index(drop=True)
+
+
+class OHLCVStore:
+    """按股票增量维护的日线行情存储"""
+
+    def __init__(self, store_dir: str = None):
+        """
+        Args:
+            store_dir: 存储目录，默认为 tradingagents/dataflows/data_cache/ohlcv
+        """
+        if store_dir is None:
+            store_dir = Path(__file__).parent / "data_cache" / "ohlcv"
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        self.stats = {"requests": 0, "local_hits": 0, "segments_fetched": 0}
+
+    def _lock_for(self, source: str, symbol: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault((source, symbol), threading.Lock())
+
+    def _paths(self, source: str, symbol: str) -> Tuple[Path, Path]:
+        directory = self.store_dir / source
+        safe_symbol = symbol.replace('/', '_')
+        suffix = "parquet" if PARQUET_AVAILABLE else "pkl"
+        return directory / f"{safe_symbol}.{suffix}", directory / f"{safe_symbol}_coverage.json"
+
+    def get_coverage(self, source: str, symbol: str) -> List[DateRange]:
+        """读取已覆盖的日期区间"""
+        _, coverage_path = self._paths(source, symbol)
+        if not coverage_path.exists():
+            return []
+        try:
+            with open(coverage_path, 'r', encoding='utf-8') as f:
+                return [tuple(item) for item in json.load(f).get("ranges", [])]
+        except Exception as e:
+            logger.warning(f"⚠️ [OHLCV存储] 读取覆盖区间失败 {coverage_path}: {e}")
+            return []
+
+    def _load_frame(self, source: str, symbol: str) -> Optional[pd.DataFrame]:
+        data_path, _ = self._paths(source, symbol)
+        if not data_path.exists():
+            return None
+        try:
+            if data_path.suffix == ".parquet":
+                return pd.read_parquet(data_path)
+            return pd.read_pickle(data_path)
+        except Exception as e:
+            logger.warning(f"⚠️ [OHLCV存储] 读取本地数据失败 {data_path}: {e}")
+            return None
+
+    def _save(self, source: str, symbol: str, frame: pd.DataFrame, coverage: List[DateRange]):
+        data_path, coverage_path = self._paths(source, symbol)
+        data_path.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp_data = data_path.with_name(data_path.name + ".tmp")
+        try:
+            if data_path.suffix == ".parquet":
+                frame.to_parquet(tmp_data, index=False)
+            else:
+                frame.to_pickle(tmp_data)
+        except Exception as e:
+            # 列类型混杂等情况下 Parquet 写入失败时不更新覆盖区间
+            logger.warning(f"⚠️ [OHLCV存储] 保存数据失败 {data_path}: {e}")
+            tmp_data.unlink(missing_ok=True)
+            return
+        os.replace(tmp_data, data_path)
+
+        tmp_coverage = coverage_path.with_name(coverage_path.name + ".tmp")
+        with open(tmp_coverage, 'w', encoding='utf-8') as f:
+            json.dump({"ranges": [list(r) for r in coverage], "updated_at": datetime.now().isoformat()}, f)
+        os.replace(tmp_coverage, coverage_path)
+
+    @staticmethod
+    def _date_column(frame: pd.DataFrame) -> Optional[str]:
+        return date_column(frame)
+
+    def get_range(self, symbol: str, source: str, start_date: str, end_date: str,
+                  fetch: Callable[[str, str], Optional[pd.DataFrame]]) -> Optional[pd.DataFrame]:
+        """
+        获取 [start_date, end_date] 的日线数据，只对缺失区间调用 fetch
+
+        Args:
+            symbol: 股票代码
+            source: 数据源名称（不同数据源的列格式不同，分开存储）
+            start_date: 开始日期 YYYY-MM-DD
+            end_date: 结束日期 YYYY-MM-DD
+            fetch: fetch(start, end) -> DataFrame，从数据源获取指定区间；获取失败时应返回None或抛出异常，
+                空表表示区间内没有数据
+
+        Returns:
+            按日期升序的 DataFrame；本地无数据且获取失败时返回 fetch 的原始结果
+        """
+        start, end = _to_day(start_date), _to_day(end_date)
+        # 今天及以后的数据可能尚未收盘，不记入覆盖区间，下次请求时重新获取
+        last_final_day = _shift_day(datetime.now().strftime('%Y-%m-%d'), -1)
+
+        with self._lock_for(source, symbol):
+            self.stats["requests"] += 1
+            coverage = self.get_coverage(source, symbol)
+            frame = self._load_frame(source, symbol)
+            if frame is None:
+                coverage = []
+
+            gaps = missing_ranges(coverage, start, end)
+            if not gaps:
+                self.stats["local_hits"] += 1
+                logger.info(f"⚡ [OHLCV存储] 本地数据覆盖 {symbol} {start}~{end} ({source})")
+                return self._slice(frame, start, end)
+
+            fetched = []
+            empty_gaps = []
+            last_result = None
+            for gap_start, gap_end in gaps:
+                logger.info(f"🌐 [OHLCV存储] 获取缺失区间 {symbol} {gap_start}~{gap_end} ({source})")
+                result = fetch(gap_start, gap_end)
+                self.stats["segments_fetched"] += 1
+                last_result = result
+                if not isinstance(result, pd.DataFrame):
+                    continue
+                covered_end = min(gap_end, last_final_day)
+                if result.empty:
+                    # 只有周末区间确定没有交易日，记入覆盖区间避免每次重新请求；
+                    # 含工作日的空结果可能是数据源失败（多数数据源出错时也返回空表），下次仍重新获取
+                    if gap_start <= covered_end and not _has_weekday(gap_start, covered_end):
+                        empty_gaps.append((gap_start, covered_end))
+                    continue
+                if self._date_column(result) is None:
+                    # 无法按日期拼接，直接返回该结果，不再重复请求整个区间
+                    logger.warning(f"⚠️ [OHLCV存储] 数据缺少日期列，跳过存储: {list(result.columns)}")
+                    return result
+                fetched.append(result)
+                if gap_start <= covered_end:
+                    coverage.append((gap_start, covered_end))
+
+            if frame is None and not fetched:
+                # 本地没有任何数据时，空结果更可能是数据源失败，不记入覆盖区间
+                return last_result
+            coverage.extend(empty_gaps)
+
+            if not fetched:
+                if empty_gaps:
+                    self._save(source, symbol, frame, merge_ranges(coverage))
+                return self._slice(frame, start, end)
+
+            merged = merge_frames(([frame] if frame is not None else []) + fetched)
+
+            self._save(source, symbol, merged, merge_ranges(coverage))
+            return self._slice(merged, start, end)
+
+    def _slice(self, frame: pd.DataFrame, start: str, end: str) -> pd.DataFrame:
+        return slice_by_date(frame, start, end)
+
+    def clear(self, source: str = None, symbol: str = None):
+        """删除本地存储（可按数据源/股票过滤）"""
+        sources = [source] if source else [p.name for p in self.store_dir.iterdir() if p.is_dir()]
+        for src in sources:
+            directory = self.store_dir / src
+            if not directory.exists():
+                continue
+            for path in directory.iterdir():
+                if symbol is None or path.name.startswith(f"{symbol}.") or path.name.startswith(f"{symbol}_"):
+                    path.unlink(missing_ok=True)
+
+
+# 全局存储实例
+_store_instance = None
+
+
+def get_ohlcv_store() -> OHLCVStore:
+    """获取全局OHLCV存储实例"""
+    global _store_instance
+    if _store_instance is None:
+        _store_instance = OHLCVStore()
+    return _store_instance
+
+
+def is_ohlcv_store_enabled() -> bool:
+    return os.getenv('ENABLE_OHLCV_STORE', 'true').lower() == 'true'
@@ -11,6 +11,7 @@ from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from .cache_manager import get_cache
 from .config import get_config
+from .data_context import context_cached
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
@@ -139,22 +140,15 @@ class OptimizedChinaDataProvider:
         # 检查缓存（除非强制刷新）
         if not force_refresh:
             # 查找基本面数据缓存
-            for metadata_file in self.cache.metadata_dir.glob(f"*_meta.json"):
+            for metadata in self.cache.query_metadata(symbol=symbol, data_type='fundamentals',
+                                                      market_type='china'):
                 try:
-                    import json
-                    with open(metadata_file, 'r', encoding='utf-8') as f:
-                        metadata = json.load(f)
-                    
-                    if (metadata.get('symbol') == symbol and 
-                        metadata.get('data_type') == 'fundamentals' and
-                        metadata.get('market_type') == 'china'):
-                        
-                        cache_key = metadata_file.stem.replace('_meta', '')
-                        if self.cache.is_cache_valid(cache_key, symbol=symbol, data_type='fundamentals'):
-                            cached_data = self.cache.load_stock_data(cache_key)
-                            if cached_data:
-                                logger.info(f"⚡ 从缓存加载A股基本面数据: {symbol}")
-                                return cached_data
+                    cache_key = metadata['cache_key']
+                    if self.cache.is_cache_valid(cache_key, symbol=symbol, data_type='fundamentals'):
+                        cached_data = self.cache.load_stock_data(cache_key)
+                        if cached_data:
+                            logger.info(f"⚡ 从缓存加载A股基本面数据: {symbol}")
+                            return cached_data
                 except Exception:
                     continue
         
@@ -162,14 +156,9 @@ class OptimizedChinaDataProvider:
         logger.debug(f"🔍 生成A股基本面分析: {symbol}")
         
         try:
-            # 先获取股票数据
+            # 生成基本面分析报告（行情直接取自结构化日线数据，无需先生成行情文本）
             current_date = datetime.now().strftime('%Y-%m-%d')
-            start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-            
-            stock_data = self.get_stock_data(symbol, start_date, current_date)
-            
-            # 生成基本面分析报告
-            fundamentals_data = self._generate_fundamentals_report(symbol, stock_data)
+            fundamentals_data = self._generate_fundamentals_report(symbol, end_date=current_date)
             
             # 保存到缓存
             self.cache.save_fundamentals_data(
@@ -186,74 +175,52 @@ class OptimizedChinaDataProvider:
             logger.error(f"❌ {error_msg}")
             return self._generate_fallback_fundamentals(symbol, error_msg)
     
-    def _generate_fundamentals_report(self, symbol: str, stock_data: str) -> str:
-        """基于股票数据生成真实的基本面分析报告"""
+    def _generate_fundamentals_report(self, symbol: str, stock_data=None, end_date: str = None) -> str:
+        """
+        基于股票数据生成真实的基本面分析报告
+
+        Args:
+            symbol: 股票代码
+            stock_data: 已获取的 StockBars；传入文本（旧调用方式）或为空时按 end_date 获取近30天日线
+            end_date: 分析日期 YYYY-MM-DD，默认今天
+        """
+        from .data_source_manager import get_china_stock_bars, get_china_stock_info_unified
+        from .stock_data_types import StockBars, StockInfo
 
-        # 添加详细的股票代码追踪日志
         logger.debug(f"🔍 [股票代码追踪] _generate_fundamentals_report 接收到的股票代码: '{symbol}' (类型: {type(symbol)})")
-        logger.debug(f"🔍 [股票代码追踪] 股票代码长度: {len(str(symbol))}")
-        logger.debug(f"🔍 [股票代码追踪] 股票代码字符: {list(str(symbol))}")
-        logger.debug(f"🔍 [股票代码追踪] 接收到的股票数据前200字符: {stock_data[:200] if stock_data else 'None'}")
 
-        # 从股票数据中提取信息
         company_name = "未知公司"
         current_price = "N/A"
         volume = "N/A"
         change_pct = "N/A"
+        price_value = None
 
-        # 首先尝试从统一接口获取股票基本信息
+        # 股票基本信息（结构化结果，运行内与其他调用共享）
         try:
-            logger.debug(f"🔍 [股票代码追踪] 尝试获取{symbol}的基本信息...")
-            from .interface import get_china_stock_info_unified
-            stock_info = get_china_stock_info_unified(symbol)
-            logger.debug(f"🔍 [股票代码追踪] 获取到的股票信息: {stock_info}")
-
-            if "股票名称:" in stock_info:
-                lines = stock_info.split('\n')
-                for line in lines:
-                    if "股票名称:" in line:
-                        company_name = line.split(':')[1].strip()
-                        logger.debug(f"🔍 [股票代码追踪] 从统一接口获取到股票名称: {company_name}")
-                        break
+            stock_info = StockInfo.from_dict(symbol, get_china_stock_info_unified(symbol))
+            if stock_info.is_valid:
+                company_name = stock_info.name
+                logger.debug(f"🔍 [股票代码追踪] 获取到股票名称: {company_name}")
         except Exception as e:
             logger.warning(f"⚠️ 获取股票基本信息失败: {e}")
 
-        # 然后从股票数据中提取价格信息
-        if "股票名称:" in stock_data:
-            lines = stock_data.split('\n')
-            for line in lines:
-                if "股票名称:" in line and company_name == "未知公司":
-                    company_name = line.split(':')[1].strip()
-                elif "当前价格:" in line:
-                    current_price = line.split(':')[1].strip()
-                elif "涨跌幅:" in line:
-                    change_pct = line.split(':')[1].strip()
-                elif "成交量:" in line:
-                    volume = line.split(':')[1].strip()
-
-        # 尝试从股票数据表格中提取最新价格信息
-        if current_price == "N/A" and stock_data:
+        # 最新行情直接取自日线数据
+        bars = stock_data if isinstance(stock_data, StockBars) else None
+        if bars is None:
             try:
-                lines = stock_data.split('\n')
-                for i, line in enumerate(lines):
-                    if "最新数据:" in line and i + 1 < len(lines):
-                        # 查找数据行
-                        for j in range(i + 1, min(i + 5, len(lines))):
-                            data_line = lines[j].strip()
-                            if data_line and not data_line.startswith('日期') and not data_line.startswith('-'):
-                                # 尝试解析数据行
-                                parts = data_line.split()
-                                if len(parts) >= 4:
-                                    try:
-                                        # 假设格式: 日期 股票代码 开盘 收盘 最高 最低 成交量 成交额...
-                                        current_price = parts[3]  # 收盘价
-                                        logger.debug(f"🔍 [股票代码追踪] 从数据表格提取到收盘价: {current_price}")
-                                        break
-                                    except (IndexError, ValueError):
-                                        continue
-                        break
+                end = end_date or datetime.now().strftime('%Y-%m-%d')
+                start = (datetime.strptime(end, '%Y-%m-%d') - timedelta(days=30)).strftime('%Y-%m-%d')
+                bars = get_china_stock_bars(symbol, start, end)
             except Exception as e:
-                logger.debug(f"🔍 [股票代码追踪] 解析股票数据表格失败: {e}")
+                logger.warning(f"⚠️ 获取{symbol}日线数据失败: {e}")
+        quote = bars.quote if bars is not None else None
+        if quote is not None:
+            price_value = quote.price
+            current_price = f"¥{quote.price:.2f}"
+            change_pct = f"{quote.change_pct:+.2f}%"
+            if quote.volume is not None:
+                volume = f"{quote.volume:,.0f}"
+            logger.debug(f"🔍 [股票代码追踪] 最新行情: {quote}")
 
         # 根据股票代码判断行业和基本信息
         logger.debug(f"🔍 [股票代码追踪] 调用 _get_industry_info，传入参数: '{symbol}'")
@@ -261,7 +228,8 @@ class OptimizedChinaDataProvider:
         logger.debug(f"🔍 [股票代码追踪] _get_industry_info 返回结果: {industry_info}")
 
         logger.debug(f"🔍 [股票代码追踪] 调用 _estimate_financial_metrics，传入参数: '{symbol}'")
-        financial_estimates = self._estimate_financial_metrics(symbol, current_price)
+        financial_estimates = self._estimate_financial_metrics(
+            symbol, price_value if price_value is not None else current_price)
         logger.debug(f"🔍 [股票代码追踪] _estimate_financial_metrics 返回结果: {financial_estimates}")
 
         logger.debug(f"🔍 [股票代码追踪] 开始生成报告，使用股票代码: '{symbol}'")
@@ -455,14 +423,20 @@ class OptimizedChinaDataProvider:
 
         return info
 
-    def _estimate_financial_metrics(self, symbol: str, current_price: str) -> dict:
-        """获取真实财务指标（优先使用Tushare真实数据，失败时使用估算）"""
+    def _estimate_financial_metrics(self, symbol: str, current_price) -> dict:
+        """获取真实财务指标（优先使用Tushare真实数据，失败时使用估算）
+
+        current_price 为最新价（float），也接受 "¥12.34" 形式的文本
+        """
 
         # 提取价格数值
-        try:
-            price_value = float(current_price.replace('¥', '').replace(',', ''))
-        except:
-            price_value = 10.0  # 默认值
+        if isinstance(current_price, (int, float)):
+            price_value = float(current_price)
+        else:
+            try:
+                price_value = float(current_price.replace('¥', '').replace(',', ''))
+            except:
+                price_value = 10.0  # 默认值
 
         # 尝试获取真实财务数据
         real_metrics = self._get_real_financial_metrics(symbol, price_value)
@@ -482,9 +456,20 @@ class OptimizedChinaDataProvider:
         
         return estimated_metrics
 
+    @context_cached("china_financial_metrics")
     def _get_real_financial_metrics(self, symbol: str, price_value: float) -> dict:
         """获取真实财务指标 - 优先使用AKShare"""
         try:
+            # 报表未更新且股价相同时，直接复用上次解析出的指标
+            from .financial_statement_cache import get_financial_statement_cache, is_financial_cache_enabled
+            statement_cache = get_financial_statement_cache() if is_financial_cache_enabled() else None
+            metrics_key = round(float(price_value), 4)
+            if statement_cache is not None:
+                cached_metrics = statement_cache.get_metrics('akshare', symbol, metrics_key)
+                if cached_metrics is not None:
+                    logger.info(f"⚡ 使用缓存的{symbol}财务指标 (报告期: {statement_cache.get_report_period('akshare', symbol)})")
+                    return cached_metrics
+
             # 优先尝试AKShare数据源
             logger.info(f"🔄 优先尝试AKShare获取{symbol}财务数据")
             from .akshare_utils import get_akshare_provider
@@ -505,6 +490,8 @@ class OptimizedChinaDataProvider:
                     logger.debug(f"🔧 AKShare解析结果: {metrics}")
                     if metrics:
                         logger.info(f"✅ AKShare解析成功，返回指标")
+                        if statement_cache is not None:
+                            statement_cache.put_metrics('akshare', symbol, metrics_key, metrics)
                         return metrics
                     else:
                         logger.warning(f"⚠️ AKShare解析失败，返回None")
@@ -1064,21 +1051,12 @@ class OptimizedChinaDataProvider:
         """尝试获取过期的缓存数据作为备用"""
         try:
             # 查找任何相关的缓存，不考虑TTL
-            for metadata_file in self.cache.metadata_dir.glob(f"*_meta.json"):
+            for metadata in self.cache.query_metadata(symbol=symbol, data_type='stock_data',
+                                                      market_type='china'):
                 try:
-                    import json
-
-                    with open(metadata_file, 'r', encoding='utf-8') as f:
-                        metadata = json.load(f)
-                    
-                    if (metadata.get('symbol') == symbol and 
-                        metadata.get('data_type') == 'stock_data' and
-                        metadata.get('market_type') == 'china'):
-                        
-                        cache_key = metadata_file.stem.replace('_meta', '')
-                        cached_data = self.cache.load_stock_data(cache_key)
-                        if cached_data:
-                            return cached_data + "\n\n⚠️ 注意: 使用的是过期缓存数据"
+                    cached_data = self.cache.load_stock_data(metadata['cache_key'])
+                    if cached_data:
+                        return cached_data + "\n\n⚠️ 注意: 使用的是过期缓存数据"
                 except Exception:
                     continue
         except Exception:
@@ -10,6 +10,8 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import time
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 from dataclasses import dataclass
 
 # 导入日志模块
@@ -17,6 +19,49 @@ from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
 
 
+# 各新闻源的累计调用统计（聚合器按次创建，统计在进程内共享）
+_source_metrics: Dict[str, Dict[str, float]] = {}
+_source_metrics_lock = threading.Lock()
+
+
+def _record_source_metric(source_name: str, call: bool = False, latency: float = None,
+                          items: int = 0, timeout: bool = False, error: bool = False):
+    with _source_metrics_lock:
+        metric = _source_metrics.setdefault(source_name, {
+            "calls": 0, "completed": 0, "hits": 0, "items": 0,
+            "timeouts": 0, "errors": 0, "total_latency": 0.0
+        })
+        if call:
+            metric["calls"] += 1
+        if latency is not None:
+            metric["completed"] += 1
+            metric["total_latency"] += latency
+            metric["items"] += items
+            if items:
+                metric["hits"] += 1
+        if timeout:
+            metric["timeouts"] += 1
+        if error:
+            metric["errors"] += 1
+
+
+def get_news_source_metrics() -> Dict[str, Dict[str, float]]:
+    """获取各新闻源的平均延迟与命中率（命中：返回了至少一条新闻）"""
+    with _source_metrics_lock:
+        snapshot = {name: dict(metric) for name, metric in _source_metrics.items()}
+    for metric in snapshot.values():
+        completed = metric["completed"]
+        metric["avg_latency"] = round(metric["total_latency"] / completed, 3) if completed else 0.0
+        metric["hit_rate"] = round(metric["hits"] / metric["calls"], 3) if metric["calls"] else 0.0
+        metric["timeout_rate"] = round(metric["timeouts"] / metric["calls"], 3) if metric["calls"] else 0.0
+    return snapshot
+
+
+def reset_news_source_metrics():
+    """清空新闻源统计"""
+    with _source_metrics_lock:
+        _source_metrics.clear()
+
 
 @dataclass
 class NewsItem:
@@ -32,6 +77,9 @@ class NewsItem:
 
 class RealtimeNewsAggregator:
     """实时新闻聚合器"""
+
+    # 达到该相关性评分的新闻计为高相关性，收集满 max_news 条即可提前返回
+    HIGH_RELEVANCE_THRESHOLD = 0.8
     
     def __init__(self):
         self.headers = {
@@ -42,76 +90,109 @@ class RealtimeNewsAggregator:
         self.finnhub_key = os.getenv('FINNHUB_API_KEY')
         self.alpha_vantage_key = os.getenv('ALPHA_VANTAGE_API_KEY')
         self.newsapi_key = os.getenv('NEWSAPI_KEY')
-        
-    def get_realtime_stock_news(self, ticker: str, hours_back: int = 6, max_news: int = 10) -> List[NewsItem]:
+
+        # 所有新闻源的整体截止时间（秒）
+        self.deadline = float(os.getenv('NEWS_AGGREGATOR_DEADLINE', '15'))
+
+    def get_source_metrics(self) -> Dict[str, Dict[str, float]]:
+        """获取各新闻源的平均延迟与命中率"""
+        return get_news_source_metrics()
+
+    def _news_sources(self):
+        """按优先级排列的新闻源：专业API > 新闻API > 搜索引擎"""
+        sources = [
+            ("FinnHub", self._get_finnhub_realtime_news),
+            ("Alpha Vantage", self._get_alpha_vantage_news),
+        ]
+        if self.newsapi_key:
+            sources.append(("NewsAPI", self._get_newsapi_news))
+        else:
+            logger.info(f"[新闻聚合器] NewsAPI 密钥未配置，跳过此新闻源")
+        sources.append(("中文财经", self._get_chinese_finance_news))
+        return sources
+
+    @staticmethod
+    def _fetch_source(source_name: str, fetch, ticker: str, hours_back: int) -> List[NewsItem]:
+        """在线程池中调用单个新闻源并记录耗时（超时后仍在后台完成时也会计入延迟）"""
+        fetch_start = time.time()
+        news = []
+        try:
+            news = fetch(ticker, hours_back) or []
+            return news
+        except Exception:
+            _record_source_metric(source_name, error=True)
+            raise
+        finally:
+            latency = time.time() - fetch_start
+            _record_source_metric(source_name, latency=latency, items=len(news))
+            logger.info(f"[新闻聚合器] {source_name} 返回 {len(news)} 条新闻，耗时: {latency:.2f}秒")
+
+    def get_realtime_stock_news(self, ticker: str, hours_back: int = 6, max_news: int = 10,
+                                deadline: float = None) -> List[NewsItem]:
         """
         获取实时股票新闻
-        优先级：专业API > 新闻API > 搜索引擎
-        
+        各新闻源并发请求，结果到达即合并；已收集到 max_news 条高相关性新闻或超过
+        整体截止时间时立即返回，不等待慢速新闻源
+
         Args:
             ticker: 股票代码
             hours_back: 回溯小时数
             max_news: 最大新闻数量，默认10条
+            deadline: 整体截止时间（秒），默认读取 NEWS_AGGREGATOR_DEADLINE 环境变量
         """
         logger.info(f"[新闻聚合器] 开始获取 {ticker} 的实时新闻，回溯时间: {hours_back}小时")
         start_time = datetime.now()
+        if deadline is None:
+            deadline = self.deadline
+
+        sources = self._news_sources()
+        results: Dict[str, List[NewsItem]] = {}
+        seen_titles = set()
+        high_relevance_count = 0
+
+        executor = ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix="news-source")
+        futures = {}
+        for source_name, fetch in sources:
+            _record_source_metric(source_name, call=True)
+            futures[executor.submit(self._fetch_source, source_name, fetch, ticker, hours_back)] = source_name
+
+        try:
+            for future in as_completed(futures, timeout=deadline):
+                source_name = futures[future]
+                try:
+                    news = future.result()
+                except Exception as e:
+                    logger.error(f"[新闻聚合器] {source_name} 获取新闻失败: {e}")
+                    news = []
+                results[source_name] = news
+
+                # 到达即合并，统计去重后的高相关性新闻数量
+                for item in news:
+                    title_key = item.title.lower().strip()
+                    if len(title_key) <= 10 or title_key in seen_titles:
+                        continue
+                    seen_titles.add(title_key)
+                    if item.relevance_score >= self.HIGH_RELEVANCE_THRESHOLD:
+                        high_relevance_count += 1
+
+                if high_relevance_count >= max_news and len(results) < len(futures):
+                    logger.info(f"[新闻聚合器] ⚡ 已收集 {high_relevance_count} 条高相关性新闻，"
+                                f"不再等待剩余 {len(futures) - len(results)} 个新闻源")
+                    break
+        except FuturesTimeoutError:
+            pending = [name for name in futures.values() if name not in results]
+            for source_name in pending:
+                _record_source_metric(source_name, timeout=True)
+            logger.warning(f"[新闻聚合器] ⏰ 超过截止时间 {deadline:.1f}秒，跳过未返回的新闻源: {', '.join(pending)}")
+        finally:
+            # 不阻塞等待慢速新闻源，其结果在后台完成后丢弃
+            executor.shutdown(wait=False)
+
+        # 按新闻源优先级合并，保证去重时保留高优先级来源
         all_news = []
-        
-        # 1. FinnHub实时新闻 (最高优先级)
-        logger.info(f"[新闻聚合器] 尝试从 FinnHub 获取 {ticker} 的新闻")
-        finnhub_start = datetime.now()
-        finnhub_news = self._get_finnhub_realtime_news(ticker, hours_back)
-        finnhub_time = (datetime.now() - finnhub_start).total_seconds()
-        
-        if finnhub_news:
-            logger.info(f"[新闻聚合器] 成功从 FinnHub 获取 {len(finnhub_news)} 条新闻，耗时: {finnhub_time:.2f}秒")
-        else:
-            logger.info(f"[新闻聚合器] FinnHub 未返回新闻，耗时: {finnhub_time:.2f}秒")
-            
-        all_news.extend(finnhub_news)
-        
-        # 2. Alpha Vantage新闻
-        logger.info(f"[新闻聚合器] 尝试从 Alpha Vantage 获取 {ticker} 的新闻")
-        av_start = datetime.now()
-        av_news = self._get_alpha_vantage_news(ticker, hours_back)
-        av_time = (datetime.now() - av_start).total_seconds()
-        
-        if av_news:
-            logger.info(f"[新闻聚合器] 成功从 Alpha Vantage 获取 {len(av_news)} 条新闻，耗时: {av_time:.2f}秒")
-        else:
-            logger.info(f"[新闻聚合器] Alpha Vantage 未返回新闻，耗时: {av_time:.2f}秒")
-            
-        all_news.extend(av_news)
-        
-        # 3. NewsAPI (如果配置了)
-        if self.newsapi_key:
-            logger.info(f"[新闻聚合器] 尝试从 NewsAPI 获取 {ticker} 的新闻")
-            newsapi_start = datetime.now()
-            newsapi_news = self._get_newsapi_news(ticker, hours_back)
-            newsapi_time = (datetime.now() - newsapi_start).total_seconds()
-            
-            if newsapi_news:
-                logger.info(f"[新闻聚合器] 成功从 NewsAPI 获取 {len(newsapi_news)} 条新闻，耗时: {newsapi_time:.2f}秒")
-            else:
-                logger.info(f"[新闻聚合器] NewsAPI 未返回新闻，耗时: {newsapi_time:.2f}秒")
-                
-            all_news.extend(newsapi_news)
-        else:
-            logger.info(f"[新闻聚合器] NewsAPI 密钥未配置，跳过此新闻源")
-        
-        # 4. 中文财经新闻源
-        logger.info(f"[新闻聚合器] 尝试获取 {ticker} 的中文财经新闻")
-        chinese_start = datetime.now()
-        chinese_news = self._get_chinese_finance_news(ticker, hours_back)
-        chinese_time = (datetime.now() - chinese_start).total_seconds()
-        
-        if chinese_news:
-            logger.info(f"[新闻聚合器] 成功获取 {len(chinese_news)} 条中文财经新闻，耗时: {chinese_time:.2f}秒")
-        else:
-            logger.info(f"[新闻聚合器] 未获取到中文财经新闻，耗时: {chinese_time:.2f}秒")
-            
-        all_news.extend(chinese_news)
-        
+        for source_name, _ in sources:
+            all_news.extend(results.get(source_name, []))
+
         # 去重和排序
         logger.info(f"[新闻聚合器] 开始对 {len(all_news)} 条新闻进行去重和排序")
         dedup_start = datetime.now()
@@ -3,9 +3,19 @@ import time
 import json
 from datetime import datetime, timedelta
 from contextlib import contextmanager
-from typing import Annotated
+from typing import Annotated, Dict, List
+import hashlib
 import os
 import re
+import threading
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+# 预建索引目录（位于 reddit_data 下，与分类目录平级），JSONL 文件仍是数据源
+REDDIT_INDEX_DIR = "_index"
+INDEX_VERSION = 1
 
 ticker_to_company = {
     "AAPL": "Apple",
@@ -49,6 +59,170 @@ ticker_to_company = {
 }
 
 
+def _search_terms(ticker: str) -> List[str]:
+    """公司名称别名加股票代码，与逐行扫描时使用的匹配词一致"""
+    company = ticker_to_company[ticker]
+    terms = company.split(" OR ") if "OR" in company else [company]
+    return terms + [ticker]
+
+
+def _mentions(post: dict, ticker: str) -> bool:
+    for term in _search_terms(ticker):
+        if re.search(term, post["title"], re.IGNORECASE) or re.search(
+            term, post["content"], re.IGNORECASE
+        ):
+            return True
+    return False
+
+
+def _aliases_digest() -> str:
+    """别名表变化时索引需要重建"""
+    return hashlib.md5(json.dumps(ticker_to_company, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _source_signature(category_dir: str) -> Dict[str, List[int]]:
+    signature = {}
+    for name in os.listdir(category_dir):
+        if name.endswith(".jsonl"):
+            stat = os.stat(os.path.join(category_dir, name))
+            signature[name] = [stat.st_size, stat.st_mtime_ns]
+    return signature
+
+
+def _index_dir(data_path: str, category: str) -> str:
+    return os.path.join(data_path, REDDIT_INDEX_DIR, category)
+
+
+def _write_json(path: str, payload):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def build_reddit_index(data_path: str = "reddit_data", category: str = None) -> int:
+    """
+    为离线Reddit语料建立按 (分类, 日期) 分区的索引
+
+    每个日期一个分区文件 {date}.json，按子版块文件保存当天的帖子（已按点赞数降序），
+    公司新闻分类另外保存每个股票代码命中的帖子位置（倒排表）。
+
+    Args:
+        data_path: reddit_data 目录
+        category: 只构建指定分类，默认构建全部分类
+
+    Returns:
+        int: 写入的分区数
+    """
+    categories = [category] if category else [
+        name for name in sorted(os.listdir(data_path))
+        if name != REDDIT_INDEX_DIR and os.path.isdir(os.path.join(data_path, name))
+    ]
+
+    partitions_written = 0
+    for category_name in categories:
+        category_dir = os.path.join(data_path, category_name)
+        signature = _source_signature(category_dir)
+        with_mentions = "company" in category_name
+
+        # date -> file -> posts
+        partitions: Dict[str, Dict[str, List[dict]]] = {}
+        for data_file in signature:
+            with open(os.path.join(category_dir, data_file), "rb") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    parsed_line = json.loads(line)
+                    post_date = datetime.utcfromtimestamp(
+                        parsed_line["created_utc"]
+                    ).strftime("%Y-%m-%d")
+                    partitions.setdefault(post_date, {}).setdefault(data_file, []).append({
+                        "title": parsed_line["title"],
+                        "content": parsed_line["selftext"],
+                        "url": parsed_line["url"],
+                        "upvotes": parsed_line["ups"],
+                        "posted_date": post_date,
+                    })
+
+        index_dir = _index_dir(data_path, category_name)
+        os.makedirs(index_dir, exist_ok=True)
+        for name in os.listdir(index_dir):
+            if name.endswith(".json") and name != "manifest.json":
+                os.remove(os.path.join(index_dir, name))
+
+        for post_date, files in partitions.items():
+            partition = {}
+            for data_file, posts in files.items():
+                # 稳定排序，点赞数相同时保持文件中的顺序
+                posts.sort(key=lambda x: x["upvotes"], reverse=True)
+                entry = {"posts": posts}
+                if with_mentions:
+                    entry["mentions"] = {
+                        ticker: [i for i, post in enumerate(posts) if _mentions(post, ticker)]
+                        for ticker in ticker_to_company
+                    }
+                partition[data_file] = entry
+            _write_json(os.path.join(index_dir, f"{post_date}.json"), partition)
+        partitions_written += len(partitions)
+
+        # 清单最后写入，构建中断时索引视为无效
+        _write_json(os.path.join(index_dir, "manifest.json"), {
+            "version": INDEX_VERSION,
+            "aliases": _aliases_digest(),
+            "sources": signature,
+        })
+        logger.info(f"📇 [Reddit索引] {category_name}: {len(signature)} 个文件, {len(partitions)} 个日期分区")
+
+    return partitions_written
+
+
+_index_state: Dict[str, bool] = {}
+_index_lock = threading.Lock()
+
+
+def _ensure_index(data_path: str, category: str) -> bool:
+    """确认分类索引与JSONL文件一致，缺失或过期时重建；无法建立时返回False"""
+    if os.getenv("REDDIT_INDEX_ENABLED", "true").lower() == "false":
+        return False
+
+    category_dir = os.path.join(data_path, category)
+    index_dir = _index_dir(data_path, category)
+    signature = _source_signature(category_dir)
+    state_key = json.dumps([os.path.abspath(index_dir), signature], sort_keys=True)
+
+    with _index_lock:
+        if _index_state.get(state_key):
+            return True
+        try:
+            with open(os.path.join(index_dir, "manifest.json"), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+
+        fresh = (
+            manifest.get("version") == INDEX_VERSION
+            and manifest.get("aliases") == _aliases_digest()
+            and manifest.get("sources") == signature
+        )
+        if not fresh:
+            try:
+                build_reddit_index(data_path, category)
+            except OSError as e:
+                logger.warning(f"⚠️ [Reddit索引] 无法建立索引，逐行扫描 {category}: {e}")
+                return False
+        _index_state[state_key] = True
+        return True
+
+
+def _read_partition(data_path: str, category: str, date: str) -> dict:
+    path = os.path.join(_index_dir(data_path, category), f"{date}.json")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
 def fetch_top_from_category(
     category: Annotated[
         str, "Category to fetch top post from. Collection of subreddits."
@@ -74,6 +248,22 @@ def fetch_top_from_category(
         os.listdir(os.path.join(base_path, category))
     )
 
+    # 有索引时只读取当天的分区
+    if _ensure_index(base_path, category):
+        partition = _read_partition(base_path, category, date)
+        filter_company = "company" in category and query
+        if filter_company:
+            ticker_to_company[query]  # 未知代码与逐行扫描一样抛出 KeyError
+        for data_file in os.listdir(os.path.join(base_path, category)):
+            entry = partition.get(data_file)
+            if not entry:
+                continue
+            posts = entry["posts"]
+            if filter_company:
+                posts = [posts[i] for i in entry["mentions"][query]]
+            all_content.extend(posts[:limit_per_subreddit])
+        return all_content
+
     for data_file in os.listdir(os.path.join(base_path, category)):
         # check if data_file is a .jsonl file
         if not data_file.endswith(".jsonl"):
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+统一证券主数据
+每天从数据源下载一次A股/港股/美股的完整证券列表（代码、名称、行业、地区、上市日期），
+保存为本地快照并在内存中建立索引：代码精确查找、代码/名称/拼音首字母前缀搜索。
+名称解析因此变为内存查找；快照在后台线程中刷新，刷新期间继续使用旧快照，
+未命中时由调用方退回原有的单只股票查询。
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from tradingagents.utils.stock_utils import StockMarket
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+# 拼音首字母索引需要 pypinyin，不可用时只建立代码和名称索引
+try:
+    from pypinyin import Style, lazy_pinyin
+    PINYIN_AVAILABLE = True
+except ImportError:
+    PINYIN_AVAILABLE = False
+
+SNAPSHOT_VERSION = 1
+CHINA_A = StockMarket.CHINA_A.value
+HONG_KONG = StockMarket.HONG_KONG.value
+US = StockMarket.US.value
+
+
+class SecurityRecord:
+    """一只证券的主数据"""
+
+    __slots__ = ("market", "symbol", "name", "industry", "area", "list_date", "board", "pinyin")
+
+    def __init__(self, market: str, symbol: str, name: str, industry: str = "", area: str = "",
+                 list_date: str = "", board: str = "", pinyin: str = ""):
+        self.market = market
+        self.symbol = symbol
+        self.name = name
+        self.industry = industry
+        self.area = area
+        self.list_date = list_date
+        self.board = board
+        self.pinyin = pinyin
+
+    def to_row(self) -> list:
+        return [getattr(self, field) for field in self.__slots__]
+
+    def to_dict(self) -> Dict[str, str]:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self):
+        return f"SecurityRecord({self.market}:{self.symbol} {self.name})"
+
+
+def _pinyin_initials(name: str) -> str:
+    if not PINYIN_AVAILABLE or not re.search(r'[一-鿿]', name):
+        return ""
+    return "".join(lazy_pinyin(name, style=Style.FIRST_LETTER)).lower()
+
+
+def normalize_symbol(symbol: str, market: str = None) -> Optional[Tuple[str, str]]:
+    """
+    把各种写法的代码统一为 (市场, 代码)
+
+    A股为6位数字（去掉 .SZ/.SH/.BJ 后缀和 sh/sz 前缀），港股为5位数字（0700.HK -> 00700），
+    美股为大写字母代码。无法识别时返回None。
+    """
+    text = str(symbol or "").strip().upper()
+    if not text:
+        return None
+    if market == HONG_KONG or text.endswith(".HK"):
+        digits = text[:-3] if text.endswith(".HK") else text
+        return (HONG_KONG, digits.zfill(5)) if digits.isdigit() else None
+
+    text = re.sub(r'\.(SZ|SH|SS|BJ)$', '', text)
+    text = re.sub(r'^(SH|SZ|BJ)(?=\d{6}$)', '', text)
+    if market == CHINA_A or (market is None and re.fullmatch(r'\d{6}', text)):
+        return (CHINA_A, text) if re.fullmatch(r'\d{6}', text) else None
+    if market is None and re.fullmatch(r'\d{1,5}', text):
+        return HONG_KONG, text.zfill(5)
+    if market in (None, US) and re.fullmatch(r'[A-Z][A-Z.\-]{0,9}', text):
+        return US, text
+    return None
+
+
+# ---- 默认快照来源：每个市场按顺序尝试，第一个成功的来源生效 ----
+
+def _text(value) -> str:
+    return "" if value is None or value != value else str(value).strip()
+
+
+def _load_china_tushare() -> Optional[List[SecurityRecord]]:
+    from .tushare_utils import get_tushare_provider
+    provider = get_tushare_provider()
+    if not provider.connected:
+        return None
+    frame = provider.get_stock_list()
+    if frame is None or getattr(frame, "empty", True):
+        return None
+    return [
+        SecurityRecord(CHINA_A, _text(row.get("symbol")), _text(row.get("name")),
+                       industry=_text(row.get("industry")), area=_text(row.get("area")),
+                       list_date=_text(row.get("list_date")), board=_text(row.get("market")))
+        for row in frame.to_dict("records")
+    ]
+
+
+def _load_china_akshare() -> Optional[List[SecurityRecord]]:
+    import akshare as ak
+    frame = ak.stock_info_a_code_name()
+    return [SecurityRecord(CHINA_A, _text(code), _text(name))
+            for code, name in zip(frame["code"], frame["name"])]
+
+
+def _load_hk_akshare() -> Optional[List[SecurityRecord]]:
+    import akshare as ak
+    frame = ak.stock_hk_spot_em()
+    return [SecurityRecord(HONG_KONG, _text(code).zfill(5), _text(name))
+            for code, name in zip(frame["代码"], frame["名称"])]
+
+
+def _load_us_akshare() -> Optional[List[SecurityRecord]]:
+    import akshare as ak
+    frame = ak.stock_us_spot_em()
+    # 代码形如 105.AAPL
+    return [SecurityRecord(US, _text(code).split(".")[-1].upper(), _text(name))
+            for code, name in zip(frame["代码"], frame["名称"])]
+
+
+DEFAULT_LOADERS: List[Tuple[str, Callable[[], Optional[List[SecurityRecord]]]]] = [
+    (CHINA_A, _load_china_tushare),
+    (CHINA_A, _load_china_akshare),
+    (HONG_KONG, _load_hk_akshare),
+    (US, _load_us_akshare),
+]
+
+
+class _Index:
+    """不可变的查询索引，刷新时整体替换"""
+
+    def __init__(self, records: List[SecurityRecord]):
+        self.records = records
+        self.by_key: Dict[Tuple[str, str], SecurityRecord] = {(r.market, r.symbol): r for r in records}
+        self.by_name: Dict[str, SecurityRecord] = {}
+        for record in records:
+            self.by_name.setdefault(record.name, record)
+        self.markets = {r.market for r in records}
+        self.codes = sorted((r.symbol, i) for i, r in enumerate(records))
+        self.names = sorted((r.name.upper(), i) for i, r in enumerate(records))
+        self.pinyins = sorted((r.pinyin, i) for i, r in enumerate(records) if r.pinyin)
+
+    @staticmethod
+    def prefix(entries: List[Tuple[str, int]], prefix: str) -> List[int]:
+        found = []
+        for position in range(bisect_left(entries, (prefix, -1)), len(entries)):
+            key, record_id = entries[position]
+            if not key.startswith(prefix):
+                break
+            found.append(record_id)
+        return found
+
+
+class SecurityMaster:
+    """进程级证券主数据服务"""
+
+    def __init__(self, store_dir: str = None, loaders=None, markets: List[str] = None,
+                 max_age_hours: float = None, retry_interval: float = 600):
+        """
+        Args:
+            store_dir: 快照目录，默认为 tradingagents/dataflows/data_cache/security_master
+            loaders: [(市场, 加载函数)]，默认使用Tushare/AKShare的完整列表接口
+            markets: 需要维护的市场，默认读取 SECURITY_MASTER_MARKETS（如 "china_a,hong_kong,us"）
+            max_age_hours: 快照最长使用时间，默认读取 SECURITY_MASTER_MAX_AGE_HOURS（默认24）
+            retry_interval: 刷新失败后再次尝试的间隔（秒）
+        """
+        if store_dir is None:
+            store_dir = Path(__file__).parent / "data_cache" / "security_master"
+        self.snapshot_path = Path(store_dir) / "snapshot.json"
+        if markets is None:
+            markets = [m.strip() for m in os.getenv(
+                "SECURITY_MASTER_MARKETS", f"{CHINA_A},{HONG_KONG},{US}").split(",") if m.strip()]
+        self.loaders = [(market, loader) for market, loader in (loaders or DEFAULT_LOADERS)
+                        if market in markets]
+        self.max_age = 3600 * (max_age_hours if max_age_hours is not None else
+                               float(os.getenv("SECURITY_MASTER_MAX_AGE_HOURS", "24")))
+        self.retry_interval = retry_interval
+
+        self._index = _Index([])
+        self._updated_at = 0.0
+        self._loaded = False
+        self._refreshing = False
+        self._last_attempt = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"lookups": 0, "hits": 0, "refreshes": 0}
+
+    # ---- 快照 ----
+
+    def _load_snapshot(self):
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            if snapshot.get("version") != SNAPSHOT_VERSION:
+                return
+            records = [SecurityRecord(*row) for row in snapshot["records"]]
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"⚠️ [证券主数据] 快照读取失败: {e}")
+            return
+        updated_at = float(snapshot.get("updated_at", 0))
+        if updated_at <= self._updated_at:
+            return
+        self._index = _Index(records)
+        self._updated_at = updated_at
+        logger.debug(f"📇 [证券主数据] 已加载快照: {len(records)} 只证券")
+
+    def _save_snapshot(self, records: List[SecurityRecord], updated_at: float):
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.snapshot_path.with_name(self.snapshot_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": SNAPSHOT_VERSION, "updated_at": updated_at,
+                       "fields": list(SecurityRecord.__slots__),
+                       "records": [r.to_row() for r in records]},
+                      f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.snapshot_path)
+
+    def refresh(self) -> bool:
+        """
+        从数据源重新下载证券列表并替换索引（同步执行）
+
+        某个市场的所有来源都失败时保留该市场的旧数据。
+
+        Returns:
+            bool: 至少一个市场刷新成功
+        """
+        fresh: Dict[str, List[SecurityRecord]] = {}
+        for market, loader in self.loaders:
+            if market in fresh:
+                continue
+            try:
+                records = loader()
+            except Exception as e:
+                logger.warning(f"⚠️ [证券主数据] {market} 列表获取失败 ({loader.__name__}): {e}")
+                continue
+            records = [r for r in records or [] if r.symbol and r.name]
+            if records:
+                for record in records:
+                    record.pinyin = record.pinyin or _pinyin_initials(record.name)
+                fresh[market] = records
+
+        if not fresh:
+            return False
+
+        kept = [r for r in self._index.records if r.market not in fresh]
+        records = kept + [r for market_records in fresh.values() for r in market_records]
+        updated_at = time.time()
+        self._index = _Index(records)
+        self._updated_at = updated_at
+        self._loaded = True
+        self.stats["refreshes"] += 1
+        logger.info(f"📇 [证券主数据] 刷新完成: " +
+                    ", ".join(f"{market} {len(rs)}只" for market, rs in fresh.items()))
+        try:
+            self._save_snapshot(records, updated_at)
+        except Exception as e:
+            logger.warning(f"⚠️ [证券主数据] 快照保存失败: {e}")
+        return True
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.warning(f"⚠️ [证券主数据] 后台刷新失败: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _ensure_fresh(self):
+        """首次使用时加载本地快照；快照过期时在后台刷新，不阻塞查询"""
+        with self._lock:
+            if not self._loaded:
+                self._load_snapshot()
+                self._loaded = True
+            now = time.time()
+            if (not self.loaders or self._refreshing or now - self._updated_at < self.max_age
+                    or now - self._last_attempt < self.retry_interval):
+                return
+            self._refreshing = True
+            self._last_attempt = now
+        threading.Thread(target=self._background_refresh, name="security-master-refresh",
+                         daemon=True).start()
+
+    # ---- 查询 ----
+
+    def has_market(self, market: str) -> bool:
+        """当前快照是否包含该市场"""
+        self._ensure_fresh()
+        return market in self._index.markets
+
+    def get(self, symbol: str, market: str = None) -> Optional[SecurityRecord]:
+        """按代码精确查找，支持 000001.SZ / 0700.HK / aapl 等写法"""
+        self._ensure_fresh()
+        self.stats["lookups"] += 1
+        key = normalize_symbol(symbol, market)
+        record = self._index.by_key.get(key) if key else None
+        if record is not None:
+            self.stats["hits"] += 1
+        return record
+
+    def get_name(self, symbol: str, market: str = None) -> Optional[str]:
+        record = self.get(symbol, market)
+        return record.name if record else None
+
+    def find_by_name(self, name: str) -> Optional[SecurityRecord]:
+        """按证券简称精确查找"""
+        self._ensure_fresh()
+        return self._index.by_name.get(str(name).strip())
+
+    def search(self, keyword: str, market: str = None, limit: int = None) -> List[SecurityRecord]:
+        """
+        搜索证券：代码前缀、名称前缀、拼音首字母前缀优先，其后是名称或代码包含关键词的结果
+
+        Args:
+            keyword: 代码（可带 .SZ/.SH 等后缀）、名称或拼音首字母（如 payh）
+            market: 只返回指定市场
+            limit: 最多返回的条数
+        """
+        self._ensure_fresh()
+        index = self._index
+        keyword = str(keyword or "").strip()
+        if not keyword:
+            return []
+        upper = keyword.upper()
+        # 000001.SZ / sz000001 / 0700.HK 等写法先统一为主数据中的代码
+        normalized = normalize_symbol(keyword, market)
+
+        ordered: List[int] = []
+        ordered += index.prefix(index.codes, upper)
+        if normalized and normalized[1] != upper:
+            ordered += index.prefix(index.codes, normalized[1])
+        ordered += index.prefix(index.names, upper)
+        if keyword.isascii() and keyword.isalpha():
+            ordered += index.prefix(index.pinyins, keyword.lower())
+        # 名称中间包含关键词（与按名称 contains 搜索的结果一致）
+        ordered += [i for name, i in index.names if upper in name]
+        # 代码中间包含数字片段（与按 symbol/ts_code contains 搜索的结果一致）
+        digits = re.sub(r'\.(SZ|SH|SS|BJ|HK)$', '', upper)
+        if digits.isdigit():
+            ordered += [i for symbol, i in index.codes if digits in symbol]
+
+        results, seen = [], set()
+        for record_id in ordered:
+            record = index.records[record_id]
+            if record_id in seen or (market and record.market != market):
+                continue
+            seen.add(record_id)
+            results.append(record)
+            if limit and len(results) >= limit:
+                break
+        return results
+
+    def get_status(self) -> Dict:
+        return {
+            "records": len(self._index.records),
+            "markets": sorted(self._index.markets),
+            "updated_at": datetime.fromtimestamp(self._updated_at).isoformat() if self._updated_at else None,
+            "refreshing": self._refreshing,
+            "pinyin": PINYIN_AVAILABLE,
+            **self.stats,
+        }
+
+
+# 全局实例
+_security_master = None
+_security_master_lock = threading.Lock()
+
+
+def get_security_master() -> Optional[SecurityMaster]:
+    """获取全局证券主数据服务；SECURITY_MASTER_ENABLED=false 时返回None"""
+    global _security_master
+    if os.getenv("SECURITY_MASTER_ENABLED", "true").lower() == "false":
+        return None
+    with _security_master_lock:
+        if _security_master is None:
+            _security_master = SecurityMaster()
+        return _security_master
+
+
+def lookup_security(symbol: str, market: str = None) -> Optional[SecurityRecord]:
+    """在证券主数据中查找代码，服务关闭或未命中时返回None（不会发起网络请求）"""
+    master = get_security_master()
+    if master is None:
+        return None
+    try:
+        return master.get(symbol, market)
+    except Exception as e:
+        logger.debug(f"证券主数据查询失败: {e}")
+        return None
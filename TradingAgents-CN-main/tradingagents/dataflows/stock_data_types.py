@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+数据层的结构化结果
+股票信息、行情快照和日线数据以类型化对象在数据层内传递，下游直接读取字段；
+面向LLM提示词的文本只在需要时渲染一次，不再把格式化文本重新解析回数值。
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+
+from .ohlcv_store import _normalize_dates, date_column
+
+# 各数据源收盘价/成交量列的候选名称
+CLOSE_COLUMNS = ['close', '收盘']
+VOLUME_COLUMNS = ['volume', 'vol', '成交量']
+
+UNKNOWN = '未知'
+
+
+def _first_column(frame: pd.DataFrame, candidates) -> Optional[str]:
+    for column in candidates:
+        if column in frame.columns:
+            return column
+    return None
+
+
+@dataclass(slots=True)
+class StockInfo:
+    """股票基本信息"""
+
+    symbol: str
+    name: str
+    area: str = UNKNOWN
+    industry: str = UNKNOWN
+    market: str = UNKNOWN
+    list_date: str = UNKNOWN
+    source: str = 'unknown'
+
+    @classmethod
+    def from_dict(cls, symbol: str, info: Optional[Dict[str, Any]], source: str = None) -> "StockInfo":
+        """由数据源返回的信息字典构造，缺失字段填为“未知”"""
+        info = info or {}
+
+        def text(key):
+            value = info.get(key)
+            return str(value) if value not in (None, '') else UNKNOWN
+
+        return cls(
+            symbol=symbol,
+            name=str(info.get('name') or f'股票{symbol}'),
+            area=text('area'),
+            industry=text('industry'),
+            market=text('market'),
+            list_date=text('list_date'),
+            source=source or str(info.get('source') or 'unknown'),
+        )
+
+    @property
+    def is_valid(self) -> bool:
+        """数据源返回了真实名称（而不是“股票{代码}”占位）"""
+        return bool(self.name) and self.name != UNKNOWN and not self.name.startswith(f'股票{self.symbol}')
+
+    def to_dict(self) -> Dict[str, str]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def to_text(self) -> str:
+        return (f"股票代码: {self.symbol}\n"
+                f"股票名称: {self.name}\n"
+                f"所属地区: {self.area}\n"
+                f"所属行业: {self.industry}\n"
+                f"上市市场: {self.market}\n"
+                f"上市日期: {self.list_date}\n"
+                f"数据来源: {self.source}\n")
+
+
+@dataclass(slots=True)
+class StockQuote:
+    """最新一个交易日的行情快照"""
+
+    symbol: str
+    date: str
+    price: float
+    prev_close: float
+    volume: Optional[float] = None
+
+    @property
+    def change(self) -> float:
+        return self.price - self.prev_close
+
+    @property
+    def change_pct(self) -> float:
+        return self.change / self.prev_close * 100 if self.prev_close else 0.0
+
+
+@dataclass(slots=True)
+class StockBars:
+    """
+    一段区间的日线数据
+
+    frame 为数据源原始列格式的 DataFrame（按日期升序）；quote 与 text 在首次访问时计算并保存，
+    text 由数据源对应的 renderer 生成，与此前各数据源的文本格式一致。
+    """
+
+    symbol: str
+    source: str
+    start_date: str
+    end_date: str
+    frame: pd.DataFrame = field(repr=False)
+    renderer: Optional[Callable[["StockBars"], str]] = field(default=None, repr=False, compare=False)
+    _quote: Optional[StockQuote] = field(default=None, init=False, repr=False, compare=False)
+    _text: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    @property
+    def quote(self) -> Optional[StockQuote]:
+        """最新收盘价、前收盘价和成交量，缺少收盘价列时为None"""
+        if self._quote is None and not self.frame.empty:
+            close_column = _first_column(self.frame, CLOSE_COLUMNS)
+            if close_column is None:
+                return None
+            closes = pd.to_numeric(self.frame[close_column], errors='coerce')
+            price = float(closes.iloc[-1])
+            prev_close = float(closes.iloc[-2]) if len(closes) > 1 else price
+
+            volume = None
+            volume_column = _first_column(self.frame, VOLUME_COLUMNS)
+            if volume_column is not None:
+                volume = float(pd.to_numeric(self.frame[volume_column], errors='coerce').iloc[-1])
+
+            day_column = date_column(self.frame)
+            day = _normalize_dates(self.frame[day_column].tail(1)).iloc[0] if day_column else self.end_date
+            self._quote = StockQuote(self.symbol, day, price, prev_close, volume)
+        return self._quote
+
+    @property
+    def text(self) -> str:
+        """面向提示词的文本，首次访问时渲染"""
+        if self._text is None:
+            if self.renderer is not None:
+                self._text = self.renderer(self)
+            else:
+                self._text = (f"股票代码: {self.symbol}\n数据期间: {self.start_date} 至 {self.end_date}\n"
+                              f"数据条数: {len(self.frame)}条\n\n{self.frame.tail(3).to_string(index=False)}")
+        return self._text
@@ -1,12 +1,136 @@
 import pandas as pd
 import yfinance as yf
 from stockstats import wrap
-from typing import Annotated
+from typing import Annotated, List
+from functools import lru_cache
+import threading
 import os
 from .config import get_config
+from .offline_price_store import get_offline_price_store, price_csv_path
+
+
+# 已包装的价格数据缓存数量（按 symbol + 数据日期）
+_STATS_FRAME_CACHE_SIZE = 32
+# stockstats 会在首次访问指标时向 DataFrame 追加列，多线程共享同一帧时需要加锁
+_stats_lock = threading.Lock()
+
+
+def _load_online_price_data(symbol: str, as_of: str) -> pd.DataFrame:
+    """读取（或下载并缓存）截至 as_of 的15年日线数据"""
+    end_date = pd.Timestamp(as_of)
+    start_date = end_date - pd.DateOffset(years=15)
+    start_date = start_date.strftime("%Y-%m-%d")
+    end_date = end_date.strftime("%Y-%m-%d")
+
+    # Get config and ensure cache directory exists
+    config = get_config()
+    os.makedirs(config["data_cache_dir"], exist_ok=True)
+
+    data_file = os.path.join(
+        config["data_cache_dir"],
+        f"{symbol}-YFin-data-{start_date}-{end_date}.csv",
+    )
+
+    if os.path.exists(data_file):
+        data = pd.read_csv(data_file)
+        data["Date"] = pd.to_datetime(data["Date"])
+    else:
+        data = yf.download(
+            symbol,
+            start=start_date,
+            end=end_date,
+            multi_level_index=False,
+            progress=False,
+            auto_adjust=True,
+        )
+        data = data.reset_index()
+        data.to_csv(data_file, index=False)
+
+    return data
+
+
+@lru_cache(maxsize=_STATS_FRAME_CACHE_SIZE)
+def _load_stats_frame(symbol: str, data_dir: str, online: bool, version: str):
+    """加载一次价格数据并包装为 StockDataFrame
+
+    version 在离线模式下为文件修改时间，在线模式下为当天日期，
+    用于让缓存随数据文件一起失效。返回的 ``Date`` 列统一为 YYYY-mm-dd 字符串。
+    """
+    if not online:
+        try:
+            frame = get_offline_price_store().load(symbol, data_dir)
+        except FileNotFoundError:
+            raise Exception("Stockstats fail: Yahoo Finance data not fetched yet!")
+        # 共享帧只读，stockstats 会追加指标列，这里复制一份
+        data = frame.reset_index(drop=True)
+        data["Date"] = frame.index.strftime("%Y-%m-%d")
+    else:
+        data = _load_online_price_data(symbol, version)
+        data["Date"] = pd.to_datetime(data["Date"]).dt.strftime("%Y-%m-%d")
+
+    return wrap(data)
+
+
+def _stats_frame_version(symbol: str, data_dir: str, online: bool) -> str:
+    if online:
+        return pd.Timestamp.today().strftime("%Y-%m-%d")
+    path = price_csv_path(symbol, data_dir)
+    try:
+        return str(os.path.getmtime(path))
+    except OSError:
+        return ""
 
 
 class StockstatsUtils:
+    @staticmethod
+    def get_stats_frame(symbol: str, data_dir: str, online: bool = False):
+        """获取缓存的 StockDataFrame，同一数据版本只解析一次"""
+        version = _stats_frame_version(symbol, data_dir, online)
+        return _load_stats_frame(symbol, data_dir, online, version)
+
+    @staticmethod
+    def get_stock_stats_window(
+        symbol: Annotated[str, "ticker symbol for the company"],
+        indicators: Annotated[
+            List[str], "quantitative indicators based off of the stock data for the company"
+        ],
+        curr_date: Annotated[
+            str, "curr date for retrieving stock price data, YYYY-mm-dd"
+        ],
+        look_back_days: Annotated[int, "how many days to look back"],
+        data_dir: Annotated[
+            str,
+            "directory where the stock data is stored.",
+        ],
+        online: Annotated[
+            bool,
+            "whether to use online tools to fetch data or offline tools. If True, will use online tools.",
+        ] = False,
+    ) -> pd.DataFrame:
+        """一次性计算多个指标并截取回看窗口
+
+        指标在完整历史上向量化计算（与逐日计算结果一致），然后按日期切片。
+
+        Returns:
+            pd.DataFrame: ``Date`` 列加每个指标一列，只包含窗口内的交易日，按日期倒序
+        """
+        df = StockstatsUtils.get_stats_frame(symbol, data_dir, online)
+
+        with _stats_lock:
+            for indicator in indicators:
+                df[indicator]  # trigger stockstats to calculate the indicator
+            frame = pd.DataFrame(df[["Date"] + list(indicators)])
+
+        end_date = pd.Timestamp(curr_date)
+        start_date = (end_date - pd.DateOffset(days=look_back_days)).strftime("%Y-%m-%d")
+        end_date = end_date.strftime("%Y-%m-%d")
+
+        # Date 列按日期升序，二分查找窗口边界
+        dates = frame["Date"]
+        lo = dates.searchsorted(start_date, side="left")
+        hi = dates.searchsorted(end_date, side="right")
+        return frame.iloc[lo:hi].iloc[::-1].reset_index(drop=True)
+
     @staticmethod
     def get_stock_stats(
         symbol: Annotated[str, "ticker symbol for the company"],
@@ -25,63 +149,13 @@ class StockstatsUtils:
             "whether to use online tools to fetch data or offline tools. If True, will use online tools.",
         ] = False,
     ):
-        df = None
-        data = None
-
-        if not online:
-            try:
-                data = pd.read_csv(
-                    os.path.join(
-                        data_dir,
-                        f"{symbol}-YFin-data-2015-01-01-2025-03-25.csv",
-                    )
-                )
-                df = wrap(data)
-            except FileNotFoundError:
-                raise Exception("Stockstats fail: Yahoo Finance data not fetched yet!")
-        else:
-            # Get today's date as YYYY-mm-dd to add to cache
-            today_date = pd.Timestamp.today()
-            curr_date = pd.to_datetime(curr_date)
-
-            end_date = today_date
-            start_date = today_date - pd.DateOffset(years=15)
-            start_date = start_date.strftime("%Y-%m-%d")
-            end_date = end_date.strftime("%Y-%m-%d")
-
-            # Get config and ensure cache directory exists
-            config = get_config()
-            os.makedirs(config["data_cache_dir"], exist_ok=True)
-
-            data_file = os.path.join(
-                config["data_cache_dir"],
-                f"{symbol}-YFin-data-{start_date}-{end_date}.csv",
-            )
-
-            if os.path.exists(data_file):
-                data = pd.read_csv(data_file)
-                data["Date"] = pd.to_datetime(data["Date"])
-            else:
-                data = yf.download(
-                    symbol,
-                    start=start_date,
-                    end=end_date,
-                    multi_level_index=False,
-                    progress=False,
-                    auto_adjust=True,
-                )
-                data = data.reset_index()
-                data.to_csv(data_file, index=False)
-
-            df = wrap(data)
-            df["Date"] = df["Date"].dt.strftime("%Y-%m-%d")
-            curr_date = curr_date.strftime("%Y-%m-%d")
-
-        df[indicator]  # trigger stockstats to calculate the indicator
-        matching_rows = df[df["Date"].str.startswith(curr_date)]
-
-        if not matching_rows.empty:
-            indicator_value = matching_rows[indicator].values[0]
+        curr_date = pd.to_datetime(curr_date).strftime("%Y-%m-%d")
+        window = StockstatsUtils.get_stock_stats_window(
+            symbol, [indicator], curr_date, 0, data_dir, online=online
+        )
+
+        if not window.empty:
+            indicator_value = window[indicator].values[0]
             return indicator_value
         else:
             return "N/A: Not a trading day (weekend or holiday)"
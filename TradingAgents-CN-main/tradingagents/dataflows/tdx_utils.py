@@ -6,8 +6,13 @@ Tushare数据接口数据获取工具
 
 import pandas as pd
 import numpy as np
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, List, Dict, Optional, Tuple
 import warnings
 
 # 导入日志模块
@@ -46,69 +51,290 @@ try:
     from pytdx.exhq import TdxExHq_API
     TDX_AVAILABLE = True
 except ImportError:
+    TdxHq_API = None
     TDX_AVAILABLE = False
     logger.warning(f"⚠️ pytdx库未安装，无法使用Tushare数据接口")
     logger.info(f"💡 安装命令: pip install pytdx")
 
 
+# 默认通达信行情服务器（未找到 tdx_servers_config.json 时使用）
+DEFAULT_TDX_SERVERS = [
+    {'ip': '115.238.56.198', 'port': 7709},
+    {'ip': '115.238.90.165', 'port': 7709},
+    {'ip': '180.153.18.170', 'port': 7709},
+    {'ip': '119.147.212.81', 'port': 7709},  # 备用
+]
+
+# 通达信协议单次 get_security_quotes 最多支持的股票数量
+MAX_QUOTES_PER_REQUEST = 80
+
+
+def _load_working_servers() -> List[Dict]:
+    """加载可用服务器配置"""
+    try:
+        import json
+
+        config_file = 'tdx_servers_config.json'
+        if os.path.exists(config_file):
+            with open(config_file, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+                return config.get('working_servers', [])
+    except Exception:
+        pass
+    return []
+
+
+class TdxConnectionPool:
+    """通达信行情连接池
+
+    启动时并行探测所有服务器并按实测延迟排序，保持最多 size 个已连接的socket供并发分析
+    借用。空闲超过 idle_check_seconds 的连接在借出前才做一次健康检查，出错的连接直接丢弃
+    并在下次借用时连接下一个可用服务器。
+    """
+
+    def __init__(self, servers: List[Dict] = None, size: int = None, api_factory: Callable = None,
+                 probe_timeout: float = 3.0, idle_check_seconds: float = 30.0):
+        """
+        Args:
+            servers: 候选服务器列表 [{'ip': ..., 'port': ...}]，默认读取配置文件或内置列表
+            size: 最大连接数，默认读取 TDX_POOL_SIZE 环境变量（默认3）
+            api_factory: 创建行情API对象的工厂，默认 TdxHq_API
+            probe_timeout: 探测/连接单个服务器的超时时间（秒）
+            idle_check_seconds: 连接空闲超过该时间后，借出前先做健康检查
+        """
+        self.servers = servers or _load_working_servers() or list(DEFAULT_TDX_SERVERS)
+        self.size = size or int(os.getenv('TDX_POOL_SIZE', '3'))
+        self.api_factory = api_factory or TdxHq_API
+        self.probe_timeout = probe_timeout
+        self.idle_check_seconds = idle_check_seconds
+
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        # 空闲连接: (api, server, 归还时间)，后进先出，优先复用最近使用过的连接
+        self._idle: List[Tuple[object, Dict, float]] = []
+        self._created = 0
+        self._ranked: Optional[List[Dict]] = None
+        self.server_latency: Dict[str, float] = {}
+        self.stats = {"borrowed": 0, "opened": 0, "discarded": 0, "quote_requests": 0}
+
+    @staticmethod
+    def _server_key(server: Dict) -> str:
+        return f"{server['ip']}:{server['port']}"
+
+    def _probe(self, server: Dict) -> Optional[float]:
+        """连接并做一次请求，返回往返耗时（秒），失败返回None"""
+        api = self.api_factory()
+        start = time.time()
+        try:
+            if not api.connect(server['ip'], server['port'], time_out=self.probe_timeout):
+                return None
+            count = api.get_security_count(0)
+            if not count:
+                return None
+            return time.time() - start
+        except Exception as e:
+            logger.debug(f"🔍 [通达信连接池] 服务器 {self._server_key(server)} 探测失败: {e}")
+            return None
+        finally:
+            try:
+                api.disconnect()
+            except Exception:
+                pass
+
+    def rank_servers(self) -> List[Dict]:
+        """并行探测所有服务器，返回按延迟升序排列的可用服务器"""
+        with ThreadPoolExecutor(max_workers=min(len(self.servers), 8) or 1) as executor:
+            latencies = list(executor.map(self._probe, self.servers))
+
+        latency_map = {
+            self._server_key(server): latency
+            for server, latency in zip(self.servers, latencies) if latency is not None
+        }
+        ranked = sorted(
+            (server for server in self.servers if self._server_key(server) in latency_map),
+            key=lambda server: latency_map[self._server_key(server)]
+        )
+        with self._lock:
+            self.server_latency = latency_map
+            self._ranked = ranked
+
+        if ranked:
+            fastest = ranked[0]
+            logger.info(f"✅ [通达信连接池] {len(ranked)}/{len(self.servers)} 个服务器可用，"
+                        f"最快: {self._server_key(fastest)} ({latency_map[self._server_key(fastest)] * 1000:.0f}ms)")
+        else:
+            logger.error(f"❌ [通达信连接池] 所有数据服务器连接失败")
+        return ranked
+
+    def _ranked_servers(self) -> List[Dict]:
+        if self._ranked is None:
+            self.rank_servers()
+        return self._ranked
+
+    def start(self) -> bool:
+        """探测服务器并预先建立连接，至少有一个可用连接时返回True"""
+        if not self._ranked_servers():
+            return False
+        with self._lock:
+            missing = max(self.size - self._created, 0)
+            self._created += missing
+        for _ in range(missing):
+            connection = self._open()
+            if connection is None:
+                with self._available:
+                    self._created -= 1
+                continue
+            self.release(*connection)
+        with self._lock:
+            return self._created > 0
+
+    def _open(self) -> Optional[Tuple[object, Dict]]:
+        """按延迟顺序连接服务器，返回 (api, server)"""
+        for server in self._ranked_servers():
+            api = self.api_factory()
+            try:
+                if api.connect(server['ip'], server['port'], time_out=self.probe_timeout):
+                    with self._lock:
+                        self.stats["opened"] += 1
+                    logger.debug(f"🔍 [通达信连接池] 新建连接: {self._server_key(server)}")
+                    return api, server
+            except Exception as e:
+                logger.warning(f"⚠️ 服务器 {self._server_key(server)} 连接失败: {e}")
+        return None
+
+    def _healthy(self, api) -> bool:
+        try:
+            count = api.get_security_count(0)
+            return count is not None and count > 0
+        except Exception:
+            return False
+
+    def _discard(self, api):
+        try:
+            api.disconnect()
+        except Exception:
+            pass
+        with self._available:
+            self._created -= 1
+            self.stats["discarded"] += 1
+            self._available.notify()
+
+    def acquire(self, timeout: float = 30.0) -> Tuple[object, Dict]:
+        """借出一个连接，池满时最多等待 timeout 秒"""
+        deadline = time.time() + timeout
+        while True:
+            with self._available:
+                while not self._idle and self._created >= self.size:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise TimeoutError("通达信连接池已满，等待空闲连接超时")
+                    self._available.wait(remaining)
+                if self._idle:
+                    api, server, returned_at = self._idle.pop()
+                else:
+                    api = None
+                    self._created += 1
+                self.stats["borrowed"] += 1
+
+            if api is None:
+                connection = self._open()
+                if connection is None:
+                    with self._available:
+                        self._created -= 1
+                        self._available.notify()
+                    raise ConnectionError("所有通达信数据服务器连接失败")
+                api, server = connection
+            elif time.time() - returned_at > self.idle_check_seconds and not self._healthy(api):
+                logger.debug(f"🔍 [通达信连接池] 空闲连接已失效，丢弃: {self._server_key(server)}")
+                self._discard(api)
+                continue
+            return api, server
+
+    def release(self, api, server: Dict, broken: bool = False):
+        """归还连接；broken=True 时断开并丢弃"""
+        if broken:
+            self._discard(api)
+            return
+        with self._available:
+            self._idle.append((api, server, time.time()))
+            self._available.notify()
+
+    @contextmanager
+    def connection(self, timeout: float = 30.0):
+        """借用连接的上下文管理器，块内抛出异常时丢弃该连接"""
+        api, server = self.acquire(timeout)
+        try:
+            yield api
+        except Exception:
+            self.release(api, server, broken=True)
+            raise
+        else:
+            self.release(api, server)
+
+    def get_security_quotes(self, stocks: List[Tuple[int, str]]) -> List[Dict]:
+        """批量获取实时行情，按协议上限分批合并为尽量少的请求"""
+        quotes = []
+        with self.connection() as api:
+            for offset in range(0, len(stocks), MAX_QUOTES_PER_REQUEST):
+                batch = stocks[offset:offset + MAX_QUOTES_PER_REQUEST]
+                with self._lock:
+                    self.stats["quote_requests"] += 1
+                quotes.extend(api.get_security_quotes(batch) or [])
+        return quotes
+
+    def is_available(self) -> bool:
+        with self._lock:
+            return bool(self._idle) or bool(self._ranked)
+
+    def close(self):
+        """断开所有空闲连接"""
+        with self._available:
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+        for api, _, _ in idle:
+            try:
+                api.disconnect()
+            except Exception:
+                pass
+
+
+_connection_pool: Optional[TdxConnectionPool] = None
+_connection_pool_lock = threading.Lock()
+
+
+def get_tdx_connection_pool() -> TdxConnectionPool:
+    """获取全局通达信连接池"""
+    global _connection_pool
+    with _connection_pool_lock:
+        if _connection_pool is None:
+            _connection_pool = TdxConnectionPool()
+        return _connection_pool
+
+
 class TongDaXinDataProvider:
-    """通达信数据提供器"""
+    """通达信数据提供器（连接由进程级连接池管理，可供并发分析共享）"""
     
-    def __init__(self):
+    def __init__(self, pool: TdxConnectionPool = None):
         logger.debug(f"🔍 [DEBUG] 初始化通达信数据提供器...")
-        self.api = None
-        self.exapi = None  # 扩展行情API
         self.connected = False
 
         logger.debug(f"🔍 [DEBUG] 检查pytdx库可用性: {TDX_AVAILABLE}")
-        if not TDX_AVAILABLE:
+        if not TDX_AVAILABLE and pool is None:
             error_msg = "pytdx库未安装，请运行: pip install pytdx"
             logger.error(f"❌ [DEBUG] {error_msg}")
             raise ImportError(error_msg)
         logger.debug(f"✅ [DEBUG] pytdx库检查通过")
+        self.pool = pool or get_tdx_connection_pool()
     
     def connect(self):
-        """连接数据服务器"""
-        logger.debug(f"🔍 [DEBUG] 开始连接数据服务器...")
+        """连接数据服务器（探测服务器延迟并预热连接池）"""
+        if self.connected:
+            return True
         try:
-            # 尝试从配置文件加载可用服务器
-            logger.debug(f"🔍 [DEBUG] 加载服务器配置...")
-            working_servers = self._load_working_servers()
-
-            # 如果没有配置文件，使用默认服务器列表
-            if not working_servers:
-                logger.debug(f"🔍 [DEBUG] 未找到配置文件，使用默认服务器列表")
-                working_servers = [
-                    {'ip': '115.238.56.198', 'port': 7709},
-                    {'ip': '115.238.90.165', 'port': 7709},
-                    {'ip': '180.153.18.170', 'port': 7709},
-                    {'ip': '119.147.212.81', 'port': 7709},  # 备用
-                ]
-            else:
-                logger.debug(f"🔍 [DEBUG] 从配置文件加载了 {len(working_servers)} 个服务器")
-
-            # 尝试连接可用服务器
-            logger.debug(f"🔍 [DEBUG] 创建Tushare数据接口实例...")
-            self.api = TdxHq_API()
-            logger.debug(f"🔍 [DEBUG] 开始尝试连接服务器...")
-
-            for i, server in enumerate(working_servers):
-                try:
-                    logger.debug(f"🔍 [DEBUG] 尝试连接服务器 {i+1}/{len(working_servers)}: {server['ip']}:{server['port']}")
-                    result = self.api.connect(server['ip'], server['port'])
-                    logger.debug(f"🔍 [DEBUG] 连接结果: {result}")
-                    if result:
-                        logger.info(f"✅ Tushare数据接口连接成功: {server['ip']}:{server['port']}")
-                        self.connected = True
-                        return True
-                except Exception as e:
-                    logger.error(f"⚠️ 服务器 {server['ip']}:{server['port']} 连接失败: {e}")
-                    continue
-
-            logger.error(f"❌ 所有数据服务器连接失败")
-            self.connected = False
-            return False
-
+            self.connected = self.pool.start()
+            if self.connected:
+                logger.info(f"✅ Tushare数据接口连接成功，连接池大小: {self.pool.size}")
+            return self.connected
         except Exception as e:
             logger.error(f"❌ Tushare数据接口连接失败: {e}")
             self.connected = False
@@ -116,50 +342,25 @@ class TongDaXinDataProvider:
 
     def _load_working_servers(self):
         """加载可用服务器配置"""
-        try:
-            import json
-            import os
-
-            config_file = 'tdx_servers_config.json'
-            if os.path.exists(config_file):
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    return config.get('working_servers', [])
-        except Exception:
-            pass
-        return []
+        return _load_working_servers()
     
     def disconnect(self):
         """断开连接"""
         try:
-            if self.api:
-                self.api.disconnect()
-            if self.exapi:
-                self.exapi.disconnect()
+            self.pool.close()
             self.connected = False
             logger.info(f"✅ Tushare数据接口连接已断开")
         except:
             pass
 
     def is_connected(self):
-        """检查连接状态"""
-        if not self.connected or not self.api:
-            return False
-
-        # 尝试简单的API调用来验证连接是否有效
-        try:
-            # 获取市场信息作为连接测试
-            result = self.api.get_security_count(0)  # 获取深圳市场股票数量
-            return result is not None and result > 0
-        except Exception as e:
-            logger.error(f"🔍 [DEBUG] 连接测试失败: {e}")
-            self.connected = False
-            return False
+        """检查连接状态（连接的有效性由连接池在借出时检查，这里不做网络往返）"""
+        return self.connected and self.pool.is_available()
     
     def _get_stock_name(self, stock_code: str) -> str:
         """
         获取股票名称
-        优先级：缓存 -> MongoDB -> 常用股票映射 -> API获取（仅深圳市场） -> 默认格式
+        优先级：缓存 -> 证券主数据 -> MongoDB -> 常用股票映射 -> API获取（仅深圳市场） -> 默认格式
         Args:
             stock_code: 股票代码
         Returns:
@@ -170,8 +371,15 @@ class TongDaXinDataProvider:
         # 首先检查缓存
         if stock_code in _stock_name_cache:
             return _stock_name_cache[stock_code]
-        
-        # 优先从MongoDB获取
+
+        # 证券主数据（每日快照，内存查找）
+        from .security_master import CHINA_A, lookup_security
+        record = lookup_security(stock_code, CHINA_A)
+        if record is not None:
+            _stock_name_cache[stock_code] = record.name
+            return record.name
+
+        # 其次从MongoDB获取
         mongodb_name = _get_stock_name_from_mongodb(stock_code)
         if mongodb_name:
             _stock_name_cache[stock_code] = mongodb_name
@@ -195,15 +403,16 @@ class TongDaXinDataProvider:
             market = self._get_market_code(stock_code)
             if market == 0:  # 深圳市场
                 try:
-                    for start_pos in range(0, 2000, 1000):  # 分批获取
-                        stock_list = self.api.get_security_list(market, start_pos)
-                        if stock_list:
-                            for stock_info in stock_list:
-                                if stock_info.get('code') == stock_code:
-                                    stock_name = stock_info.get('name', '').strip()
-                                    if stock_name:
-                                        _stock_name_cache[stock_code] = stock_name
-                                        return stock_name
+                    with self.pool.connection() as api:
+                        for start_pos in range(0, 2000, 1000):  # 分批获取
+                            stock_list = api.get_security_list(market, start_pos)
+                            if stock_list:
+                                for stock_info in stock_list:
+                                    if stock_info.get('code') == stock_code:
+                                        stock_name = stock_info.get('name', '').strip()
+                                        if stock_name:
+                                            _stock_name_cache[stock_code] = stock_name
+                                            return stock_name
                 except Exception as e:
                     logger.error(f"⚠️ 获取深圳股票列表失败: {e}")
             
@@ -226,47 +435,58 @@ class TongDaXinDataProvider:
         Returns:
             Dict: 实时数据
         """
+        return self.get_real_time_quotes([stock_code]).get(stock_code, {})
+
+    def get_real_time_quotes(self, stock_codes: List[str]) -> Dict[str, Dict]:
+        """
+        批量获取多只股票的实时数据（合并为尽量少的 get_security_quotes 请求）
+        Args:
+            stock_codes: 股票代码列表
+        Returns:
+            Dict[str, Dict]: 股票代码 -> 实时数据
+        """
         if not self.connected:
             if not self.connect():
                 return {}
-        
-        try:
-            market = self._get_market_code(stock_code)
-            
-            # 获取实时数据
-            data = self.api.get_security_quotes([(market, stock_code)])
 
-            if not data:
-                return {}
-
-            quote = data[0]
-            
-            # 安全获取字段，避免KeyError
-            def safe_get(key, default=0):
-                return quote.get(key, default)
-
-            return {
-                'code': stock_code,
-                'name': self._get_stock_name(stock_code),  # 使用独立的股票名称获取方法
-                'price': safe_get('price'),
-                'last_close': safe_get('last_close'),
-                'open': safe_get('open'),
-                'high': safe_get('high'),
-                'low': safe_get('low'),
-                'volume': safe_get('vol'),
-                'amount': safe_get('amount'),
-                'change': safe_get('price') - safe_get('last_close'),
-                'change_percent': ((safe_get('price') - safe_get('last_close')) / safe_get('last_close') * 100) if safe_get('last_close') > 0 else 0,
-                'bid_prices': [safe_get(f'bid{i}') for i in range(1, 6)],
-                'bid_volumes': [safe_get(f'bid_vol{i}') for i in range(1, 6)],
-                'ask_prices': [safe_get(f'ask{i}') for i in range(1, 6)],
-                'ask_volumes': [safe_get(f'ask_vol{i}') for i in range(1, 6)],
-                'update_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
-            
+        codes = list(dict.fromkeys(stock_codes))
+        try:
+            quotes = self.pool.get_security_quotes([(self._get_market_code(code), code) for code in codes])
         except Exception as e:
             logger.error(f"获取实时数据失败: {e}")
             return {}
+
+        results = {}
+        for i, quote in enumerate(quotes):
+            code = quote.get('code') or (codes[i] if i < len(codes) else None)
+            if code in codes:
+                results[code] = self._format_quote(code, quote)
+        return results
+
+    def _format_quote(self, stock_code: str, quote: Dict) -> Dict:
+        """把通达信行情转换为统一的实时数据格式"""
+        # 安全获取字段，避免KeyError
+        def safe_get(key, default=0):
+            return quote.get(key, default)
+
+        return {
+            'code': stock_code,
+            'name': self._get_stock_name(stock_code),  # 使用独立的股票名称获取方法
+            'price': safe_get('price'),
+            'last_close': safe_get('last_close'),
+            'open': safe_get('open'),
+            'high': safe_get('high'),
+            'low': safe_get('low'),
+            'volume': safe_get('vol'),
+            'amount': safe_get('amount'),
+            'change': safe_get('price') - safe_get('last_close'),
+            'change_percent': ((safe_get('price') - safe_get('last_close')) / safe_get('last_close') * 100) if safe_get('last_close') > 0 else 0,
+            'bid_prices': [safe_get(f'bid{i}') for i in range(1, 6)],
+            'bid_volumes': [safe_get(f'bid_vol{i}') for i in range(1, 6)],
+            'ask_prices': [safe_get(f'ask{i}') for i in range(1, 6)],
+            'ask_volumes': [safe_get(f'ask_vol{i}') for i in range(1, 6)],
+            'update_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
     
     def get_stock_history_data(self, stock_code: str, start_date: str, end_date: str, period: str = 'D') -> pd.DataFrame:
         """
@@ -305,7 +525,8 @@ class TongDaXinDataProvider:
             category_map = {'D': 9, 'W': 5, 'M': 6}
             category = category_map.get(period, 9)
             
-            data = self.api.get_security_bars(category, market, stock_code, 0, count)
+            with self.pool.connection() as api:
+                data = api.get_security_bars(category, market, stock_code, 0, count)
             
             if not data:
                 return pd.DataFrame()
@@ -431,18 +652,19 @@ class TongDaXinDataProvider:
             
             results = []
             
-            # 按关键词搜索
-            for name, code in stock_mapping.items():
-                if keyword.lower() in name.lower() or keyword in code:
-                    # 获取实时数据
-                    realtime_data = self.get_real_time_data(code)
-                    if realtime_data:
-                        results.append({
-                            'code': code,
-                            'name': name,
-                            'price': realtime_data.get('price', 0),
-                            'change_percent': realtime_data.get('change_percent', 0)
-                        })
+            # 按关键词搜索，匹配的股票一次性批量获取实时数据
+            matched = {name: code for name, code in stock_mapping.items()
+                       if keyword.lower() in name.lower() or keyword in code}
+            quotes = self.get_real_time_quotes(list(matched.values())) if matched else {}
+            for name, code in matched.items():
+                realtime_data = quotes.get(code)
+                if realtime_data:
+                    results.append({
+                        'code': code,
+                        'name': name,
+                        'price': realtime_data.get('price', 0),
+                        'change_percent': realtime_data.get('change_percent', 0)
+                    })
             
             return results
             
@@ -481,18 +703,17 @@ class TongDaXinDataProvider:
             }
             
             market_data = {}
-            
-            for name, (market, code) in indices.items():
+
+            # 所有指数合并为一次行情请求
+            quotes = self.pool.get_security_quotes([(int(market), code) for market, code in indices.values()])
+            for name, quote in zip(indices.keys(), quotes):
                 try:
-                    data = self.api.get_security_quotes([(int(market), code)])
-                    if data:
-                        quote = data[0]
-                        market_data[name] = {
-                            'price': quote['price'],
-                            'change': quote['price'] - quote['last_close'],
-                            'change_percent': ((quote['price'] - quote['last_close']) / quote['last_close'] * 100) if quote['last_close'] > 0 else 0,
-                            'volume': quote['vol']
-                        }
+                    market_data[name] = {
+                        'price': quote['price'],
+                        'change': quote['price'] - quote['last_close'],
+                        'change_percent': ((quote['price'] - quote['last_close']) / quote['last_close'] * 100) if quote['last_close'] > 0 else 0,
+                        'volume': quote['vol']
+                    }
                 except:
                     continue
             
@@ -510,46 +731,34 @@ _mongodb_client = None
 _mongodb_db = None
 
 def _get_mongodb_connection():
-    """获取MongoDB连接"""
+    """获取MongoDB连接（进程级共享客户端，不可用时按间隔惰性重连）"""
     global _mongodb_client, _mongodb_db
     
     if not MONGODB_AVAILABLE:
         return None, None
     
-    if _mongodb_client is None or _mongodb_db is None:
-        try:
-            # 从环境变量获取MongoDB配置
-            config = {
-                'host': os.getenv('MONGODB_HOST', 'localhost'),
-                'port': int(os.getenv('MONGODB_PORT', 27018)),
-                'username': os.getenv('MONGODB_USERNAME'),
-                'password': os.getenv('MONGODB_PASSWORD'),
-                'database': os.getenv('MONGODB_DATABASE', 'tradingagents'),
-                'auth_source': os.getenv('MONGODB_AUTH_SOURCE', 'admin')
-            }
-            
-            # 构建连接字符串
-            if config.get('username') and config.get('password'):
-                connection_string = f"mongodb://{config['username']}:{config['password']}@{config['host']}:{config['port']}/{config['auth_source']}"
-            else:
-                connection_string = f"mongodb://{config['host']}:{config['port']}/"
-            
-            # 创建客户端
-            _mongodb_client = MongoClient(
-                connection_string,
-                serverSelectionTimeoutMS=3000  # 3秒超时
-            )
-            
-            # 测试连接
-            _mongodb_client.admin.command('ping')
-            
-            # 选择数据库
-            _mongodb_db = _mongodb_client[config['database']]
-            
-        except Exception as e:
-            logger.error(f"⚠️ MongoDB连接失败: {e}")
-            _mongodb_client = None
-            _mongodb_db = None
+    from tradingagents.config.connection_registry import get_connection_registry
+
+    # 从环境变量获取MongoDB配置
+    config = {
+        'host': os.getenv('MONGODB_HOST', 'localhost'),
+        'port': int(os.getenv('MONGODB_PORT', 27018)),
+        'username': os.getenv('MONGODB_USERNAME'),
+        'password': os.getenv('MONGODB_PASSWORD'),
+        'database': os.getenv('MONGODB_DATABASE', 'tradingagents'),
+        'auth_source': os.getenv('MONGODB_AUTH_SOURCE', 'admin')
+    }
+    
+    _mongodb_client = get_connection_registry().get_mongodb(
+        host=config['host'],
+        port=config['port'],
+        username=config['username'],
+        password=config['password'],
+        auth_source=config['auth_source'],
+        timeout_ms=3000  # 3秒超时
+    )
+    # 选择数据库
+    _mongodb_db = _mongodb_client[config['database']] if _mongodb_client is not None else None
     
     return _mongodb_client, _mongodb_db
 
@@ -607,19 +816,12 @@ _common_stock_names = {
 }
 
 def get_tdx_provider() -> TongDaXinDataProvider:
-    """获取通达信数据提供器实例"""
+    """获取通达信数据提供器实例（失效连接由连接池自行替换，无需重建实例）"""
     global _tdx_provider
     if _tdx_provider is None:
         logger.debug(f"🔍 [DEBUG] 创建新的通达信数据提供器实例...")
         _tdx_provider = TongDaXinDataProvider()
         logger.debug(f"🔍 [DEBUG] 通达信数据提供器实例创建完成")
-    else:
-        logger.debug(f"🔍 [DEBUG] 使用现有的通达信数据提供器实例")
-        # 检查连接状态，如果连接断开则重新创建
-        if not _tdx_provider.is_connected():
-            logger.debug(f"🔍 [DEBUG] 检测到连接断开，重新创建通达信数据提供器...")
-            _tdx_provider = TongDaXinDataProvider()
-            logger.debug(f"🔍 [DEBUG] 通达信数据提供器重新创建完成")
     return _tdx_provider
 
 
@@ -683,21 +885,22 @@ def get_china_stock_data(stock_code: str, start_date: str, end_date: str) -> str
 
     try:
         provider = get_tdx_provider()
+        provider.connect()
 
-        # 获取历史数据
-        df = provider.get_stock_history_data(stock_code, start_date, end_date)
+        # 历史数据、实时行情和技术指标分别借用连接池中的连接并发获取
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            history_future = executor.submit(provider.get_stock_history_data, stock_code, start_date, end_date)
+            realtime_future = executor.submit(provider.get_real_time_data, stock_code)
+            indicators_future = executor.submit(provider.get_stock_technical_indicators, stock_code)
+            df = history_future.result()
+            realtime_data = realtime_future.result()
+            indicators = indicators_future.result()
 
         if df.empty:
             error_msg = f"❌ 未能获取股票 {stock_code} 的历史数据"
             print(error_msg)
             return error_msg
         
-        # 获取实时数据
-        realtime_data = provider.get_real_time_data(stock_code)
-
-        # 获取技术指标
-        indicators = provider.get_stock_technical_indicators(stock_code)
-        
         # 格式化输出
         result = f"""
 # {stock_code} 股票数据分析
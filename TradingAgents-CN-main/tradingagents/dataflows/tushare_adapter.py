@@ -69,7 +69,7 @@ class TushareDataAdapter:
             logger.error("❌ Tushare不可用")
     
     def get_stock_data(self, symbol: str, start_date: str = None, end_date: str = None, 
-                      data_type: str = "daily") -> pd.DataFrame:
+                      data_type: str = "daily", forward_adjust: bool = True) -> pd.DataFrame:
         """
         获取股票数据
         
@@ -78,13 +78,17 @@ class TushareDataAdapter:
             start_date: 开始日期
             end_date: 结束日期
             data_type: 数据类型 ("daily", "realtime")
+            forward_adjust: 日线是否前复权；为False时返回除权价格与涨跌幅，由调用方拼接后调用 forward_adjust()，
+                获取失败时返回None
             
         Returns:
             DataFrame: 股票数据
         """
+        # 请求除权数据（增量存储）时以None表示失败，空表表示区间内没有数据
+        failed = pd.DataFrame() if forward_adjust else None
         if not self.provider or not self.provider.connected:
             logger.error("❌ Tushare数据源不可用")
-            return pd.DataFrame()
+            return failed
 
         try:
             logger.debug(f"🔄 获取{symbol}数据 (类型: {data_type})...")
@@ -96,7 +100,7 @@ class TushareDataAdapter:
 
             if data_type == "daily":
                 logger.info(f"🔍 [股票代码追踪] 调用 _get_daily_data，传入参数: symbol='{symbol}'")
-                return self._get_daily_data(symbol, start_date, end_date)
+                return self._get_daily_data(symbol, start_date, end_date, forward_adjust)
             elif data_type == "realtime":
                 return self._get_realtime_data(symbol)
             else:
@@ -105,9 +109,10 @@ class TushareDataAdapter:
                 
         except Exception as e:
             logger.error(f"❌ 获取{symbol}数据失败: {e}")
-            return pd.DataFrame()
+            return failed
     
-    def _get_daily_data(self, symbol: str, start_date: str = None, end_date: str = None) -> pd.DataFrame:
+    def _get_daily_data(self, symbol: str, start_date: str = None, end_date: str = None,
+                        forward_adjust: bool = True) -> pd.DataFrame:
         """获取日线数据"""
 
         # 记录详细的调用信息
@@ -115,8 +120,8 @@ class TushareDataAdapter:
         logger.info(f"🔍 [TushareAdapter详细日志] 输入参数: symbol='{symbol}', start_date='{start_date}', end_date='{end_date}'")
         logger.info(f"🔍 [TushareAdapter详细日志] 缓存启用状态: {self.enable_cache}")
 
-        # 1. 尝试从缓存获取
-        if self.enable_cache:
+        # 1. 尝试从缓存获取（缓存中是前复权数据，请求除权数据时跳过）
+        if self.enable_cache and forward_adjust:
             try:
                 logger.info(f"🔍 [TushareAdapter详细日志] 开始查找缓存数据...")
                 cache_key = self.cache_manager.find_cached_stock_data(
@@ -158,7 +163,7 @@ class TushareDataAdapter:
 
         import time
         provider_start_time = time.time()
-        data = self.provider.get_stock_daily(symbol, start_date, end_date)
+        data = self.provider.get_stock_daily(symbol, start_date, end_date, forward_adjust=forward_adjust)
         provider_duration = time.time() - provider_start_time
 
         logger.info(f"🔍 [TushareAdapter详细日志] Provider调用完成，耗时: {provider_duration:.3f}秒")
@@ -181,6 +186,9 @@ class TushareDataAdapter:
             standardized_data = self._standardize_data(data)
             logger.info(f"🔍 [TushareAdapter详细日志] 数据标准化完成")
             return standardized_data
+        elif data is None and not forward_adjust:
+            logger.warning(f"⚠️ Tushare获取{symbol}数据失败")
+            return None
         else:
             logger.warning(f"⚠️ Tushare返回空数据")
             logger.warning(f"⚠️ [TushareAdapter详细日志] 空数据详情: data={data}, type={type(data)}")
@@ -188,6 +196,12 @@ class TushareDataAdapter:
                 logger.warning(f"⚠️ [TushareAdapter详细日志] DataFrame为空: {data.empty}")
             return pd.DataFrame()
     
+    def forward_adjust(self, data: pd.DataFrame) -> pd.DataFrame:
+        """对标准化后的除权日线数据计算前复权价格（以区间最后一天的收盘价为基准）"""
+        if self.provider is None or data is None or data.empty:
+            return data
+        return self.provider._calculate_forward_adjusted_prices(data, date_column='date', pct_column='pct_change')
+
     def _get_realtime_data(self, symbol: str) -> pd.DataFrame:
         """获取实时数据（使用最新日线数据）"""
         
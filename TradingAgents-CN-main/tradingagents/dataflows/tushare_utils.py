@@ -7,13 +7,16 @@ Tushare数据源工具类
 import os
 import pandas as pd
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple, Union
 import warnings
 import time
 
+from .data_context import context_cached
+
 # 导入日志模块
-from tradingagents.utils.logging_manager import get_logger
+from tradingagents.utils.logging_manager import get_logger, lazy
 logger = get_logger('agents')
 warnings.filterwarnings('ignore')
 
@@ -151,7 +154,8 @@ class TushareProvider:
             logger.error(f"❌ 获取股票列表失败: {e}")
             return pd.DataFrame()
     
-    def get_stock_daily(self, symbol: str, start_date: str = None, end_date: str = None) -> pd.DataFrame:
+    def get_stock_daily(self, symbol: str, start_date: str = None, end_date: str = None,
+                        forward_adjust: bool = True) -> pd.DataFrame:
         """
         获取股票日线数据
         
@@ -159,25 +163,25 @@ class TushareProvider:
             symbol: 股票代码（如：000001.SZ）
             start_date: 开始日期（YYYYMMDD）
             end_date: 结束日期（YYYYMMDD）
+            forward_adjust: 是否计算前复权价格；为False时返回除权价格与pct_chg，不写入缓存
+                （供增量存储拼接多段数据后统一复权），获取失败时返回None以区别于没有数据的空表
             
         Returns:
             DataFrame: 日线数据
         """
-        # 记录详细的调用信息
-        logger.info(f"🔍 [Tushare详细日志] get_stock_daily 开始执行")
-        logger.info(f"🔍 [Tushare详细日志] 输入参数: symbol='{symbol}', start_date='{start_date}', end_date='{end_date}'")
-        logger.info(f"🔍 [Tushare详细日志] 连接状态: {self.connected}")
-        logger.info(f"🔍 [Tushare详细日志] API对象: {type(self.api).__name__ if self.api else 'None'}")
+        # 记录详细的调用信息（DEBUG级别，昂贵字段延迟计算）
+        logger.debug("🔍 [Tushare详细日志] get_stock_daily 开始执行: symbol='%s', start_date='%s', end_date='%s', 连接状态: %s, API对象: %s",
+                     symbol, start_date, end_date, self.connected,
+                     lazy(lambda: type(self.api).__name__ if self.api else 'None'))
 
         if not self.connected:
             logger.error(f"❌ [Tushare详细日志] Tushare未连接，无法获取数据")
-            return pd.DataFrame()
+            return pd.DataFrame() if forward_adjust else None
 
         try:
             # 标准化股票代码
-            logger.info(f"🔍 [股票代码追踪] get_stock_daily 调用 _normalize_symbol，传入参数: '{symbol}'")
             ts_code = self._normalize_symbol(symbol)
-            logger.info(f"🔍 [股票代码追踪] _normalize_symbol 返回结果: '{ts_code}'")
+            logger.debug("🔍 [股票代码追踪] _normalize_symbol: '%s' -> '%s'", symbol, ts_code)
 
             # 设置默认日期
             original_start = start_date
@@ -185,24 +189,20 @@ class TushareProvider:
 
             if end_date is None:
                 end_date = datetime.now().strftime('%Y%m%d')
-                logger.info(f"🔍 [Tushare详细日志] 结束日期为空，设置为当前日期: {end_date}")
             else:
                 end_date = end_date.replace('-', '')
-                logger.info(f"🔍 [Tushare详细日志] 结束日期转换: '{original_end}' -> '{end_date}'")
 
             if start_date is None:
                 start_date = (datetime.now() - timedelta(days=365)).strftime('%Y%m%d')
-                logger.info(f"🔍 [Tushare详细日志] 开始日期为空，设置为一年前: {start_date}")
             else:
                 start_date = start_date.replace('-', '')
-                logger.info(f"🔍 [Tushare详细日志] 开始日期转换: '{original_start}' -> '{start_date}'")
+            logger.debug("🔍 [Tushare详细日志] 日期转换: '%s' -> '%s', '%s' -> '%s'",
+                         original_start, start_date, original_end, end_date)
 
-            logger.info(f"🔄 从Tushare获取{ts_code}数据 ({start_date} 到 {end_date})...")
-            logger.info(f"🔍 [股票代码追踪] 调用 Tushare API daily，传入参数: ts_code='{ts_code}', start_date='{start_date}', end_date='{end_date}'")
+            logger.info("🔄 从Tushare获取%s数据 (%s 到 %s)...", ts_code, start_date, end_date)
 
             # 记录API调用前的状态
             api_start_time = time.time()
-            logger.info(f"🔍 [Tushare详细日志] API调用开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
 
             # 获取日线数据
             try:
@@ -212,81 +212,66 @@ class TushareProvider:
                     end_date=end_date
                 )
                 api_duration = time.time() - api_start_time
-                logger.info(f"🔍 [Tushare详细日志] API调用完成，耗时: {api_duration:.3f}秒")
+                logger.debug("🔍 [Tushare详细日志] API调用完成，耗时: %.3f秒", api_duration)
 
             except Exception as api_error:
                 api_duration = time.time() - api_start_time
-                logger.error(f"❌ [Tushare详细日志] API调用异常，耗时: {api_duration:.3f}秒")
-                logger.error(f"❌ [Tushare详细日志] API异常类型: {type(api_error).__name__}")
-                logger.error(f"❌ [Tushare详细日志] API异常信息: {str(api_error)}")
+                logger.error(f"❌ [Tushare详细日志] API调用异常，耗时: {api_duration:.3f}秒, "
+                             f"类型: {type(api_error).__name__}, 信息: {api_error}")
                 raise api_error
 
-            # 详细记录返回数据的信息
-            logger.info(f"🔍 [股票代码追踪] Tushare API daily 返回数据形状: {data.shape if data is not None and hasattr(data, 'shape') else 'None'}")
-            logger.info(f"🔍 [Tushare详细日志] 返回数据类型: {type(data)}")
-
-            if data is not None:
-                logger.info(f"🔍 [Tushare详细日志] 数据是否为空: {data.empty}")
-                if not data.empty:
-                    logger.info(f"🔍 [Tushare详细日志] 数据列名: {list(data.columns)}")
-                    logger.info(f"🔍 [Tushare详细日志] 数据索引类型: {type(data.index)}")
-                    if 'ts_code' in data.columns:
-                        unique_codes = data['ts_code'].unique()
-                        logger.info(f"🔍 [股票代码追踪] 返回数据中的ts_code: {unique_codes}")
-                    if 'trade_date' in data.columns:
-                        date_range = f"{data['trade_date'].min()} 到 {data['trade_date'].max()}"
-                        logger.info(f"🔍 [Tushare详细日志] 数据日期范围: {date_range}")
-                else:
-                    logger.warning(f"⚠️ [Tushare详细日志] 返回的DataFrame为空")
+            # 详细记录返回数据的信息（只在DEBUG启用时计算）
+            if data is not None and not data.empty:
+                logger.debug("🔍 [股票代码追踪] Tushare API daily 返回数据形状: %s, 列名: %s, ts_code: %s, 日期范围: %s",
+                             data.shape, lazy(lambda: list(data.columns)),
+                             lazy(lambda: data['ts_code'].unique() if 'ts_code' in data.columns else None),
+                             lazy(lambda: f"{data['trade_date'].min()} 到 {data['trade_date'].max()}"
+                                  if 'trade_date' in data.columns else None))
+            elif data is not None:
+                logger.warning(f"⚠️ [Tushare详细日志] 返回的DataFrame为空")
             else:
                 logger.warning(f"⚠️ [Tushare详细日志] 返回数据为None")
 
             if data is not None and not data.empty:
                 # 数据预处理
-                logger.info(f"🔍 [Tushare详细日志] 开始数据预处理...")
                 data = data.sort_values('trade_date')
                 data['trade_date'] = pd.to_datetime(data['trade_date'])
 
+                if not forward_adjust:
+                    logger.info("✅ 获取%s数据成功（除权价格）: %d条", ts_code, len(data))
+                    return data
+
                 # 计算前复权价格（基于pct_chg重新计算连续价格）
-                logger.info(f"🔍 [Tushare详细日志] 开始计算前复权价格...")
                 data = self._calculate_forward_adjusted_prices(data)
-                logger.info(f"🔍 [Tushare详细日志] 前复权价格计算完成")
+                logger.debug("🔍 [Tushare详细日志] 数据预处理完成（含前复权价格）")
 
-                logger.info(f"🔍 [Tushare详细日志] 数据预处理完成")
-
-                logger.info(f"✅ 获取{ts_code}数据成功: {len(data)}条")
+                logger.info("✅ 获取%s数据成功: %d条", ts_code, len(data))
 
                 # 缓存数据
                 if self.enable_cache and self.cache_manager:
                     try:
-                        logger.info(f"🔍 [Tushare详细日志] 开始缓存数据...")
                         cache_key = self.cache_manager.save_stock_data(
                             symbol=symbol,
                             data=data,
                             data_source="tushare"
                         )
-                        logger.info(f"💾 A股历史数据已缓存: {symbol} (tushare) -> {cache_key}")
-                        logger.info(f"🔍 [Tushare详细日志] 数据缓存完成")
+                        logger.info("💾 A股历史数据已缓存: %s (tushare) -> %s", symbol, cache_key)
                     except Exception as cache_error:
                         logger.error(f"⚠️ 缓存保存失败: {cache_error}")
                         logger.error(f"⚠️ [Tushare详细日志] 缓存异常类型: {type(cache_error).__name__}")
 
-                logger.info(f"🔍 [Tushare详细日志] get_stock_daily 执行成功，返回数据")
                 return data
             else:
                 logger.warning(f"⚠️ Tushare返回空数据: {ts_code}")
-                logger.warning(f"⚠️ [Tushare详细日志] 空数据详情: data={data}, empty={data.empty if data is not None else 'N/A'}")
                 return pd.DataFrame()
 
         except Exception as e:
             logger.error(f"❌ 获取{symbol}数据失败: {e}")
-            logger.error(f"❌ [Tushare详细日志] 异常类型: {type(e).__name__}")
-            logger.error(f"❌ [Tushare详细日志] 异常信息: {str(e)}")
-            import traceback
-            logger.error(f"❌ [Tushare详细日志] 异常堆栈: {traceback.format_exc()}")
-            return pd.DataFrame()
+            logger.error(f"❌ [Tushare详细日志] 异常类型: {type(e).__name__}", exc_info=True)
+            return pd.DataFrame() if forward_adjust else None
 
-    def _calculate_forward_adjusted_prices(self, data: pd.DataFrame) -> pd.DataFrame:
+    def _calculate_forward_adjusted_prices(self, data: pd.DataFrame, date_column: str = 'trade_date',
+                                           pct_column: str = 'pct_chg') -> pd.DataFrame:
         """
         基于pct_chg计算前复权价格
 
@@ -295,11 +280,13 @@ class TushareProvider:
 
         Args:
             data: 包含除权价格和pct_chg的DataFrame
+            date_column: 日期列名（标准化后的数据为 date）
+            pct_column: 涨跌幅列名（标准化后的数据为 pct_change）
 
         Returns:
             DataFrame: 包含前复权价格的数据
         """
-        if data.empty or 'pct_chg' not in data.columns:
+        if data.empty or pct_column not in data.columns:
             logger.warning("⚠️ 数据为空或缺少pct_chg列，无法计算前复权价格")
             return data
 
@@ -308,7 +295,7 @@ class TushareProvider:
             adjusted_data = data.copy()
 
             # 确保数据按日期排序
-            adjusted_data = adjusted_data.sort_values('trade_date').reset_index(drop=True)
+            adjusted_data = adjusted_data.sort_values(date_column).reset_index(drop=True)
 
             # 保存原始价格列（用于对比）
             adjusted_data['close_raw'] = adjusted_data['close'].copy()
@@ -325,7 +312,7 @@ class TushareProvider:
 
             # 从倒数第二天开始向前计算
             for i in range(len(adjusted_data) - 2, -1, -1):
-                pct_change = float(adjusted_data.iloc[i + 1]['pct_chg']) / 100.0  # 转换为小数
+                pct_change = float(adjusted_data.iloc[i + 1][pct_column]) / 100.0  # 转换为小数
 
                 # 前一天的前复权收盘价 = 今天的前复权收盘价 / (1 + 今天的涨跌幅)
                 prev_close = adjusted_closes[0] / (1 + pct_change)
@@ -358,6 +345,7 @@ class TushareProvider:
             logger.error(f"❌ 返回原始数据")
             return data
     
+    @context_cached("tushare_stock_info")
     def get_stock_info(self, symbol: str) -> Dict:
         """
         获取股票基本信息
@@ -406,6 +394,7 @@ class TushareProvider:
             logger.error(f"❌ 获取{symbol}股票信息失败: {e}")
             return {'symbol': symbol, 'name': f'股票{symbol}', 'source': 'unknown'}
     
+    @context_cached("tushare_financial_data")
     def get_financial_data(self, symbol: str, period: str = "20231231") -> Dict:
         """
         获取财务数据
@@ -419,53 +408,55 @@ class TushareProvider:
         """
         if not self.connected:
             return {}
-        
+
+        from .financial_statement_cache import get_financial_statement_cache, is_financial_cache_enabled
+
+        # 指定报告期的报表披露后不再变化，按 (代码, 报告期) 缓存
+        cache_key = f"{symbol}_{period}"
+        cache = get_financial_statement_cache() if is_financial_cache_enabled() else None
+        if cache is not None:
+            cached = cache.get_statements('tushare', cache_key)
+            if cached is not None:
+                logger.info(f"⚡ 使用缓存的{symbol}财务数据 (报告期: {period})")
+                return cached
+
         try:
             ts_code = self._normalize_symbol(symbol)
-            
-            financials = {}
-            
-            # 获取资产负债表
-            try:
-                balance_sheet = self.api.balancesheet(
-                    ts_code=ts_code,
-                    period=period,
-                    fields='ts_code,ann_date,f_ann_date,end_date,report_type,comp_type,total_assets,total_liab,total_hldr_eqy_exc_min_int'
-                )
-                financials['balance_sheet'] = balance_sheet.to_dict('records') if balance_sheet is not None and not balance_sheet.empty else []
-            except Exception as e:
-                logger.error(f"⚠️ 获取资产负债表失败: {e}")
-                financials['balance_sheet'] = []
-            
-            # 获取利润表
-            try:
-                income_statement = self.api.income(
-                    ts_code=ts_code,
-                    period=period,
-                    fields='ts_code,ann_date,f_ann_date,end_date,report_type,comp_type,total_revenue,total_cogs,operate_profit,total_profit,n_income'
-                )
-                financials['income_statement'] = income_statement.to_dict('records') if income_statement is not None and not income_statement.empty else []
-            except Exception as e:
-                logger.error(f"⚠️ 获取利润表失败: {e}")
-                financials['income_statement'] = []
-            
-            # 获取现金流量表
-            try:
-                cash_flow = self.api.cashflow(
-                    ts_code=ts_code,
-                    period=period,
-                    fields='ts_code,ann_date,f_ann_date,end_date,report_type,comp_type,net_profit,finan_exp,c_fr_sale_sg,c_paid_goods_s'
-                )
-                financials['cash_flow'] = cash_flow.to_dict('records') if cash_flow is not None and not cash_flow.empty else []
-            except Exception as e:
-                logger.error(f"⚠️ 获取现金流量表失败: {e}")
-                financials['cash_flow'] = []
-            
+
+            # 三张报表互不依赖，并发获取
+            statements = [
+                ('balance_sheet', '资产负债表', self.api.balancesheet,
+                 'ts_code,ann_date,f_ann_date,end_date,report_type,comp_type,total_assets,total_liab,total_hldr_eqy_exc_min_int'),
+                ('income_statement', '利润表', self.api.income,
+                 'ts_code,ann_date,f_ann_date,end_date,report_type,comp_type,total_revenue,total_cogs,operate_profit,total_profit,n_income'),
+                ('cash_flow', '现金流量表', self.api.cashflow,
+                 'ts_code,ann_date,f_ann_date,end_date,report_type,comp_type,net_profit,finan_exp,c_fr_sale_sg,c_paid_goods_s'),
+            ]
+            with ThreadPoolExecutor(max_workers=len(statements)) as executor:
+                futures = [
+                    (key, executor.submit(self._fetch_statement_records, ts_code, period, label, func, fields))
+                    for key, label, func, fields in statements
+                ]
+                financials = {key: future.result() for key, future in futures}
+
+            # 三张报表均已披露时才缓存，未披露的报告期下次重新查询
+            if cache is not None and all(financials.values()):
+                cache.put_statements('tushare', cache_key, financials, pinned=True)
+
             return financials
             
         except Exception as e:
             logger.error(f"❌ 获取{symbol}财务数据失败: {e}")
             return {}
+
+    def _fetch_statement_records(self, ts_code: str, period: str, label: str, func, fields: str) -> List[Dict]:
+        """获取单张财务报表并转换为记录列表，失败时返回空列表"""
+        try:
+            statement = func(ts_code=ts_code, period=period, fields=fields)
+            return statement.to_dict('records') if statement is not None and not statement.empty else []
+        except Exception as e:
+            logger.error(f"⚠️ 获取{label}失败: {e}")
+            return []
     
     def _normalize_symbol(self, symbol: str) -> str:
         """
@@ -18,8 +18,22 @@ DEFAULT_CONFIG = {
     "max_debate_rounds": 1,
     "max_risk_discuss_rounds": 1,
     "max_recur_limit": 150,
+    # 分析师并行执行（各分析师使用独立消息通道，汇合后进入研究员辩论）
+    "parallel_analysts": False,
+    # 批量分析（propagate_many）默认并发数
+    "max_batch_concurrency": 4,
+    # 各LLM提供商请求预算（次/秒），如 {"dashscope": 5}；未配置的提供商不限流
+    "llm_rate_limits": {},
+    # 记忆embedding磁盘缓存目录（None 表示只使用进程内LRU缓存）
+    "embedding_cache_dir": os.getenv("EMBEDDING_CACHE_DIR"),
+    # 记忆后端：numpy（持久化向量文件）或 chromadb（进程内，重启后丢失）
+    "memory_backend": os.getenv("MEMORY_BACKEND", "numpy"),
+    # 持久化记忆目录（None 表示 data_cache_dir/memory）
+    "memory_dir": os.getenv("MEMORY_DIR"),
     # Tool settings
     "online_tools": True,
+    # 图启动时在后台预取各分析师必然调用的统一数据（行情、基本面、新闻、情绪）
+    "data_prefetch": True,
     
     # Cleanup settings
     "cleanup_expired_days": 7,  # 保留最近7天的数据
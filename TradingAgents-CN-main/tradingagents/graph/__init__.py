@@ -1,6 +1,7 @@
 # TradingAgents/graph/__init__.py
 
 from .trading_graph import TradingAgentsGraph
+from .graph_pool import GraphPool, get_graph_pool, get_trading_graph
 from .conditional_logic import ConditionalLogic
 from .setup import GraphSetup
 from .propagation import Propagator
@@ -13,6 +14,9 @@ logger = get_logger("default")
 
 __all__ = [
     "TradingAgentsGraph",
+    "GraphPool",
+    "get_graph_pool",
+    "get_trading_graph",
     "ConditionalLogic",
     "GraphSetup",
     "Propagator",
@@ -67,6 +67,29 @@ class ConditionalLogic:
             return "tools_fundamentals"
         return "Msg Clear Fundamentals"
 
+    def create_channel_router(self, analyst_type: str):
+        """为并行分析师模式创建基于独立消息通道的路由函数"""
+        node_name = f"{analyst_type.capitalize()} Analyst"
+        messages_key = f"{analyst_type}_messages"
+        tools_node = f"tools_{analyst_type}"
+        clear_node = f"Msg Clear {analyst_type.capitalize()}"
+
+        def should_continue_channel(state: AgentState):
+            # 断点续传：分析师节点已完成则直接跳过工具调用
+            if node_name in state.get("completed_nodes", []):
+                return clear_node
+            messages = state.get(messages_key) or []
+            if not messages:
+                return clear_node
+            last_message = messages[-1]
+
+            # 只有AIMessage才有tool_calls属性
+            if hasattr(last_message, 'tool_calls') and last_message.tool_calls:
+                return tools_node
+            return clear_node
+
+        return should_continue_channel
+
     def should_continue_debate(self, state: AgentState) -> str:
         """Determine if debate should continue."""
 
@@ -0,0 +1,138 @@
+# TradingAgents/graph/graph_pool.py
+
+"""
+已编译交易图的复用池
+按 (LLM提供商, 模型, 分析师, 辩论轮数, 记忆开关, 其余配置) 缓存 TradingAgentsGraph，
+重复分析时直接复用已创建的LLM客户端、Toolkit、记忆集合和编译好的 StateGraph。
+每次分析的状态由 propagate 按股票隔离保存，同一个图实例可以被并发分析共享。
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from tradingagents.default_config import DEFAULT_CONFIG
+from tradingagents.dataflows.interface import set_config
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+from .trading_graph import TradingAgentsGraph, llm_credentials_digest
+
+DEFAULT_ANALYSTS = ["market", "social", "news", "fundamentals"]
+
+# 显式列出的键之外，其余配置只参与指纹计算
+_KEY_FIELDS = (
+    "llm_provider", "deep_think_llm", "quick_think_llm", "backend_url",
+    "max_debate_rounds", "max_risk_discuss_rounds", "memory_enabled",
+)
+
+
+def graph_pool_key(selected_analysts: List[str], config: Dict[str, Any], debug: bool = False) -> Tuple:
+    """计算图实例的复用键"""
+    rest = {k: v for k, v in config.items() if k not in _KEY_FIELDS}
+    fingerprint = hashlib.sha1(
+        json.dumps(rest, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()[:12]
+    return (
+        str(config.get("llm_provider", "")).lower(),
+        config.get("deep_think_llm"),
+        config.get("quick_think_llm"),
+        config.get("backend_url"),
+        tuple(selected_analysts),
+        config.get("max_debate_rounds"),
+        config.get("max_risk_discuss_rounds"),
+        bool(config.get("memory_enabled", True)),
+        bool(debug),
+        fingerprint,
+        llm_credentials_digest(config),
+    )
+
+
+class GraphPool:
+    """按配置复用 TradingAgentsGraph 的LRU池"""
+
+    def __init__(self, max_size: int = None):
+        """
+        Args:
+            max_size: 最多保留的图实例数，默认读取 GRAPH_POOL_SIZE 环境变量（默认4）
+        """
+        self.max_size = max_size or int(os.getenv("GRAPH_POOL_SIZE", "4"))
+        self._graphs: "OrderedDict[Tuple, TradingAgentsGraph]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 同一个键只创建一次，创建过程不阻塞其他键
+        self._key_locks: Dict[Tuple, threading.Lock] = {}
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, selected_analysts: Optional[List[str]] = None, config: Optional[Dict[str, Any]] = None,
+            debug: bool = False) -> TradingAgentsGraph:
+        """获取与配置对应的图实例，不存在时创建"""
+        selected_analysts = list(selected_analysts or DEFAULT_ANALYSTS)
+        config = config or DEFAULT_CONFIG
+        key = graph_pool_key(selected_analysts, config, debug)
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                graph = self._graphs.get(key)
+                if graph is not None:
+                    self._graphs.move_to_end(key)
+                    self.stats["hits"] += 1
+
+            if graph is None:
+                logger.info(f"🔧 [图复用池] 创建新的分析图: {key[0]} {key[1]}/{key[2]}，分析师: {list(key[4])}")
+                graph = TradingAgentsGraph(selected_analysts, debug=debug, config=dict(config))
+                with self._lock:
+                    self.stats["misses"] += 1
+                    self._graphs[key] = graph
+                    while len(self._graphs) > self.max_size:
+                        evicted_key, _ = self._graphs.popitem(last=False)
+                        self._key_locks.pop(evicted_key, None)
+                        self.stats["evictions"] += 1
+                        logger.debug(f"🔍 [图复用池] 淘汰分析图: {evicted_key[:5]}")
+            else:
+                logger.info(f"⚡ [图复用池] 复用已编译的分析图: {key[0]} {key[1]}/{key[2]}")
+                # 数据接口使用进程级配置，切换到该图的配置
+                set_config(graph.config)
+
+        return graph
+
+    def clear(self):
+        with self._lock:
+            self._graphs.clear()
+            self._key_locks.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._graphs)
+
+
+_graph_pool: Optional[GraphPool] = None
+_graph_pool_lock = threading.Lock()
+
+
+def get_graph_pool() -> GraphPool:
+    """获取全局图复用池"""
+    global _graph_pool
+    with _graph_pool_lock:
+        if _graph_pool is None:
+            _graph_pool = GraphPool()
+        return _graph_pool
+
+
+def is_graph_pool_enabled() -> bool:
+    return os.getenv("ENABLE_GRAPH_POOL", "true").lower() == "true"
+
+
+def get_trading_graph(selected_analysts: Optional[List[str]] = None, config: Optional[Dict[str, Any]] = None,
+                      debug: bool = False) -> TradingAgentsGraph:
+    """获取可直接 propagate 的交易图：启用复用池时返回共享实例，否则新建"""
+    if not is_graph_pool_enabled():
+        return TradingAgentsGraph(list(selected_analysts or DEFAULT_ANALYSTS), debug=debug, config=config)
+    return get_graph_pool().get(selected_analysts, config, debug)
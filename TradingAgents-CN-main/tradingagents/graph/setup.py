@@ -6,7 +6,7 @@ from langgraph.graph import END, StateGraph, START
 from langgraph.prebuilt import ToolNode
 
 from tradingagents.agents import *
-from tradingagents.agents.utils.agent_states import AgentState
+from tradingagents.agents.utils.agent_states import AgentState, merge_completed_nodes
 from tradingagents.agents.utils.agent_utils import Toolkit
 from tradingagents.utils.checkpoints import save_checkpoint, mark_node_completed
 
@@ -17,40 +17,74 @@ from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
 
 
+def _has_pending_tool_calls(result: Dict[str, Any]) -> bool:
+    """判断节点输出的最后一条消息是否仍在等待工具调用"""
+    for key, value in result.items():
+        if key.endswith("messages") and isinstance(value, list) and value:
+            if getattr(value[-1], "tool_calls", None):
+                return True
+    return False
+
+
 def node_with_checkpoint(node_name: str, node_func: Callable):
     """包装节点函数以支持断点续传功能"""
     def wrapped_node(state: AgentState):
         # 检查节点是否已完成
-        completed_nodes = state.get("completed_nodes", {})
+        completed_nodes = state.get("completed_nodes", [])
         if node_name in completed_nodes:
             logger.info(f"⏭️ 跳过已完成的节点: {node_name}")
-            return state
+            # 只返回空更新，避免并行分支重复写入同一状态键
+            return {}
         
         try:
             # 执行原始节点函数
             result = node_func(state)
             
-            # 标记节点为已完成
-            if isinstance(result, dict):
-                result = mark_node_completed(result, node_name)
-            else:
-                result = mark_node_completed(state, node_name)
+            # 标记节点为已完成（仍在等待工具调用的分析师节点不算完成）
+            if not isinstance(result, dict):
+                result = {}
+            if not _has_pending_tool_calls(result):
+                mark_node_completed(result, node_name)
             
-            # 保存断点
-            save_checkpoint(result)
+            # 保存断点（只追加本节点改变的状态键，消息列表不写入断点）
+            delta = {k: v for k, v in result.items() if not k.endswith("messages")}
+            delta["completed_nodes"] = merge_completed_nodes(
+                completed_nodes, result.get("completed_nodes")
+            )
+            save_checkpoint(delta, state["company_of_interest"], state["trade_date"])
             logger.info(f"✅ 节点完成并保存断点: {node_name}")
             
             return result
             
         except Exception as e:
+            # 已完成节点的进度在各自完成时已保存，这里不再写入（执行前的状态会带着空报告）
             logger.error(f"❌ 节点执行失败: {node_name}, 错误: {e}")
-            # 保存当前状态作为断点
-            save_checkpoint(state)
             raise
     
     return wrapped_node
 
 
+def node_with_message_channel(analyst_type: str, node_func: Callable):
+    """包装分析师节点，使其读写独立的消息通道（并行分析师模式）
+
+    分析师看到的消息为共享的初始消息加上自己通道中的消息，
+    节点输出的 messages 被重定向到 ``{analyst_type}_messages``，
+    这样并行执行的分析师之间不会互相干扰。
+    """
+    messages_key = f"{analyst_type}_messages"
+
+    def wrapped_node(state: AgentState):
+        view = dict(state)
+        view["messages"] = list(state.get("messages") or []) + list(state.get(messages_key) or [])
+        result = node_func(view)
+        if isinstance(result, dict) and "messages" in result:
+            result = dict(result)
+            result[messages_key] = result.pop("messages")
+        return result
+
+    return wrapped_node
+
+
 class GraphSetup:
     """Handles the setup and configuration of the agent graph."""
 
@@ -84,7 +118,8 @@ class GraphSetup:
         self.react_llm = react_llm
 
     def setup_graph(
-        self, selected_analysts=["market", "social", "news", "fundamentals"]
+        self, selected_analysts=["market", "social", "news", "fundamentals"],
+        parallel_analysts=None,
     ):
         """Set up and compile the agent workflow graph.
 
@@ -94,10 +129,16 @@ class GraphSetup:
                 - "social": Social media analyst
                 - "news": News analyst
                 - "fundamentals": Fundamentals analyst
+            parallel_analysts (bool): Run the analysts concurrently from START,
+                each with its own message channel, and join before the Bull
+                Researcher. Defaults to ``config["parallel_analysts"]``.
         """
         if len(selected_analysts) == 0:
             raise ValueError("Trading Agents Graph Setup Error: no analysts selected!")
 
+        if parallel_analysts is None:
+            parallel_analysts = self.config.get("parallel_analysts", False)
+
         # Create analyst nodes
         analyst_nodes = {}
         delete_nodes = {}
@@ -197,10 +238,18 @@ class GraphSetup:
         # Add analyst nodes to the graph with checkpoint support
         for analyst_type, node in analyst_nodes.items():
             node_name = f"{analyst_type.capitalize()} Analyst"
+            clear_name = f"Msg Clear {analyst_type.capitalize()}"
+            if parallel_analysts:
+                # 并行模式：每个分析师使用独立的消息通道
+                messages_key = f"{analyst_type}_messages"
+                node = node_with_message_channel(analyst_type, node)
+                delete_nodes[analyst_type] = create_msg_delete(messages_key)
+                tool_nodes[analyst_type] = ToolNode(
+                    list(tool_nodes[analyst_type].tools_by_name.values()),
+                    messages_key=messages_key,
+                )
             workflow.add_node(node_name, node_with_checkpoint(node_name, node))
-            workflow.add_node(
-                f"Msg Clear {analyst_type.capitalize()}", delete_nodes[analyst_type]
-            )
+            workflow.add_node(clear_name, delete_nodes[analyst_type])
             workflow.add_node(f"tools_{analyst_type}", tool_nodes[analyst_type])
 
         # Add other nodes with checkpoint support
@@ -214,30 +263,49 @@ class GraphSetup:
         workflow.add_node("Risk Judge", node_with_checkpoint("Risk Judge", risk_manager_node))
 
         # Define edges
-        # Start with the first analyst
-        first_analyst = selected_analysts[0]
-        workflow.add_edge(START, f"{first_analyst.capitalize()} Analyst")
-
-        # Connect analysts in sequence
-        for i, analyst_type in enumerate(selected_analysts):
-            current_analyst = f"{analyst_type.capitalize()} Analyst"
-            current_tools = f"tools_{analyst_type}"
-            current_clear = f"Msg Clear {analyst_type.capitalize()}"
-
-            # Add conditional edges for current analyst
-            workflow.add_conditional_edges(
-                current_analyst,
-                getattr(self.conditional_logic, f"should_continue_{analyst_type}"),
-                [current_tools, current_clear],
-            )
-            workflow.add_edge(current_tools, current_analyst)
-
-            # Connect to next analyst or to Bull Researcher if this is the last analyst
-            if i < len(selected_analysts) - 1:
-                next_analyst = f"{selected_analysts[i+1].capitalize()} Analyst"
-                workflow.add_edge(current_clear, next_analyst)
-            else:
-                workflow.add_edge(current_clear, "Bull Researcher")
+        if parallel_analysts:
+            # 所有分析师从START并行出发，全部完成后汇合到Bull Researcher
+            clear_nodes = []
+            for analyst_type in selected_analysts:
+                current_analyst = f"{analyst_type.capitalize()} Analyst"
+                current_tools = f"tools_{analyst_type}"
+                current_clear = f"Msg Clear {analyst_type.capitalize()}"
+
+                workflow.add_edge(START, current_analyst)
+                workflow.add_conditional_edges(
+                    current_analyst,
+                    self.conditional_logic.create_channel_router(analyst_type),
+                    [current_tools, current_clear],
+                )
+                workflow.add_edge(current_tools, current_analyst)
+                clear_nodes.append(current_clear)
+
+            workflow.add_edge(clear_nodes, "Bull Researcher")
+        else:
+            # Start with the first analyst
+            first_analyst = selected_analysts[0]
+            workflow.add_edge(START, f"{first_analyst.capitalize()} Analyst")
+
+            # Connect analysts in sequence
+            for i, analyst_type in enumerate(selected_analysts):
+                current_analyst = f"{analyst_type.capitalize()} Analyst"
+                current_tools = f"tools_{analyst_type}"
+                current_clear = f"Msg Clear {analyst_type.capitalize()}"
+
+                # Add conditional edges for current analyst
+                workflow.add_conditional_edges(
+                    current_analyst,
+                    getattr(self.conditional_logic, f"should_continue_{analyst_type}"),
+                    [current_tools, current_clear],
+                )
+                workflow.add_edge(current_tools, current_analyst)
+
+                # Connect to next analyst or to Bull Researcher if this is the last analyst
+                if i < len(selected_analysts) - 1:
+                    next_analyst = f"{selected_analysts[i+1].capitalize()} Analyst"
+                    workflow.add_edge(current_clear, next_analyst)
+                else:
+                    workflow.add_edge(current_clear, "Bull Researcher")
 
         # Add remaining edges
         workflow.add_conditional_edges(
@@ -1,5 +1,10 @@
 # TradingAgents/graph/signal_processing.py
 
+import os
+import re
+import threading
+from typing import Optional
+
 from langchain_openai import ChatOpenAI
 
 # 导入统一日志系统和图处理模块日志装饰器
@@ -8,12 +13,155 @@ from tradingagents.utils.tool_logging import log_graph_module
 logger = get_logger("graph.signal_processing")
 
 
+# ---- 规则提取：解析风险经理/交易员报告中的结构化段落 ----
+# 标签后允许Markdown加粗、冒号和"为/是/约"等连接词
+_LABEL_TAIL = r'\s*\**\s*(?:[：:]|为|是|约为?)\s*\**\s*'
+_NUMBER = r'(\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)'
+_CURRENCY = r'(?:HK\$|US\$|[¥￥$]|人民币|港币|港元|美元)?\s*'
+
+_ACTION_WORDS = {
+    '买入': '买入', '增持': '买入', 'BUY': '买入',
+    '持有': '持有', 'HOLD': '持有',
+    '卖出': '卖出', '减持': '卖出', 'SELL': '卖出',
+}
+_ACTION_ALT = '|'.join(_ACTION_WORDS)
+
+# 提示词要求的结论行，出现时以最后一次为准
+_FINAL_ACTION_RE = re.compile(
+    r'最终交易建议' + _LABEL_TAIL + r'(' + _ACTION_ALT + r')', re.IGNORECASE)
+# 其他带标签的建议，所有出现必须一致
+_LABELED_ACTION_RE = re.compile(
+    r'(?:投资建议|最终建议|最终决策|交易建议|操作建议|建议操作|决策建议)' + _LABEL_TAIL
+    + r'(' + _ACTION_ALT + r')', re.IGNORECASE)
+_TARGET_PRICE_RE = re.compile(
+    r'目标价[位格]?' + _LABEL_TAIL + _CURRENCY + _NUMBER
+    + r'(?:\s*(?:元|美元|港元))?(?:\s*(?:-|~|～|－|—|至|到)\s*' + _CURRENCY + _NUMBER + r')?')
+_CONFIDENCE_RE = re.compile(
+    r'(?:置信度|信心度|信心程度)' + _LABEL_TAIL + _NUMBER + r'\s*(%|/\s*10(?:0)?)?')
+# 风险等级/风险评级通常是1-5级的整数档位，不是0-1的评分，不走规则解析
+_RISK_RE = re.compile(
+    r'(?:风险评分|风险分数)' + _LABEL_TAIL + _NUMBER + r'\s*(%|/\s*10(?:0)?)?')
+_REASONING_RE = re.compile(
+    r'(?:详细推理|决策理由|主要理由|推理|理由)\s*\**\s*[：:]\s*\**\s*([^\n]+)')
+
+
+def _to_float(value: str) -> float:
+    return float(value.replace(',', ''))
+
+
+def _unique(values):
+    """去重后只剩一个值时返回该值，否则返回None（无匹配或互相矛盾）"""
+    distinct = set(values)
+    return distinct.pop() if len(distinct) == 1 else None
+
+
+def _extract_action(text: str) -> Optional[str]:
+    final = _FINAL_ACTION_RE.findall(text)
+    if final:
+        return _ACTION_WORDS[final[-1].upper() if final[-1].isascii() else final[-1]]
+    labeled = [_ACTION_WORDS[word.upper() if word.isascii() else word]
+               for word in _LABELED_ACTION_RE.findall(text)]
+    return _unique(labeled)
+
+
+def _extract_target_price(text: str) -> Optional[float]:
+    prices = []
+    for low, high in _TARGET_PRICE_RE.findall(text):
+        price = _to_float(low)
+        if high:
+            # 价格区间取中值
+            price = round((price + _to_float(high)) / 2, 2)
+        prices.append(price)
+    price = _unique(prices)
+    return price if price and price > 0 else None
+
+
+def _extract_ratio(pattern: re.Pattern, text: str) -> Optional[float]:
+    """
+    提取0-1之间的比例，支持 0.8 / 80% / 8/10 / 80/100 写法
+
+    没有单位且大于1的数（如“风险评分: 5”）无法确定是10分制还是百分制，返回None交给LLM
+    """
+    values = []
+    for number, unit in pattern.findall(text):
+        value = _to_float(number)
+        unit = unit.replace(' ', '')
+        if unit == '/10':
+            value /= 10
+        elif unit in ('%', '/100'):
+            value /= 100
+        elif value > 1:
+            return None
+        values.append(round(value, 4))
+    value = _unique(values)
+    return value if value is not None and 0 <= value <= 1 else None
+
+
+def _extract_reasoning(text: str) -> str:
+    match = _REASONING_RE.search(text)
+    if match:
+        reasoning = match.group(1).strip(' *')
+    else:
+        # 第一段非标题、非结构化字段的正文
+        field_patterns = (_FINAL_ACTION_RE, _LABELED_ACTION_RE, _TARGET_PRICE_RE, _CONFIDENCE_RE, _RISK_RE)
+        paragraphs = [line.strip(' *#>-') for line in text.splitlines()]
+        reasoning = next((line for line in paragraphs
+                          if len(line) >= 10 and not any(p.search(line) for p in field_patterns)), '')
+    return reasoning[:200] or '基于综合分析的投资建议'
+
+
+def extract_structured_decision(text: str) -> Optional[dict]:
+    """
+    用规则直接从报告的结构化段落中提取交易决策
+
+    只有建议动作、目标价、置信度、风险评分四项都能唯一确定时才返回结果；
+    任何一项缺失或前后矛盾都返回None，由调用方交给LLM处理。
+    """
+    action = _extract_action(text)
+    if action is None:
+        return None
+    target_price = _extract_target_price(text)
+    if target_price is None:
+        return None
+    confidence = _extract_ratio(_CONFIDENCE_RE, text)
+    if confidence is None:
+        return None
+    risk_score = _extract_ratio(_RISK_RE, text)
+    if risk_score is None:
+        return None
+    return {
+        'action': action,
+        'target_price': target_price,
+        'confidence': confidence,
+        'risk_score': risk_score,
+        'reasoning': _extract_reasoning(text),
+    }
+
+
 class SignalProcessor:
     """Processes trading signals to extract actionable decisions."""
 
     def __init__(self, quick_thinking_llm: ChatOpenAI):
         """Initialize with an LLM for processing."""
         self.quick_thinking_llm = quick_thinking_llm
+        # SIGNAL_FAST_PATH=false 时总是调用LLM
+        self.fast_path_enabled = os.getenv('SIGNAL_FAST_PATH', 'true').lower() != 'false'
+        self.stats = {'fast_path_hits': 0, 'llm_fallbacks': 0}
+        self._stats_lock = threading.Lock()
+
+    def _record(self, key: str) -> float:
+        with self._stats_lock:
+            self.stats[key] += 1
+            total = self.stats['fast_path_hits'] + self.stats['llm_fallbacks']
+            return self.stats['fast_path_hits'] / total
+
+    def get_stats(self) -> dict:
+        """规则提取命中率统计"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        total = stats['fast_path_hits'] + stats['llm_fallbacks']
+        stats['hit_rate'] = stats['fast_path_hits'] / total if total else 0.0
+        return stats
 
     @log_graph_module("signal_processing")
     def process_signal(self, full_signal: str, stock_symbol: str = None) -> dict:
@@ -63,6 +211,19 @@ class SignalProcessor:
         logger.info(f"🔍 [SignalProcessor] 处理信号: 股票={stock_symbol}, 市场={market_info['market_name']}, 货币={currency}",
                    extra={'stock_symbol': stock_symbol, 'market': market_info['market_name'], 'currency': currency})
 
+        # 报告中已有完整的结构化决策时直接返回，省去一次LLM调用
+        if self.fast_path_enabled:
+            decision = extract_structured_decision(full_signal)
+            if decision is not None:
+                hit_rate = self._record('fast_path_hits')
+                logger.info("⚡ [SignalProcessor] 规则提取命中: %s 目标价=%s (命中率 %.0f%%)",
+                            decision['action'], decision['target_price'], hit_rate * 100,
+                            extra={'action': decision['action'], 'target_price': decision['target_price'],
+                                   'confidence': decision['confidence'], 'stock_symbol': stock_symbol})
+                return decision
+            hit_rate = self._record('llm_fallbacks')
+            logger.info("🔍 [SignalProcessor] 规则提取未命中，调用LLM解析 (命中率 %.0f%%)", hit_rate * 100)
+
         messages = [
             (
                 "system",
@@ -173,7 +334,8 @@ class SignalProcessor:
 
                     # 如果仍然没有找到价格，尝试智能推算
                     if target_price is None or target_price == "null" or target_price == "":
-                        target_price = self._smart_price_estimation(full_text, action, is_china)
+                        target_price = self._smart_price_estimation(full_text, action, is_china,
+                                                                    self._current_price(stock_symbol))
                         if target_price:
                             logger.debug(f"🔍 [SignalProcessor] 智能推算目标价格: {target_price}")
                         else:
@@ -206,23 +368,38 @@ class SignalProcessor:
                 return result
             else:
                 # 如果无法解析JSON，使用简单的文本提取
-                return self._extract_simple_decision(response)
+                return self._extract_simple_decision(response, stock_symbol)
 
         except Exception as e:
             logger.error(f"信号处理错误: {e}", exc_info=True, extra={'stock_symbol': stock_symbol})
             # 回退到简单提取
-            return self._extract_simple_decision(full_signal)
+            return self._extract_simple_decision(full_signal, stock_symbol)
+
+    @staticmethod
+    def _current_price(stock_symbol: Optional[str]) -> Optional[float]:
+        """本次分析已获取的最新收盘价（来自数据层的结构化行情，不发起请求）"""
+        if not stock_symbol:
+            return None
+        try:
+            from tradingagents.dataflows.data_source_manager import get_cached_quote
+            quote = get_cached_quote(stock_symbol)
+        except Exception as e:
+            logger.debug(f"🔍 [SignalProcessor] 读取{stock_symbol}行情失败: {e}")
+            return None
+        return quote.price if quote is not None else None
+
+    def _smart_price_estimation(self, text: str, action: str, is_china: bool,
+                                current_price: Optional[float] = None) -> float:
+        """智能价格推算方法
 
-    def _smart_price_estimation(self, text: str, action: str, is_china: bool) -> float:
-        """智能价格推算方法"""
+        current_price 为数据层提供的最新价；没有时才从报告文本中匹配当前价格
+        """
         import re
         
-        # 尝试从文本中提取当前价格和涨跌幅信息
-        current_price = None
         percentage_change = None
         
         # 提取当前价格
-        current_price_patterns = [
+        current_price_patterns = [] if current_price else [
             r'当前价[格位]?[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',
             r'现价[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',
             r'股价[：:]?\s*[¥\$]?(\d+(?:\.\d+)?)',
@@ -278,7 +455,7 @@ class SignalProcessor:
         
         return None
 
-    def _extract_simple_decision(self, text: str) -> dict:
+    def _extract_simple_decision(self, text: str, stock_symbol: str = None) -> dict:
         """简单的决策提取方法作为备用"""
         import re
 
@@ -315,7 +492,8 @@ class SignalProcessor:
         if target_price is None:
             # 检测股票类型
             is_china = True  # 默认假设是A股，实际应该从上下文获取
-            target_price = self._smart_price_estimation(text, action, is_china)
+            target_price = self._smart_price_estimation(text, action, is_china,
+                                                        self._current_price(stock_symbol))
 
         return {
             'action': action,
@@ -1,16 +1,20 @@
 # TradingAgents/graph/trading_graph.py
 
 import os
+import hashlib
 from pathlib import Path
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date
-from typing import Dict, Any, Tuple, List, Optional
+from typing import Dict, Any, Tuple, List, Optional, Sequence
 
 from langchain_openai import ChatOpenAI
 from langchain_anthropic import ChatAnthropic
 from langchain_google_genai import ChatGoogleGenerativeAI
 from tradingagents.llm_adapters import ChatDashScope, ChatDashScopeOpenAI, ChatGoogleOpenAI
 
+from langchain_core.rate_limiters import InMemoryRateLimiter
 from langgraph.prebuilt import ToolNode
 
 from tradingagents.agents import *
@@ -29,6 +33,10 @@ from tradingagents.agents.utils.agent_states import (
     RiskDebateState,
 )
 from tradingagents.dataflows.interface import set_config
+from tradingagents.dataflows.data_context import DataContext, get_run_data_context, use_data_context
+from tradingagents.agents.utils.agent_utils import UNIFIED_DATA_START_DATE
+from tradingagents.agents.analysts.news_analyst import news_prefetch_args
+from tradingagents.tools.unified_news_tool import create_unified_news_tool
 
 from .conditional_logic import ConditionalLogic
 from .setup import GraphSetup
@@ -37,6 +45,227 @@ from .reflection import Reflector
 from .signal_processing import SignalProcessor
 
 
+# 按LLM提供商共享的限流器，同一进程内的所有图实例共用同一份请求预算
+_provider_rate_limiters: Dict[str, InMemoryRateLimiter] = {}
+_provider_rate_limiters_lock = threading.Lock()
+
+
+def get_provider_rate_limiter(provider: str, requests_per_second: float) -> InMemoryRateLimiter:
+    """获取（或创建）某个LLM提供商的共享限流器"""
+    provider = provider.lower()
+    with _provider_rate_limiters_lock:
+        limiter = _provider_rate_limiters.get(provider)
+        if limiter is None or limiter.requests_per_second != requests_per_second:
+            limiter = InMemoryRateLimiter(
+                requests_per_second=requests_per_second,
+                check_every_n_seconds=0.05,
+                max_bucket_size=max(1, requests_per_second),
+            )
+            _provider_rate_limiters[provider] = limiter
+            logger.info(f"🚦 [限流] {provider} 请求预算: {requests_per_second}次/秒")
+        return limiter
+
+
+def _create_llm_clients(config: Dict[str, Any]) -> Tuple[Any, Any]:
+    """按配置创建 (深度思考LLM, 快速思考LLM)"""
+    if config["llm_provider"].lower() == "openai":
+        deep_thinking_llm = ChatOpenAI(model=config["deep_think_llm"], base_url=config["backend_url"])
+        quick_thinking_llm = ChatOpenAI(model=config["quick_think_llm"], base_url=config["backend_url"])
+    elif config["llm_provider"] == "siliconflow":
+        # SiliconFlow支持：使用OpenAI兼容API
+        siliconflow_api_key = os.getenv('SILICONFLOW_API_KEY')
+        if not siliconflow_api_key:
+            raise ValueError("使用SiliconFlow需要设置SILICONFLOW_API_KEY环境变量")
+
+        logger.info(f"🌐 [SiliconFlow] 使用API密钥: {siliconflow_api_key[:20]}...")
+
+        deep_thinking_llm = ChatOpenAI(
+            model=config["deep_think_llm"],
+            base_url=config["backend_url"],
+            api_key=siliconflow_api_key,
+            temperature=0.1,
+            max_tokens=2000
+        )
+        quick_thinking_llm = ChatOpenAI(
+            model=config["quick_think_llm"],
+            base_url=config["backend_url"],
+            api_key=siliconflow_api_key,
+            temperature=0.1,
+            max_tokens=2000
+        )
+    elif config["llm_provider"] == "openrouter":
+        # OpenRouter支持：优先使用OPENROUTER_API_KEY，否则使用OPENAI_API_KEY
+        openrouter_api_key = os.getenv('OPENROUTER_API_KEY') or os.getenv('OPENAI_API_KEY')
+        if not openrouter_api_key:
+            raise ValueError("使用OpenRouter需要设置OPENROUTER_API_KEY或OPENAI_API_KEY环境变量")
+
+        logger.info(f"🌐 [OpenRouter] 使用API密钥: {openrouter_api_key[:20]}...")
+
+        deep_thinking_llm = ChatOpenAI(
+            model=config["deep_think_llm"],
+            base_url=config["backend_url"],
+            api_key=openrouter_api_key
+        )
+        quick_thinking_llm = ChatOpenAI(
+            model=config["quick_think_llm"],
+            base_url=config["backend_url"],
+            api_key=openrouter_api_key
+        )
+    elif config["llm_provider"] == "ollama":
+        deep_thinking_llm = ChatOpenAI(model=config["deep_think_llm"], base_url=config["backend_url"])
+        quick_thinking_llm = ChatOpenAI(model=config["quick_think_llm"], base_url=config["backend_url"])
+    elif config["llm_provider"].lower() == "anthropic":
+        deep_thinking_llm = ChatAnthropic(model=config["deep_think_llm"], base_url=config["backend_url"])
+        quick_thinking_llm = ChatAnthropic(model=config["quick_think_llm"], base_url=config["backend_url"])
+    elif config["llm_provider"].lower() == "google":
+        # 使用 Google OpenAI 兼容适配器，解决工具调用格式不匹配问题
+        logger.info(f"🔧 使用Google AI OpenAI 兼容适配器 (解决工具调用问题)")
+        google_api_key = os.getenv('GOOGLE_API_KEY')
+        if not google_api_key:
+            raise ValueError("使用Google AI需要设置GOOGLE_API_KEY环境变量")
+        
+        deep_thinking_llm = ChatGoogleOpenAI(
+            model=config["deep_think_llm"],
+            google_api_key=google_api_key,
+            temperature=0.1,
+            max_tokens=2000
+        )
+        quick_thinking_llm = ChatGoogleOpenAI(
+            model=config["quick_think_llm"],
+            google_api_key=google_api_key,
+            temperature=0.1,
+            max_tokens=2000
+        )
+        
+        logger.info(f"✅ [Google AI] 已启用优化的工具调用和内容格式处理")
+    elif (config["llm_provider"].lower() == "dashscope" or
+          config["llm_provider"].lower() == "alibaba" or
+          "dashscope" in config["llm_provider"].lower() or
+          "阿里百炼" in config["llm_provider"]):
+        # 使用 OpenAI 兼容适配器，支持原生 Function Calling
+        logger.info(f"🔧 使用阿里百炼 OpenAI 兼容适配器 (支持原生工具调用)")
+        deep_thinking_llm = ChatDashScopeOpenAI(
+            model=config["deep_think_llm"],
+            temperature=0.1,
+            max_tokens=2000
+        )
+        quick_thinking_llm = ChatDashScopeOpenAI(
+            model=config["quick_think_llm"],
+            temperature=0.1,
+            max_tokens=2000
+        )
+    elif (config["llm_provider"].lower() == "deepseek" or
+          "deepseek" in config["llm_provider"].lower()):
+        # DeepSeek V3配置 - 使用支持token统计的适配器
+        from tradingagents.llm_adapters.deepseek_adapter import ChatDeepSeek
+
+
+        deepseek_api_key = os.getenv('DEEPSEEK_API_KEY')
+        if not deepseek_api_key:
+            raise ValueError("使用DeepSeek需要设置DEEPSEEK_API_KEY环境变量")
+
+        deepseek_base_url = os.getenv('DEEPSEEK_BASE_URL', 'https://api.deepseek.com')
+
+        # 使用支持token统计的DeepSeek适配器
+        deep_thinking_llm = ChatDeepSeek(
+            model=config["deep_think_llm"],
+            api_key=deepseek_api_key,
+            base_url=deepseek_base_url,
+            temperature=0.1,
+            max_tokens=2000
+        )
+        quick_thinking_llm = ChatDeepSeek(
+            model=config["quick_think_llm"],
+            api_key=deepseek_api_key,
+            base_url=deepseek_base_url,
+            temperature=0.1,
+            max_tokens=2000
+            )
+
+        logger.info(f"✅ [DeepSeek] 已启用token统计功能")
+    elif config["llm_provider"].lower() == "custom_openai":
+        # 自定义OpenAI端点配置
+        from tradingagents.llm_adapters.openai_compatible_base import create_openai_compatible_llm
+        
+        custom_api_key = os.getenv('CUSTOM_OPENAI_API_KEY')
+        if not custom_api_key:
+            raise ValueError("使用自定义OpenAI端点需要设置CUSTOM_OPENAI_API_KEY环境变量")
+        
+        custom_base_url = config.get("custom_openai_base_url", "https://api.openai.com/v1")
+        
+        logger.info(f"🔧 [自定义OpenAI] 使用端点: {custom_base_url}")
+        
+        # 使用OpenAI兼容适配器创建LLM实例
+        deep_thinking_llm = create_openai_compatible_llm(
+            provider="custom_openai",
+            model=config["deep_think_llm"],
+            base_url=custom_base_url,
+            temperature=0.1,
+            max_tokens=2000
+        )
+        quick_thinking_llm = create_openai_compatible_llm(
+            provider="custom_openai",
+            model=config["quick_think_llm"],
+            base_url=custom_base_url,
+            temperature=0.1,
+            max_tokens=2000
+        )
+        
+        logger.info(f"✅ [自定义OpenAI] 已配置自定义端点: {custom_base_url}")
+    else:
+        raise ValueError(f"Unsupported LLM provider: {config['llm_provider']}")
+
+    return deep_thinking_llm, quick_thinking_llm
+
+
+# 按 (提供商, 模型, 端点, 凭据) 共享的LLM客户端，复用其底层HTTP连接（keep-alive）
+_llm_clients: Dict[Tuple, Tuple[Any, Any]] = {}
+_llm_clients_lock = threading.Lock()
+
+# 创建LLM客户端时会读取的凭据类环境变量
+_LLM_CREDENTIAL_ENV_VARS = (
+    "OPENAI_API_KEY", "ANTHROPIC_API_KEY", "GOOGLE_API_KEY", "DASHSCOPE_API_KEY",
+    "DEEPSEEK_API_KEY", "DEEPSEEK_BASE_URL", "SILICONFLOW_API_KEY", "OPENROUTER_API_KEY",
+    "CUSTOM_OPENAI_API_KEY",
+)
+
+
+def llm_credentials_digest(config: Dict[str, Any]) -> str:
+    """计算LLM凭据（环境变量中的API密钥及配置中的密钥字段）的摘要，密钥轮换后摘要随之变化"""
+    credentials = [(name, os.getenv(name, "")) for name in _LLM_CREDENTIAL_ENV_VARS]
+    credentials += sorted((k, str(v)) for k, v in config.items() if "api_key" in str(k).lower())
+    return hashlib.sha256(json.dumps(credentials).encode("utf-8")).hexdigest()[:16]
+
+
+def _llm_client_key(config: Dict[str, Any]) -> Tuple:
+    return (
+        config["llm_provider"].lower(),
+        config["deep_think_llm"],
+        config["quick_think_llm"],
+        config.get("backend_url"),
+        config.get("custom_openai_base_url"),
+        llm_credentials_digest(config),
+    )
+
+
+def get_llm_clients(config: Dict[str, Any]) -> Tuple[Any, Any]:
+    """获取（或创建）与配置对应的共享LLM客户端 (深度思考LLM, 快速思考LLM)"""
+    key = _llm_client_key(config)
+    with _llm_clients_lock:
+        clients = _llm_clients.get(key)
+        if clients is None:
+            clients = _create_llm_clients(config)
+            _llm_clients[key] = clients
+            logger.info(f"🔌 [LLM客户端] 创建共享客户端: {key[0]} ({key[1]} / {key[2]})")
+        return clients
+
+
+def clear_llm_clients():
+    """清空共享的LLM客户端（API密钥等环境变量变化后调用）"""
+    with _llm_clients_lock:
+        _llm_clients.clear()
+
+
 class TradingAgentsGraph:
     """Main class that orchestrates the trading agents framework."""
 
@@ -65,154 +294,11 @@ class TradingAgentsGraph:
             exist_ok=True,
         )
 
-        # Initialize LLMs
-        if self.config["llm_provider"].lower() == "openai":
-            self.deep_thinking_llm = ChatOpenAI(model=self.config["deep_think_llm"], base_url=self.config["backend_url"])
-            self.quick_thinking_llm = ChatOpenAI(model=self.config["quick_think_llm"], base_url=self.config["backend_url"])
-        elif self.config["llm_provider"] == "siliconflow":
-            # SiliconFlow支持：使用OpenAI兼容API
-            siliconflow_api_key = os.getenv('SILICONFLOW_API_KEY')
-            if not siliconflow_api_key:
-                raise ValueError("使用SiliconFlow需要设置SILICONFLOW_API_KEY环境变量")
-
-            logger.info(f"🌐 [SiliconFlow] 使用API密钥: {siliconflow_api_key[:20]}...")
-
-            self.deep_thinking_llm = ChatOpenAI(
-                model=self.config["deep_think_llm"],
-                base_url=self.config["backend_url"],
-                api_key=siliconflow_api_key,
-                temperature=0.1,
-                max_tokens=2000
-            )
-            self.quick_thinking_llm = ChatOpenAI(
-                model=self.config["quick_think_llm"],
-                base_url=self.config["backend_url"],
-                api_key=siliconflow_api_key,
-                temperature=0.1,
-                max_tokens=2000
-            )
-        elif self.config["llm_provider"] == "openrouter":
-            # OpenRouter支持：优先使用OPENROUTER_API_KEY，否则使用OPENAI_API_KEY
-            openrouter_api_key = os.getenv('OPENROUTER_API_KEY') or os.getenv('OPENAI_API_KEY')
-            if not openrouter_api_key:
-                raise ValueError("使用OpenRouter需要设置OPENROUTER_API_KEY或OPENAI_API_KEY环境变量")
-
-            logger.info(f"🌐 [OpenRouter] 使用API密钥: {openrouter_api_key[:20]}...")
-
-            self.deep_thinking_llm = ChatOpenAI(
-                model=self.config["deep_think_llm"],
-                base_url=self.config["backend_url"],
-                api_key=openrouter_api_key
-            )
-            self.quick_thinking_llm = ChatOpenAI(
-                model=self.config["quick_think_llm"],
-                base_url=self.config["backend_url"],
-                api_key=openrouter_api_key
-            )
-        elif self.config["llm_provider"] == "ollama":
-            self.deep_thinking_llm = ChatOpenAI(model=self.config["deep_think_llm"], base_url=self.config["backend_url"])
-            self.quick_thinking_llm = ChatOpenAI(model=self.config["quick_think_llm"], base_url=self.config["backend_url"])
-        elif self.config["llm_provider"].lower() == "anthropic":
-            self.deep_thinking_llm = ChatAnthropic(model=self.config["deep_think_llm"], base_url=self.config["backend_url"])
-            self.quick_thinking_llm = ChatAnthropic(model=self.config["quick_think_llm"], base_url=self.config["backend_url"])
-        elif self.config["llm_provider"].lower() == "google":
-            # 使用 Google OpenAI 兼容适配器，解决工具调用格式不匹配问题
-            logger.info(f"🔧 使用Google AI OpenAI 兼容适配器 (解决工具调用问题)")
-            google_api_key = os.getenv('GOOGLE_API_KEY')
-            if not google_api_key:
-                raise ValueError("使用Google AI需要设置GOOGLE_API_KEY环境变量")
-            
-            self.deep_thinking_llm = ChatGoogleOpenAI(
-                model=self.config["deep_think_llm"],
-                google_api_key=google_api_key,
-                temperature=0.1,
-                max_tokens=2000
-            )
-            self.quick_thinking_llm = ChatGoogleOpenAI(
-                model=self.config["quick_think_llm"],
-                google_api_key=google_api_key,
-                temperature=0.1,
-                max_tokens=2000
-            )
-            
-            logger.info(f"✅ [Google AI] 已启用优化的工具调用和内容格式处理")
-        elif (self.config["llm_provider"].lower() == "dashscope" or
-              self.config["llm_provider"].lower() == "alibaba" or
-              "dashscope" in self.config["llm_provider"].lower() or
-              "阿里百炼" in self.config["llm_provider"]):
-            # 使用 OpenAI 兼容适配器，支持原生 Function Calling
-            logger.info(f"🔧 使用阿里百炼 OpenAI 兼容适配器 (支持原生工具调用)")
-            self.deep_thinking_llm = ChatDashScopeOpenAI(
-                model=self.config["deep_think_llm"],
-                temperature=0.1,
-                max_tokens=2000
-            )
-            self.quick_thinking_llm = ChatDashScopeOpenAI(
-                model=self.config["quick_think_llm"],
-                temperature=0.1,
-                max_tokens=2000
-            )
-        elif (self.config["llm_provider"].lower() == "deepseek" or
-              "deepseek" in self.config["llm_provider"].lower()):
-            # DeepSeek V3配置 - 使用支持token统计的适配器
-            from tradingagents.llm_adapters.deepseek_adapter import ChatDeepSeek
-
+        # Initialize LLMs（同一配置的图实例共享客户端及其HTTP连接）
+        self.deep_thinking_llm, self.quick_thinking_llm = get_llm_clients(self.config)
 
-            deepseek_api_key = os.getenv('DEEPSEEK_API_KEY')
-            if not deepseek_api_key:
-                raise ValueError("使用DeepSeek需要设置DEEPSEEK_API_KEY环境变量")
+        self._apply_rate_limit()
 
-            deepseek_base_url = os.getenv('DEEPSEEK_BASE_URL', 'https://api.deepseek.com')
-
-            # 使用支持token统计的DeepSeek适配器
-            self.deep_thinking_llm = ChatDeepSeek(
-                model=self.config["deep_think_llm"],
-                api_key=deepseek_api_key,
-                base_url=deepseek_base_url,
-                temperature=0.1,
-                max_tokens=2000
-            )
-            self.quick_thinking_llm = ChatDeepSeek(
-                model=self.config["quick_think_llm"],
-                api_key=deepseek_api_key,
-                base_url=deepseek_base_url,
-                temperature=0.1,
-                max_tokens=2000
-                )
-
-            logger.info(f"✅ [DeepSeek] 已启用token统计功能")
-        elif self.config["llm_provider"].lower() == "custom_openai":
-            # 自定义OpenAI端点配置
-            from tradingagents.llm_adapters.openai_compatible_base import create_openai_compatible_llm
-            
-            custom_api_key = os.getenv('CUSTOM_OPENAI_API_KEY')
-            if not custom_api_key:
-                raise ValueError("使用自定义OpenAI端点需要设置CUSTOM_OPENAI_API_KEY环境变量")
-            
-            custom_base_url = self.config.get("custom_openai_base_url", "https://api.openai.com/v1")
-            
-            logger.info(f"🔧 [自定义OpenAI] 使用端点: {custom_base_url}")
-            
-            # 使用OpenAI兼容适配器创建LLM实例
-            self.deep_thinking_llm = create_openai_compatible_llm(
-                provider="custom_openai",
-                model=self.config["deep_think_llm"],
-                base_url=custom_base_url,
-                temperature=0.1,
-                max_tokens=2000
-            )
-            self.quick_thinking_llm = create_openai_compatible_llm(
-                provider="custom_openai",
-                model=self.config["quick_think_llm"],
-                base_url=custom_base_url,
-                temperature=0.1,
-                max_tokens=2000
-            )
-            
-            logger.info(f"✅ [自定义OpenAI] 已配置自定义端点: {custom_base_url}")
-        else:
-            raise ValueError(f"Unsupported LLM provider: {self.config['llm_provider']}")
-        
         self.toolkit = Toolkit(config=self.config)
 
         # Initialize memories (如果启用)
@@ -259,10 +345,33 @@ class TradingAgentsGraph:
         self.curr_state = None
         self.ticker = None
         self.log_states_dict = {}  # date to full state dict
+        # 批量分析时按股票隔离的状态
+        self.curr_states: Dict[str, Dict[str, Any]] = {}  # ticker to final state
+        self._log_states_by_ticker: Dict[str, Dict[str, Any]] = {}  # ticker to {date: state}
+        self._state_lock = threading.Lock()
 
         # Set up the graph
+        self.selected_analysts = list(selected_analysts)
         self.graph = self.graph_setup.setup_graph(selected_analysts)
 
+    def _apply_rate_limit(self, requests_per_second: Optional[float] = None):
+        """为深度/快速思考LLM挂上提供商共享的限流器
+
+        预算来自参数或 config["llm_rate_limits"][provider]（次/秒），未配置时不限流。
+        """
+        provider = self.config["llm_provider"].lower()
+        if requests_per_second is None:
+            requests_per_second = (self.config.get("llm_rate_limits") or {}).get(provider)
+        if not requests_per_second:
+            return
+
+        limiter = get_provider_rate_limiter(provider, float(requests_per_second))
+        for llm in (self.deep_thinking_llm, self.quick_thinking_llm):
+            try:
+                llm.rate_limiter = limiter
+            except Exception as e:
+                logger.warning(f"⚠️ [限流] 无法为 {type(llm).__name__} 设置限流器: {e}")
+
     def _create_tool_nodes(self) -> Dict[str, ToolNode]:
         """Create tool nodes for different data sources."""
         return {
@@ -310,35 +419,145 @@ class TradingAgentsGraph:
             ),
         }
 
-    def propagate(self, company_name, trade_date):
-        """Run the trading agents graph for a company on a specific date."""
+    def propagate(self, company_name, trade_date, run_id: Optional[str] = None):
+        """Run the trading agents graph for a company on a specific date.
+
+        run_id: 已通过 open_data_context 登记的分析ID，图内的数据获取复用该运行级数据上下文
+        """
 
-        # 添加详细的接收日志
-        logger.debug(f"🔍 [GRAPH DEBUG] ===== TradingAgentsGraph.propagate 接收参数 =====")
-        logger.debug(f"🔍 [GRAPH DEBUG] 接收到的company_name: '{company_name}' (类型: {type(company_name)})")
-        logger.debug(f"🔍 [GRAPH DEBUG] 接收到的trade_date: '{trade_date}' (类型: {type(trade_date)})")
+        # 添加详细的接收日志（%-格式化，DEBUG未启用时不格式化）
+        logger.debug("🔍 [GRAPH DEBUG] TradingAgentsGraph.propagate 接收参数: company_name='%s' (类型: %s), trade_date='%s' (类型: %s)",
+                     company_name, type(company_name).__name__, trade_date, type(trade_date).__name__)
 
         self.ticker = company_name
-        logger.debug(f"🔍 [GRAPH DEBUG] 设置self.ticker: '{self.ticker}'")
 
-        # 设置每日每股独立断点路径
-        from pathlib import Path
-        from tradingagents.utils.checkpoints import load_checkpoint, save_checkpoint
-        
-        checkpoint_dir = Path(self.config["results_dir"]) / company_name / trade_date
-        checkpoint_dir.mkdir(parents=True, exist_ok=True)
-        checkpoint_path = checkpoint_dir / "checkpoint.json"
+        final_state, decision = self._run_analysis(company_name, trade_date, run_id=run_id)
+
+        # Store current state for reflection
+        self.curr_state = final_state
+        with self._state_lock:
+            self.log_states_dict = self._log_states_by_ticker[company_name]
+
+        return final_state, decision
+
+    def propagate_many(self, tickers: List[str], trade_date, max_concurrency: Optional[int] = None,
+                       requests_per_second: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """并发分析多只股票
+
+        所有分析共享同一组LLM客户端、工具集和记忆，每只股票的状态互相隔离，
+        结果可通过 curr_states[ticker] 用于反思。
+
+        Args:
+            tickers: 股票代码列表
+            trade_date: 分析日期
+            max_concurrency: 最大并发分析数，默认 config["max_batch_concurrency"]
+            requests_per_second: 本次批量使用的LLM提供商请求预算（次/秒），默认使用配置
 
-        # 加载 checkpoint 或新建初始状态
-        if checkpoint_path.exists():
-            init_agent_state = load_checkpoint(checkpoint_path)
+        Returns:
+            Dict[str, Dict]: 股票代码 -> {"success", "final_state", "decision"} 或 {"success": False, "error"}
+        """
+        max_concurrency = max_concurrency or self.config.get("max_batch_concurrency", 4)
+        if requests_per_second is not None:
+            self._apply_rate_limit(requests_per_second)
+
+        tickers = list(dict.fromkeys(tickers))
+        logger.info(f"📦 [批量分析] {len(tickers)}只股票，日期: {trade_date}，并发数: {max_concurrency}")
+
+        results: Dict[str, Dict[str, Any]] = {}
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="propagate") as executor:
+            futures = {
+                executor.submit(self._run_analysis, ticker, trade_date): ticker
+                for ticker in tickers
+            }
+            for future in as_completed(futures):
+                ticker = futures[future]
+                try:
+                    final_state, decision = future.result()
+                    results[ticker] = {"success": True, "final_state": final_state, "decision": decision}
+                    logger.info(f"✅ [批量分析] {ticker} 完成 ({len(results)}/{len(tickers)})")
+                except Exception as e:
+                    results[ticker] = {"success": False, "error": str(e)}
+                    logger.error(f"❌ [批量分析] {ticker} 失败: {e}")
+
+        succeeded = sum(1 for result in results.values() if result["success"])
+        logger.info(f"📦 [批量分析] 完成: 成功{succeeded}/{len(tickers)}")
+        return {ticker: results[ticker] for ticker in tickers}
+
+    def _prefetch_plan(self, ticker: str, trade_date: str,
+                       completed_nodes: Sequence[str] = ()) -> List[Tuple[Any, Dict[str, Any]]]:
+        """
+        各分析师第一次LLM调用后必然调用的数据工具及其参数（与分析师提示词中的参数一致）
+
+        断点中已完成的分析师节点会被跳过，不再预取其数据
+        """
+        toolkit = self.toolkit
+        online = self.config.get("online_tools", True)
+        pending = [analyst for analyst in self.selected_analysts
+                   if f"{analyst.capitalize()} Analyst" not in completed_nodes]
+        plan = []
+        if "market" in pending and online:
+            plan.append((toolkit.get_stock_market_data_unified.func,
+                         {"ticker": ticker, "start_date": UNIFIED_DATA_START_DATE, "end_date": trade_date}))
+        if "social" in pending:
+            social_tool = toolkit.get_stock_news_openai if online else toolkit.get_chinese_social_sentiment
+            plan.append((social_tool.func, {"ticker": ticker, "curr_date": trade_date}))
+        if "news" in pending:
+            plan.append((create_unified_news_tool(toolkit),
+                         news_prefetch_args(ticker, self.quick_thinking_llm)))
+        if "fundamentals" in pending and online:
+            plan.append((toolkit.get_stock_fundamentals_unified.func,
+                         {"ticker": ticker, "start_date": UNIFIED_DATA_START_DATE,
+                          "end_date": trade_date, "curr_date": trade_date}))
+        return plan
+
+    def _start_prefetch(self, company_name, trade_date, context: Optional[DataContext] = None,
+                        completed_nodes: Sequence[str] = ()) -> Optional[DataContext]:
+        """股票和日期确定后立即在后台获取数据，与分析师的首次LLM调用重叠（有运行级上下文时预取到其中）"""
+        if not self.config.get("data_prefetch", True):
+            return context
+        context = context or DataContext(company_name, str(trade_date))
+        for func, kwargs in self._prefetch_plan(company_name, str(trade_date), completed_nodes):
+            try:
+                context.prefetch(func, **kwargs)
+            except Exception as e:
+                logger.warning(f"⚠️ [数据预取] 提交失败: {e}")
+        logger.info(f"🚀 [数据预取] {company_name} 已提交{context.stats['prefetched']}项数据获取")
+        return context
+
+    def _run_analysis(self, company_name, trade_date, run_id: Optional[str] = None):
+        """执行单只股票的分析，不修改任何按实例共享的状态（可并发调用）"""
+        from tradingagents.utils.checkpoints import load_checkpoint
+
+        # 先读取断点，断点恢复时已完成的分析师不再预取数据
+        checkpoint_state = load_checkpoint(company_name, trade_date) or {}
+        # 运行级上下文由登记方（如Web分析流程）在分析结束后关闭
+        run_context = get_run_data_context(run_id)
+        data_context = self._start_prefetch(company_name, trade_date, run_context,
+                                            checkpoint_state.get("completed_nodes", []))
+        try:
+            with use_data_context(data_context):
+                return self._run_graph(company_name, trade_date)
+        finally:
+            if data_context is not None and data_context is not run_context:
+                data_context.close()
+                logger.info(f"📊 [数据预取] {company_name} 统计: {data_context.get_stats()}")
+
+    def _run_graph(self, company_name, trade_date):
+        """在当前数据上下文中执行图"""
+        from tradingagents.utils.checkpoints import load_checkpoint, save_checkpoint, sync_checkpoint
+
+        # 加载 checkpoint 或新建初始状态（断点不含消息列表，合并到新的初始状态上）
+        init_agent_state = self.propagator.create_initial_state(company_name, trade_date)
+        checkpoint_state = load_checkpoint(company_name, trade_date)
+        if checkpoint_state:
+            checkpoint_state.pop("_checkpoint_timestamp", None)
+            init_agent_state.update(checkpoint_state)
             logger.info(f"断点恢复：已加载 checkpoint 状态。")
         else:
-            init_agent_state = self.propagator.create_initial_state(company_name, trade_date)
             logger.info(f"未发现 checkpoint，使用新初始状态。")
         
-        logger.debug(f"🔍 [GRAPH DEBUG] 初始状态中的company_of_interest: '{init_agent_state.get('company_of_interest', 'NOT_FOUND')}'")
-        logger.debug(f"🔍 [GRAPH DEBUG] 初始状态中的trade_date: '{init_agent_state.get('trade_date', 'NOT_FOUND')}'")
+        logger.debug("🔍 [GRAPH DEBUG] 初始状态: company_of_interest='%s', trade_date='%s'",
+                     init_agent_state.get('company_of_interest', 'NOT_FOUND'), init_agent_state.get('trade_date', 'NOT_FOUND'))
         args = self.propagator.get_graph_args()
 
         try:
@@ -352,33 +571,34 @@ class TradingAgentsGraph:
                         chunk["messages"][-1].pretty_print()
                         trace.append(chunk)
                     # 每步保存断点
-                    save_checkpoint(checkpoint_path, chunk)
+                    save_checkpoint(chunk, company_name, trade_date)
 
                 final_state = trace[-1]
             else:
                 # Standard mode without tracing
                 final_state = self.graph.invoke(init_agent_state, **args)
                 # 保存最终状态
-                save_checkpoint(checkpoint_path, final_state)
+                save_checkpoint(final_state, company_name, trade_date)
         except Exception as e:
-            # 异常时保存当前状态
+            # 各节点完成时已保存断点，不能用初始状态覆盖其中的报告和已完成节点
             logger.error(f"图执行异常: {e}")
-            if 'init_agent_state' in locals():
-                save_checkpoint(checkpoint_path, init_agent_state)
             raise
+        finally:
+            sync_checkpoint(company_name, trade_date)
 
-        # Store current state for reflection
-        self.curr_state = final_state
+        with self._state_lock:
+            self.curr_states[company_name] = final_state
 
         # Log state
-        self._log_state(trade_date, final_state)
+        self._log_state(trade_date, final_state, ticker=company_name)
 
         # Return decision and processed signal
         return final_state, self.process_signal(final_state["final_trade_decision"], company_name)
 
-    def _log_state(self, trade_date, final_state):
+    def _log_state(self, trade_date, final_state, ticker=None):
         """Log the final state to a JSON file."""
-        self.log_states_dict[str(trade_date)] = {
+        ticker = ticker or self.ticker
+        entry = {
             "company_of_interest": final_state["company_of_interest"],
             "trade_date": final_state["trade_date"],
             "market_report": final_state["market_report"],
@@ -408,32 +628,41 @@ class TradingAgentsGraph:
             "final_trade_decision": final_state["final_trade_decision"],
         }
 
+        with self._state_lock:
+            ticker_log = self._log_states_by_ticker.setdefault(ticker, {})
+            ticker_log[str(trade_date)] = entry
+            snapshot = dict(ticker_log)
+
         # Save to file
-        directory = Path(f"eval_results/{self.ticker}/TradingAgentsStrategy_logs/")
+        directory = Path(f"eval_results/{ticker}/TradingAgentsStrategy_logs/")
         directory.mkdir(parents=True, exist_ok=True)
 
         with open(
-            f"eval_results/{self.ticker}/TradingAgentsStrategy_logs/full_states_log.json",
+            f"eval_results/{ticker}/TradingAgentsStrategy_logs/full_states_log.json",
             "w",
         ) as f:
-            json.dump(self.log_states_dict, f, indent=4)
+            json.dump(snapshot, f, indent=4)
 
-    def reflect_and_remember(self, returns_losses):
-        """Reflect on decisions and update memory based on returns."""
+    def reflect_and_remember(self, returns_losses, ticker=None):
+        """Reflect on decisions and update memory based on returns.
+
+        ticker 用于批量分析后指定反思哪只股票的状态，默认使用最近一次 propagate 的状态。
+        """
+        curr_state = self.curr_states[ticker] if ticker else self.curr_state
         self.reflector.reflect_bull_researcher(
-            self.curr_state, returns_losses, self.bull_memory
+            curr_state, returns_losses, self.bull_memory
         )
         self.reflector.reflect_bear_researcher(
-            self.curr_state, returns_losses, self.bear_memory
+            curr_state, returns_losses, self.bear_memory
         )
         self.reflector.reflect_trader(
-            self.curr_state, returns_losses, self.trader_memory
+            curr_state, returns_losses, self.trader_memory
         )
         self.reflector.reflect_invest_judge(
-            self.curr_state, returns_losses, self.invest_judge_memory
+            curr_state, returns_losses, self.invest_judge_memory
         )
         self.reflector.reflect_risk_manager(
-            self.curr_state, returns_losses, self.risk_manager_memory
+            curr_state, returns_losses, self.risk_manager_memory
         )
 
     def process_signal(self, full_signal, stock_symbol=None):
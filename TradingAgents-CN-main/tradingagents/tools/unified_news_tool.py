@@ -9,6 +9,8 @@ import logging
 from datetime import datetime
 import re
 
+from tradingagents.dataflows.data_context import context_cached
+
 logger = logging.getLogger(__name__)
 
 class UnifiedNewsAnalyzer:
@@ -332,6 +334,7 @@ def create_unified_news_tool(toolkit):
     """创建统一新闻工具函数"""
     analyzer = UnifiedNewsAnalyzer(toolkit)
     
+    @context_cached("unified_news_tool")
     def get_stock_news_unified(stock_code: str, max_news: int = 100, model_info: str = ""):
         """
         统一新闻获取工具
@@ -6,19 +6,24 @@ checkpoints.py - TradingAgents断点续传功能实现
 功能：
 1. 保存和加载分析过程的中间状态
 2. 支持节点级别的断点续传
-3. 处理不可序列化对象的转换
-4. 提供异常恢复机制
+3. 增量保存：每次只追加本次节点改变的状态键（二进制日志）
+4. 批量fsync与原子重写（日志过长时压缩为一条完整记录）
 
 作者：AI Assistant
 创建时间：2025-01-27
-版本：1.0
+版本：2.0
 """
 
+import copy
 import json
 import os
+import pickle
+import struct
+import threading
+import time
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 
 # 导入统一日志系统
 try:
@@ -29,93 +34,249 @@ except ImportError:
     logger = logging.getLogger("checkpoints")
 
 
-class CustomEncoder(json.JSONEncoder):
-    """自定义JSON编码器，处理不可序列化的对象"""
-    
-    def default(self, obj):
-        """处理特殊对象的序列化"""
-        # 处理有dict方法的对象（如Pydantic模型）
-        if hasattr(obj, 'dict'):
-            try:
-                return obj.dict()
-            except Exception:
-                pass
-        
-        # 处理有__dict__属性的对象
-        if hasattr(obj, '__dict__'):
-            try:
-                return obj.__dict__
-            except Exception:
-                pass
-        
-        # 处理LangChain消息对象
-        if hasattr(obj, 'content') and hasattr(obj, 'type'):
-            try:
-                return {
-                    'type': getattr(obj, 'type', 'unknown'),
-                    'content': getattr(obj, 'content', ''),
-                    'additional_kwargs': getattr(obj, 'additional_kwargs', {}),
-                    'response_metadata': getattr(obj, 'response_metadata', {}),
-                    'id': getattr(obj, 'id', '')
-                }
-            except Exception:
-                pass
-        
-        # 处理datetime对象
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        
-        # 其他对象转为字符串
-        try:
-            return str(obj)
-        except Exception:
-            return f"<不可序列化对象: {type(obj).__name__}>"
+# 每条记录的头部：负载长度（小端无符号32位）
+_RECORD_HEADER = struct.Struct("<I")
+
+
+def _is_message_key(key: str) -> bool:
+    """消息列表（含各分析师独立通道）不写入断点，恢复时由初始状态重建"""
+    return key.endswith("messages")
+
+
+def _union_nodes(stored, incoming) -> list:
+    """已完成节点只增不减：并行分支各自保存时按顺序去重合并，不覆盖其他分支写入的节点"""
+    merged = list(stored or [])
+    for node_name in incoming or []:
+        if node_name not in merged:
+            merged.append(node_name)
+    return merged
+
+
+def _is_empty(value) -> bool:
+    return value is None or (isinstance(value, (str, list, dict)) and not value)
 
 
 def get_checkpoint_path(ticker: str, analysis_date: str) -> Path:
     """获取断点文件路径
-    
+
     Args:
         ticker: 股票代码
         analysis_date: 分析日期 (YYYY-MM-DD格式)
-    
+
     Returns:
         断点文件的完整路径
     """
     # 使用项目根目录下的checkpoints文件夹
     checkpoint_dir = Path("checkpoints") / ticker
     checkpoint_dir.mkdir(parents=True, exist_ok=True)
-    
+
     # 文件名包含日期信息
-    filename = f"checkpoint_{analysis_date.replace('-', '')}.json"
+    filename = f"checkpoint_{analysis_date.replace('-', '')}.ckpt"
     return checkpoint_dir / filename
 
 
+def _get_legacy_checkpoint_path(ticker: str, analysis_date: str) -> Path:
+    """旧版JSON断点文件路径（只读兼容）"""
+    return Path("checkpoints") / ticker / f"checkpoint_{analysis_date.replace('-', '')}.json"
+
+
+class CheckpointStore:
+    """增量二进制断点存储
+
+    每个 (股票, 日期) 对应一个追加写入的日志文件，每条记录是本次变化的状态键
+    （pickle编码）。加载时按顺序合并所有记录；记录数超过 compact_after 时把合并后的
+    状态写入临时文件、fsync 后原子替换原文件。fsync 每 fsync_every 条记录或
+    fsync_interval 秒执行一次，调用 sync() 时立即执行。
+    """
+
+    def __init__(self, fsync_every: int = 8, fsync_interval: float = 2.0, compact_after: int = 64):
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact_after = compact_after
+
+        self._lock = threading.RLock()
+        # 路径 -> 已写入的合并状态 / 打开的文件句柄 / 记录数 / 未fsync的记录数 / 上次fsync时间
+        self._states: Dict[Path, Dict[str, Any]] = {}
+        self._handles: Dict[Path, Any] = {}
+        self._record_counts: Dict[Path, int] = {}
+        self._unsynced: Dict[Path, int] = {}
+        self._last_sync: Dict[Path, float] = {}
+
+    def _read_records(self, path: Path) -> Tuple[Dict[str, Any], int, int]:
+        """读取日志并合并为完整状态，返回 (状态, 记录数, 有效字节数)"""
+        state: Dict[str, Any] = {}
+        count = 0
+        valid_bytes = 0
+        if not path.exists():
+            return state, count, valid_bytes
+
+        with open(path, "rb") as f:
+            data = f.read()
+        offset = 0
+        while offset + _RECORD_HEADER.size <= len(data):
+            (length,) = _RECORD_HEADER.unpack_from(data, offset)
+            end = offset + _RECORD_HEADER.size + length
+            if end > len(data):
+                break
+            try:
+                delta = pickle.loads(data[offset + _RECORD_HEADER.size:end])
+            except Exception:
+                break
+            state.update(delta)
+            count += 1
+            offset = valid_bytes = end
+
+        if valid_bytes < len(data):
+            logger.warning(f"断点文件尾部记录不完整，已忽略 {len(data) - valid_bytes} 字节: {path}")
+        return state, count, valid_bytes
+
+    def _load_into_cache(self, path: Path):
+        if path in self._states:
+            return
+        state, count, valid_bytes = self._read_records(path)
+        if path.exists() and valid_bytes < path.stat().st_size:
+            # 截掉崩溃时写了一半的记录，后续追加才能被正确读取
+            with open(path, "r+b") as f:
+                f.truncate(valid_bytes)
+        self._states[path] = state
+        self._record_counts[path] = count
+        self._unsynced[path] = 0
+        self._last_sync[path] = time.time()
+
+    def _handle(self, path: Path):
+        handle = self._handles.get(path)
+        if handle is None:
+            handle = open(path, "ab")
+            self._handles[path] = handle
+        return handle
+
+    def _fsync(self, path: Path):
+        handle = self._handles.get(path)
+        if handle is not None:
+            handle.flush()
+            os.fsync(handle.fileno())
+        self._unsynced[path] = 0
+        self._last_sync[path] = time.time()
+
+    def _close(self, path: Path):
+        handle = self._handles.pop(path, None)
+        if handle is not None:
+            handle.close()
+
+    def save(self, state: Dict[str, Any], ticker: str, analysis_date: str) -> int:
+        """追加保存与上次相比发生变化的状态键，返回写入的键数量
+
+        completed_nodes 与已保存的列表取并集，并行分支的保存顺序不影响结果；
+        空值（如初始状态中的空报告）不覆盖已保存的非空值
+        """
+        path = get_checkpoint_path(ticker, analysis_date).resolve()
+        with self._lock:
+            self._load_into_cache(path)
+            current = self._states[path]
+            if "completed_nodes" in state:
+                state = dict(state)
+                state["completed_nodes"] = _union_nodes(current.get("completed_nodes"),
+                                                        state["completed_nodes"])
+            delta = {
+                key: value for key, value in state.items()
+                if not _is_message_key(key) and (key not in current or current[key] != value)
+                and not (_is_empty(value) and not _is_empty(current.get(key)))
+            }
+            if not delta:
+                return 0
+
+            delta["_checkpoint_timestamp"] = datetime.now().isoformat()
+            payload = pickle.dumps(delta, protocol=pickle.HIGHEST_PROTOCOL)
+            handle = self._handle(path)
+            handle.write(_RECORD_HEADER.pack(len(payload)) + payload)
+            handle.flush()
+
+            # 保存副本，避免调用方之后原地修改列表/字典导致下次比较失效
+            current.update({
+                key: copy.deepcopy(value) if isinstance(value, (list, dict)) else value
+                for key, value in delta.items()
+            })
+            self._record_counts[path] += 1
+            self._unsynced[path] += 1
+
+            if self._record_counts[path] > self.compact_after:
+                self._compact(path)
+            elif (self._unsynced[path] >= self.fsync_every or
+                  time.time() - self._last_sync[path] >= self.fsync_interval):
+                self._fsync(path)
+            return len(delta) - 1
+
+    def _compact(self, path: Path):
+        """把合并后的状态原子地重写为一条记录"""
+        self._close(path)
+        payload = pickle.dumps(self._states[path], protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(_RECORD_HEADER.pack(len(payload)) + payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        self._record_counts[path] = 1
+        self._unsynced[path] = 0
+        self._last_sync[path] = time.time()
+        logger.debug(f"断点文件已压缩: {path}")
+
+    def load(self, ticker: str, analysis_date: str) -> Optional[Dict[str, Any]]:
+        """加载合并后的断点状态，不存在时返回None"""
+        path = get_checkpoint_path(ticker, analysis_date).resolve()
+        with self._lock:
+            self._load_into_cache(path)
+            if not self._record_counts[path]:
+                return None
+            return dict(self._states[path])
+
+    def sync(self, ticker: str, analysis_date: str):
+        """立即fsync并关闭文件句柄、释放内存中的状态（一次分析结束时调用）"""
+        path = get_checkpoint_path(ticker, analysis_date).resolve()
+        with self._lock:
+            if path in self._handles:
+                self._fsync(path)
+                self._close(path)
+            self._forget(path)
+
+    def _forget(self, path: Path):
+        for cache in (self._states, self._record_counts, self._unsynced, self._last_sync):
+            cache.pop(path, None)
+
+    def clear(self, ticker: str, analysis_date: str):
+        path = get_checkpoint_path(ticker, analysis_date).resolve()
+        with self._lock:
+            self._close(path)
+            self._forget(path)
+            if path.exists():
+                path.unlink()
+                logger.info(f"断点文件已清除: {path}")
+
+
+_checkpoint_store = CheckpointStore()
+
+
+def get_checkpoint_store() -> CheckpointStore:
+    """获取全局断点存储实例"""
+    return _checkpoint_store
+
+
 def save_checkpoint(state: Dict[str, Any], ticker: str, analysis_date: str) -> bool:
-    """保存断点状态到文件
-    
+    """保存断点状态（只追加发生变化的状态键）
+
     Args:
-        state: 要保存的状态字典
+        state: 要保存的状态字典（完整状态或节点输出的增量均可）
         ticker: 股票代码
         analysis_date: 分析日期
-    
+
     Returns:
         保存是否成功
     """
     try:
-        checkpoint_path = get_checkpoint_path(ticker, analysis_date)
-        
-        # 添加保存时间戳
-        state_with_timestamp = state.copy()
-        state_with_timestamp['_checkpoint_timestamp'] = datetime.now().isoformat()
-        
-        # 保存到文件
-        with open(checkpoint_path, "w", encoding="utf-8") as f:
-            json.dump(state_with_timestamp, f, ensure_ascii=False, indent=2, cls=CustomEncoder)
-        
-        logger.info(f"断点保存成功: {checkpoint_path}")
+        written = _checkpoint_store.save(state, ticker, analysis_date)
+        logger.debug(f"断点保存成功: {ticker} {analysis_date}，更新{written}个键")
         return True
-        
+
     except Exception as e:
         logger.error(f"断点保存失败: {e}")
         return False
@@ -123,55 +284,64 @@ def save_checkpoint(state: Dict[str, Any], ticker: str, analysis_date: str) -> b
 
 def load_checkpoint(ticker: str, analysis_date: str) -> Optional[Dict[str, Any]]:
     """从文件加载断点状态
-    
+
     Args:
         ticker: 股票代码
         analysis_date: 分析日期
-    
+
     Returns:
-        加载的状态字典，如果文件不存在或加载失败则返回None
+        合并后的状态字典（不含消息列表），如果文件不存在或加载失败则返回None
     """
     try:
-        checkpoint_path = get_checkpoint_path(ticker, analysis_date)
-        
-        if not checkpoint_path.exists():
-            logger.info(f"断点文件不存在: {checkpoint_path}")
-            return None
-        
-        with open(checkpoint_path, "r", encoding="utf-8") as f:
-            state = json.load(f)
-        
+        state = _checkpoint_store.load(ticker, analysis_date)
+        if state is None:
+            legacy_path = _get_legacy_checkpoint_path(ticker, analysis_date)
+            if not legacy_path.exists():
+                logger.info(f"断点文件不存在: {get_checkpoint_path(ticker, analysis_date)}")
+                return None
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                state = {k: v for k, v in json.load(f).items() if not _is_message_key(k)}
+            logger.info(f"加载旧版JSON断点文件: {legacy_path}")
+
         # 检查时间戳
         timestamp = state.get('_checkpoint_timestamp')
         if timestamp:
             logger.info(f"加载断点文件，保存时间: {timestamp}")
-        
-        logger.info(f"断点加载成功: {checkpoint_path}")
+
+        logger.info(f"断点加载成功: {ticker} {analysis_date}，已完成节点: {len(state.get('completed_nodes', []))}")
         return state
-        
+
     except Exception as e:
         logger.error(f"断点加载失败: {e}")
         return None
 
 
+def sync_checkpoint(ticker: str, analysis_date: str) -> None:
+    """立即把断点写入磁盘"""
+    try:
+        _checkpoint_store.sync(ticker, analysis_date)
+    except Exception as e:
+        logger.error(f"断点同步失败: {e}")
+
+
 def clear_checkpoint(ticker: str, analysis_date: str) -> bool:
     """清除断点文件
-    
+
     Args:
         ticker: 股票代码
         analysis_date: 分析日期
-    
+
     Returns:
         清除是否成功
     """
     try:
-        checkpoint_path = get_checkpoint_path(ticker, analysis_date)
-        
-        if checkpoint_path.exists():
-            checkpoint_path.unlink()
-            logger.info(f"断点文件已清除: {checkpoint_path}")
+        _checkpoint_store.clear(ticker, analysis_date)
+        legacy_path = _get_legacy_checkpoint_path(ticker, analysis_date)
+        if legacy_path.exists():
+            legacy_path.unlink()
+            logger.info(f"断点文件已清除: {legacy_path}")
         return True
-        
+
     except Exception as e:
         logger.error(f"清除断点文件失败: {e}")
         return False
@@ -179,11 +349,11 @@ def clear_checkpoint(ticker: str, analysis_date: str) -> bool:
 
 def is_node_completed(state: Dict[str, Any], node_name: str) -> bool:
     """检查节点是否已完成
-    
+
     Args:
         state: 状态字典
         node_name: 节点名称
-    
+
     Returns:
         节点是否已完成
     """
@@ -193,14 +363,14 @@ def is_node_completed(state: Dict[str, Any], node_name: str) -> bool:
 
 def mark_node_completed(state: Dict[str, Any], node_name: str) -> None:
     """标记节点为已完成
-    
+
     Args:
         state: 状态字典
         node_name: 节点名称
     """
     if "completed_nodes" not in state:
         state["completed_nodes"] = []
-    
+
     if node_name not in state["completed_nodes"]:
         state["completed_nodes"].append(node_name)
         logger.debug(f"节点标记为已完成: {node_name}")
@@ -208,19 +378,19 @@ def mark_node_completed(state: Dict[str, Any], node_name: str) -> None:
 
 def get_checkpoint_summary(state: Dict[str, Any]) -> Dict[str, Any]:
     """获取断点状态摘要
-    
+
     Args:
         state: 状态字典
-    
+
     Returns:
         断点摘要信息
     """
     completed_nodes = state.get("completed_nodes", [])
-    
+
     return {
         "total_nodes_completed": len(completed_nodes),
         "completed_nodes": completed_nodes,
         "checkpoint_timestamp": state.get("_checkpoint_timestamp"),
         "company_of_interest": state.get("company_of_interest"),
         "trade_date": state.get("trade_date")
-    }
\ No newline at end of file
+    }
@@ -145,11 +145,11 @@ def cleanup_expired_checkpoints(checkpoints_root: str = "checkpoints", days_to_k
         
         # 遍历断点文件
         for checkpoint_file in ticker_dir.iterdir():
-            if not checkpoint_file.is_file() or not checkpoint_file.name.endswith('.json'):
+            if not checkpoint_file.is_file() or not checkpoint_file.name.endswith(('.ckpt', '.json')):
                 continue
             
             try:
-                # 从文件名解析日期 (checkpoint_YYYYMMDD.json)
+                # 从文件名解析日期 (checkpoint_YYYYMMDD.ckpt，旧版为 .json)
                 if checkpoint_file.name.startswith('checkpoint_'):
                     date_str = checkpoint_file.name[11:19]  # 提取YYYYMMDD
                     file_date = datetime.strptime(date_str, "%Y%m%d")
@@ -6,6 +6,9 @@
 import pandas as pd
 import re
 import logging
+import hashlib
+import threading
+from collections import OrderedDict
 from typing import List, Dict, Tuple, Optional
 from datetime import datetime
 import numpy as np
@@ -15,8 +18,109 @@ from .news_filter import NewsRelevanceFilter, create_news_filter, get_company_na
 
 logger = logging.getLogger(__name__)
 
+# 语义相似度模型（支持中文的轻量级模型）
+SEMANTIC_MODEL_NAME = "paraphrase-multilingual-MiniLM-L12-v2"
+# 本地中文新闻分类模型
+CLASSIFICATION_MODEL_NAME = "uer/roberta-base-finetuned-chinanews-chinese"
+# 新闻文本embedding缓存条数
+EMBEDDING_CACHE_SIZE = 4096
+
+# 进程内共享的模型注册表：模型名 -> 已加载的模型（加载失败记为None，不再重复尝试）
+_models: Dict[str, object] = {}
+_models_lock = threading.Lock()
+
+# 按内容哈希缓存的归一化embedding
+_embedding_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+_embedding_cache_lock = threading.Lock()
+
+
+def get_sentence_model(model_name: str = SEMANTIC_MODEL_NAME):
+    """获取共享的SentenceTransformer模型，首次调用时加载"""
+    with _models_lock:
+        if model_name not in _models:
+            try:
+                from sentence_transformers import SentenceTransformer
+                logger.info(f"[增强过滤器] 正在加载语义相似度模型: {model_name}")
+                _models[model_name] = SentenceTransformer(model_name)
+                logger.info(f"[增强过滤器] ✅ 语义模型加载成功: {model_name}")
+            except ImportError:
+                logger.warning("[增强过滤器] sentence-transformers未安装，跳过语义过滤")
+                _models[model_name] = None
+            except Exception as e:
+                logger.error(f"[增强过滤器] 语义模型初始化失败: {e}")
+                _models[model_name] = None
+        return _models[model_name]
+
+
+def get_classification_model(model_name: str = CLASSIFICATION_MODEL_NAME):
+    """获取共享的 (tokenizer, 分类模型)，首次调用时加载"""
+    with _models_lock:
+        if model_name not in _models:
+            try:
+                from transformers import AutoTokenizer, AutoModelForSequenceClassification
+                logger.info(f"[增强过滤器] 正在加载本地分类模型: {model_name}")
+                tokenizer = AutoTokenizer.from_pretrained(model_name)
+                model = AutoModelForSequenceClassification.from_pretrained(model_name)
+                model.eval()
+                _models[model_name] = (tokenizer, model)
+                logger.info(f"[增强过滤器] ✅ 分类模型加载成功: {model_name}")
+            except ImportError:
+                logger.warning("[增强过滤器] transformers未安装，跳过本地模型分类")
+                _models[model_name] = None
+            except Exception as e:
+                logger.error(f"[增强过滤器] 本地分类模型初始化失败: {e}")
+                _models[model_name] = None
+        return _models[model_name]
+
+
+def encode_texts(model, texts: List[str], model_name: str = SEMANTIC_MODEL_NAME) -> np.ndarray:
+    """批量编码文本，返回按行L2归一化的矩阵；已编码过的文本直接从缓存读取"""
+    keys = [hashlib.sha1(f"{model_name}\0{text}".encode("utf-8")).hexdigest() for text in texts]
+    vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+    missing: Dict[str, List[int]] = {}
+
+    with _embedding_cache_lock:
+        for i, key in enumerate(keys):
+            cached = _embedding_cache.get(key)
+            if cached is not None:
+                _embedding_cache.move_to_end(key)
+                vectors[i] = cached
+            else:
+                missing.setdefault(key, []).append(i)
+
+    if missing:
+        miss_keys = list(missing)
+        encoded = np.asarray(model.encode([texts[missing[key][0]] for key in miss_keys], batch_size=32), dtype=np.float32)
+        norms = np.linalg.norm(encoded, axis=1, keepdims=True)
+        encoded = encoded / np.where(norms == 0, 1, norms)
+        with _embedding_cache_lock:
+            for key, vector in zip(miss_keys, encoded):
+                _embedding_cache[key] = vector
+                for i in missing[key]:
+                    vectors[i] = vector
+            while len(_embedding_cache) > EMBEDDING_CACHE_SIZE:
+                _embedding_cache.popitem(last=False)
+
+    if not vectors:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.vstack(vectors)
+
+
+def _news_text(title, content, length: int) -> str:
+    """组合标题和内容前 length 个字符"""
+    title = title if isinstance(title, str) else ""
+    content = content if isinstance(content, str) else ""
+    return f"{title} {content[:length]}"
+
 class EnhancedNewsFilter(NewsRelevanceFilter):
     """增强新闻过滤器，集成本地模型和多种过滤策略"""
+
+    # 综合评分权重
+    SCORE_WEIGHTS = {
+        'rule': 0.4,      # 规则过滤权重40%
+        'semantic': 0.35,  # 语义相似度权重35%
+        'classification': 0.25  # 分类模型权重25%
+    }
     
     def __init__(self, stock_code: str, company_name: str, use_semantic: bool = True, use_local_model: bool = False):
         """
@@ -47,65 +151,37 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
             self._init_classification_model()
     
     def _init_semantic_model(self):
-        """初始化语义相似度模型"""
+        """初始化语义相似度模型（模型进程内共享，只预计算本公司的embedding）"""
         try:
-            logger.info("[增强过滤器] 正在加载语义相似度模型...")
-            
-            # 尝试使用sentence-transformers
-            try:
-                from sentence_transformers import SentenceTransformer
-                
-                # 使用轻量级中文模型
-                model_name = "paraphrase-multilingual-MiniLM-L12-v2"  # 支持中文的轻量级模型
-                self.sentence_model = SentenceTransformer(model_name)
-                
-                # 预计算公司相关的embedding
-                company_texts = [
-                    self.company_name,
-                    f"{self.company_name}股票",
-                    f"{self.company_name}公司",
-                    f"{self.stock_code}",
-                    f"{self.company_name}业绩",
-                    f"{self.company_name}财报"
-                ]
-                
-                self.company_embedding = self.sentence_model.encode(company_texts)
-                logger.info(f"[增强过滤器] ✅ 语义模型加载成功: {model_name}")
-                
-            except ImportError:
-                logger.warning("[增强过滤器] sentence-transformers未安装，跳过语义过滤")
+            self.sentence_model = get_sentence_model()
+            if self.sentence_model is None:
                 self.use_semantic = False
-                
+                return
+
+            # 预计算公司相关的embedding
+            company_texts = [
+                self.company_name,
+                f"{self.company_name}股票",
+                f"{self.company_name}公司",
+                f"{self.stock_code}",
+                f"{self.company_name}业绩",
+                f"{self.company_name}财报"
+            ]
+
+            self.company_embedding = encode_texts(self.sentence_model, company_texts)
+
         except Exception as e:
             logger.error(f"[增强过滤器] 语义模型初始化失败: {e}")
             self.use_semantic = False
-    
+
     def _init_classification_model(self):
-        """初始化本地分类模型"""
-        try:
-            logger.info("[增强过滤器] 正在加载本地分类模型...")
-            
-            # 尝试使用transformers库的中文分类模型
-            try:
-                from transformers import AutoTokenizer, AutoModelForSequenceClassification
-                import torch
-                
-                # 使用轻量级中文文本分类模型
-                model_name = "uer/roberta-base-finetuned-chinanews-chinese"
-                
-                self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-                self.classification_model = AutoModelForSequenceClassification.from_pretrained(model_name)
-                
-                logger.info(f"[增强过滤器] ✅ 分类模型加载成功: {model_name}")
-                
-            except ImportError:
-                logger.warning("[增强过滤器] transformers未安装，跳过本地模型分类")
-                self.use_local_model = False
-                
-        except Exception as e:
-            logger.error(f"[增强过滤器] 本地分类模型初始化失败: {e}")
+        """初始化本地分类模型（进程内共享）"""
+        loaded = get_classification_model()
+        if loaded is None:
             self.use_local_model = False
-    
+            return
+        self.tokenizer, self.classification_model = loaded
+
     def calculate_semantic_similarity(self, title: str, content: str) -> float:
         """
         计算语义相似度评分
@@ -117,36 +193,27 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
         Returns:
             float: 语义相似度评分 (0-100)
         """
-        if not self.use_semantic or self.sentence_model is None:
-            return 0
-        
+        return float(self.calculate_semantic_scores([_news_text(title, content, 200)])[0])
+
+    def calculate_semantic_scores(self, texts: List[str]) -> np.ndarray:
+        """批量计算语义相似度评分：一次编码所有文本，再与公司embedding做一次矩阵乘法
+
+        Returns:
+            np.ndarray: 每条文本与公司相关文本的最高余弦相似度 (0-100)
+        """
+        if not self.use_semantic or self.sentence_model is None or not texts:
+            return np.zeros(len(texts))
+
         try:
-            # 组合标题和内容的前200字符
-            text = f"{title} {content[:200]}"
-            
-            # 计算文本embedding
-            text_embedding = self.sentence_model.encode([text])
-            
-            # 计算与公司相关文本的相似度
-            similarities = []
-            for company_emb in self.company_embedding:
-                similarity = np.dot(text_embedding[0], company_emb) / (
-                    np.linalg.norm(text_embedding[0]) * np.linalg.norm(company_emb)
-                )
-                similarities.append(similarity)
-            
-            # 取最高相似度
-            max_similarity = max(similarities)
-            
-            # 转换为0-100评分
-            semantic_score = max(0, min(100, max_similarity * 100))
-            
-            logger.debug(f"[增强过滤器] 语义相似度评分: {semantic_score:.1f}")
-            return semantic_score
-            
+            text_embeddings = encode_texts(self.sentence_model, texts)
+            similarities = text_embeddings @ self.company_embedding.T
+            semantic_scores = np.clip(similarities.max(axis=1) * 100, 0, 100)
+            logger.debug(f"[增强过滤器] 批量语义评分完成: {len(texts)}条")
+            return semantic_scores
+
         except Exception as e:
             logger.error(f"[增强过滤器] 语义相似度计算失败: {e}")
-            return 0
+            return np.zeros(len(texts))
     
     def classify_news_relevance(self, title: str, content: str) -> float:
         """
@@ -159,48 +226,43 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
         Returns:
             float: 分类相关性评分 (0-100)
         """
-        if not self.use_local_model or self.classification_model is None:
-            return 0
-        
+        return float(self.classify_news_batch([_news_text(title, content, 300)])[0])
+
+    def classify_news_batch(self, texts: List[str], batch_size: int = 16) -> np.ndarray:
+        """批量分类新闻相关性，返回每条文本的相关性评分 (0-100)"""
+        if not self.use_local_model or self.classification_model is None or not texts:
+            return np.zeros(len(texts))
+
         try:
             import torch
-            
-            # 构建分类文本
-            text = f"{title} {content[:300]}"
-            
+
             # 添加公司信息作为上下文
-            context_text = f"关于{self.company_name}({self.stock_code})的新闻: {text}"
-            
-            # 分词和编码
-            inputs = self.tokenizer(
-                context_text,
-                return_tensors="pt",
-                truncation=True,
-                padding=True,
-                max_length=512
-            )
-            
-            # 模型推理
-            with torch.no_grad():
-                outputs = self.classification_model(**inputs)
-                logits = outputs.logits
-                
-                # 使用softmax获取概率分布
-                probabilities = torch.softmax(logits, dim=-1)
-                
-                # 假设第一个类别是"相关"，第二个是"不相关"
-                # 这里需要根据具体模型调整
-                relevance_prob = probabilities[0][0].item()  # 相关性概率
-                
-                # 转换为0-100评分
-                classification_score = relevance_prob * 100
-                
-                logger.debug(f"[增强过滤器] 分类模型评分: {classification_score:.1f}")
-                return classification_score
-                
+            context_texts = [f"关于{self.company_name}({self.stock_code})的新闻: {text}" for text in texts]
+            scores = []
+            for start in range(0, len(context_texts), batch_size):
+                # 分词和编码
+                inputs = self.tokenizer(
+                    context_texts[start:start + batch_size],
+                    return_tensors="pt",
+                    truncation=True,
+                    padding=True,
+                    max_length=512
+                )
+
+                # 模型推理
+                with torch.no_grad():
+                    logits = self.classification_model(**inputs).logits
+                    # 假设第一个类别是"相关"，第二个是"不相关"
+                    # 这里需要根据具体模型调整
+                    probabilities = torch.softmax(logits, dim=-1)
+                    scores.extend((probabilities[:, 0] * 100).tolist())
+
+            logger.debug(f"[增强过滤器] 批量分类完成: {len(texts)}条")
+            return np.asarray(scores)
+
         except Exception as e:
             logger.error(f"[增强过滤器] 本地模型分类失败: {e}")
-            return 0
+            return np.zeros(len(texts))
     
     def calculate_enhanced_relevance_score(self, title: str, content: str) -> Dict[str, float]:
         """
@@ -234,11 +296,7 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
             scores['classification_score'] = 0
         
         # 4. 综合评分（加权平均）
-        weights = {
-            'rule': 0.4,      # 规则过滤权重40%
-            'semantic': 0.35,  # 语义相似度权重35%
-            'classification': 0.25  # 分类模型权重25%
-        }
+        weights = self.SCORE_WEIGHTS
         
         final_score = (
             weights['rule'] * rule_score +
@@ -270,23 +328,47 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
         
         logger.info(f"[增强过滤器] 开始增强过滤，原始数量: {len(news_df)}条，最低评分阈值: {min_score}")
         
+        titles = [row.get('新闻标题', row.get('标题', '')) for _, row in news_df.iterrows()]
+        contents = [row.get('新闻内容', row.get('内容', '')) for _, row in news_df.iterrows()]
+
+        # 1. 基础规则评分（逐条，纯字符串规则）
+        rule_scores = np.array([
+            self.calculate_relevance_score(title, content)
+            for title, content in zip(titles, contents)
+        ], dtype=float)
+
+        # 2/3. 语义相似度与本地模型分类（整批计算）
+        semantic_scores = self.calculate_semantic_scores(
+            [_news_text(title, content, 200) for title, content in zip(titles, contents)]
+        )
+        classification_scores = self.classify_news_batch(
+            [_news_text(title, content, 300) for title, content in zip(titles, contents)]
+        )
+
+        # 4. 综合评分（加权平均）
+        weights = self.SCORE_WEIGHTS
+        final_scores = (
+            weights['rule'] * rule_scores +
+            weights['semantic'] * semantic_scores +
+            weights['classification'] * classification_scores
+        )
+
         filtered_news = []
-        
-        for idx, row in news_df.iterrows():
-            title = row.get('新闻标题', row.get('标题', ''))
-            content = row.get('新闻内容', row.get('内容', ''))
-            
-            # 计算增强评分
-            scores = self.calculate_enhanced_relevance_score(title, content)
-            
-            if scores['final_score'] >= min_score:
+        for i, (_, row) in enumerate(news_df.iterrows()):
+            title = titles[i]
+            if final_scores[i] >= min_score:
                 row_dict = row.to_dict()
-                row_dict.update(scores)  # 添加所有评分信息
+                row_dict.update({
+                    'rule_score': rule_scores[i],
+                    'semantic_score': float(semantic_scores[i]),
+                    'classification_score': float(classification_scores[i]),
+                    'final_score': float(final_scores[i]),
+                })
                 filtered_news.append(row_dict)
-                
-                logger.debug(f"[增强过滤器] 保留新闻 (综合评分: {scores['final_score']:.1f}): {title[:50]}...")
+
+                logger.debug(f"[增强过滤器] 保留新闻 (综合评分: {final_scores[i]:.1f}): {str(title)[:50]}...")
             else:
-                logger.debug(f"[增强过滤器] 过滤新闻 (综合评分: {scores['final_score']:.1f}): {title[:50]}...")
+                logger.debug(f"[增强过滤器] 过滤新闻 (综合评分: {final_scores[i]:.1f}): {str(title)[:50]}...")
         
         # 创建过滤后的DataFrame
         if filtered_news:
@@ -2,15 +2,25 @@
 """
 统一日志管理器
 提供项目级别的日志配置和管理功能
+
+热路径日志约定：
+- 诊断字段用 lazy() 包装或 log_event() 传入，只有级别启用时才计算
+- 文件/结构化日志经队列交给后台线程格式化和写盘，分析线程只负责入队
+- 可按日志器前缀对 INFO 及以下的记录采样（TRADINGAGENTS_LOG_SAMPLING="tools=0.1"）
 """
 
+import atexit
+import copy
 import logging
 import logging.handlers
 import os
+import queue
 import sys
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional, Union
+from typing import Dict, Any, Optional, Tuple, Union
 import json
 import toml
 
@@ -33,13 +43,184 @@ class ColoredFormatter(logging.Formatter):
     }
     
     def format(self, record):
-        # 添加颜色
+        # 添加颜色（在副本上修改，同一条记录还会交给后台线程写文件）
         if hasattr(record, 'levelname') and record.levelname in self.COLORS:
+            record = logging.makeLogRecord(record.__dict__)
             record.levelname = f"{self.COLORS[record.levelname]}{record.levelname}{self.COLORS['RESET']}"
         
         return super().format(record)
 
 
+class LazyValue:
+    """延迟计算的日志字段：只有在日志真正被格式化时才调用函数（结果缓存）"""
+
+    __slots__ = ('func', 'args', 'kwargs', '_value', '_done')
+
+    def __init__(self, func, *args, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self._done = False
+        self._value = None
+
+    def get(self):
+        if not self._done:
+            try:
+                self._value = self.func(*self.args, **self.kwargs)
+            except Exception as e:
+                self._value = f"<计算失败: {e}>"
+            self._done = True
+        return self._value
+
+    def __str__(self):
+        return str(self.get())
+
+    def __repr__(self):
+        return repr(self.get())
+
+    def __format__(self, spec):
+        return format(self.get(), spec)
+
+
+def lazy(func, *args, **kwargs) -> LazyValue:
+    """
+    包装昂贵的诊断字段，配合 %-格式化使用：
+
+        logger.debug("返回的ts_code: %s", lazy(lambda: data['ts_code'].unique()))
+
+    级别未启用时函数不会被调用；启用时在写日志的线程中计算（函数应只读数据）。
+    """
+    return LazyValue(func, *args, **kwargs)
+
+
+def resolve_lazy(value):
+    """把 LazyValue（包括字典/列表中的）替换为计算结果"""
+    if isinstance(value, LazyValue):
+        return value.get()
+    if isinstance(value, dict):
+        return {k: resolve_lazy(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [resolve_lazy(v) for v in value]
+    return value
+
+
+def log_event(logger: logging.Logger, level: int, message: str, *args,
+              event_type: Optional[str] = None, **fields):
+    """
+    结构化日志：级别未启用时立即返回，不计算任何字段
+
+    Args:
+        logger: 日志器
+        level: 日志级别（logging.INFO 等）
+        message: 消息模板（%-格式化，参数可以是 lazy 值）
+        event_type: 事件类型，写入结构化日志的 event_type 字段
+        **fields: 结构化字段，LazyValue 字段在这里才计算
+    """
+    if not logger.isEnabledFor(level):
+        return
+    extra = {'fields': {k: resolve_lazy(v) for k, v in fields.items()}}
+    if event_type:
+        extra['event_type'] = event_type
+    logger.log(level, message, *args, extra=extra, stacklevel=2)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    按日志器名称前缀对 WARNING 以下的记录采样
+
+    rate=0.1 表示每10条保留1条（确定性累加，第一条总是保留）；
+    同一条记录经过多个处理器时只判定一次。
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # 最长前缀优先匹配
+        self.rates = sorted(((prefix, float(rate)) for prefix, rate in rates.items()),
+                            key=lambda item: -len(item[0]))
+        self._credit: Dict[str, float] = {}
+        self._category_cache: Dict[str, Optional[Tuple[str, float]]] = {}
+        self._lock = threading.Lock()
+        self.sampled_out = 0
+
+    def _category(self, name: str) -> Optional[Tuple[str, float]]:
+        if name not in self._category_cache:
+            match = None
+            for prefix, rate in self.rates:
+                if name == prefix or name.startswith(prefix + '.'):
+                    match = (prefix, rate)
+                    break
+            self._category_cache[name] = match
+        return self._category_cache[name]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        decision = getattr(record, '_sampled_keep', None)
+        if decision is not None:
+            return decision
+
+        keep = True
+        category = self._category(record.name) if record.levelno < logging.WARNING else None
+        if category is not None:
+            prefix, rate = category
+            with self._lock:
+                # 初始额度保证第一条保留；容差避免浮点累加误差漏掉整数周期
+                credit = self._credit.get(prefix, 1.0 - rate) + rate
+                keep = credit >= 1.0 - 1e-9
+                self._credit[prefix] = credit - 1.0 if keep else credit
+                if not keep:
+                    self.sampled_out += 1
+        record._sampled_keep = keep
+        return keep
+
+
+def parse_sampling(spec: str) -> Dict[str, float]:
+    """解析 "tools=0.1,agents=0.5" 形式的采样配置"""
+    rates = {}
+    for item in (spec or '').split(','):
+        if '=' in item:
+            prefix, rate = item.split('=', 1)
+            try:
+                rates[prefix.strip()] = max(0.0, min(1.0, float(rate)))
+            except ValueError:
+                _bootstrap_logger.warning(f"警告: 无效的日志采样配置 {item}")
+    return rates
+
+
+class AsyncQueueHandler(logging.handlers.QueueHandler):
+    """
+    异步队列处理器：调用线程只求值消息并放入队列，布局格式化和写盘在监听线程完成
+
+    记录通过级别和采样过滤后，消息参数（含 lazy 值）和异常堆栈在调用线程中求值，
+    避免监听线程处理时数据已被调用方修改；队列满时丢弃并计数，不阻塞分析线程。
+    """
+
+    _exception_formatter = logging.Formatter()
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 复制记录，同步的控制台处理器仍使用原记录
+        record = copy.copy(record)
+        if record.args:
+            record.args = resolve_lazy(record.args) if isinstance(record.args, dict) \
+                else tuple(resolve_lazy(record.args))
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self._exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
 class StructuredFormatter(logging.Formatter):
     """结构化日志格式化器（JSON格式）"""
     
@@ -55,6 +236,10 @@ class StructuredFormatter(logging.Formatter):
         }
         
         # 添加额外字段
+        if hasattr(record, 'event_type'):
+            log_entry['event_type'] = record.event_type
+        if hasattr(record, 'fields'):
+            log_entry.update(resolve_lazy(record.fields))
         if hasattr(record, 'session_id'):
             log_entry['session_id'] = record.session_id
         if hasattr(record, 'analysis_type'):
@@ -66,7 +251,7 @@ class StructuredFormatter(logging.Formatter):
         if hasattr(record, 'tokens'):
             log_entry['tokens'] = record.tokens
             
-        return json.dumps(log_entry, ensure_ascii=False)
+        return json.dumps(log_entry, ensure_ascii=False, default=str)
 
 
 class TradingAgentsLogger:
@@ -75,6 +260,10 @@ class TradingAgentsLogger:
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         self.config = config or self._load_default_config()
         self.loggers: Dict[str, logging.Logger] = {}
+        self._queue: Optional[queue.Queue] = None
+        self._queue_handler: Optional[AsyncQueueHandler] = None
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self._sampling_filter: Optional[SamplingFilter] = None
         self._setup_logging()
     
     def _load_default_config(self) -> Dict[str, Any]:
@@ -125,7 +314,12 @@ class TradingAgentsLogger:
             'docker': {
                 'enabled': os.getenv('DOCKER_CONTAINER', 'false').lower() == 'true',
                 'stdout_only': True  # Docker环境只输出到stdout
-            }
+            },
+            'async': {
+                'enabled': True,  # 文件/结构化日志由后台线程写入
+                'queue_size': 10000
+            },
+            'sampling': {}
         }
 
     def _load_config_file(self) -> Optional[Dict[str, Any]]:
@@ -170,11 +364,27 @@ class TradingAgentsLogger:
                 'enabled': is_docker,
                 'stdout_only': logging_config.get('docker', {}).get('stdout_only', True)
             },
+            'async': logging_config.get('async', {}),
+            'sampling': logging_config.get('sampling', {}),
             'performance': logging_config.get('performance', {}),
             'security': logging_config.get('security', {}),
             'business': logging_config.get('business', {})
         }
     
+    def _async_config(self) -> Dict[str, Any]:
+        async_config = dict(self.config.get('async') or {})
+        env_value = os.getenv('TRADINGAGENTS_LOG_ASYNC')
+        if env_value is not None:
+            async_config['enabled'] = env_value.lower() == 'true'
+        async_config.setdefault('enabled', True)
+        async_config.setdefault('queue_size', 10000)
+        return async_config
+
+    def _sampling_rates(self) -> Dict[str, float]:
+        rates = {prefix: float(rate) for prefix, rate in (self.config.get('sampling') or {}).items()}
+        rates.update(parse_sampling(os.getenv('TRADINGAGENTS_LOG_SAMPLING', '')))
+        return rates
+
     def _setup_logging(self):
         """设置日志系统"""
         # 创建日志目录
@@ -193,12 +403,75 @@ class TradingAgentsLogger:
         self._add_console_handler(root_logger)
         
         if not self.config['docker']['enabled'] or not self.config['docker']['stdout_only']:
-            self._add_file_handler(root_logger)
+            # 文件类处理器先收集起来，异步模式下交给队列监听线程
+            file_handlers = []
+            self._add_file_handler(file_handlers)
             if self.config['handlers']['structured']['enabled']:
-                self._add_structured_handler(root_logger)
+                self._add_structured_handler(file_handlers)
+            self._attach_file_handlers(root_logger, file_handlers)
+
+        # 采样过滤器挂在根处理器上，对所有日志器生效
+        rates = self._sampling_rates()
+        if rates:
+            self._sampling_filter = SamplingFilter(rates)
+            for handler in root_logger.handlers:
+                handler.addFilter(self._sampling_filter)
         
         # 配置特定日志器
         self._configure_specific_loggers()
+
+    def _attach_file_handlers(self, root_logger: logging.Logger, handlers: list):
+        """同步模式直接挂到根日志器；异步模式通过 QueueHandler + QueueListener 写入"""
+        if not handlers:
+            return
+        async_config = self._async_config()
+        if not async_config['enabled']:
+            for handler in handlers:
+                root_logger.addHandler(handler)
+            return
+
+        self._queue = queue.Queue(maxsize=int(async_config['queue_size']))
+        self._queue_handler = AsyncQueueHandler(self._queue)
+        self._queue_handler.setLevel(min(handler.level for handler in handlers))
+        root_logger.addHandler(self._queue_handler)
+
+        self._listener = logging.handlers.QueueListener(self._queue, *handlers, respect_handler_level=True)
+        self._listener.start()
+        atexit.register(self.shutdown)
+
+    def flush(self, timeout: float = 5.0):
+        """等待队列中的日志写完（测试或进程退出前调用）"""
+        if self._queue is not None:
+            deadline = time.monotonic() + timeout
+            while self._queue.unfinished_tasks and time.monotonic() < deadline:
+                time.sleep(0.005)
+        if self._listener is not None:
+            for handler in self._listener.handlers:
+                handler.flush()
+
+    def shutdown(self):
+        """停止后台写日志线程并关闭文件处理器"""
+        listener, self._listener = self._listener, None
+        if listener is None:
+            return
+        root_logger = logging.getLogger()
+        if self._queue_handler in root_logger.handlers:
+            root_logger.removeHandler(self._queue_handler)
+        try:
+            listener.stop()
+        except Exception:
+            pass
+        for handler in listener.handlers:
+            handler.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """日志系统运行统计"""
+        return {
+            'async': self._listener is not None,
+            'queue_pending': self._queue.qsize() if self._queue is not None else 0,
+            'queue_dropped': self._queue_handler.dropped if self._queue_handler else 0,
+            'sampled_out': self._sampling_filter.sampled_out if self._sampling_filter else 0,
+        }
     
     def _add_console_handler(self, logger: logging.Logger):
         """添加控制台处理器"""
@@ -218,7 +491,7 @@ class TradingAgentsLogger:
         console_handler.setFormatter(formatter)
         logger.addHandler(console_handler)
     
-    def _add_file_handler(self, logger: logging.Logger):
+    def _add_file_handler(self, handlers: list):
         """添加文件处理器"""
         if not self.config['handlers']['file']['enabled']:
             return
@@ -242,9 +515,9 @@ class TradingAgentsLogger:
         
         formatter = logging.Formatter(self.config['format']['file'])
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
     
-    def _add_structured_handler(self, logger: logging.Logger):
+    def _add_structured_handler(self, handlers: list):
         """添加结构化日志处理器"""
         log_dir = Path(self.config['handlers']['structured']['directory'])
         log_file = log_dir / 'tradingagents_structured.log'
@@ -261,7 +534,7 @@ class TradingAgentsLogger:
         
         formatter = StructuredFormatter()
         structured_handler.setFormatter(formatter)
-        logger.addHandler(structured_handler)
+        handlers.append(structured_handler)
     
     def _configure_specific_loggers(self):
         """配置特定的日志器"""
@@ -320,8 +593,10 @@ class TradingAgentsLogger:
     def log_module_start(self, logger: logging.Logger, module_name: str, stock_symbol: str,
                         session_id: str, **extra_data):
         """记录模块开始分析"""
+        if not logger.isEnabledFor(logging.INFO):
+            return
         logger.info(
-            f"📊 [模块开始] {module_name} - 股票: {stock_symbol}",
+            "📊 [模块开始] %s - 股票: %s", module_name, stock_symbol,
             extra={
                 'module_name': module_name,
                 'stock_symbol': stock_symbol,
@@ -336,9 +611,11 @@ class TradingAgentsLogger:
                            session_id: str, duration: float, success: bool = True,
                            result_length: int = 0, **extra_data):
         """记录模块完成分析"""
+        if not logger.isEnabledFor(logging.INFO):
+            return
         status = "✅ 成功" if success else "❌ 失败"
         logger.info(
-            f"📊 [模块完成] {module_name} - {status} - 股票: {stock_symbol}, 耗时: {duration:.2f}s",
+            "📊 [模块完成] %s - %s - 股票: %s, 耗时: %.2fs", module_name, status, stock_symbol, duration,
             extra={
                 'module_name': module_name,
                 'stock_symbol': stock_symbol,
@@ -406,5 +683,7 @@ def get_logger(name: str) -> logging.Logger:
 def setup_logging(config: Optional[Dict[str, Any]] = None):
     """设置项目日志系统（便捷函数）"""
     global _logger_manager
+    if _logger_manager is not None:
+        _logger_manager.shutdown()
     _logger_manager = TradingAgentsLogger(config)
     return _logger_manager
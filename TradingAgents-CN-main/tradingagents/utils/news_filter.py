@@ -251,6 +251,10 @@ def get_company_name(ticker: str) -> str:
     clean_ticker = ticker.split('.')[0]
     
     company_name = STOCK_COMPANY_MAPPING.get(clean_ticker)
+    if not company_name:
+        from tradingagents.dataflows.security_master import lookup_security
+        record = lookup_security(ticker)
+        company_name = record.name if record else None
     
     if company_name:
         logger.debug(f"[公司映射] {ticker} -> {company_name}")
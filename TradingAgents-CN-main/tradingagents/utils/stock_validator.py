@@ -306,80 +306,39 @@ class StockDataPreparer:
         cache_status = ""
 
         try:
-            # 1. 获取基本信息
+            # 1. 获取基本信息（结构化结果，直接读取字段）
             logger.debug(f"📊 [A股数据] 获取{stock_code}基本信息...")
-            from tradingagents.dataflows.interface import get_china_stock_info_unified
-
-            stock_info = get_china_stock_info_unified(stock_code)
+            from tradingagents.dataflows.data_source_manager import (
+                get_china_stock_bars, get_china_stock_info_unified,
+            )
+            from tradingagents.dataflows.stock_data_types import StockInfo
 
-            if stock_info and "❌" not in stock_info and "未能获取" not in stock_info:
-                # 解析股票名称
-                if "股票名称:" in stock_info:
-                    lines = stock_info.split('\n')
-                    for line in lines:
-                        if "股票名称:" in line:
-                            stock_name = line.split(':')[1].strip()
-                            break
+            stock_info = StockInfo.from_dict(stock_code, get_china_stock_info_unified(stock_code))
 
-                # 检查是否为有效的股票名称
-                if stock_name != "未知" and not stock_name.startswith(f"股票{stock_code}"):
-                    has_basic_info = True
-                    logger.info(f"✅ [A股数据] 基本信息获取成功: {stock_code} - {stock_name}")
-                    cache_status += "基本信息已缓存; "
-                else:
-                    logger.warning(f"⚠️ [A股数据] 基本信息无效: {stock_code}")
-                    return StockDataPreparationResult(
-                        is_valid=False,
-                        stock_code=stock_code,
-                        market_type="A股",
-                        error_message=f"股票代码 {stock_code} 不存在或信息无效",
-                        suggestion="请检查股票代码是否正确，或确认该股票是否已上市"
-                    )
+            if stock_info.is_valid:
+                stock_name = stock_info.name
+                has_basic_info = True
+                logger.info(f"✅ [A股数据] 基本信息获取成功: {stock_code} - {stock_name}")
+                cache_status += "基本信息已缓存; "
             else:
                 logger.warning(f"⚠️ [A股数据] 无法获取基本信息: {stock_code}")
                 return StockDataPreparationResult(
                     is_valid=False,
                     stock_code=stock_code,
                     market_type="A股",
-                    error_message=f"无法获取股票 {stock_code} 的基本信息",
+                    error_message=f"股票代码 {stock_code} 不存在或信息无效",
                     suggestion="请检查股票代码是否正确，或确认该股票是否已上市"
                 )
 
-            # 2. 获取历史数据
+            # 2. 获取历史数据（只取数据，不渲染文本）
             logger.debug(f"📊 [A股数据] 获取{stock_code}历史数据 ({start_date_str} 到 {end_date_str})...")
-            from tradingagents.dataflows.interface import get_china_stock_data_unified
-
-            historical_data = get_china_stock_data_unified(stock_code, start_date_str, end_date_str)
-
-            if historical_data and "❌" not in historical_data and "获取失败" not in historical_data:
-                # 更宽松的数据有效性检查
-                data_indicators = [
-                    "开盘价", "收盘价", "最高价", "最低价", "成交量",
-                    "open", "close", "high", "low", "volume",
-                    "日期", "date", "时间", "time"
-                ]
+            historical_data = get_china_stock_bars(stock_code, start_date_str, end_date_str)
 
-                has_valid_data = (
-                    len(historical_data) > 50 and  # 降低长度要求
-                    any(indicator in historical_data for indicator in data_indicators)
-                )
-
-                if has_valid_data:
-                    has_historical_data = True
-                    logger.info(f"✅ [A股数据] 历史数据获取成功: {stock_code} ({period_days}天)")
-                    cache_status += f"历史数据已缓存({period_days}天); "
-                else:
-                    logger.warning(f"⚠️ [A股数据] 历史数据无效: {stock_code}")
-                    logger.debug(f"🔍 [A股数据] 数据内容预览: {historical_data[:200]}...")
-                    return StockDataPreparationResult(
-                        is_valid=False,
-                        stock_code=stock_code,
-                        market_type="A股",
-                        stock_name=stock_name,
-                        has_basic_info=has_basic_info,
-                        error_message=f"股票 {stock_code} 的历史数据无效或不足",
-                        suggestion="该股票可能为新上市股票或数据源暂时不可用，请稍后重试"
-                    )
+            if historical_data is not None and historical_data.quote is not None:
+                has_historical_data = True
+                logger.info(f"✅ [A股数据] 历史数据获取成功: {stock_code} ({len(historical_data)}条, "
+                            f"最新收盘 {historical_data.quote.price:.2f})")
+                cache_status += f"历史数据已缓存({period_days}天); "
             else:
                 logger.warning(f"⚠️ [A股数据] 无法获取历史数据: {stock_code}")
                 return StockDataPreparationResult(
@@ -2,8 +2,10 @@
 """
 工具调用日志装饰器
 为所有工具调用添加统一的日志记录
+参数摘要、结果摘要等诊断字段用 lazy() 包装，只有日志真正输出时才计算
 """
 
+import logging
 import time
 import functools
 from typing import Any, Dict, Optional, Callable
@@ -12,13 +14,28 @@ from datetime import datetime
 from tradingagents.utils.logging_init import get_logger
 
 # 导入日志模块
-from tradingagents.utils.logging_manager import get_logger, get_logger_manager
+from tradingagents.utils.logging_manager import get_logger, get_logger_manager, lazy
 logger = get_logger('agents')
 
 # 工具调用日志器
 tool_logger = get_logger("tools")
 
 
+def _clip(value: Any, limit: int) -> str:
+    text = str(value)
+    return text[:limit] + '...' if len(text) > limit else text
+
+
+def _summarize_args(args: tuple, kwargs: dict) -> Dict[str, Any]:
+    """参数摘要（每个参数最多100字符）"""
+    args_info = {}
+    if args:
+        args_info['args'] = [_clip(arg, 100) for arg in args]
+    if kwargs:
+        args_info['kwargs'] = {k: _clip(v, 100) for k, v in kwargs.items()}
+    return args_info
+
+
 def log_tool_call(tool_name: Optional[str] = None, log_args: bool = True, log_result: bool = False):
     """
     工具调用日志装饰器
@@ -36,31 +53,18 @@ def log_tool_call(tool_name: Optional[str] = None, log_args: bool = True, log_re
             
             # 记录开始时间
             start_time = time.time()
+            info_enabled = tool_logger.isEnabledFor(logging.INFO)
             
-            # 准备参数信息
-            args_info = {}
-            if log_args:
-                # 记录位置参数
-                if args:
-                    args_info['args'] = [str(arg)[:100] + '...' if len(str(arg)) > 100 else str(arg) for arg in args]
-                
-                # 记录关键字参数
-                if kwargs:
-                    args_info['kwargs'] = {
-                        k: str(v)[:100] + '...' if len(str(v)) > 100 else str(v) 
-                        for k, v in kwargs.items()
+            # 记录工具调用开始（参数摘要延迟到格式化时计算）
+            if info_enabled:
+                tool_logger.info(
+                    "🔧 [工具调用] %s - 开始", name,
+                    extra={
+                        'tool_name': name,
+                        'event_type': 'tool_call_start',
+                        'args_info': lazy(_summarize_args, args, kwargs) if log_args else None
                     }
-            
-            # 记录工具调用开始
-            tool_logger.info(
-                f"🔧 [工具调用] {name} - 开始",
-                extra={
-                    'tool_name': name,
-                    'event_type': 'tool_call_start',
-                    'timestamp': datetime.now().isoformat(),
-                    'args_info': args_info if log_args else None
-                }
-            )
+                )
             
             try:
                 # 执行工具函数
@@ -69,23 +73,17 @@ def log_tool_call(tool_name: Optional[str] = None, log_args: bool = True, log_re
                 # 计算执行时间
                 duration = time.time() - start_time
                 
-                # 准备结果信息
-                result_info = None
-                if log_result and result is not None:
-                    result_str = str(result)
-                    result_info = result_str[:200] + '...' if len(result_str) > 200 else result_str
-                
                 # 记录工具调用成功
-                tool_logger.info(
-                    f"✅ [工具调用] {name} - 完成 (耗时: {duration:.2f}s)",
-                    extra={
-                        'tool_name': name,
-                        'event_type': 'tool_call_success',
-                        'duration': duration,
-                        'result_info': result_info if log_result else None,
-                        'timestamp': datetime.now().isoformat()
-                    }
-                )
+                if info_enabled:
+                    tool_logger.info(
+                        "✅ [工具调用] %s - 完成 (耗时: %.2fs)", name, duration,
+                        extra={
+                            'tool_name': name,
+                            'event_type': 'tool_call_success',
+                            'duration': duration,
+                            'result_info': lazy(_clip, result, 200) if log_result and result is not None else None
+                        }
+                    )
                 
                 return result
                 
@@ -95,13 +93,12 @@ def log_tool_call(tool_name: Optional[str] = None, log_args: bool = True, log_re
                 
                 # 记录工具调用失败
                 tool_logger.error(
-                    f"❌ [工具调用] {name} - 失败 (耗时: {duration:.2f}s): {str(e)}",
+                    "❌ [工具调用] %s - 失败 (耗时: %.2fs): %s", name, duration, e,
                     extra={
                         'tool_name': name,
                         'event_type': 'tool_call_error',
                         'duration': duration,
-                        'error': str(e),
-                        'timestamp': datetime.now().isoformat()
+                        'error': str(e)
                     },
                     exc_info=True
                 )
@@ -130,12 +127,11 @@ def log_data_source_call(source_name: str):
             
             # 记录数据源调用开始
             tool_logger.info(
-                f"📊 [数据源] {source_name} - 获取 {symbol} 数据",
+                "📊 [数据源] %s - 获取 %s 数据", source_name, symbol,
                 extra={
                     'data_source': source_name,
                     'symbol': symbol,
-                    'event_type': 'data_source_call',
-                    'timestamp': datetime.now().isoformat()
+                    'event_type': 'data_source_call'
                 }
             )
             
@@ -143,30 +139,29 @@ def log_data_source_call(source_name: str):
                 result = func(*args, **kwargs)
                 duration = time.time() - start_time
                 
-                # 检查结果是否成功
-                success = result and "❌" not in str(result) and "错误" not in str(result)
+                # 检查结果是否成功（结果只转换一次字符串）
+                result_text = str(result) if result else ""
+                success = bool(result_text) and "❌" not in result_text and "错误" not in result_text
                 
                 if success:
                     tool_logger.info(
-                        f"✅ [数据源] {source_name} - {symbol} 数据获取成功 (耗时: {duration:.2f}s)",
+                        "✅ [数据源] %s - %s 数据获取成功 (耗时: %.2fs)", source_name, symbol, duration,
                         extra={
                             'data_source': source_name,
                             'symbol': symbol,
                             'event_type': 'data_source_success',
                             'duration': duration,
-                            'data_size': len(str(result)) if result else 0,
-                            'timestamp': datetime.now().isoformat()
+                            'data_size': len(result_text)
                         }
                     )
                 else:
                     tool_logger.warning(
-                        f"⚠️ [数据源] {source_name} - {symbol} 数据获取失败 (耗时: {duration:.2f}s)",
+                        "⚠️ [数据源] %s - %s 数据获取失败 (耗时: %.2fs)", source_name, symbol, duration,
                         extra={
                             'data_source': source_name,
                             'symbol': symbol,
                             'event_type': 'data_source_failure',
-                            'duration': duration,
-                            'timestamp': datetime.now().isoformat()
+                            'duration': duration
                         }
                     )
                 
@@ -176,14 +171,13 @@ def log_data_source_call(source_name: str):
                 duration = time.time() - start_time
                 
                 tool_logger.error(
-                    f"❌ [数据源] {source_name} - {symbol} 数据获取异常 (耗时: {duration:.2f}s): {str(e)}",
+                    "❌ [数据源] %s - %s 数据获取异常 (耗时: %.2fs): %s", source_name, symbol, duration, e,
                     extra={
                         'data_source': source_name,
                         'symbol': symbol,
                         'event_type': 'data_source_error',
                         'duration': duration,
-                        'error': str(e),
-                        'timestamp': datetime.now().isoformat()
+                        'error': str(e)
                     },
                     exc_info=True
                 )
@@ -209,12 +203,11 @@ def log_llm_call(provider: str, model: str):
             
             # 记录LLM调用开始
             tool_logger.info(
-                f"🤖 [LLM调用] {provider}/{model} - 开始",
+                "🤖 [LLM调用] %s/%s - 开始", provider, model,
                 extra={
                     'llm_provider': provider,
                     'llm_model': model,
-                    'event_type': 'llm_call_start',
-                    'timestamp': datetime.now().isoformat()
+                    'event_type': 'llm_call_start'
                 }
             )
             
@@ -223,13 +216,12 @@ def log_llm_call(provider: str, model: str):
                 duration = time.time() - start_time
                 
                 tool_logger.info(
-                    f"✅ [LLM调用] {provider}/{model} - 完成 (耗时: {duration:.2f}s)",
+                    "✅ [LLM调用] %s/%s - 完成 (耗时: %.2fs)", provider, model, duration,
                     extra={
                         'llm_provider': provider,
                         'llm_model': model,
                         'event_type': 'llm_call_success',
-                        'duration': duration,
-                        'timestamp': datetime.now().isoformat()
+                        'duration': duration
                     }
                 )
                 
@@ -239,14 +231,13 @@ def log_llm_call(provider: str, model: str):
                 duration = time.time() - start_time
                 
                 tool_logger.error(
-                    f"❌ [LLM调用] {provider}/{model} - 失败 (耗时: {duration:.2f}s): {str(e)}",
+                    "❌ [LLM调用] %s/%s - 失败 (耗时: %.2fs): %s", provider, model, duration, e,
                     extra={
                         'llm_provider': provider,
                         'llm_model': model,
                         'event_type': 'llm_call_error',
                         'duration': duration,
-                        'error': str(e),
-                        'timestamp': datetime.now().isoformat()
+                        'error': str(e)
                     },
                     exc_info=True
                 )
@@ -365,8 +356,8 @@ def log_analysis_module(module_name: str, session_id: str = None):
                 # 计算执行时间
                 duration = time.time() - start_time
 
-                # 记录模块完成
-                result_length = len(str(result)) if result else 0
+                # 记录模块完成（结果长度只在日志输出时计算）
+                result_length = lazy(lambda: len(str(result)) if result else 0)
                 logger_manager.log_module_complete(
                     tool_logger, module_name, symbol, actual_session_id,
                     duration, success=True, result_length=result_length,
@@ -10,7 +10,6 @@ import sys
 from pathlib import Path
 import datetime
 import time
-from dotenv import load_dotenv
 
 # 添加项目根目录到Python路径
 project_root = Path(__file__).parent.parent
@@ -20,8 +19,10 @@ sys.path.insert(0, str(project_root))
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('web')
 
-# 加载环境变量
-load_dotenv(project_root / ".env", override=True)
+from tradingagents.config.env_utils import reload_env_file
+
+# 加载环境变量（.env中的密钥变化后会清空共享LLM客户端）
+reload_env_file(project_root / ".env")
 
 # 导入自定义组件
 from components.sidebar import render_sidebar
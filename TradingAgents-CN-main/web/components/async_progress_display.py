@@ -460,43 +460,12 @@ def display_unified_progress(analysis_id: str, show_refresh_controls: bool = Tru
     return display_static_progress_with_controls(analysis_id, show_refresh_controls)
 
 
-def display_static_progress_with_controls(analysis_id: str, show_refresh_controls: bool = True) -> bool:
-    """
-    显示静态进度，可控制是否显示刷新控件
-    """
-    import streamlit as st
-    from web.utils.async_progress_tracker import get_progress_by_id
-
-    # 获取进度数据
-    progress_data = get_progress_by_id(analysis_id)
-
+def _render_unified_progress(analysis_id: str, progress_data: Optional[Dict[str, Any]]) -> str:
+    """渲染进度主体，返回分析状态"""
     if not progress_data:
         # 如果没有进度数据，显示默认的准备状态
         st.info("🔄 **当前状态**: 准备开始分析...")
-        
-        # 设置默认状态为initializing
-        status = 'initializing'
-
-        # 如果需要显示刷新控件，仍然显示
-        if show_refresh_controls:
-            col1, col2 = st.columns([1, 1])
-            with col1:
-                if st.button("🔄 刷新进度", key=f"refresh_unified_default_{analysis_id}"):
-                    st.rerun()
-            with col2:
-                auto_refresh_key = f"auto_refresh_unified_default_{analysis_id}"
-                # 获取默认值，如果是新分析则默认为True
-                default_value = st.session_state.get(auto_refresh_key, True)  # 默认为True
-                auto_refresh = st.checkbox("🔄 自动刷新", value=default_value, key=auto_refresh_key)
-                if auto_refresh and status == 'running':  # 只在运行时自动刷新
-                    import time
-                    time.sleep(3)  # 等待3秒
-                    st.rerun()
-                elif auto_refresh and status in ['completed', 'failed']:
-                    # 分析完成后自动关闭自动刷新
-                    st.session_state[auto_refresh_key] = False
-
-        return False  # 返回False表示还未完成
+        return 'initializing'
 
     # 解析进度数据（修复字段名称匹配）
     status = progress_data.get('status', 'running')
@@ -584,27 +553,55 @@ def display_static_progress_with_controls(analysis_id: str, show_refresh_control
     else:
         st.info(f"{status_icon} **当前状态**: {last_message}")
 
+    return status
+
+
+def _live_unified_progress(analysis_id: str):
+    """自动刷新的进度片段：只重跑本片段并增量读取新事件，完成后刷新整个页面"""
+    status = _render_unified_progress(analysis_id, get_progress_by_id(analysis_id))
+    if status in ['completed', 'failed']:
+        st.rerun()
+
+
+# 定时只重跑进度片段（Streamlit 1.37+），旧版本退回整页刷新
+PROGRESS_REFRESH_INTERVAL = 3
+if hasattr(st, "fragment"):
+    _live_unified_progress = st.fragment(run_every=PROGRESS_REFRESH_INTERVAL)(_live_unified_progress)
+    LIVE_FRAGMENT_AVAILABLE = True
+else:
+    LIVE_FRAGMENT_AVAILABLE = False
+
+
+def display_static_progress_with_controls(analysis_id: str, show_refresh_controls: bool = True) -> bool:
+    """
+    显示静态进度，可控制是否显示刷新控件
+    """
+    # 获取进度数据
+    progress_data = get_progress_by_id(analysis_id)
+    status = progress_data.get('status', 'running') if progress_data else 'initializing'
+
+    auto_refresh_key = f"auto_refresh_unified_{analysis_id}"
     # 显示刷新控制的条件：
     # 1. 需要显示刷新控件 AND
     # 2. (分析正在运行 OR 分析刚开始还没有状态)
-    if show_refresh_controls and (status == 'running' or status == 'initializing'):
+    show_controls = show_refresh_controls and status in ['running', 'initializing']
+    # 获取默认值，如果是新分析则默认为True
+    auto_refresh = show_controls and st.session_state.get(auto_refresh_key, True)
+
+    if auto_refresh and LIVE_FRAGMENT_AVAILABLE:
+        _live_unified_progress(analysis_id)
+    else:
+        _render_unified_progress(analysis_id, progress_data)
+
+    if show_controls:
         col1, col2 = st.columns([1, 1])
         with col1:
             if st.button("🔄 刷新进度", key=f"refresh_unified_{analysis_id}"):
                 st.rerun()
         with col2:
-            auto_refresh_key = f"auto_refresh_unified_{analysis_id}"
-            # 获取默认值，如果是新分析则默认为True
-            default_value = st.session_state.get(auto_refresh_key, True)  # 默认为True
-            auto_refresh = st.checkbox("🔄 自动刷新", value=default_value, key=auto_refresh_key)
-            if auto_refresh and status == 'running':  # 只在运行时自动刷新
-                import time
-                time.sleep(3)  # 等待3秒
+            auto_refresh = st.checkbox("🔄 自动刷新", value=auto_refresh, key=auto_refresh_key)
+            if auto_refresh and not LIVE_FRAGMENT_AVAILABLE:
+                time.sleep(PROGRESS_REFRESH_INTERVAL)
                 st.rerun()
-            elif auto_refresh and status in ['completed', 'failed']:
-                # 分析完成后自动关闭自动刷新
-                st.session_state[auto_refresh_key] = False
-
-    # 不需要清理session state，因为我们通过参数控制显示
 
     return status in ['completed', 'failed']
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 异步进度跟踪器
-支持Redis和文件两种存储方式，前端定时轮询获取进度
+进度以增量事件追加到Redis Stream或本地文件（见 progress_stream），前端只读取新增事件
 """
 
 import json
@@ -12,6 +12,11 @@ from datetime import datetime
 import threading
 from pathlib import Path
 
+from .progress_stream import (
+    RedisProgressStream, get_file_progress_stream,
+    get_progress_stream, read_progress,
+)
+
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('async_progress')
@@ -76,15 +81,13 @@ class AsyncProgressTracker:
             'steps': self.analysis_steps
         }
         
-        # 尝试初始化Redis，失败则使用文件
-        self.redis_client = None
-        self.use_redis = self._init_redis()
-        
-        if not self.use_redis:
-            # 使用文件存储
-            self.progress_file = f"./data/progress_{analysis_id}.json"
-            os.makedirs(os.path.dirname(self.progress_file), exist_ok=True)
-        
+        # 进度事件流：Redis可用时使用Redis Stream，否则使用本地文件
+        self.stream = get_progress_stream()
+        self.use_redis = isinstance(self.stream, RedisProgressStream)
+        self.redis_client = self.stream.client if self.use_redis else None
+        # 已发布的字段值，每次只发布发生变化的字段
+        self._published: Dict[str, Any] = {}
+
         # 保存初始状态
         self._save_progress()
         
@@ -116,51 +119,6 @@ class AsyncProgressTracker:
         except Exception as e:
             print(f"❌ [进度集成] 跟踪器注册异常: {e}")
     
-    def _init_redis(self) -> bool:
-        """初始化Redis连接"""
-        try:
-            # 首先检查REDIS_ENABLED环境变量
-            redis_enabled_raw = os.getenv('REDIS_ENABLED', 'false')
-            redis_enabled = redis_enabled_raw.lower()
-            logger.info(f"🔍 [Redis检查] REDIS_ENABLED原值='{redis_enabled_raw}' -> 处理后='{redis_enabled}'")
-
-            if redis_enabled != 'true':
-                logger.info(f"📊 [异步进度] Redis已禁用，使用文件存储")
-                return False
-
-            import redis
-
-            # 从环境变量获取Redis配置
-            redis_host = os.getenv('REDIS_HOST', 'localhost')
-            redis_port = int(os.getenv('REDIS_PORT', 6379))
-            redis_password = os.getenv('REDIS_PASSWORD', None)
-            redis_db = int(os.getenv('REDIS_DB', 0))
-
-            # 创建Redis连接
-            if redis_password:
-                self.redis_client = redis.Redis(
-                    host=redis_host,
-                    port=redis_port,
-                    password=redis_password,
-                    db=redis_db,
-                    decode_responses=True
-                )
-            else:
-                self.redis_client = redis.Redis(
-                    host=redis_host,
-                    port=redis_port,
-                    db=redis_db,
-                    decode_responses=True
-                )
-
-            # 测试连接
-            self.redis_client.ping()
-            logger.info(f"📊 [异步进度] Redis连接成功: {redis_host}:{redis_port}")
-            return True
-        except Exception as e:
-            logger.warning(f"📊 [异步进度] Redis连接失败，使用文件存储: {e}")
-            return False
-    
     def _generate_dynamic_steps(self) -> List[Dict]:
         """根据分析师数量和研究深度动态生成分析步骤"""
         steps = [
@@ -474,58 +432,47 @@ class AsyncProgressTracker:
 
         return remaining
     
+    def _collect_changes(self) -> Dict[str, Any]:
+        """收集自上次发布以来变化的字段（安全序列化后）"""
+        changes = {}
+        for key, value in self.progress_data.items():
+            if key not in self._published or self._published[key] != value:
+                changes[key] = safe_serialize(value)
+                self._published[key] = value
+        return changes
+
     def _save_progress(self):
-        """保存进度到存储"""
+        """把变化的字段作为一条事件追加到进度事件流"""
+        changes = self._collect_changes()
+        if not changes:
+            return
+
+        current_step_name = self.progress_data.get('current_step_name', '未知')
+        progress_pct = self.progress_data.get('progress_percentage', 0)
+        status = self.progress_data.get('status', 'running')
         try:
-            current_step_name = self.progress_data.get('current_step_name', '未知')
-            progress_pct = self.progress_data.get('progress_percentage', 0)
-            status = self.progress_data.get('status', 'running')
-
-            if self.use_redis:
-                # 保存到Redis（安全序列化）
-                key = f"progress:{self.analysis_id}"
-                safe_data = safe_serialize(self.progress_data)
-                data_json = json.dumps(safe_data, ensure_ascii=False)
-                self.redis_client.setex(key, 3600, data_json)  # 1小时过期
-
-                logger.info(f"📊 [Redis写入] {self.analysis_id} -> {status} | {current_step_name} | {progress_pct:.1f}%")
-                logger.debug(f"📊 [Redis详情] 键: {key}, 数据大小: {len(data_json)} 字节")
-            else:
-                # 保存到文件（安全序列化）
-                safe_data = safe_serialize(self.progress_data)
-                with open(self.progress_file, 'w', encoding='utf-8') as f:
-                    json.dump(safe_data, f, ensure_ascii=False, indent=2)
+            self.stream.append(self.analysis_id, changes)
+            if 'status' in changes:
+                # 开始、完成、失败时更新最新分析指针
+                self.stream.set_latest(self.analysis_id)
 
-                logger.info(f"📊 [文件写入] {self.analysis_id} -> {status} | {current_step_name} | {progress_pct:.1f}%")
-                logger.debug(f"📊 [文件详情] 路径: {self.progress_file}")
+            storage = 'Redis写入' if self.use_redis else '文件写入'
+            logger.info(f"📊 [{storage}] {self.analysis_id} -> {status} | {current_step_name} | {progress_pct:.1f}%")
+            logger.debug(f"📊 [进度事件] {self.analysis_id} 更新字段: {list(changes)}")
 
         except Exception as e:
             logger.error(f"📊 [异步进度] 保存失败: {e}")
-            # 尝试备用存储方式
+            if not self.use_redis:
+                return
+            # Redis失败，切换到文件事件流并重新发布完整状态
             try:
-                if self.use_redis:
-                    # Redis失败，尝试文件存储
-                    logger.warning(f"📊 [异步进度] Redis保存失败，尝试文件存储")
-                    backup_file = f"./data/progress_{self.analysis_id}.json"
-                    os.makedirs(os.path.dirname(backup_file), exist_ok=True)
-                    safe_data = safe_serialize(self.progress_data)
-                    with open(backup_file, 'w', encoding='utf-8') as f:
-                        json.dump(safe_data, f, ensure_ascii=False, indent=2)
-                    logger.info(f"📊 [备用存储] 文件保存成功: {backup_file}")
-                else:
-                    # 文件存储失败，尝试简化数据
-                    logger.warning(f"📊 [异步进度] 文件保存失败，尝试简化数据")
-                    simplified_data = {
-                        'analysis_id': self.analysis_id,
-                        'status': self.progress_data.get('status', 'unknown'),
-                        'progress_percentage': self.progress_data.get('progress_percentage', 0),
-                        'last_message': str(self.progress_data.get('last_message', '')),
-                        'last_update': self.progress_data.get('last_update', time.time())
-                    }
-                    backup_file = f"./data/progress_{self.analysis_id}.json"
-                    with open(backup_file, 'w', encoding='utf-8') as f:
-                        json.dump(simplified_data, f, ensure_ascii=False, indent=2)
-                    logger.info(f"📊 [备用存储] 简化数据保存成功: {backup_file}")
+                logger.warning(f"📊 [异步进度] Redis保存失败，切换到文件存储")
+                self.stream = get_file_progress_stream()
+                self.use_redis = False
+                self.redis_client = None
+                self.stream.append(self.analysis_id, safe_serialize(self.progress_data))
+                self.stream.set_latest(self.analysis_id)
+                logger.info(f"📊 [备用存储] 文件保存成功: {self.analysis_id}")
             except Exception as backup_e:
                 logger.error(f"📊 [异步进度] 备用存储也失败: {backup_e}")
     
@@ -574,54 +521,38 @@ class AsyncProgressTracker:
         except ImportError:
             pass
 
+def _read_legacy_progress(analysis_id: str, stream) -> Optional[Dict[str, Any]]:
+    """读取旧版整份快照（升级前启动的分析）"""
+    if isinstance(stream, RedisProgressStream):
+        data = stream.client.get(f"progress:{analysis_id}")
+        if data:
+            return json.loads(data)
+
+    progress_file = f"./data/progress_{analysis_id}.json"
+    if os.path.exists(progress_file):
+        with open(progress_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return None
+
+
 def get_progress_by_id(analysis_id: str) -> Optional[Dict[str, Any]]:
-    """根据分析ID获取进度"""
+    """根据分析ID获取进度（增量读取事件流，只解析上次之后的新事件）"""
     try:
-        # 检查REDIS_ENABLED环境变量
-        redis_enabled = os.getenv('REDIS_ENABLED', 'false').lower() == 'true'
+        stream = get_progress_stream()
+        streams = [stream]
+        if isinstance(stream, RedisProgressStream):
+            # Redis写入失败时跟踪器会切换到文件事件流
+            streams.append(get_file_progress_stream())
 
-        # 如果Redis启用，先尝试Redis
-        if redis_enabled:
+        for candidate in streams:
             try:
-                import redis
-
-                # 从环境变量获取Redis配置
-                redis_host = os.getenv('REDIS_HOST', 'localhost')
-                redis_port = int(os.getenv('REDIS_PORT', 6379))
-                redis_password = os.getenv('REDIS_PASSWORD', None)
-                redis_db = int(os.getenv('REDIS_DB', 0))
-
-                # 创建Redis连接
-                if redis_password:
-                    redis_client = redis.Redis(
-                        host=redis_host,
-                        port=redis_port,
-                        password=redis_password,
-                        db=redis_db,
-                        decode_responses=True
-                    )
-                else:
-                    redis_client = redis.Redis(
-                        host=redis_host,
-                        port=redis_port,
-                        db=redis_db,
-                        decode_responses=True
-                    )
-
-                key = f"progress:{analysis_id}"
-                data = redis_client.get(key)
-                if data:
-                    return json.loads(data)
+                progress = read_progress(analysis_id, candidate)
+                if progress is not None:
+                    return progress
             except Exception as e:
-                logger.debug(f"📊 [异步进度] Redis读取失败: {e}")
+                logger.debug(f"📊 [异步进度] 事件流读取失败: {e}")
 
-        # 尝试文件
-        progress_file = f"./data/progress_{analysis_id}.json"
-        if os.path.exists(progress_file):
-            with open(progress_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-
-        return None
+        return _read_legacy_progress(analysis_id, stream)
     except Exception as e:
         logger.error(f"📊 [异步进度] 获取进度失败: {analysis_id}, 错误: {e}")
         return None
@@ -639,69 +570,23 @@ def format_time(seconds: float) -> str:
 
 
 def get_latest_analysis_id() -> Optional[str]:
-    """获取最新的分析ID"""
+    """获取最新的分析ID（读取最新分析指针，不扫描键空间）"""
     try:
-        # 检查REDIS_ENABLED环境变量
-        redis_enabled = os.getenv('REDIS_ENABLED', 'false').lower() == 'true'
+        stream = get_progress_stream()
+        streams = [stream]
+        if isinstance(stream, RedisProgressStream):
+            streams.append(get_file_progress_stream())
 
-        # 如果Redis启用，先尝试从Redis获取
-        if redis_enabled:
+        for candidate in streams:
             try:
-                import redis
-
-                # 从环境变量获取Redis配置
-                redis_host = os.getenv('REDIS_HOST', 'localhost')
-                redis_port = int(os.getenv('REDIS_PORT', 6379))
-                redis_password = os.getenv('REDIS_PASSWORD', None)
-                redis_db = int(os.getenv('REDIS_DB', 0))
-
-                # 创建Redis连接
-                if redis_password:
-                    redis_client = redis.Redis(
-                        host=redis_host,
-                        port=redis_port,
-                        password=redis_password,
-                        db=redis_db,
-                        decode_responses=True
-                    )
-                else:
-                    redis_client = redis.Redis(
-                        host=redis_host,
-                        port=redis_port,
-                        db=redis_db,
-                        decode_responses=True
-                    )
-
-                # 获取所有progress键
-                keys = redis_client.keys("progress:*")
-                if not keys:
-                    return None
-
-                # 获取每个键的数据，找到最新的
-                latest_time = 0
-                latest_id = None
-
-                for key in keys:
-                    try:
-                        data = redis_client.get(key)
-                        if data:
-                            progress_data = json.loads(data)
-                            last_update = progress_data.get('last_update', 0)
-                            if last_update > latest_time:
-                                latest_time = last_update
-                                # 从键名中提取analysis_id (去掉"progress:"前缀)
-                                latest_id = key.replace('progress:', '')
-                    except Exception:
-                        continue
-
+                latest_id = candidate.get_latest()
                 if latest_id:
                     logger.info(f"📊 [恢复分析] 找到最新分析ID: {latest_id}")
                     return latest_id
-
             except Exception as e:
-                logger.debug(f"📊 [恢复分析] Redis查找失败: {e}")
+                logger.debug(f"📊 [恢复分析] 读取最新分析指针失败: {e}")
 
-        # 如果Redis失败或未启用，尝试从文件查找
+        # 兼容旧版进度快照文件
         data_dir = Path("data")
         if data_dir.exists():
             progress_files = list(data_dir.glob("progress_*.json"))
@@ -709,11 +594,9 @@ def get_latest_analysis_id() -> Optional[str]:
                 # 按修改时间排序，获取最新的
                 latest_file = max(progress_files, key=lambda f: f.stat().st_mtime)
                 # 从文件名提取analysis_id
-                filename = latest_file.name
-                if filename.startswith("progress_") and filename.endswith(".json"):
-                    analysis_id = filename[9:-5]  # 去掉前缀和后缀
-                    logger.debug(f"📊 [恢复分析] 从文件找到最新分析ID: {analysis_id}")
-                    return analysis_id
+                analysis_id = latest_file.name[9:-5]  # 去掉前缀和后缀
+                logger.debug(f"📊 [恢复分析] 从旧版文件找到最新分析ID: {analysis_id}")
+                return analysis_id
 
         return None
     except Exception as e:
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+进度事件流
+每个分析的进度保存为只追加的事件日志（Redis Stream 或本地JSONL文件），
+每条事件只包含本次变化的字段，第一条事件是完整的初始状态；另外维护一个"最新分析"指针，
+恢复分析时不再扫描全部键。读取端记住上次读到的位置，每次只读取并合并新增的事件。
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('async_progress')
+
+# 进度数据过期时间（秒）
+PROGRESS_TTL = 3600
+# Redis中最新分析指针的键
+LATEST_KEY = "progress:latest"
+
+
+def _encode(changes: Dict[str, Any]) -> str:
+    return json.dumps(changes, ensure_ascii=False, separators=(',', ':'))
+
+
+class FileProgressStream:
+    """本地文件事件流：data/progress/{analysis_id}.jsonl，读取位置为字节偏移"""
+
+    initial_offset = 0
+
+    def __init__(self, data_dir: str = "./data/progress"):
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.latest_path = self.data_dir / "latest.json"
+
+    def _events_path(self, analysis_id: str) -> Path:
+        return self.data_dir / f"{analysis_id}.jsonl"
+
+    def append(self, analysis_id: str, changes: Dict[str, Any]):
+        with open(self._events_path(analysis_id), 'a', encoding='utf-8') as f:
+            f.write(_encode(changes) + "\n")
+
+    def read(self, analysis_id: str, offset: int) -> Tuple[List[Dict[str, Any]], int]:
+        """读取 offset 之后的完整事件行，返回 (事件列表, 新偏移)"""
+        path = self._events_path(analysis_id)
+        if not path.exists():
+            return [], offset
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+
+        # 写到一半的尾行留到下次读取
+        end = data.rfind(b"\n") + 1
+        events = []
+        for line in data[:end].splitlines():
+            if line.strip():
+                events.append(json.loads(line))
+        return events, offset + end
+
+    def set_latest(self, analysis_id: str):
+        tmp_path = self.latest_path.with_name(self.latest_path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"analysis_id": analysis_id}, f)
+        os.replace(tmp_path, self.latest_path)
+
+    def get_latest(self) -> Optional[str]:
+        if not self.latest_path.exists():
+            return None
+        with open(self.latest_path, 'r', encoding='utf-8') as f:
+            return json.load(f).get("analysis_id")
+
+
+class RedisProgressStream:
+    """Redis Stream事件流：progress:events:{analysis_id}，读取位置为流条目ID"""
+
+    initial_offset = "0-0"
+
+    def __init__(self, client, ttl: int = PROGRESS_TTL):
+        self.client = client
+        self.ttl = ttl
+
+    @staticmethod
+    def _events_key(analysis_id: str) -> str:
+        return f"progress:events:{analysis_id}"
+
+    def append(self, analysis_id: str, changes: Dict[str, Any]):
+        key = self._events_key(analysis_id)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.xadd(key, {"data": _encode(changes)})
+        pipe.expire(key, self.ttl)
+        pipe.execute()
+
+    def read(self, analysis_id: str, offset: str) -> Tuple[List[Dict[str, Any]], str]:
+        response = self.client.xread({self._events_key(analysis_id): offset})
+        events = []
+        for _, entries in response or []:
+            for entry_id, fields in entries:
+                events.append(json.loads(fields["data"]))
+                offset = entry_id
+        return events, offset
+
+    def set_latest(self, analysis_id: str):
+        self.client.set(LATEST_KEY, analysis_id, ex=self.ttl)
+
+    def get_latest(self) -> Optional[str]:
+        return self.client.get(LATEST_KEY)
+
+
+class ProgressStreamReader:
+    """增量读取器：保存合并后的进度状态和已读位置，每次只应用新事件"""
+
+    def __init__(self, stream, analysis_id: str):
+        self.stream = stream
+        self.analysis_id = analysis_id
+        self.offset = stream.initial_offset
+        self.state: Dict[str, Any] = {}
+        self.events_read = 0
+        self._lock = threading.Lock()
+
+    def poll(self) -> Optional[Dict[str, Any]]:
+        """读取新增事件并返回当前进度（浅拷贝），流不存在时返回None"""
+        with self._lock:
+            events, self.offset = self.stream.read(self.analysis_id, self.offset)
+            for changes in events:
+                self.state.update(changes)
+            self.events_read += len(events)
+            return dict(self.state) if self.state else None
+
+
+def create_redis_client():
+    """根据环境变量获取共享的Redis客户端，未启用或连接失败时返回None"""
+    redis_enabled_raw = os.getenv('REDIS_ENABLED', 'false')
+    redis_enabled = redis_enabled_raw.lower()
+    logger.info(f"🔍 [Redis检查] REDIS_ENABLED原值='{redis_enabled_raw}' -> 处理后='{redis_enabled}'")
+    if redis_enabled != 'true':
+        logger.info(f"📊 [异步进度] Redis已禁用，使用文件存储")
+        return None
+
+    from tradingagents.config.connection_registry import get_connection_registry
+
+    # 从环境变量获取Redis配置，使用进程级共享连接池
+    redis_host = os.getenv('REDIS_HOST', 'localhost')
+    redis_port = int(os.getenv('REDIS_PORT', 6379))
+    client = get_connection_registry().get_redis(
+        host=redis_host,
+        port=redis_port,
+        password=os.getenv('REDIS_PASSWORD', None),
+        db=int(os.getenv('REDIS_DB', 0)),
+        decode_responses=True
+    )
+    if client is None:
+        logger.warning(f"📊 [异步进度] Redis连接失败，使用文件存储")
+        return None
+    logger.info(f"📊 [异步进度] Redis连接成功: {redis_host}:{redis_port}")
+    return client
+
+
+_file_stream: Optional[FileProgressStream] = None
+_redis_stream: Optional[RedisProgressStream] = None
+_redis_checked = False
+_stream_lock = threading.Lock()
+
+
+def get_file_progress_stream() -> FileProgressStream:
+    """获取全局文件事件流"""
+    global _file_stream
+    with _stream_lock:
+        if _file_stream is None:
+            _file_stream = FileProgressStream()
+        return _file_stream
+
+
+def get_progress_stream():
+    """获取全局进度事件流：Redis可用时使用Redis Stream，否则使用文件（连接只建立一次）"""
+    global _redis_stream, _redis_checked
+    with _stream_lock:
+        if not _redis_checked:
+            client = create_redis_client()
+            _redis_stream = RedisProgressStream(client) if client is not None else None
+            _redis_checked = True
+        stream = _redis_stream
+    return stream if stream is not None else get_file_progress_stream()
+
+
+def reset_progress_streams():
+    """丢弃已创建的事件流和读取器（环境变量变化后重新检测存储方式）"""
+    global _file_stream, _redis_stream, _redis_checked
+    with _stream_lock:
+        _file_stream = None
+        _redis_stream = None
+        _redis_checked = False
+    with _readers_lock:
+        _readers.clear()
+
+
+# 每个分析一个增量读取器，只保留最近使用的若干个
+MAX_READERS = 64
+_readers: "OrderedDict[Tuple[int, str], ProgressStreamReader]" = OrderedDict()
+_readers_lock = threading.Lock()
+
+
+def read_progress(analysis_id: str, stream=None) -> Optional[Dict[str, Any]]:
+    """增量读取分析进度，返回合并后的状态；事件流不存在时返回None"""
+    stream = stream or get_progress_stream()
+    key = (id(stream), analysis_id)
+    with _readers_lock:
+        reader = _readers.get(key)
+        if reader is not None:
+            _readers.move_to_end(key)
+    if reader is None:
+        reader = ProgressStreamReader(stream, analysis_id)
+
+    progress = reader.poll()
+    if progress is None:
+        return None
+
+    with _readers_lock:
+        _readers[key] = reader
+        _readers.move_to_end(key)
+        while len(_readers) > MAX_READERS:
+            _readers.popitem(last=False)
+    return progress
@@ -26,27 +26,20 @@ class RedisSessionManager:
             if redis_enabled != 'true':
                 return False
 
-            import redis
+            from tradingagents.config.connection_registry import get_connection_registry
 
-            # 从环境变量获取Redis配置
-            redis_host = os.getenv('REDIS_HOST', 'localhost')
-            redis_port = int(os.getenv('REDIS_PORT', 6379))
-            redis_password = os.getenv('REDIS_PASSWORD', None)
-            redis_db = int(os.getenv('REDIS_DB', 0))
-            
-            # 创建Redis连接
-            self.redis_client = redis.Redis(
-                host=redis_host,
-                port=redis_port,
-                password=redis_password,
-                db=redis_db,
+            # 从环境变量获取Redis配置，使用进程级共享连接池
+            self.redis_client = get_connection_registry().get_redis(
+                host=os.getenv('REDIS_HOST', 'localhost'),
+                port=int(os.getenv('REDIS_PORT', 6379)),
+                password=os.getenv('REDIS_PASSWORD', None),
+                db=int(os.getenv('REDIS_DB', 0)),
                 decode_responses=True,
                 socket_timeout=5,
                 socket_connect_timeout=5
             )
-            
-            # 测试连接
-            self.redis_client.ping()
+            if self.redis_client is None:
+                raise ConnectionError("Redis不可用")
             return True
             
         except Exception as e:
@@ -23,6 +23,7 @@ python main.py
 
 import sys
 import os
+import re
 from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
@@ -194,14 +195,10 @@ class TradingProcessor:
     def clear_checkpoint(self, stock_code, analysis_date):
         """清除指定股票和日期的断点文件"""
         try:
-            checkpoint_dir = Path(self.trading_graph.config["results_dir"]) / stock_code / analysis_date
-            checkpoint_path = checkpoint_dir / "checkpoint.json"
-            
-            if checkpoint_path.exists():
-                clear_checkpoint(checkpoint_path)
-                print(f"🗑️ 已清除断点文件: {checkpoint_path}")
+            if clear_checkpoint(stock_code, analysis_date):
+                print(f"🗑️ 已清除断点文件: {stock_code} {analysis_date}")
             else:
-                print(f"ℹ️ 断点文件不存在: {checkpoint_path}")
+                print(f"⚠️ 断点文件清除失败: {stock_code} {analysis_date}")
                 
         except Exception as e:
             print(f"❌ 清除断点文件失败: {e}")
@@ -272,6 +269,37 @@ class TradingProcessor:
                 "error": analysis_result["error"]
             }
 
+    def process_batch_analysis(self, stock_codes, analysis_date=None, max_concurrency=None):
+        """并发处理多只股票分析（共享同一个TradingAgents图实例）"""
+        if analysis_date is None:
+            analysis_date = datetime.now().strftime("%Y-%m-%d")
+
+        print(f"\n📦 批量分析 {len(stock_codes)} 只股票，日期: {analysis_date}")
+        batch_results = self.trading_graph.propagate_many(
+            stock_codes, analysis_date, max_concurrency=max_concurrency
+        )
+
+        results = {}
+        for stock_code, batch_result in batch_results.items():
+            analysis_result = {
+                "success": batch_result["success"],
+                "final_state": batch_result.get("final_state"),
+                "processed_signal": batch_result.get("decision"),
+                "error": batch_result.get("error"),
+                "analysis_date": analysis_date
+            }
+            if analysis_result["success"]:
+                content = self.generate_analysis_content(analysis_result)
+                file_path = self.save_analysis_to_file(stock_code, "", content, analysis_date)
+                results[stock_code] = {"success": True, "file_path": file_path, "content": content}
+            else:
+                print(f"❌ 股票 {stock_code} 分析失败: {analysis_result['error']}")
+                results[stock_code] = {"success": False, "error": analysis_result["error"]}
+
+        succeeded = sum(1 for result in results.values() if result["success"])
+        print(f"✅ 批量分析完成: 成功 {succeeded}/{len(stock_codes)}")
+        return results
+
 def main():
     """主函数"""
     print("🚀 TradingAgents 简化版本启动")
@@ -287,11 +315,20 @@ def main():
         # 创建处理器
         processor = TradingProcessor()
         
-        # 示例：分析单个股票
-        stock_code = input("\n请输入股票代码 (例如: AAPL): ").strip()
-        if not stock_code:
-            stock_code = "AAPL"  # 默认值
-        
+        # 输入一个或多个股票代码（逗号或空格分隔），多只股票时并发批量分析
+        stock_codes = [code for code in re.split(r"[,，\s]+", input("\n请输入股票代码，多只用逗号分隔 (例如: AAPL): ").strip()) if code]
+        if not stock_codes:
+            stock_codes = ["AAPL"]  # 默认值
+
+        if len(stock_codes) > 1:
+            results = processor.process_batch_analysis(stock_codes)
+            for code, result in results.items():
+                if result["success"]:
+                    print(f"📄 {code} 报告文件: {result['file_path']}")
+            print("\n👋 程序结束")
+            return
+
+        stock_code = stock_codes[0]
         stock_name = input(f"请输入股票名称 (可选，默认为空): ").strip()
         
         # 询问是否清除现有断点
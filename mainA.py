@@ -45,7 +45,7 @@ import time
 
 # 从TradingAgents导入必要的模块
 try:
-    from tradingagents.graph.trading_graph import TradingAgentsGraph
+    from tradingagents.graph.graph_pool import get_trading_graph
     from tradingagents.default_config import DEFAULT_CONFIG
     from tradingagents.utils.logging_manager import get_logger
     TRADINGAGENTS_AVAILABLE = True
@@ -156,8 +156,8 @@ class FeiShuTradingProcessor:
             # 设置日志目录
             os.environ['TRADINGAGENTS_LOG_DIR'] = str(Path(__file__).parent / 'results')
             
-            # 创建TradingAgents图
-            self.trading_graph = TradingAgentsGraph(config=config)
+            # 获取TradingAgents图（相同配置复用已编译的图）
+            self.trading_graph = get_trading_graph(config=config)
             
             print("✅ TradingAgents初始化成功")
         except Exception as e:
@@ -430,26 +430,33 @@ class FeiShuTradingProcessor:
             print(f"📄 备用链接: {backup_link}")
             return backup_link
     
-    def generate_tradingagents_analysis_content(self, stock_code, stock_name):
-        """生成基于TradingAgents真实分析的内容"""
+    def generate_tradingagents_analysis_content(self, stock_code, stock_name, batch_result=None):
+        """生成基于TradingAgents真实分析的内容（batch_result 为批量分析中该股票的结果时不再单独分析）"""
         request_date = datetime.now().strftime('%Y/%m/%d')  # 使用 yyyy/mm/dd 格式
         
         if self.trading_graph:
             try:
-                print(f"🤖 调用TradingAgents分析 {stock_code}...")
-                
-                # 构建查询参数 - TradingAgents需要公司名称和交易日期
-                company_name = stock_code  # 使用股票代码作为公司名称
                 trade_date = datetime.now().strftime('%Y-%m-%d')  # 当前日期作为交易日期
-                
-                print(f"📝 分析参数: 公司={company_name}, 日期={trade_date}")
-                
-                # 调用TradingAgents进行分析
-                start_time = time.time()
-                state, decision = self.trading_graph.propagate(company_name, trade_date)
-                end_time = time.time()
-                
-                analysis_time = end_time - start_time
+
+                if batch_result is not None:
+                    if not batch_result["success"]:
+                        raise RuntimeError(batch_result["error"])
+                    state, decision = batch_result["final_state"], batch_result["decision"]
+                    analysis_time = batch_result["analysis_time"]
+                else:
+                    print(f"🤖 调用TradingAgents分析 {stock_code}...")
+
+                    # 构建查询参数 - TradingAgents需要公司名称和交易日期
+                    company_name = stock_code  # 使用股票代码作为公司名称
+
+                    print(f"📝 分析参数: 公司={company_name}, 日期={trade_date}")
+
+                    # 调用TradingAgents进行分析
+                    start_time = time.time()
+                    state, decision = self.trading_graph.propagate(company_name, trade_date)
+                    end_time = time.time()
+
+                    analysis_time = end_time - start_time
                 print(f"⏱️ TradingAgents分析耗时: {analysis_time:.2f}秒")
                 
                 # 提取分析结果
@@ -734,13 +741,13 @@ class FeiShuTradingProcessor:
         
         return html_content
     
-    def run_trading_analysis(self, stock_code, stock_name=""):
+    def run_trading_analysis(self, stock_code, stock_name="", batch_result=None):
         """运行TradingAgents分析并创建飞书文档"""
         print(f"🤖 开始TradingAgents分析: {stock_code} ({stock_name})")
         
         try:
             # 生成分析内容 - 使用真实的TradingAgents
-            analysis_content = self.generate_tradingagents_analysis_content(stock_code, stock_name)
+            analysis_content = self.generate_tradingagents_analysis_content(stock_code, stock_name, batch_result)
             
             # 创建飞书文档
             print("📄 创建飞书文档...")
@@ -782,8 +789,8 @@ class FeiShuTradingProcessor:
         except Exception as e:
             print(f"⚠️ 保存本地文件失败: {e}")
     
-    def process_single_task(self, task):
-        """处理单个任务"""
+    def process_single_task(self, task, batch_result=None):
+        """处理单个任务（batch_result 为批量分析中该股票的结果）"""
         print(f"\n🔄 处理任务: {task['stock_code']} - {task['stock_name']}")
         print("=" * 60)
         
@@ -791,12 +798,13 @@ class FeiShuTradingProcessor:
         stock_code = task['stock_code']
         stock_name = task['stock_name']
         
-        # 1. 更新状态为"分析中"
-        self.update_task_status(record_id, "分析中")
+        # 1. 更新状态为"分析中"（批量处理时已在分析前统一更新）
+        if batch_result is None:
+            self.update_task_status(record_id, "分析中")
         
         try:
             # 2. 运行TradingAgents分析并创建飞书文档
-            analysis_result = self.run_trading_analysis(stock_code, stock_name)
+            analysis_result = self.run_trading_analysis(stock_code, stock_name, batch_result)
             
             if analysis_result["success"]:
                 # 3. 分析成功，更新状态为"已完成"并添加飞书文档链接
@@ -932,24 +940,33 @@ class FeiShuTradingProcessor:
             print("❌ 没有找到可处理的任务")
             return
         
-        # 2. 处理每个任务
+        # 2. 所有股票通过同一个图实例并发分析（并发数和各LLM提供商的请求速率由配置控制）
+        batch_results = {}
+        if self.trading_graph:
+            for task in pending_tasks:
+                self.update_task_status(task['record_id'], "分析中")
+            stock_codes = [task['stock_code'] for task in pending_tasks]
+            print(f"🤖 并发分析 {len(set(stock_codes))} 只股票...")
+            start_time = time.time()
+            batch_results = self.trading_graph.propagate_many(stock_codes, datetime.now().strftime('%Y-%m-%d'))
+            analysis_time = time.time() - start_time
+            print(f"⏱️ 批量分析耗时: {analysis_time:.2f}秒")
+            for result in batch_results.values():
+                result["analysis_time"] = analysis_time
+
+        # 3. 逐个生成文档并更新任务状态
         success_count = 0
         failed_count = 0
         
         for i, task in enumerate(pending_tasks, 1):
             print(f"\n📈 处理进度: {i}/{len(pending_tasks)}")
             
-            if self.process_single_task(task):
+            if self.process_single_task(task, batch_results.get(task['stock_code'])):
                 success_count += 1
             else:
                 failed_count += 1
-            
-            # 任务间延迟，避免API频率限制
-            if i < len(pending_tasks):
-                print("⏱️ 等待 5 秒后继续下一个任务...")
-                time.sleep(5)
         
-        # 3. 处理完成总结
+        # 4. 处理完成总结
         print("\n" + "=" * 70)
         print("🎉 TradingAgents完整集成处理完成!")
         print(f"⏰ 结束时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")